@@ -1,10 +1,10 @@
 import argparse
 import json
-import multiprocessing as mp
-import sqlite3
-import sys
+from pathlib import Path
 
-from func_timeout import FunctionTimedOut, func_timeout
+from utilities.config import PATH_CONFIG
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.execution_evaluation import EvaluationTask, evaluate_tasks
 
 
 def load_json(dir):
@@ -12,47 +12,10 @@ def load_json(dir):
         contents = json.loads(j.read())
     return contents
 
-def result_callback(result):
-    exec_result.append(result)
-
-
-def execute_sql(predicted_sql,ground_truth, db_path):
-    conn = sqlite3.connect(db_path)
-    # Connect to the database
-    cursor = conn.cursor()
-    cursor.execute(predicted_sql)
-    predicted_res = cursor.fetchall()
-    cursor.execute(ground_truth)
-    ground_truth_res = cursor.fetchall()
-    res = 0
-    if set(predicted_res) == set(ground_truth_res):
-        res = 1
-    return res
-
-
-
-def execute_model(predicted_sql,ground_truth, db_place, idx, meta_time_out):
-    try:
-        res = func_timeout(meta_time_out, execute_sql,
-                                  args=(predicted_sql, ground_truth, db_place))
-    except KeyboardInterrupt:
-        sys.exit(0)
-    except FunctionTimedOut:
-        result = [(f'timeout',)]
-        res = 0
-    except Exception as e:
-        result = [(f'error',)]  # possibly len(query) > 512 or not executable
-        res = 0
-    # print(result)
-    # result = str(set([ret[0] for ret in result]))
-    result = {'sql_idx': idx, 'res': res}
-    # print(result)
-    return result
-
-
 def package_sqls(sql_path, db_root_path, mode='gpt', data_mode='dev'):
     clean_sqls = []
     db_path_list = []
+    question_ids = []
     if mode == 'gpt':
         sql_data = json.load(open(sql_path + 'predict_' + data_mode + '.json', 'r'))
         for idx, sql_str in sql_data.items():
@@ -62,6 +25,7 @@ def package_sqls(sql_path, db_root_path, mode='gpt', data_mode='dev'):
                 sql, db_name = " ", "financial"
             clean_sqls.append(sql)
             db_path_list.append(db_root_path + db_name + '/' + db_name + '.sqlite')
+        question_ids = [int(idx) for idx in sql_data]
 
     elif mode == 'gt':
         sqls = open(sql_path + data_mode + '_gold.sql')
@@ -71,24 +35,14 @@ def package_sqls(sql_path, db_root_path, mode='gpt', data_mode='dev'):
             sql, db_name = sql_str.strip().split('\t')
             clean_sqls.append(sql)
             db_path_list.append(db_root_path + db_name + '/' + db_name + '.sqlite')
+        # The gold file has one line per question, in question id order
+        question_ids = list(range(len(sql_txt)))
 
-    return clean_sqls, db_path_list
-
-def run_sqls_parallel(sqls, db_places, num_cpus=1, meta_time_out=30.0):
-    pool = mp.Pool(processes=num_cpus)
-    for i,sql_pair in enumerate(sqls):
-
-        predicted_sql, ground_truth = sql_pair
-        pool.apply_async(execute_model, args=(predicted_sql, ground_truth, db_places[i], i, meta_time_out), callback=result_callback)
-    pool.close()
-    pool.join()
-
-def sort_results(list_of_dicts):
-  return sorted(list_of_dicts, key=lambda x: x['sql_idx'])
+    return clean_sqls, db_path_list, question_ids
 
 def compute_acc_by_diff(exec_results,diff_json_path):
     num_queries = len(exec_results)
-    results = [res['res'] for res in exec_results]
+    results = [int(res.correct) for res in exec_results]
     contents = load_json(diff_json_path)
     simple_results, moderate_results, challenging_results = [], [], []
 
@@ -106,9 +60,9 @@ def compute_acc_by_diff(exec_results,diff_json_path):
         if content['difficulty'] == 'challenging':
             challenging_results.append(exec_results[i])
 
-    simple_acc = sum([res['res'] for res in simple_results])/len(simple_results)
-    moderate_acc = sum([res['res'] for res in moderate_results])/len(moderate_results)
-    challenging_acc = sum([res['res'] for res in challenging_results])/len(challenging_results)
+    simple_acc = sum([res.correct for res in simple_results])/len(simple_results)
+    moderate_acc = sum([res.correct for res in moderate_results])/len(moderate_results)
+    challenging_acc = sum([res.correct for res in challenging_results])/len(challenging_results)
     all_acc = sum(results)/num_queries
     count_lists = [len(simple_results), len(moderate_results), len(challenging_results), num_queries]
     return simple_acc * 100, moderate_acc * 100, challenging_acc * 100, all_acc * 100, count_lists
@@ -133,6 +87,13 @@ if __name__ == '__main__':
         if i >= num_queries: # Avoid out-of-bounds indexing
             print(f"Skipping index {i}, as exec_results has only {num_queries} elements.")
             continue
+    - Queries run on the execution evaluation engine of the server instead of a new connection per
+      question inside func_timeout threads: questions are grouped by database, every worker process
+      keeps a warm read-only connection per database and queries are interrupted inside SQLite at
+      their deadline. --comparison selects set (the official metric), multiset or ordered comparison.
+    - Gold results are read from the gold result store (--gold_results_path, filled by
+      preprocess/build_gold_results.py) by question id and database checksum, and stored there on
+      first use, so that evaluations only execute the predictions.
     """
 
     args_parser = argparse.ArgumentParser()
@@ -146,19 +107,27 @@ if __name__ == '__main__':
     args_parser.add_argument('--mode_predict', type=str, default='gpt')
     args_parser.add_argument('--difficulty',type=str,default='simple')
     args_parser.add_argument('--diff_json_path',type=str,default='')
+    args_parser.add_argument('--comparison', type=str, default=ComparisonMode.SET.value,
+                             choices=[mode.value for mode in ComparisonMode])
+    args_parser.add_argument('--gold_results_path', type=str, default=str(PATH_CONFIG.gold_results_path()))
     args = args_parser.parse_args()
 
-    exec_result = []
-
-    pred_queries, db_paths = package_sqls(args.predicted_sql_path, args.db_root_path, mode=args.mode_predict,
+    pred_queries, db_paths, question_ids = package_sqls(args.predicted_sql_path, args.db_root_path, mode=args.mode_predict,
                                           data_mode=args.data_mode)
     # generate gt sqls:
-    gt_queries, db_paths_gt = package_sqls(args.ground_truth_path, args.db_root_path, mode='gt',
-                                           data_mode=args.data_mode)
-
-    query_pairs = list(zip(pred_queries,gt_queries))
-    run_sqls_parallel(query_pairs, db_places=db_paths, num_cpus=args.num_cpus, meta_time_out=args.meta_time_out)
-    exec_result = sort_results(exec_result)
+    gt_queries, db_paths_gt, _ = package_sqls(args.ground_truth_path, args.db_root_path, mode='gt',
+                                              data_mode=args.data_mode)
+
+    tasks = [
+        EvaluationTask(index=i, database=Path(db_path).stem, predicted_sql=predicted_sql, gold_sql=gold_sql,
+                       question_id=question_id)
+        for i, (predicted_sql, gold_sql, db_path, question_id)
+        in enumerate(zip(pred_queries, gt_queries, db_paths, question_ids))
+    ]
+    database_paths = {Path(db_path).stem: Path(db_path) for db_path in db_paths}
+    exec_result = list(evaluate_tasks(tasks, database_paths, mode=ComparisonMode(args.comparison),
+                                      timeout=args.meta_time_out, num_workers=args.num_cpus,
+                                      gold_store_path=Path(args.gold_results_path)))
     
     print('start calculate')
     simple_acc, moderate_acc, challenging_acc, acc, count_lists = \
@@ -1,83 +1,18 @@
 import argparse
 import json
 import math
-import multiprocessing as mp
-import os
-import pdb
-import sqlite3
-import sys
-import time
-
-import numpy as np
-from func_timeout import FunctionTimedOut, func_timeout
-
-
-def result_callback(result):
-    exec_result.append(result)
-
-def clean_abnormal(input):
-    input = np.asarray(input)
-    processed_list = []
-    mean = np.mean(input,axis=0)
-    std = np.std(input,axis=0)
-    for x in input:
-        if x < mean + 3 * std and x > mean - 3 * std:
-            processed_list.append(x)
-    return processed_list
-
-def execute_sql(sql, db_path):
-    # Connect to the database
-    conn = sqlite3.connect(db_path)
-    # Create a cursor object
-    cursor = conn.cursor()
-    start_time = time.time()
-    cursor.execute(sql)
-    exec_time = time.time() - start_time
-    return exec_time
-
-def iterated_execute_sql(predicted_sql,ground_truth,db_path,iterate_num):
-    conn = sqlite3.connect(db_path)
-    diff_list = []
-    cursor = conn.cursor()
-    cursor.execute(predicted_sql)
-    predicted_res = cursor.fetchall()
-    cursor.execute(ground_truth)
-    ground_truth_res = cursor.fetchall()
-    time_ratio = 0
-    if set(predicted_res) == set(ground_truth_res):
-        for i in range(iterate_num):
-            predicted_time = execute_sql(predicted_sql, db_path)
-            ground_truth_time = execute_sql(ground_truth, db_path)
-            diff_list.append(ground_truth_time / predicted_time)
-        processed_diff_list = clean_abnormal(diff_list)
-        time_ratio = sum(processed_diff_list) / len(processed_diff_list)
-    return time_ratio
-
-
-
-def execute_model(predicted_sql,ground_truth, db_place, idx, iterate_num, meta_time_out):
-    try:
-        # you can personalize the total timeout number
-        # larger timeout leads to more stable ves
-        # while it needs more your patience....
-        time_ratio = func_timeout(meta_time_out * iterate_num, iterated_execute_sql,
-                                  args=(predicted_sql, ground_truth, db_place, iterate_num))
-        # print([idx, math.sqrt(time_ratio)])
-    except KeyboardInterrupt:
-        sys.exit(0)
-    except FunctionTimedOut:
-        result = [(f'timeout',)]
-        time_ratio = 0
-    except Exception as e:
-        result = [(f'error',)]  # possibly len(query) > 512 or not executable
-        time_ratio = 0
-    result = {'sql_idx': idx, 'time_ratio': time_ratio}
-    return result
+from pathlib import Path
+
+from utilities.config import (PATH_CONFIG, VES_CI_TOLERANCE,
+                              VES_MAX_ITERATIONS, VES_MIN_ITERATIONS)
+from utilities.execution_evaluation import EvaluationTask, evaluate_tasks
+from utilities.ves_timing import TimingConfig
 
 
 def package_sqls(sql_path, db_root_path, mode='gpt', data_mode='dev'):
     clean_sqls = []
     db_path_list = []
+    question_ids = []
     if mode == 'gpt':
         sql_data = json.load(open(sql_path + 'predict_' + data_mode + '.json', 'r'))
         for idx, sql_str in sql_data.items():
@@ -87,6 +22,7 @@ def package_sqls(sql_path, db_root_path, mode='gpt', data_mode='dev'):
                 sql, db_name = " ", "financial"
             clean_sqls.append(sql)
             db_path_list.append(db_root_path + db_name + '/' + db_name + '.sqlite')
+        question_ids = [int(idx) for idx in sql_data]
 
     elif mode == 'gt':
         sqls = open(sql_path + data_mode + '_gold.sql')
@@ -95,19 +31,10 @@ def package_sqls(sql_path, db_root_path, mode='gpt', data_mode='dev'):
             sql, db_name = sql_str.strip().split('\t')
             clean_sqls.append(sql)
             db_path_list.append(db_root_path + db_name + '/' + db_name + '.sqlite')
+        # The gold file has one line per question, in question id order
+        question_ids = list(range(len(sql_txt)))
 
-    return clean_sqls, db_path_list
-
-def run_sqls_parallel(sqls, db_places, num_cpus=1, iterate_num=100, meta_time_out=30.0):
-    pool = mp.Pool(processes=num_cpus)
-    for i,sql_pair in enumerate(sqls):
-        predicted_sql, ground_truth = sql_pair
-        pool.apply_async(execute_model, args=(predicted_sql, ground_truth, db_places[i], i, iterate_num, meta_time_out), callback=result_callback)
-    pool.close()
-    pool.join()
-
-def sort_results(list_of_dicts):
-  return sorted(list_of_dicts, key=lambda x: x['sql_idx'])
+    return clean_sqls, db_path_list, question_ids
 
 def compute_ves(exec_results):
     num_queries = len(exec_results)
@@ -115,9 +42,9 @@ def compute_ves(exec_results):
     count = 0
 
     for i, result in enumerate(exec_results):
-        if result['time_ratio'] != 0:
+        if result.time_ratio != 0:
             count += 1
-        total_ratio += math.sqrt(result['time_ratio']) * 100
+        total_ratio += math.sqrt(result.time_ratio) * 100
     ves = (total_ratio/num_queries)
     return ves
 
@@ -165,6 +92,15 @@ if __name__ == '__main__':
         if i >= num_queries: # Avoid out-of-bounds indexing
             print(f"Skipping index {i}, as exec_results has only {num_queries} elements.")
             continue
+    - Queries run on the execution evaluation engine of the server, like evaluation.py, with the gold
+      results of the gold result store (--gold_results_path). Correct predictions are then timed
+      against their gold query on a warm connection with a monotonic high-resolution clock, in worker
+      processes pinned to their own CPU, instead of 100 times each on a new connection. Timing stops
+      once the 95% confidence interval of the mean time ratio is within --ci_tolerance of the mean,
+      after --min_iterations and at most --max_iterations pairs of runs (--ci_tolerance 0 always
+      runs --max_iterations). --meta_time_out is the deadline of every run.
+    - Outliers are dropped from the time ratios as before, except that all ratios are kept when they
+      are equal instead of none.
     """
 
     args_parser = argparse.ArgumentParser()
@@ -177,19 +113,30 @@ if __name__ == '__main__':
     args_parser.add_argument('--mode_gt', type=str, default='gt')
     args_parser.add_argument('--mode_predict', type=str, default='gpt')
     args_parser.add_argument('--diff_json_path',type=str,default='')
+    args_parser.add_argument('--gold_results_path', type=str, default=str(PATH_CONFIG.gold_results_path()))
+    args_parser.add_argument('--min_iterations', type=int, default=VES_MIN_ITERATIONS)
+    args_parser.add_argument('--max_iterations', type=int, default=VES_MAX_ITERATIONS)
+    args_parser.add_argument('--ci_tolerance', type=float, default=VES_CI_TOLERANCE)
     args = args_parser.parse_args()
 
-    exec_result = []
-    
-    pred_queries, db_paths = package_sqls(args.predicted_sql_path, args.db_root_path, mode=args.mode_predict,
+    pred_queries, db_paths, question_ids = package_sqls(args.predicted_sql_path, args.db_root_path, mode=args.mode_predict,
                                           data_mode=args.data_mode)
     # generate gt sqls:
-    gt_queries, db_paths_gt = package_sqls(args.ground_truth_path, args.db_root_path, mode='gt',
-                                           data_mode=args.data_mode)
-
-    query_pairs = list(zip(pred_queries, gt_queries))
-    run_sqls_parallel(query_pairs, db_places=db_paths, num_cpus=args.num_cpus, meta_time_out=args.meta_time_out)
-    exec_result = sort_results(exec_result)
+    gt_queries, db_paths_gt, _ = package_sqls(args.ground_truth_path, args.db_root_path, mode='gt',
+                                              data_mode=args.data_mode)
+
+    tasks = [
+        EvaluationTask(index=i, database=Path(db_path).stem, predicted_sql=predicted_sql, gold_sql=gold_sql,
+                       question_id=question_id)
+        for i, (predicted_sql, gold_sql, db_path, question_id)
+        in enumerate(zip(pred_queries, gt_queries, db_paths, question_ids))
+    ]
+    database_paths = {Path(db_path).stem: Path(db_path) for db_path in db_paths}
+    timing = TimingConfig(min_iterations=args.min_iterations, max_iterations=args.max_iterations,
+                          tolerance=args.ci_tolerance)
+    exec_result = list(evaluate_tasks(tasks, database_paths, timeout=args.meta_time_out,
+                                      num_workers=args.num_cpus, gold_store_path=Path(args.gold_results_path),
+                                      timing=timing))
     print('start calculate')
     simple_ves, moderate_ves, challenging_ves, ves, count_lists = \
         compute_ves_by_diff(exec_result, args.diff_json_path)
@@ -197,6 +144,3 @@ if __name__ == '__main__':
     print_data(score_lists, count_lists)
     print('===========================================================================================')
     print("Finished evaluation")
-
-
-
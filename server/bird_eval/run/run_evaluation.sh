@@ -9,6 +9,6 @@ mode_gt='gt'
 mode_predict='gpt'
 
 echo '''starting to compare for ex'''
-python3 -u ./bird_eval/evaluation.py --db_root_path ${db_root_path} --predicted_sql_path ${predicted_sql_path} --data_mode ${data_mode} \
+PYTHONPATH=$(pwd) python3 -u ./bird_eval/evaluation.py --db_root_path ${db_root_path} --predicted_sql_path ${predicted_sql_path} --data_mode ${data_mode} \
 --ground_truth_path ${ground_truth_path} --num_cpus ${num_cpus} --mode_gt ${mode_gt} --mode_predict ${mode_predict} \
 --diff_json_path ${diff_json_path} --meta_time_out ${meta_time_out}
@@ -9,8 +9,9 @@ from tqdm import tqdm
 from utilities.candidate_selection import xiyan_basic_llm_selector
 from utilities.config import PATH_CONFIG
 from utilities.constants.services.llm_enums import LLMConfig, LLMType, ModelType
+from utilities.execution_cache import execute_cached
+from utilities.gold_result_store import get_gold_result_store
 from utilities.logging_utils import setup_logger
-from utilities.utility_functions import execute_sql_query, execute_sql_timeout
 
 logger = setup_logger(__name__)
 
@@ -35,7 +36,8 @@ def get_dict(file_path):
 
 def process_item(item, correct_gen_dict, correct_sel_dict, config_sel_dict, cache, errors):
 
-    gold_res = execute_sql_timeout(item['database'], item['gold'])
+    # Gold results come from the gold result store and are only executed on the first run
+    gold_res = get_gold_result_store().outcome(item['question_id'], item['database'], item['gold'])
     candidates = [(sql, id) for id, sql in item['candidates'].items()]
 
     correct_gen = []
@@ -46,15 +48,13 @@ def process_item(item, correct_gen_dict, correct_sel_dict, config_sel_dict, cach
     config_sel_dict[item['database']] = config_sel_dict.get(item['database'], {idx: 0 for _, idx in candidates})
 
     for sql, id in candidates:
-        try:
-            res = execute_sql_timeout(item['database'], sql)
-            cand_exec_results[id]=res
-            if set(res) == set(gold_res):
-                correct_gen.append(sql)
-                correct_gen_dict[item['database']][id] += 1
-                
-        except Exception as e:
-            logger.error(f"Error in Candidate SQL {e}")
+        res = execute_cached(item['database'], sql)
+        cand_exec_results[id]=res
+        if not res.succeeded:
+            logger.error(f"Error in Candidate SQL {res.error}")
+        elif gold_res.succeeded and res.set_hash == gold_res.set_hash:
+            correct_gen.append(sql)
+            correct_gen_dict[item['database']][id] += 1
 
     if len(correct_gen) > 0:
         correct_sel_dict[item['database']]['correct_generated'] += 1
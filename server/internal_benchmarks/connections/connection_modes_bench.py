@@ -0,0 +1,142 @@
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utilities.config import PATH_CONFIG
+from utilities.connections.sqlite import SqliteConnectionPool
+from utilities.constants.database_enums import SqliteConnectionMode
+
+SYNTHETIC_QUERIES = [
+    "SELECT COUNT(*) FROM orders WHERE amount > 500",
+    "SELECT customer_id, SUM(amount) FROM orders GROUP BY customer_id ORDER BY 2 DESC LIMIT 10",
+    "SELECT c.region, AVG(o.amount) FROM orders o JOIN customers c ON o.customer_id = c.id GROUP BY c.region",
+    "SELECT name FROM customers WHERE id = 4242",
+    "SELECT * FROM customers WHERE id BETWEEN 10 AND 20",
+    "SELECT COUNT(*) FROM orders WHERE id < 100",
+    "SELECT MAX(amount) FROM orders WHERE customer_id BETWEEN 100 AND 200",
+]
+
+
+def make_synthetic_database(path, rows, seed):
+    """
+    Writes a database with a customers table and an orders table with the given number of rows
+    """
+    rng = random.Random(seed)
+    customers = max(rows // 20, 1)
+    with sqlite3.connect(path) as connection:
+        connection.executescript(
+            """
+            CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT, region TEXT);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, amount REAL);
+            """
+        )
+        connection.executemany(
+            "INSERT INTO customers VALUES (?, ?, ?)",
+            ((i, f"Customer {i}", rng.choice("NESW")) for i in range(customers)),
+        )
+        connection.executemany(
+            "INSERT INTO orders VALUES (?, ?, ?)",
+            ((i, rng.randrange(customers), rng.uniform(0, 1000)) for i in range(rows)),
+        )
+    connection.close()
+
+
+def load_gold_queries(database_name):
+    """
+    Returns the gold queries of the preprocessed test questions of a database
+    """
+    with open(PATH_CONFIG.processed_test_path(database_name=database_name)) as file:
+        return [question["SQL"] for question in json.load(file)]
+
+
+def run_with_new_connections(db_path, queries):
+    """
+    Runs every query on a new connection, the way queries were executed before
+    """
+    for sql in queries:
+        connection = sqlite3.connect(db_path)
+        try:
+            connection.execute(sql).fetchall()
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+
+
+def run_with_pool(pool, db_path, queries):
+    """
+    Runs every query on the pooled connection of the calling thread
+    """
+    for sql in queries:
+        with pool.connect(db_path) as connection:
+            try:
+                connection.execute(sql).fetchall()
+            except sqlite3.Error:
+                pass
+
+
+def timed_threads(function, threads, *args):
+    """
+    Returns the wall clock time in seconds of running the function once in each of the threads
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(function, *args) for _ in range(threads)]:
+            future.result()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    """
+    This script compares executing queries on a new connection per query, as done before, with the
+    pooled read-only connections in file (immutable, memory-mapped) and in-memory copy mode. Every
+    thread runs the whole query list --repeats times. It runs the gold queries of a preprocessed
+    database, or a fixed query mix on a synthetic database with --synthetic rows.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.connections.connection_modes_bench --synthetic 500000
+    python -m internal_benchmarks.connections.connection_modes_bench --database california_schools
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", type=str, default=PATH_CONFIG.database_name)
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp())
+    try:
+        if args.synthetic:
+            db_path = work_dir / "synthetic.sqlite"
+            make_synthetic_database(db_path, args.synthetic, args.seed)
+            queries = SYNTHETIC_QUERIES
+        else:
+            db_path = PATH_CONFIG.sqlite_path(database_name=args.database)
+            queries = load_gold_queries(args.database)
+        queries = queries * args.repeats
+
+        results = {
+            "database": str(db_path),
+            "size_mb": db_path.stat().st_size / (1024 * 1024),
+            "queries_per_thread": len(queries),
+            "threads": args.threads,
+            "new_connection_seconds": timed_threads(
+                run_with_new_connections, args.threads, db_path, queries
+            ),
+        }
+        for mode in (SqliteConnectionMode.FILE, SqliteConnectionMode.MEMORY):
+            pool = SqliteConnectionPool(mode=mode)
+            results[f"pool_{mode.value}_seconds"] = timed_threads(
+                run_with_pool, args.threads, pool, db_path, queries
+            )
+            pool.clear()
+        print(json.dumps(results, indent=4))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,119 @@
+import argparse
+import json
+import random
+import re
+import sqlite3
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from preprocess.add_descriptions_bird_dataset import (
+    estimate_tokens, improve_column_descriptions_for_table)
+from utilities.constants.preprocess.add_descriptions_bird_dataset.indexing_constants import (
+    COLUMN_DESCRIPTION_COL, DATA_FORMAT_COL, IMPROVED_COLUMN_DESCRIPTIONS_COL,
+    ORIG_COLUMN_NAME_COL, TABLE_DESCRIPTION_COL, TABLE_NAME_COL)
+
+COLUMN_TYPES = ["integer", "text", "real", "date"]
+
+
+class CountingClient:
+    """
+    Answers description prompts without a model and counts the requests and their estimated tokens
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.tokens = 0
+
+    def execute_prompt(self, prompt):
+        with self.lock:
+            self.requests += 1
+            self.tokens += estimate_tokens(prompt)
+        names = re.findall(r"- Name: ([^;]+);", prompt)
+        if names:
+            return json.dumps({name: f"Description of {name}." for name in names})
+        return "Description of the column."
+
+
+def make_synthetic_table(connection, table_name, num_columns, rng):
+    """
+    Creates a table with one row and returns the metadata of its columns as in a description file
+    """
+    columns = [f"{table_name}_column_{i}" for i in range(num_columns)]
+    types = [rng.choice(COLUMN_TYPES) for _ in columns]
+    connection.execute(
+        f'CREATE TABLE "{table_name}" ({", ".join(f"{c} {t}" for c, t in zip(columns, types))})'
+    )
+    connection.execute(
+        f'INSERT INTO "{table_name}" VALUES ({", ".join("?" for _ in columns)})',
+        [f"value {rng.randint(0, 10000)}" for _ in columns],
+    )
+    return pd.DataFrame(
+        {
+            ORIG_COLUMN_NAME_COL: columns,
+            DATA_FORMAT_COL: types,
+            COLUMN_DESCRIPTION_COL: [f"original description of {c}" for c in columns],
+            IMPROVED_COLUMN_DESCRIPTIONS_COL: [None] * num_columns,
+        }
+    )
+
+
+def describe_tables(tables, connection, table_description_df, max_batch_tokens, workers):
+    """
+    Returns the requests and estimated prompt tokens of describing every column of the tables
+    """
+    client = CountingClient()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for table_name, table_df in tables.items():
+            improve_column_descriptions_for_table(
+                table_df.copy(), connection, table_name, "synthetic", client, table_description_df,
+                executor=executor, max_batch_tokens=max_batch_tokens,
+            )
+    return {"requests": client.requests, "prompt_tokens": client.tokens}
+
+
+if __name__ == '__main__':
+    """
+    This script compares describing every column of --tables synthetic tables in its own request with
+    describing the columns of each table in batched requests of --max_batch_tokens estimated prompt
+    tokens. The tables have between --min_columns and --max_columns columns, and a client answering
+    without a model counts the requests sent and their estimated prompt tokens.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.descriptions.description_batching_bench --tables 50 --max_batch_tokens 2000
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--min_columns", type=int, default=3)
+    parser.add_argument("--max_columns", type=int, default=40)
+    parser.add_argument("--max_batch_tokens", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    tables = {
+        f"table_{i}": make_synthetic_table(
+            connection, f"table_{i}", rng.randint(args.min_columns, args.max_columns), rng
+        )
+        for i in range(args.tables)
+    }
+    table_description_df = pd.DataFrame(
+        {
+            TABLE_NAME_COL: list(tables),
+            TABLE_DESCRIPTION_COL: [f"Synthetic table {name} used to benchmark descriptions." for name in tables],
+        }
+    )
+
+    results = {
+        "average_columns": statistics.fmean(len(table_df) for table_df in tables.values()),
+        "per_column": describe_tables(tables, connection, table_description_df, 0, args.workers),
+        "batched": describe_tables(tables, connection, table_description_df, args.max_batch_tokens, args.workers),
+    }
+    results["request_reduction"] = results["per_column"]["requests"] / results["batched"]["requests"]
+    results["token_reduction"] = results["per_column"]["prompt_tokens"] / results["batched"]["prompt_tokens"]
+    print(json.dumps(results, indent=4))
+    connection.close()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import multiprocessing as mp
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from func_timeout import FunctionTimedOut, func_timeout
+from internal_benchmarks.connections.connection_modes_bench import \
+    make_synthetic_database
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.execution_evaluation import EvaluationTask, evaluate_tasks
+
+SYNTHETIC_QUERY_PAIRS = [
+    (
+        "SELECT name FROM customers WHERE region = 'N'",
+        "SELECT name FROM customers WHERE region = 'N' ORDER BY id",
+    ),
+    (
+        "SELECT COUNT(*) FROM orders WHERE amount > 500",
+        "SELECT COUNT(id) FROM orders WHERE amount > 500",
+    ),
+    (
+        "SELECT customer_id, SUM(amount) FROM orders GROUP BY customer_id ORDER BY 2 DESC LIMIT 5",
+        "SELECT customer_id, SUM(amount) FROM orders GROUP BY customer_id ORDER BY 2 DESC LIMIT 3",
+    ),
+    (
+        "SELECT c.region, COUNT(*) FROM orders o JOIN customers c ON o.customer_id = c.id GROUP BY c.region",
+        "SELECT region, COUNT(*) FROM customers JOIN orders ON orders.customer_id = customers.id GROUP BY region",
+    ),
+]
+
+
+def legacy_execute_sql(predicted_sql, ground_truth, db_path):
+    """
+    Returns 1 if the results are equal as sets, opening a new connection as the evaluation did before
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(predicted_sql)
+    predicted_res = cursor.fetchall()
+    cursor.execute(ground_truth)
+    ground_truth_res = cursor.fetchall()
+    return int(set(predicted_res) == set(ground_truth_res))
+
+
+def legacy_execute_model(predicted_sql, ground_truth, db_path, idx, meta_time_out):
+    """
+    Returns the result of one question evaluated inside a func_timeout thread as before
+    """
+    try:
+        res = func_timeout(meta_time_out, legacy_execute_sql, args=(predicted_sql, ground_truth, db_path))
+    except FunctionTimedOut:
+        res = 0
+    except Exception:
+        res = 0
+    return {"sql_idx": idx, "res": res}
+
+
+def run_legacy(tasks, database_paths, num_cpus, meta_time_out):
+    """
+    Returns the results of submitting every question separately to a process pool as before
+    """
+    exec_result = []
+    pool = mp.Pool(processes=num_cpus)
+    for task in tasks:
+        pool.apply_async(
+            legacy_execute_model,
+            args=(task.predicted_sql, task.gold_sql, str(database_paths[task.database]), task.index, meta_time_out),
+            callback=exec_result.append,
+        )
+    pool.close()
+    pool.join()
+    return sorted(exec_result, key=lambda x: x["sql_idx"])
+
+
+def run_engine(tasks, database_paths, num_cpus, meta_time_out):
+    """
+    Returns the results of the execution evaluation engine
+    """
+    return list(
+        evaluate_tasks(tasks, database_paths, mode=ComparisonMode.SET, timeout=meta_time_out, num_workers=num_cpus)
+    )
+
+
+if __name__ == '__main__':
+    """
+    This script compares the former BIRD evaluation, which opens a connection per question inside a
+    func_timeout thread and submits every question to a process pool on its own, with the execution
+    evaluation engine on --databases synthetic databases of --synthetic rows each and --questions
+    questions. It reports the wall clock time and accuracy of both. Set EXECUTION_CACHE_PERSIST=false
+    so that the engine does not reuse outcomes of earlier runs.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.evaluation.evaluation_engine_bench --questions 1500 --num_cpus 8
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=20000)
+    parser.add_argument("--databases", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=1500)
+    parser.add_argument("--num_cpus", type=int, default=8)
+    parser.add_argument("--meta_time_out", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    work_dir = Path(tempfile.mkdtemp())
+    try:
+        database_paths = {}
+        for i in range(args.databases):
+            database_paths[f"synthetic_{i}"] = work_dir / f"synthetic_{i}.sqlite"
+            make_synthetic_database(database_paths[f"synthetic_{i}"], args.synthetic, args.seed + i)
+
+        tasks = []
+        for index in range(args.questions):
+            predicted_sql, gold_sql = rng.choice(SYNTHETIC_QUERY_PAIRS)
+            database = f"synthetic_{index * args.databases // args.questions}"
+            tasks.append(EvaluationTask(index=index, database=database, predicted_sql=predicted_sql, gold_sql=gold_sql))
+
+        results = {}
+        for name, run in (("legacy", run_legacy), ("engine", run_engine)):
+            start = time.perf_counter()
+            exec_result = run(tasks, database_paths, args.num_cpus, args.meta_time_out)
+            seconds = time.perf_counter() - start
+            correct = [res["res"] if isinstance(res, dict) else int(res.correct) for res in exec_result]
+            results[name] = {"seconds": seconds, "accuracy": 100 * sum(correct) / len(correct)}
+        results["speedup"] = results["legacy"]["seconds"] / results["engine"]["seconds"]
+        print(json.dumps(results, indent=4))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
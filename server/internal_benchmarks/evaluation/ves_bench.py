@@ -0,0 +1,167 @@
+import argparse
+import json
+import math
+import multiprocessing as mp
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from func_timeout import FunctionTimedOut, func_timeout
+from internal_benchmarks.connections.connection_modes_bench import \
+    make_synthetic_database
+from internal_benchmarks.evaluation.evaluation_engine_bench import \
+    SYNTHETIC_QUERY_PAIRS
+from utilities.execution_evaluation import EvaluationTask, evaluate_tasks
+from utilities.ves_timing import TimingConfig
+
+
+def legacy_clean_abnormal(input):
+    """
+    Returns the values within three standard deviations of the mean as the VES evaluation did before
+    """
+    input = np.asarray(input)
+    mean = np.mean(input, axis=0)
+    std = np.std(input, axis=0)
+    return [x for x in input if mean - 3 * std < x < mean + 3 * std]
+
+
+def legacy_execute_sql(sql, db_path):
+    """
+    Returns the execution time of a query on a new connection as the VES evaluation did before
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    start_time = time.time()
+    cursor.execute(sql)
+    return time.time() - start_time
+
+
+def legacy_iterated_execute_sql(predicted_sql, ground_truth, db_path, iterate_num):
+    """
+    Returns the time ratio of a question timed iterate_num times as the VES evaluation did before
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    predicted_res = cursor.execute(predicted_sql).fetchall()
+    ground_truth_res = cursor.execute(ground_truth).fetchall()
+    if set(predicted_res) != set(ground_truth_res):
+        return 0
+    diff_list = []
+    for _ in range(iterate_num):
+        predicted_time = legacy_execute_sql(predicted_sql, db_path)
+        ground_truth_time = legacy_execute_sql(ground_truth, db_path)
+        diff_list.append(ground_truth_time / predicted_time)
+    processed_diff_list = legacy_clean_abnormal(diff_list)
+    return sum(processed_diff_list) / len(processed_diff_list)
+
+
+def legacy_execute_model(predicted_sql, ground_truth, db_path, idx, iterate_num, meta_time_out):
+    """
+    Returns the time ratio of one question evaluated inside a func_timeout thread as before
+    """
+    try:
+        time_ratio = func_timeout(meta_time_out * iterate_num, legacy_iterated_execute_sql,
+                                  args=(predicted_sql, ground_truth, db_path, iterate_num))
+    except FunctionTimedOut:
+        time_ratio = 0
+    except Exception:
+        time_ratio = 0
+    return {"sql_idx": idx, "time_ratio": time_ratio}
+
+
+def run_legacy(tasks, database_paths, args):
+    """
+    Returns the time ratios of submitting every question separately to a process pool as before
+    """
+    exec_result = []
+    pool = mp.Pool(processes=args.num_cpus)
+    for task in tasks:
+        pool.apply_async(
+            legacy_execute_model,
+            args=(task.predicted_sql, task.gold_sql, str(database_paths[task.database]), task.index,
+                  args.max_iterations, args.meta_time_out),
+            callback=exec_result.append,
+        )
+    pool.close()
+    pool.join()
+    return [res["time_ratio"] for res in sorted(exec_result, key=lambda x: x["sql_idx"])]
+
+
+def run_adaptive(tasks, database_paths, args):
+    """
+    Returns the time ratios of the execution evaluation engine with adaptive timing
+    """
+    timing = TimingConfig(args.min_iterations, args.max_iterations, args.ci_tolerance)
+    results = evaluate_tasks(tasks, database_paths, timeout=args.meta_time_out, num_workers=args.num_cpus,
+                             timing=timing)
+    return [result.time_ratio for result in results]
+
+
+def compute_ves(time_ratios):
+    """
+    Returns the VES of the time ratios
+    """
+    return sum(math.sqrt(ratio) * 100 for ratio in time_ratios) / len(time_ratios)
+
+
+if __name__ == '__main__':
+    """
+    This script compares the former VES evaluation, which times every correct prediction and its gold
+    query 100 times each on a new connection inside a func_timeout thread, with the adaptive timing of
+    the execution evaluation engine on --databases synthetic databases of --synthetic rows each and
+    --questions questions. Both are run --repeats times, and the mean wall clock time, the mean VES and
+    the standard deviation of the VES across repeats are reported for each. Set
+    EXECUTION_CACHE_PERSIST=false so that the engine does not reuse outcomes of earlier runs.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.evaluation.ves_bench --questions 200 --num_cpus 4 --repeats 3
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=20000)
+    parser.add_argument("--databases", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--num_cpus", type=int, default=4)
+    parser.add_argument("--meta_time_out", type=float, default=30.0)
+    parser.add_argument("--min_iterations", type=int, default=5)
+    parser.add_argument("--max_iterations", type=int, default=100)
+    parser.add_argument("--ci_tolerance", type=float, default=0.05)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    work_dir = Path(tempfile.mkdtemp())
+    try:
+        database_paths = {}
+        for i in range(args.databases):
+            database_paths[f"synthetic_{i}"] = work_dir / f"synthetic_{i}.sqlite"
+            make_synthetic_database(database_paths[f"synthetic_{i}"], args.synthetic, args.seed + i)
+
+        tasks = []
+        for index in range(args.questions):
+            predicted_sql, gold_sql = rng.choice(SYNTHETIC_QUERY_PAIRS)
+            database = f"synthetic_{index * args.databases // args.questions}"
+            tasks.append(EvaluationTask(index=index, database=database, predicted_sql=predicted_sql, gold_sql=gold_sql))
+
+        results = {}
+        for name, run in (("legacy", run_legacy), ("adaptive", run_adaptive)):
+            seconds, scores = [], []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                time_ratios = run(tasks, database_paths, args)
+                seconds.append(time.perf_counter() - start)
+                scores.append(compute_ves(time_ratios))
+            results[name] = {
+                "seconds": statistics.fmean(seconds),
+                "ves": statistics.fmean(scores),
+                "ves_std": statistics.pstdev(scores),
+            }
+        results["speedup"] = results["legacy"]["seconds"] / results["adaptive"]["seconds"]
+        print(json.dumps(results, indent=4))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,86 @@
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from internal_benchmarks.connections.connection_modes_bench import \
+    make_synthetic_database
+from utilities.sql_execution import (DEFAULT_BUDGET, PREVIEW_ROWS,
+                                     _summarize_fetched_rows,
+                                     _summarize_in_database)
+
+SYNTHETIC_QUERIES = {
+    "many_distinct_rows": "SELECT id, customer_id, amount FROM orders",
+    "many_duplicate_rows": "SELECT customer_id FROM orders",
+    "few_rows": "SELECT customer_id, SUM(amount) FROM orders GROUP BY customer_id ORDER BY 2 DESC LIMIT 10",
+}
+
+
+def summarize_with_fetchall(db_path, sql):
+    """
+    Returns the hash and preview of a result the way they were computed before, from all fetched rows
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        rows = connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+    return hashlib.md5(str(rows).encode()).hexdigest(), random.sample(rows, min(PREVIEW_ROWS, len(rows)))
+
+
+def measure(function, *args):
+    """
+    Returns the wall clock time in seconds and the peak traced Python memory in MB of one call
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        function(*args)
+        return {
+            "seconds": time.perf_counter() - start,
+            "peak_mb": tracemalloc.get_traced_memory()[1] / (1024 * 1024),
+        }
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    """
+    This script compares three ways of summarizing a query result: fetching all rows and hashing their
+    string as done before, fingerprinting the rows in Python while they are fetched, and fingerprinting
+    the result inside SQLite with the registered aggregate. It reports the time and the peak Python
+    memory of each on a synthetic database with --synthetic rows. Timings include tracemalloc overhead.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.execution.result_summary_bench --synthetic 1000000
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp())
+    try:
+        db_path = work_dir / "synthetic.sqlite"
+        make_synthetic_database(db_path, args.synthetic, args.seed)
+
+        results = {}
+        for name, sql in SYNTHETIC_QUERIES.items():
+            results[name] = {
+                "fetchall": measure(summarize_with_fetchall, db_path, sql),
+                "streamed": measure(
+                    _summarize_fetched_rows, db_path, sql, DEFAULT_BUDGET, None, PREVIEW_ROWS
+                ),
+                "in_database": measure(
+                    _summarize_in_database, db_path, sql, DEFAULT_BUDGET, None, PREVIEW_ROWS
+                ),
+            }
+        print(json.dumps(results, indent=4))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
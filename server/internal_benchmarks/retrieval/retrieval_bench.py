@@ -0,0 +1,119 @@
+import argparse
+import json
+import tempfile
+import time
+import uuid
+
+import chromadb
+import numpy as np
+from utilities.config import PATH_CONFIG
+from utilities.embedding_cache import get_embedding_function
+from utilities.vector_index import NumpyVectorIndex
+from utilities.vectorize import get_sample_questions
+
+
+def load_corpus(synthetic_size, dimension, seed):
+    """
+    Returns documents, metadatas, ids and embeddings of the sample questions, or of a
+    random synthetic corpus when synthetic_size is set
+    """
+    if synthetic_size:
+        rng = np.random.default_rng(seed)
+        embeddings = rng.standard_normal((synthetic_size, dimension)).astype(np.float32)
+        documents = [f"document {index}" for index in range(synthetic_size)]
+        metadatas = [{"db_id": f"db_{index % 11}"} for index in range(synthetic_size)]
+        ids = [str(uuid.uuid4()) for _ in range(synthetic_size)]
+        return documents, metadatas, ids, list(embeddings)
+
+    documents, metadatas, ids = get_sample_questions(PATH_CONFIG.processed_train_path())
+    embeddings = get_embedding_function().embed_texts(documents)
+    return documents, metadatas, ids, embeddings
+
+
+def time_queries(collection, queries, n_results, batch):
+    """
+    Returns the per query latency in milliseconds and the result ids of every query
+    """
+    start = time.perf_counter()
+    if batch:
+        ids = collection.query(query_embeddings=queries, n_results=n_results)["ids"]
+    else:
+        ids = [
+            collection.query(query_embeddings=[query], n_results=n_results)["ids"][0]
+            for query in queries
+        ]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / len(queries), ids
+
+
+def recall_at_k(exact_ids, approximate_ids):
+    """
+    Returns the mean fraction of exact neighbours found by the approximate search
+    """
+    recalls = [
+        len(set(exact) & set(approximate)) / len(exact)
+        for exact, approximate in zip(exact_ids, approximate_ids)
+        if exact
+    ]
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+if __name__ == "__main__":
+    """
+    This script compares the NumPy exact kNN backend with ChromaDB's HNSW index on query
+    latency (single and batched queries) and reports ChromaDB's recall@k against the exact
+    search. By default the sample questions of SAMPLE_DATASET_TYPE are used, pass
+    --synthetic to benchmark on random vectors instead. No ./chroma directory is created.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.retrieval.retrieval_bench --synthetic 20000
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    documents, metadatas, ids, embeddings = load_corpus(
+        args.synthetic, args.dimension, args.seed
+    )
+    rng = np.random.default_rng(args.seed + 1)
+    query_rows = rng.choice(len(documents), size=min(args.queries, len(documents)), replace=False)
+    queries = [
+        np.asarray(embeddings[row], dtype=np.float32)
+        + rng.normal(0, 0.05, len(embeddings[row])).astype(np.float32)
+        for row in query_rows
+    ]
+
+    results = {"corpus_size": len(documents), "queries": len(queries), "k": args.k}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        numpy_index = NumpyVectorIndex("bench", temp_dir, get_embedding_function())
+        numpy_index.add(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)
+        results["numpy_build_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chroma_collection = chromadb.EphemeralClient().create_collection(
+            name="retrieval_bench", metadata={"hnsw:space": "cosine"}
+        )
+        for batch_start in range(0, len(documents), 5000):
+            batch_end = batch_start + 5000
+            chroma_collection.add(
+                documents=documents[batch_start:batch_end],
+                metadatas=metadatas[batch_start:batch_end],
+                ids=ids[batch_start:batch_end],
+                embeddings=[list(map(float, vector)) for vector in embeddings[batch_start:batch_end]],
+            )
+        results["chroma_build_seconds"] = time.perf_counter() - start
+
+        for name, collection in (("numpy", numpy_index), ("chroma", chroma_collection)):
+            single_ms, single_ids = time_queries(collection, queries, args.k, batch=False)
+            batch_ms, _ = time_queries(collection, queries, args.k, batch=True)
+            results[f"{name}_single_query_ms"] = single_ms
+            results[f"{name}_batched_query_ms"] = batch_ms
+            results[f"{name}_ids"] = single_ids
+
+    results["chroma_recall_at_k"] = recall_at_k(results.pop("numpy_ids"), results.pop("chroma_ids"))
+    print(json.dumps(results, indent=4))
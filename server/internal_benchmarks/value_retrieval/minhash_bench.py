@@ -0,0 +1,98 @@
+import argparse
+import json
+import pickle
+import random
+import string
+import time
+
+import numpy as np
+from datasketch import MinHash
+from utilities.config import PATH_CONFIG
+from utilities.schema_linking.minhash_signatures import (
+    compute_signatures, compute_signatures_parallel)
+from utilities.schema_linking.value_retrieval import (MAX_MINHASH_WORKERS,
+                                                       N_GRAM, SIGNATURE_SIZE)
+
+
+def datasketch_signature(value):
+    """
+    Returns the signature of a value built one 3-gram at a time with datasketch
+    """
+    minhash = MinHash(num_perm=SIGNATURE_SIZE)
+    for shingle in [value[i : i + N_GRAM] for i in range(len(value) - N_GRAM + 1)]:
+        minhash.update(shingle.encode("utf8"))
+    return minhash.hashvalues
+
+
+def load_values(database_name, synthetic_size, seed):
+    """
+    Returns the unique values of the database, or random strings when synthetic_size is set
+    """
+    if synthetic_size:
+        rng = random.Random(seed)
+        alphabet = string.ascii_letters + string.digits + " "
+        return [
+            "".join(rng.choices(alphabet, k=rng.randint(3, 40)))
+            for _ in range(synthetic_size)
+        ]
+
+    with open(PATH_CONFIG.unique_values_path(database_name=database_name), "rb") as file:
+        unique_values = pickle.load(file)
+    return [
+        value
+        for table_values in unique_values.values()
+        for column_values in table_values.values()
+        for value in column_values
+    ]
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the result of the function and its wall clock time in seconds
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    """
+    This script compares the per value datasketch MinHash loop used before with the batched
+    signature generation used by make_lsh, in a single process and with a process pool, and
+    checks that all signatures are identical. It runs on the unique values pickle of a
+    preprocessed database, or on random strings with --synthetic.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.value_retrieval.minhash_bench --synthetic 200000
+    python -m internal_benchmarks.value_retrieval.minhash_bench --database california_schools
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", type=str, default=PATH_CONFIG.database_name)
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=MAX_MINHASH_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    values = load_values(args.database, args.synthetic, args.seed)
+
+    reference, reference_seconds = timed(
+        lambda: np.vstack([datasketch_signature(value) for value in values])
+    )
+    batched, batched_seconds = timed(compute_signatures, values, SIGNATURE_SIZE, N_GRAM)
+    parallel, parallel_seconds = timed(
+        compute_signatures_parallel, values, SIGNATURE_SIZE, N_GRAM, args.workers
+    )
+
+    results = {
+        "values": len(values),
+        "workers": args.workers,
+        "datasketch_seconds": reference_seconds,
+        "batched_seconds": batched_seconds,
+        "parallel_seconds": parallel_seconds,
+        "batched_speedup": reference_seconds / batched_seconds,
+        "parallel_speedup": reference_seconds / parallel_seconds,
+        "identical_signatures": bool(
+            np.array_equal(reference, batched) and np.array_equal(reference, parallel)
+        ),
+    }
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,115 @@
+import argparse
+import json
+import sqlite3
+import time
+
+from utilities.config import PATH_CONFIG
+from utilities.schema_linking.unique_values import (_keeps_column,
+                                                     get_candidate_columns,
+                                                     get_unique_values)
+from utilities.schema_linking.value_retrieval import MAX_UNIQUE_VALUES_WORKERS
+
+
+def execute_sql(db_path, sql, fetch="all"):
+    """
+    Returns the rows of a query run on a new connection, the way statements were executed before
+    """
+    with sqlite3.connect(db_path, timeout=480) as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        return cursor.fetchone() if fetch == "one" else cursor.fetchall()
+
+
+def legacy_unique_values(db_path):
+    """
+    Returns the unique values the way they were extracted before: one connection per
+    statement and two scans per candidate column, one for the statistics and one for the values
+    """
+    table_names = [
+        table[0]
+        for table in execute_sql(
+            db_path, "SELECT name FROM sqlite_master WHERE type='table';"
+        )
+    ]
+    table_infos = {
+        table_name: execute_sql(db_path, f"PRAGMA table_info('{table_name}')")
+        for table_name in table_names
+    }
+
+    unique_values = {}
+    for table_name, columns in get_candidate_columns(table_infos).items():
+        table_values = {}
+        for column in columns:
+            sum_of_lengths, count_distinct = execute_sql(
+                db_path,
+                f"""
+                SELECT SUM(LENGTH(unique_values)), COUNT(unique_values)
+                FROM (
+                    SELECT DISTINCT `{column}` AS unique_values
+                    FROM `{table_name}`
+                    WHERE `{column}` IS NOT NULL
+                ) AS subquery
+                """,
+                fetch="one",
+            )
+            if sum_of_lengths is None or not _keeps_column(
+                column, sum_of_lengths, count_distinct
+            ):
+                continue
+
+            table_values[column] = [
+                str(value[0])
+                for value in execute_sql(
+                    db_path,
+                    f"SELECT DISTINCT `{column}` FROM `{table_name}` WHERE `{column}` IS NOT NULL",
+                )
+            ]
+        unique_values[table_name] = table_values
+    return unique_values
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the result of the function and its wall clock time in seconds
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    """
+    This script compares the two-scan, connection-per-statement unique value extraction used
+    before with the single-scan extraction used by make_db_lsh, over one connection and with a
+    process pool, and checks that all of them return the same values.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.value_retrieval.unique_values_bench --database california_schools
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", type=str, default=PATH_CONFIG.database_name)
+    parser.add_argument("--workers", type=int, default=MAX_UNIQUE_VALUES_WORKERS)
+    args = parser.parse_args()
+
+    db_path = str(PATH_CONFIG.sqlite_path(database_name=args.database))
+
+    reference, reference_seconds = timed(legacy_unique_values, db_path)
+    single, single_seconds = timed(get_unique_values, db_path, max_workers=1)
+    parallel, parallel_seconds = timed(get_unique_values, db_path, max_workers=args.workers)
+
+    results = {
+        "database": args.database,
+        "workers": args.workers,
+        "values": sum(
+            len(column_values)
+            for table_values in reference.values()
+            for column_values in table_values.values()
+        ),
+        "legacy_seconds": reference_seconds,
+        "single_connection_seconds": single_seconds,
+        "parallel_seconds": parallel_seconds,
+        "single_connection_speedup": reference_seconds / single_seconds,
+        "parallel_speedup": reference_seconds / parallel_seconds,
+        "identical_values": reference == single == parallel,
+    }
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,157 @@
+import argparse
+import json
+import random
+import shutil
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from internal_benchmarks.value_retrieval.minhash_bench import load_values
+from utilities.config import PATH_CONFIG
+from utilities.schema_linking.fts_value_index import (FtsValueIndex,
+                                                      build_fts_value_index,
+                                                      trigrams)
+from utilities.schema_linking.value_index import ValueIndex, build_value_index
+from utilities.schema_linking.value_retrieval import (MAX_MINHASH_WORKERS,
+                                                       N_GRAM, SIGNATURE_SIZE,
+                                                       THRESHOLD)
+
+
+def make_keywords(values, count, seed):
+    """
+    Returns keywords derived from random values: exact copies, substrings, case changes and typos
+    """
+    rng = random.Random(seed)
+    keywords = []
+    for value in rng.sample(values, min(count, len(values))):
+        variant = rng.randrange(4)
+        if variant == 1 and len(value) > 6:
+            start = rng.randrange(len(value) // 2)
+            value = value[start : start + max(4, len(value) // 2)]
+        elif variant == 2:
+            value = value.lower()
+        elif variant == 3 and len(value) > 3:
+            position = rng.randrange(len(value))
+            value = value[:position] + rng.choice(string.ascii_lowercase) + value[position + 1 :]
+        keywords.append(value)
+    return keywords
+
+
+def exact_similarities(keyword, value_trigrams):
+    """
+    Returns the exact trigram Jaccard similarity of the keyword with every value
+    """
+    keyword_trigrams = trigrams(keyword)
+    return [
+        len(keyword_trigrams & other) / len(keyword_trigrams | other)
+        if keyword_trigrams or other
+        else 0.0
+        for other in value_trigrams
+    ]
+
+
+def recall(index, results, values, value_trigrams, keywords, top_n):
+    """
+    Returns the share of returned values that are as similar to their keyword as the exact
+    top_n-th most similar value, averaged over the keywords
+    """
+    scores = []
+    for keyword, keyword_results in zip(keywords, results):
+        similarities = exact_similarities(keyword, value_trigrams)
+        kth_best = sorted(similarities, reverse=True)[min(top_n, len(similarities)) - 1]
+        if kth_best == 0:
+            continue
+        exact = dict(zip(values, similarities))
+        hits = sum(exact[index.value(row)] >= kth_best for row, _ in keyword_results)
+        scores.append(hits / top_n)
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def directory_size(path):
+    """
+    Returns the size in bytes of a file or of every file in a directory
+    """
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the result of the function and its wall clock time in seconds
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    """
+    This script compares the MinHash LSH value index with the FTS5 trigram value index on build
+    time, disk size, query latency and recall of the exact, case-insensitive trigram Jaccard
+    top_n. It runs on the unique values pickle of a preprocessed database, or on random strings
+    with --synthetic.
+    Run the script from server directory as follows:
+
+    python -m internal_benchmarks.value_retrieval.value_engines_bench --synthetic 100000
+    python -m internal_benchmarks.value_retrieval.value_engines_bench --database california_schools
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", type=str, default=PATH_CONFIG.database_name)
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=MAX_MINHASH_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    values = list(dict.fromkeys(load_values(args.database, args.synthetic, args.seed)))
+    unique_values = {"values": {"value": values}}
+    value_trigrams = [trigrams(value) for value in values]
+    keywords = make_keywords(values, args.queries, args.seed)
+
+    work_dir = Path(tempfile.mkdtemp())
+    try:
+        lsh_dir, fts_path = work_dir / "value_index", work_dir / "values_fts.sqlite"
+        _, lsh_build_seconds = timed(
+            build_value_index,
+            unique_values,
+            lsh_dir,
+            num_perm=SIGNATURE_SIZE,
+            n_gram=N_GRAM,
+            threshold=THRESHOLD,
+            max_workers=args.workers,
+        )
+        _, fts_build_seconds = timed(build_fts_value_index, unique_values, fts_path)
+
+        lsh_index, fts_index = ValueIndex(lsh_dir), FtsValueIndex(fts_path)
+        lsh_results, lsh_query_seconds = timed(lsh_index.batch_query, keywords, args.top_n)
+        fts_results, fts_query_seconds = timed(fts_index.batch_query, keywords, args.top_n)
+
+        results = {
+            "values": len(values),
+            "queries": len(keywords),
+            "top_n": args.top_n,
+            "lsh": {
+                "build_seconds": lsh_build_seconds,
+                "disk_bytes": directory_size(lsh_dir),
+                "query_ms": 1000 * lsh_query_seconds / len(keywords),
+                "recall": recall(
+                    lsh_index, lsh_results, values, value_trigrams, keywords, args.top_n
+                ),
+            },
+            "fts5": {
+                "build_seconds": fts_build_seconds,
+                "disk_bytes": directory_size(fts_path),
+                "query_ms": 1000 * fts_query_seconds / len(keywords),
+                "recall": recall(
+                    fts_index, fts_results, values, value_trigrams, keywords, args.top_n
+                ),
+            },
+        }
+        fts_index.close()
+        print(json.dumps(results, indent=4))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
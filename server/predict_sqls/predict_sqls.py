@@ -8,6 +8,8 @@ from app import db
 from services.clients.client_factory import ClientFactory
 from utilities.candidate_selection import xiyan_basic_llm_selector
 from utilities.config import PATH_CONFIG
+from utilities.constants.bird_utils.indexing_constants import \
+    RUNTIME_FEW_SHOTS_KEY
 from utilities.constants.services.llm_enums import LLMConfig, LLMType, ModelType
 from utilities.constants.prompts_enums import (FormatType, PromptType,
                                                RefinerPromptType)
@@ -34,6 +36,7 @@ def generate_sql(candidate, item, database):
         prompt = PromptFactory.get_prompt_class(
             prompt_type=candidate['prompt_config']['type'],
             target_question=item['question'],
+            examples=item.get(RUNTIME_FEW_SHOTS_KEY),
             shots=candidate['prompt_config']['shots'],
             schema_format=candidate['prompt_config']['format_type'],
             schema=item['runtime_schema_used'] if candidate['prune_schema'] else None,
@@ -59,7 +62,8 @@ def generate_sql(candidate, item, database):
                     schema_used=item['runtime_schema_used'] if improve_config['prune_schema'] else None,
                     evidence=item['evidence'] if improve_config['add_evidence'] else None,
                     refiner_prompt_type=improve_config['prompt_config']['type'],
-                    chat_mode=improve_config['prompt_config']['chat_mode']
+                    chat_mode=improve_config['prompt_config']['chat_mode'],
+                    examples=item.get(RUNTIME_FEW_SHOTS_KEY)
                 )
             except Exception as e:
                 logger.error(f"Error improving SQL query: {str(e)}")
@@ -1,15 +1,19 @@
 import json
+import math
 import os
+import re
 import sqlite3
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Union
+from typing import Dict, List, Optional, Union
 
 import pandas as pd
 from preprocess.AddDescriptionErrorLogs import AddDescriptionErrorLogs
 from services.clients.client_factory import Client, ClientFactory
 from tqdm import tqdm
 from utilities.bird_utils import read_csv
-from utilities.config import PATH_CONFIG
+from utilities.config import (DESCRIPTION_BATCH_MAX_TOKENS, DESCRIPTION_WORKERS,
+                              PATH_CONFIG)
 from utilities.constants.database_enums import DatasetType
 from utilities.constants.preprocess.add_descriptions_bird_dataset.indexing_constants import (
     COLUMN_DESCRIPTION_COL, DATA_FORMAT_COL, IMPROVED_COLUMN_DESCRIPTIONS_COL,
@@ -20,7 +24,8 @@ from utilities.constants.preprocess.add_descriptions_bird_dataset.response_messa
     ERROR_GENERATING_COLUMN_DESCRIPTIONS, ERROR_GENERATING_TABLE_DESCRIPTIONS,
     ERROR_INITIALIZING_DESCRIPTION_FILES, ERROR_SQLITE_EXECUTION_ERROR,
     ERROR_TABLE_DOES_NOT_EXIST, ERROR_UPDATING_DESCRIPTION_FILES,
-    INFO_COLUMN_ALREADY_HAS_DESCRIPTIONS, INFO_TABLE_ALREADY_HAS_DESCRIPTIONS)
+    INFO_COLUMN_ALREADY_HAS_DESCRIPTIONS, INFO_TABLE_ALREADY_HAS_DESCRIPTIONS,
+    WARNING_COLUMN_BATCH_FAILED, WARNING_COLUMN_BATCH_INCOMPLETE)
 from utilities.constants.prompts_enums import FormatType
 from utilities.constants.script_constants import UNKNOWN_COLUMN_DATA_TYPE_STR
 from utilities.constants.services.llm_enums import (LLMConfig, LLMType,
@@ -28,7 +33,10 @@ from utilities.constants.services.llm_enums import (LLMConfig, LLMType,
 from utilities.format_schema import format_schema
 from utilities.logging_utils import setup_logger
 from utilities.prompts.prompt_templates import (
-    COLUMN_DESCRIPTION_PROMPT_TEMPLATE, TABLE_DESCRIPTION_PROMPT_TEMPLATE)
+    COLUMN_DESCRIPTION_PROMPT_TEMPLATE,
+    COLUMN_DESCRIPTIONS_BATCH_COLUMN_TEMPLATE,
+    COLUMN_DESCRIPTIONS_BATCH_PROMPT_TEMPLATE,
+    TABLE_DESCRIPTION_PROMPT_TEMPLATE)
 from utilities.utility_functions import (get_table_columns, get_table_ddl,
                                          get_table_names)
 
@@ -46,6 +54,9 @@ TABLE_DESCRIPTION_PLACEHOLDER = "No Description Available"
 PRAGMA_COLUMN_NAME_INDEX = 1
 PRAGMA_COLUMN_TYPE_INDEX = 2
 
+# Rough number of characters per token of a prompt, used to size batched column requests
+CHARS_PER_TOKEN = 4
+
 
 def extract_column_type_from_schema(
     connection: sqlite3.Connection, table_name: str, column_name: str
@@ -197,6 +208,178 @@ def get_improved_column_description(
     return improved_description
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a prompt from its length.
+
+    Args:
+        text (str): The prompt text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def format_batch_column(row: pd.Series) -> str:
+    """
+    Formats the metadata of a column as an entry of a batched column description prompt.
+
+    Args:
+        row (pd.Series): A row from a DataFrame representing column metadata, with its data type.
+
+    Returns:
+        str: The column entry of the prompt.
+    """
+    column_description = row.get(COLUMN_DESCRIPTION_COL)
+    column_comment_part = (
+        f"; Description: {column_description}"
+        if pd.notna(column_description) and str(column_description).strip()
+        else ""
+    )
+    return COLUMN_DESCRIPTIONS_BATCH_COLUMN_TEMPLATE.format(
+        column_name=str(row[ORIG_COLUMN_NAME_COL]).strip(),
+        datatype=row.get(DATA_FORMAT_COL),
+        column_comment_part=column_comment_part,
+    )
+
+
+def chunk_columns_by_token_budget(
+    rows: pd.DataFrame, header_tokens: int, max_tokens: int
+) -> List[pd.DataFrame]:
+    """
+    Splits the columns of a table into batches whose prompts fit within a token budget.
+
+    The columns are kept in order. A column whose entry alone exceeds the budget is put in a
+    batch of its own, and a budget of 0 or less puts every column in a batch of its own.
+
+    Args:
+        rows (pd.DataFrame): Metadata of the columns to describe.
+        header_tokens (int): Estimated tokens of the prompt without any column.
+        max_tokens (int): Estimated tokens allowed per prompt.
+
+    Returns:
+        List[pd.DataFrame]: The batches of column metadata.
+    """
+    if max_tokens <= 0:
+        return [rows.iloc[[position]] for position in range(len(rows))]
+
+    batches = []
+    start, tokens = 0, header_tokens
+    for position in range(len(rows)):
+        column_tokens = estimate_tokens(format_batch_column(rows.iloc[position]))
+        if position > start and tokens + column_tokens > max_tokens:
+            batches.append(rows.iloc[start:position])
+            start, tokens = position, header_tokens
+        tokens += column_tokens
+    if start < len(rows):
+        batches.append(rows.iloc[start:])
+    return batches
+
+
+def parse_column_descriptions(response: str, column_names: List[str]) -> Dict[str, str]:
+    """
+    Parses the answer to a batched column description prompt.
+
+    The answer is expected to be a JSON object mapping column names to descriptions, possibly
+    wrapped in a markdown code block. Column names are matched exactly, then ignoring case and
+    surrounding whitespace. Columns without a non-empty text description are left out.
+
+    Args:
+        response (str): The answer of the language model.
+        column_names (List[str]): The names of the columns asked for.
+
+    Returns:
+        Dict[str, str]: The description of every described column by column name.
+
+    Raises:
+        ValueError: If the answer does not contain a JSON object.
+    """
+    text = re.sub(r"```(?:json)?\s*([\s\S]*?)```", r"\1", response)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError(f"No JSON object in response: {response[:100]}")
+    parsed = json.loads(text[start:end + 1])
+    if not isinstance(parsed, dict):
+        raise ValueError(f"No JSON object in response: {response[:100]}")
+
+    normalized = {str(name).strip().lower(): value for name, value in parsed.items()}
+    descriptions = {}
+    for column_name in column_names:
+        description = parsed.get(column_name, normalized.get(column_name.strip().lower()))
+        if isinstance(description, str) and description.strip():
+            descriptions[column_name] = description.strip()
+    return descriptions
+
+
+def get_improved_column_descriptions(
+    rows: pd.DataFrame,
+    table_name: str,
+    table_row: list,
+    connection: sqlite3.Connection,
+    client: Client,
+    table_description: str,
+    database_name: str,
+) -> Dict[int, str]:
+    """
+    Generates improved descriptions for several columns of a table in one LLM request.
+
+    The table description and first row are sent once, followed by the metadata of every
+    column, and the descriptions are parsed from the JSON object returned. Columns the answer
+    does not describe, or all columns if the request or the parsing fails, are described one by
+    one with `get_improved_column_description`. A single column is described directly.
+
+    Args:
+        rows (pd.DataFrame): Metadata of the columns to describe, with their data types.
+        table_name (str): The name of the table containing the columns.
+        table_row (list): The first row of data from the table, used to infer context.
+        connection (sqlite3.Connection): An active connection to the SQLite database.
+        client (Client): A client interface for executing prompts (e.g., an LLM wrapper).
+        table_description (str): A textual description of the table, if available.
+        database_name (str): The name of the database, used for logging purposes.
+
+    Returns:
+        Dict[int, str]: The improved description of every column by row index, empty for the
+        columns that could not be described.
+    """
+    column_names = {index: str(row[ORIG_COLUMN_NAME_COL]).strip() for index, row in rows.iterrows()}
+
+    descriptions = {}
+    if len(rows) > 1:
+        prompt = COLUMN_DESCRIPTIONS_BATCH_PROMPT_TEMPLATE.format(
+            table_name=table_name,
+            table_description=table_description,
+            table_first_row_values=table_row,
+            columns="".join(format_batch_column(row) for _, row in rows.iterrows()),
+        )
+        try:
+            parsed = parse_column_descriptions(
+                client.execute_prompt(prompt), list(column_names.values())
+            )
+            descriptions = {
+                index: parsed[column_name]
+                for index, column_name in column_names.items()
+                if column_name in parsed
+            }
+        except Exception as e:
+            logger.warning(
+                WARNING_COLUMN_BATCH_FAILED.format(count=len(rows), table_name=table_name, error=str(e))
+            )
+        else:
+            missing = [column_names[index] for index in column_names if index not in descriptions]
+            if missing:
+                logger.warning(
+                    WARNING_COLUMN_BATCH_INCOMPLETE.format(table_name=table_name, columns=missing)
+                )
+
+    for index, row in rows.iterrows():
+        if index not in descriptions:
+            descriptions[index] = get_improved_column_description(
+                row, table_name, table_row, connection, client, table_description, database_name
+            )
+    return descriptions
+
+
 def table_in_db_check(
     table_column_description_csv: str, database_description_path: Path, tables_in_database: list, database_name: str
 ) -> Union[None, list]:
@@ -308,21 +491,41 @@ def get_table_description(table_name: str, table_description_df: pd.DataFrame) -
     return table_description
 
 
-def improve_column_descriptions_for_table(
+def prepare_improved_description_column(table_df: pd.DataFrame) -> None:
+    """
+    Ensures the improved column description column exists and can hold text.
+
+    A column read back from a CSV file without any description is read as floats, so it is
+    converted to objects before descriptions are assigned one row at a time.
+
+    Args:
+        table_df (pd.DataFrame): DataFrame containing column metadata, updated in place.
+    """
+    if IMPROVED_COLUMN_DESCRIPTIONS_COL not in table_df.columns:
+        table_df[IMPROVED_COLUMN_DESCRIPTIONS_COL] = None
+    else:
+        table_df[IMPROVED_COLUMN_DESCRIPTIONS_COL] = table_df[IMPROVED_COLUMN_DESCRIPTIONS_COL].astype(object)
+
+
+def submit_column_descriptions(
     table_df: pd.DataFrame,
     connection: sqlite3.Connection,
     table_name: str,
     database_name: str,
     improvement_client: Client,
-    table_description_df: pd.DataFrame
-) -> pd.DataFrame:
+    table_description_df: pd.DataFrame,
+    executor: Executor,
+    max_batch_tokens: int = DESCRIPTION_BATCH_MAX_TOKENS,
+) -> Dict[Future, List[int]]:
     """
-    Enhances column descriptions in a DataFrame using metadata and a language model client.
+    Submits the generation of the missing column descriptions of a table to an executor.
 
-    This function processes each row in the given DataFrame representing table columns. If a column
-    lacks an improved description and exists in the actual SQLite table, it generates an improved
-    description using a language model. Errors encountered during processing (e.g., missing columns)
-    are logged and stored in a singleton error tracking object.
+    Rows without an improved description (None or an empty cell of a resumed CSV file) whose
+    column exists in the SQLite table are submitted, in batches described by one request each
+    (see `get_improved_column_descriptions`) whose prompts fit within `max_batch_tokens`. Their
+    data types are read from the database beforehand, so the workers never use the connection.
+    Errors encountered (e.g., missing columns) are logged and stored in a singleton error
+    tracking object.
 
     Args:
         table_df (pd.DataFrame): DataFrame containing column metadata.
@@ -330,9 +533,14 @@ def improve_column_descriptions_for_table(
         table_name (str): Name of the table being processed.
         database_name (str): Name of the database (used for logging).
         improvement_client (Client): Client interface for generating improved descriptions.
+        table_description_df (pd.DataFrame): DataFrame containing the table descriptions.
+        executor (Executor): The executor generating the descriptions.
+        max_batch_tokens (int): Estimated prompt tokens of a batch, 0 to describe every column
+            in its own request.
 
     Returns:
-        pd.DataFrame: The input DataFrame updated with improved column descriptions.
+        Dict[Future, List[int]]: The indexes of the rows of every submitted batch, whose future
+        returns their descriptions by row index.
     """
 
     error_log_store = AddDescriptionErrorLogs()
@@ -348,31 +556,24 @@ def improve_column_descriptions_for_table(
     table_first_row_values = get_table_first_row_values(
         connection, table_name=table_name)
 
+    rows = []
     for index, row in table_df.iterrows():
 
         existing_column_description = row.get(
             IMPROVED_COLUMN_DESCRIPTIONS_COL, None)
 
-        # Only process rows where the improved_column_description is None
-        if existing_column_description is None:
+        # Only process rows where the improved_column_description is missing
+        if pd.isna(existing_column_description):
 
             # if column name from the dataframe exists in the database
-            if str(row[ORIG_COLUMN_NAME_COL]).strip() in column_names:
-
-                improved_description = get_improved_column_description(
-                    row,
-                    table_name,
-                    table_first_row_values,
-                    connection,
-                    improvement_client,
-                    table_description,
-                    database_name,
-                )
+            column_name = str(row[ORIG_COLUMN_NAME_COL]).strip()
+            if column_name in column_names:
 
-                # Update the improved description in the DataFrame and save it to the CSV file
-                table_df.loc[index, IMPROVED_COLUMN_DESCRIPTIONS_COL] = (
-                    improved_description
-                )
+                row = row.copy()
+                if pd.isna(row.get(DATA_FORMAT_COL)):
+                    row[DATA_FORMAT_COL] = extract_column_type_from_schema(
+                        connection, table_name, column_name)
+                rows.append(row)
 
             else:
                 error = {
@@ -390,6 +591,81 @@ def improve_column_descriptions_for_table(
                 )
             )
 
+    if not rows:
+        return {}
+
+    header_tokens = estimate_tokens(
+        COLUMN_DESCRIPTIONS_BATCH_PROMPT_TEMPLATE.format(
+            table_name=table_name,
+            table_description=table_description,
+            table_first_row_values=table_first_row_values,
+            columns="",
+        )
+    )
+    futures = {}
+    for batch in chunk_columns_by_token_budget(pd.DataFrame(rows), header_tokens, max_batch_tokens):
+        future = executor.submit(
+            get_improved_column_descriptions,
+            batch,
+            table_name,
+            table_first_row_values,
+            connection,
+            improvement_client,
+            table_description,
+            database_name,
+        )
+        futures[future] = list(batch.index)
+
+    return futures
+
+
+def improve_column_descriptions_for_table(
+    table_df: pd.DataFrame,
+    connection: sqlite3.Connection,
+    table_name: str,
+    database_name: str,
+    improvement_client: Client,
+    table_description_df: pd.DataFrame,
+    executor: Optional[Executor] = None,
+    max_batch_tokens: int = DESCRIPTION_BATCH_MAX_TOKENS,
+) -> pd.DataFrame:
+    """
+    Enhances column descriptions in a DataFrame using metadata and a language model client.
+
+    The missing descriptions of the table are generated concurrently, see
+    `submit_column_descriptions`.
+
+    Args:
+        table_df (pd.DataFrame): DataFrame containing column metadata.
+        connection (sqlite3.Connection): SQLite database connection for schema inspection.
+        table_name (str): Name of the table being processed.
+        database_name (str): Name of the database (used for logging).
+        improvement_client (Client): Client interface for generating improved descriptions.
+        table_description_df (pd.DataFrame): DataFrame containing the table descriptions.
+        executor (Optional[Executor]): The executor generating the descriptions, a pool of
+            DESCRIPTION_WORKERS threads if None.
+        max_batch_tokens (int): Estimated prompt tokens of a batch of columns described in one
+            request, 0 to describe every column in its own request.
+
+    Returns:
+        pd.DataFrame: The input DataFrame updated with improved column descriptions.
+    """
+    prepare_improved_description_column(table_df)
+
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=DESCRIPTION_WORKERS)
+    try:
+        futures = submit_column_descriptions(
+            table_df, connection, table_name, database_name, improvement_client,
+            table_description_df, executor, max_batch_tokens,
+        )
+        for future in as_completed(futures):
+            for index, description in future.result().items():
+                table_df.loc[index, IMPROVED_COLUMN_DESCRIPTIONS_COL] = description
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     return table_df
 
 
@@ -398,20 +674,31 @@ def improve_column_descriptions(
     dataset_type: DatasetType,
     improvement_client: Client,
     connection: sqlite3.Connection,
+    executor: Optional[Executor] = None,
+    max_batch_tokens: int = DESCRIPTION_BATCH_MAX_TOKENS,
 ) -> None:
     """
     Improves column descriptions for all relevant tables in a specified database.
 
     This function iterates through CSV files representing database tables, and for each one,
-    it checks if the corresponding table exists in the SQLite database. If so, it updates
-    the column descriptions using a language model client, writing the results back to the file.
-    Errors encountered during the process are collected in a singleton error tracker.
+    it checks if the corresponding table exists in the SQLite database. If so, the missing
+    column descriptions are submitted to a bounded pool in batches of columns described by one
+    request each, so that the columns of all tables are described concurrently. The CSV file of
+    a table is written again as soon as each batch of its descriptions is generated, so an
+    interrupted run only loses the descriptions in flight and resumes with the missing ones. When
+    a batch fails, the batches of the database still queued are cancelled and those already
+    running are awaited and written, so none is left in a shared pool. Errors encountered during
+    the process are collected in a singleton error tracker.
 
     Args:
         database_name (str): The name of the target database.
         dataset_type (DatasetType): Enum or identifier for the dataset type (e.g., staging, production).
         improvement_client (Client): Client used to generate improved column descriptions (e.g., an LLM wrapper).
         connection (sqlite3.Connection): SQLite connection used to query database metadata.
+        executor (Optional[Executor]): The executor generating the descriptions, a pool of
+            DESCRIPTION_WORKERS threads if None.
+        max_batch_tokens (int): Estimated prompt tokens of a batch of columns described in one
+            request, 0 to describe every column in its own request.
 
     Returns:
         None
@@ -422,6 +709,8 @@ def improve_column_descriptions(
 
     error_log_store = AddDescriptionErrorLogs()
 
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=DESCRIPTION_WORKERS)
     try:
 
         database_description_path = PATH_CONFIG.description_dir(
@@ -432,6 +721,7 @@ def improve_column_descriptions(
         table_description_df = get_table_description_df(
             database_name=database_name)
 
+        pending = {}
         for table_column_description_csv in os.listdir(database_description_path):
 
             # Only iterate over those files for seperate tables that end with .csv
@@ -450,25 +740,52 @@ def improve_column_descriptions(
                     error_log_store.errors.append(table_not_in_db)
                     continue
 
-                table_df = read_csv(os.path.join(
-                    database_description_path, table_column_description_csv))
+                table_column_description_csv_path = os.path.join(
+                    database_description_path, table_column_description_csv)
+                table_df = read_csv(table_column_description_csv_path)
+                prepare_improved_description_column(table_df)
 
-                updated_table_df = improve_column_descriptions_for_table(
+                futures = submit_column_descriptions(
                     table_df=table_df,
                     connection=connection,
                     table_name=table_name,
                     database_name=database_name,
                     improvement_client=improvement_client,
-                    table_description_df=table_description_df
+                    table_description_df=table_description_df,
+                    executor=executor,
+                    max_batch_tokens=max_batch_tokens,
                 )
+                for future in futures:
+                    pending[future] = (table_df, table_column_description_csv_path)
 
-                updated_table_df.to_csv(os.path.join(
-                    database_description_path, table_column_description_csv), index=False)
+        def checkpoint(future: Future) -> None:
+            table_df, table_column_description_csv_path = pending[future]
+            for index, description in future.result().items():
+                table_df.loc[index, IMPROVED_COLUMN_DESCRIPTIONS_COL] = description
+
+            # Checkpoint every batch of descriptions so that a crash only loses the ones in flight
+            table_df.to_csv(table_column_description_csv_path, index=False)
+
+        completed = set()
+        try:
+            for future in tqdm(as_completed(pending), total=len(pending), desc=f"Describing columns of {database_name}"):
+                completed.add(future)
+                checkpoint(future)
+        except Exception:
+            for future in pending:
+                future.cancel()
+            for future in pending.keys() - completed:
+                if not future.cancelled() and future.exception() is None:
+                    checkpoint(future)
+            raise
 
     except Exception as e:
         error_log_store.errors.append(
             {"database": database_name, "error": f"{str(e)}"})
         raise RuntimeError(str(e))
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
 
 
 def create_database_tables_csv(
@@ -807,36 +1124,39 @@ def add_database_descriptions(
         if os.path.isdir(os.path.join(dataset_dir, d))
     ]
 
-    for database in tqdm(databases, desc="Generating Descriptions for databases"):
-        try:
-            with sqlite3.connect(
-                PATH_CONFIG.sqlite_path(
-                    database_name=database, dataset_type=dataset_type
-                )
-            ) as connection:
+    # One pool of description workers is shared by all databases
+    with ThreadPoolExecutor(max_workers=DESCRIPTION_WORKERS) as executor:
+        for database in tqdm(databases, desc="Generating Descriptions for databases"):
+            try:
+                with sqlite3.connect(
+                    PATH_CONFIG.sqlite_path(
+                        database_name=database, dataset_type=dataset_type
+                    )
+                ) as connection:
 
-                ensure_description_files_exist(
-                    database_name=database,
-                    dataset_type=dataset_type,
-                    connection=connection,
-                )
-                create_database_tables_csv(
-                    database_name=database,
-                    dataset_type=dataset_type,
-                    client=client,
-                    connection=connection,
-                )
-                if len(error_log_store.errors) == 0:
-                    improve_column_descriptions(
+                    ensure_description_files_exist(
                         database_name=database,
                         dataset_type=dataset_type,
-                        improvement_client=client,
                         connection=connection,
                     )
+                    create_database_tables_csv(
+                        database_name=database,
+                        dataset_type=dataset_type,
+                        client=client,
+                        connection=connection,
+                    )
+                    if len(error_log_store.errors) == 0:
+                        improve_column_descriptions(
+                            database_name=database,
+                            dataset_type=dataset_type,
+                            improvement_client=client,
+                            connection=connection,
+                            executor=executor,
+                        )
 
-        except Exception as e:
-            logger.error(
-                f"Error processing database {database}: {e}", exc_info=True)
+            except Exception as e:
+                logger.error(
+                    f"Error processing database {database}: {e}", exc_info=True)
 
     if error_log_store.errors:
         for error in error_log_store.errors:
@@ -861,6 +1181,12 @@ if __name__ == "__main__":
         - Detailed logs for each database processed, including errors (if any).
 
     4. Notes:
+        - Column descriptions are generated by DESCRIPTION_WORKERS threads (.env), across the columns of all
+          tables of a database. Set LLM_REQUESTS_PER_MINUTE to stay within the rate limit of the provider.
+        - The columns of a table are described in batches of one request each, within DESCRIPTION_BATCH_MAX_TOKENS
+          estimated prompt tokens (.env). Set it to 0 to describe every column in its own request.
+        - Each description is written to its CSV file as soon as it is generated. If the script is interrupted,
+          run it again: only the columns without an improved description are described.
         - BIRD_DEV: There should be no errors during processing; the dataset is expected to be clean and consistent.
         - BIRD_TRAIN: Errors are expected and will require manual resolution, such as renaming files or correcting column names.
     """
@@ -0,0 +1,186 @@
+import copy
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from tqdm import tqdm
+from utilities.bird_utils import (ensure_global_bird_test_file_path,
+                                  get_database_list, load_json_from_file,
+                                  save_json_to_file)
+from utilities.config import PATH_CONFIG
+from utilities.constants.bird_utils.indexing_constants import (
+    DB_ID_KEY, QUESTION_KEY, RUNTIME_FEW_SHOTS_KEY)
+from utilities.constants.preprocess.add_few_shot_examples.response_messages import (
+    ERROR_FAILED_TO_ADD_FEW_SHOTS, ERROR_PROCESSING_DATABASE_TEST_FILE,
+    INFO_ADDING_FEW_SHOTS, INFO_FEW_SHOTS_UP_TO_DATE,
+    INFO_PROCESSING_DATABASES)
+from utilities.logging_utils import setup_logger
+from utilities.vectorize import fetch_few_shots_batch
+
+# Configuration Constants
+TOP_K_FEW_SHOTS_CONFIG = 10
+QUERY_BATCH_SIZE = 512
+UPDATE_DATABASE_SPECIFIC_TEST_FILES = False
+
+logger = setup_logger(__name__)
+
+
+def items_missing_few_shots(items: List[Dict[str, Any]], top_k: int) -> List[int]:
+    """
+    Returns the indices of items that have no precomputed few shots, or fewer than top_k.
+
+    Args:
+        items (List[Dict[str, Any]]): BIRD test items.
+        top_k (int): Number of few shots each item should carry.
+
+    Returns:
+        List[int]: Indices of the items that still need their few shots computed.
+    """
+    return [
+        index
+        for index, item in enumerate(items)
+        if len(item.get(RUNTIME_FEW_SHOTS_KEY) or []) < top_k
+    ]
+
+
+def add_few_shots_to_bird_items(
+    items: List[Dict[str, Any]],
+    top_k: int = TOP_K_FEW_SHOTS_CONFIG,
+    batch_size: int = QUERY_BATCH_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Returns copies of the items with their top_k most similar sample questions attached
+    under RUNTIME_FEW_SHOTS_KEY.
+
+    All missing questions are embedded and searched in batches of `batch_size`, so the
+    whole test set costs a handful of matrix queries instead of one lookup per prompt.
+
+    Args:
+        items (List[Dict[str, Any]]): BIRD test items; each must include a QUESTION_KEY.
+        top_k (int): Number of few shots to store per item.
+        batch_size (int): Number of questions searched per batched lookup.
+
+    Returns:
+        List[Dict[str, Any]]: A copy of the items with few shots added.
+    """
+    updated_items = copy.deepcopy(items)  # avoid side-effects
+    missing = items_missing_few_shots(updated_items, top_k)
+    if not missing:
+        logger.info(INFO_FEW_SHOTS_UP_TO_DATE.format(count=len(updated_items)))
+        return updated_items
+
+    logger.info(INFO_ADDING_FEW_SHOTS.format(count=len(missing)))
+    for start in tqdm(range(0, len(missing), batch_size)):
+        batch = missing[start : start + batch_size]
+        few_shots = fetch_few_shots_batch(
+            top_k, [updated_items[index][QUESTION_KEY] for index in batch]
+        )
+        for index, item_few_shots in zip(batch, few_shots):
+            updated_items[index][RUNTIME_FEW_SHOTS_KEY] = item_few_shots
+
+    return updated_items
+
+
+def process_each_database_test_file_with_few_shots(dataset_dir: Path, top_k: int) -> None:
+    """
+    Load, annotate and save the test file of every database with precomputed few shots.
+
+    Each database is selected before its lookups, since the sample questions are kept per
+    database when they come from the test dataset itself.
+
+    Args:
+        dataset_dir (Path): Root directory containing database subdirectories.
+        top_k (int): Number of few shots to store per item.
+    """
+    databases = get_database_list(dataset_directory=dataset_dir)
+
+    for database_name in tqdm(databases, desc=INFO_PROCESSING_DATABASES):
+        file_path = PATH_CONFIG.processed_test_path(database_name=database_name)
+        try:
+            PATH_CONFIG.set_database(database_name)
+            items = load_json_from_file(file_path)
+            save_json_to_file(file_path, add_few_shots_to_bird_items(items, top_k))
+        except Exception as e:
+            logger.error(
+                ERROR_PROCESSING_DATABASE_TEST_FILE.format(
+                    database_name=database_name, error=str(e)
+                )
+            )
+
+
+def process_global_test_file_with_few_shots(test_file: Path, top_k: int) -> None:
+    """
+    Load, annotate and save the global test file with precomputed few shots.
+
+    The items are annotated database by database, with the database selected before its
+    lookups, and saved in their original order.
+
+    Args:
+        test_file (Path): Path to the JSON test file containing BIRD examples from multiple DBs.
+        top_k (int): Number of few shots to store per item.
+    """
+    items = load_json_from_file(test_file)
+    indices_by_database = defaultdict(list)
+    for index, item in enumerate(items):
+        indices_by_database[item[DB_ID_KEY]].append(index)
+
+    updated_items = list(items)
+    for database_name, indices in indices_by_database.items():
+        PATH_CONFIG.set_database(database_name)
+        database_items = add_few_shots_to_bird_items([items[index] for index in indices], top_k)
+        for index, item in zip(indices, database_items):
+            updated_items[index] = item
+
+    save_json_to_file(test_file, updated_items)
+
+
+def run_few_shot_annotation_pipeline() -> None:
+    """
+    Main pipeline execution entry point.
+    Annotates the configured test file(s) with their most similar sample questions.
+    """
+    if UPDATE_DATABASE_SPECIFIC_TEST_FILES:
+        process_each_database_test_file_with_few_shots(
+            PATH_CONFIG.dataset_dir(), TOP_K_FEW_SHOTS_CONFIG
+        )
+    else:
+        test_file = ensure_global_bird_test_file_path(
+            PATH_CONFIG.processed_test_path(global_file=True)
+        )
+        process_global_test_file_with_few_shots(test_file, TOP_K_FEW_SHOTS_CONFIG)
+
+
+def main():
+    """
+    Main function to execute the script.
+    It runs the few shot annotation pipeline.
+    """
+    try:
+        run_few_shot_annotation_pipeline()
+    except Exception as e:
+        logger.error(ERROR_FAILED_TO_ADD_FEW_SHOTS.format(error=str(e)))
+
+
+if __name__ == "__main__":
+    """
+    To run this script:
+
+    1. Ensure you have set the correct DATASET_TYPE and SAMPLE_DATASET_TYPE in .env:
+    - DATASET_TYPE selects the test set whose items are annotated.
+    - SAMPLE_DATASET_TYPE selects the sample questions the few shots are taken from.
+
+    2. Configuration Options:
+    - In the script, several constants at the top of the file control the processing mode:
+        • TOP_K_FEW_SHOTS_CONFIG (int): Number of few shots stored per item. Keep it at least as
+          large as the largest number of shots used by any candidate or refiner config.
+        • QUERY_BATCH_SIZE (int): Number of questions searched per batched lookup.
+        • UPDATE_DATABASE_SPECIFIC_TEST_FILES (bool): Set to True to annotate the test file of every
+          database in DATASET_DIR instead of the global processed test file.
+
+    3. Expected Outputs:
+    - The test data JSON file(s) will be updated in-place with an added "runtime_few_shots" field for
+      each item. Items that already carry enough few shots are left untouched, so the script can be
+      re-run safely. Prompt builders use these few shots instead of querying the vector store.
+    """
+
+    main()
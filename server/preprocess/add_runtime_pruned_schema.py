@@ -16,8 +16,8 @@ from utilities.constants.bird_utils.indexing_constants import (
     EVIDENCE_KEY, QUESTION_KEY, RUNTIME_SCHEMA_USED_KEY)
 from utilities.constants.services.llm_enums import LLMConfig, LLMType, ModelType
 from utilities.constants.preprocess.add_runtime_pruned_schema.indexing_constants import (
-    KEYWORD_EXTRACTION_CLIENT_KEY, LSH_KEY, MINHASH_KEY,
-    TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY, TOP_K_VALUE_MATCHES_KEY)
+    KEYWORD_EXTRACTION_CLIENT_KEY, TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY,
+    TOP_K_VALUE_MATCHES_KEY, VALUE_INDEX_KEY)
 from utilities.constants.preprocess.add_runtime_pruned_schema.response_messages import (
     ERROR_FAILED_ITEM, ERROR_FAILED_TO_ADD_PRUNED_SCHEMA,
     ERROR_PROCESSING_DATABASE_GLOBAL_FILE, ERROR_PROCESSING_DATABASE_TEST_FILE,
@@ -25,8 +25,10 @@ from utilities.constants.preprocess.add_runtime_pruned_schema.response_messages
 from utilities.logging_utils import setup_logger
 from utilities.schema_linking.schema_linking_utils import \
     select_relevant_schema
-from utilities.schema_linking.value_retrieval import (
-    create_lsh_for_all_databases, load_db_lsh)
+from utilities.schema_linking.value_index_registry import \
+    VALUE_INDEX_REGISTRY
+from utilities.schema_linking.value_retrieval import \
+    create_lsh_for_all_databases
 from utilities.vectorize import make_column_description_collection
 
 # File Constants
@@ -97,18 +99,18 @@ def update_pipeline_configuration(
         pipeline_args (Optional[Dict[str, Any]]): The current pipeline arguments.
 
     Returns:
-        Optional[Dict[str, Any]]: Updated pipeline arguments including LSH and MinHash,
-                                  or None if no args are provided.
+        Optional[Dict[str, Any]]: Updated pipeline arguments including the LSH value index,
+                                  or None if no args are provided. The index is served by the
+                                  process-wide value index registry, so it is opened only once.
     """
     if not existing_pipeline_args:
         return None
 
     make_column_description_collection()
-    lsh, minhash = load_db_lsh(database_name)
+    value_index = VALUE_INDEX_REGISTRY.get(database_name)
 
     updated_args = copy.deepcopy(existing_pipeline_args)  # avoid side-effects
-    updated_args[LSH_KEY] = lsh
-    updated_args[MINHASH_KEY] = minhash
+    updated_args[VALUE_INDEX_KEY] = value_index
 
     return updated_args
 
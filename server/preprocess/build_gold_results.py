@@ -0,0 +1,150 @@
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from tqdm import tqdm
+from utilities.bird_utils import get_database_list, load_json_from_file
+from utilities.config import GOLD_RESULT_TIMEOUT_SECONDS, PATH_CONFIG
+from utilities.constants.bird_utils.indexing_constants import (DB_ID_KEY,
+                                                               QUESTION_ID_KEY,
+                                                               SQL)
+from utilities.constants.preprocess.build_gold_results.response_messages import (
+    ERROR_BUILDING_GOLD_RESULTS, ERROR_FAILED_TO_BUILD_GOLD_RESULTS,
+    INFO_BUILDING_GOLD_RESULTS, INFO_GOLD_RESULTS_STORED)
+from utilities.execution_cache import get_execution_executor
+from utilities.gold_result_store import GoldResultStore, get_gold_result_store
+from utilities.logging_utils import setup_logger
+
+# Configuration Constants
+DATABASES_TO_PROCESS: List[str] = []
+REBUILD = False
+
+logger = setup_logger(__name__)
+
+
+def load_gold_items(database_name: str) -> List[Dict]:
+    """
+    Load the questions of a database with their gold queries.
+
+    The processed test file of the database is used when it exists, since evaluations key
+    their predictions by its question ids, and the global BIRD file otherwise.
+
+    Args:
+        database_name (str): The name of the database.
+
+    Returns:
+        List[Dict]: The questions of the database.
+    """
+    test_file = PATH_CONFIG.processed_test_path(database_name=database_name)
+    if test_file is not None and Path(test_file).exists():
+        return load_json_from_file(test_file)
+    return [
+        item
+        for item in load_json_from_file(PATH_CONFIG.bird_file_path())
+        if item[DB_ID_KEY] == database_name
+    ]
+
+
+def build_gold_results(
+    dataset_dir: Path,
+    database_names: Optional[List[str]] = None,
+    rebuild: bool = False,
+    store: Optional[GoldResultStore] = None,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Execute the gold query of every question once and keep its result in the gold result store.
+
+    Questions already stored for the current database file and gold query are skipped. The
+    checksum of each database file is computed before its queries run concurrently on the
+    execution worker threads, which then all reuse it.
+
+    Args:
+        dataset_dir (Path): Root directory containing database subdirectories.
+        database_names (Optional[List[str]]): Databases to process, all of them when empty.
+        rebuild (bool): Execute every gold query again, even if its result is stored.
+        store (Optional[GoldResultStore]): The store to fill, the process-wide one if None.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Number of executed, reused and failed gold queries of
+        every database processed successfully.
+    """
+    store = store if store is not None else get_gold_result_store()
+    databases = database_names or get_database_list(dataset_directory=dataset_dir)
+    executor = get_execution_executor()
+
+    built = {}
+    for database_name in tqdm(databases, desc=INFO_BUILDING_GOLD_RESULTS):
+        try:
+            items = load_gold_items(database_name)
+            store.checksum(database_name)
+            pending = [
+                item
+                for item in items
+                if rebuild or store.get(item[QUESTION_ID_KEY], database_name, item[SQL]) is None
+            ]
+            futures = [
+                executor.submit(
+                    store.compute,
+                    item[QUESTION_ID_KEY],
+                    database_name,
+                    item[SQL],
+                    GOLD_RESULT_TIMEOUT_SECONDS,
+                )
+                for item in pending
+            ]
+            failed = sum(future.result().error is not None for future in as_completed(futures))
+
+            stats = {
+                "executed": len(pending),
+                "reused": len(items) - len(pending),
+                "failed": failed,
+            }
+            logger.info(INFO_GOLD_RESULTS_STORED.format(database_name=database_name, **stats))
+            built[database_name] = stats
+        except Exception as e:
+            logger.error(
+                ERROR_BUILDING_GOLD_RESULTS.format(database_name=database_name, error=str(e))
+            )
+
+    return built
+
+
+def main():
+    """
+    Main function to execute the script.
+    It stores the gold results of the configured databases.
+    """
+    try:
+        build_gold_results(PATH_CONFIG.dataset_dir(), DATABASES_TO_PROCESS, REBUILD)
+    except Exception as e:
+        logger.error(ERROR_FAILED_TO_BUILD_GOLD_RESULTS.format(error=str(e)))
+
+
+if __name__ == "__main__":
+    """
+    To run this script:
+
+    1. Ensure you have set the correct DATASET_TYPE in .env. The gold queries of its questions
+       are executed and stored in gold_results/<dataset_type>.sqlite.
+
+    2. Configuration Options:
+    - In the script, several constants at the top of the file control the processing mode:
+        • DATABASES_TO_PROCESS (List[str]): Databases to process. Leave empty to process every
+          database in DATASET_DIR.
+        • REBUILD (bool): Set to True to execute every gold query again. By default only
+          questions without a stored result for the current database file and gold query are
+          executed.
+    - GOLD_RESULT_TIMEOUT_SECONDS in .env sets the deadline of each gold query.
+
+    3. Expected Outputs:
+    - The set, multiset and ordered hashes, the row count, the error and the execution time of
+      every gold query, keyed by question id and database checksum. The BIRD evaluations, the
+      selection metadata and the selection benchmark read the gold results from the store and
+      only execute the predictions.
+
+    Run the script from server directory as follows:
+
+    PYTHONPATH=$(pwd) python3 -u ./preprocess/build_gold_results.py
+    """
+
+    main()
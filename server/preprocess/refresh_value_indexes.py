@@ -0,0 +1,102 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from tqdm import tqdm
+from utilities.bird_utils import get_database_list
+from utilities.config import PATH_CONFIG
+from utilities.constants.preprocess.refresh_value_indexes.response_messages import (
+    ERROR_FAILED_TO_REFRESH_VALUE_INDEXES, ERROR_REFRESHING_VALUE_INDEX,
+    INFO_REFRESHING_VALUE_INDEXES, INFO_VALUE_INDEX_REFRESHED)
+from utilities.logging_utils import setup_logger
+from utilities.schema_linking.value_index_registry import \
+    VALUE_INDEX_REGISTRY
+from utilities.schema_linking.value_retrieval import refresh_db_value_index
+
+# Configuration Constants
+DATABASES_TO_REFRESH: List[str] = []
+FULL_CONTENT_CHECK = False
+
+logger = setup_logger(__name__)
+
+
+def refresh_value_indexes(
+    dataset_dir: Path,
+    database_names: Optional[List[str]] = None,
+    full: bool = False,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Refresh the value index of every given database with the configured VALUE_INDEX_ENGINE,
+    re-indexing only the changed columns.
+
+    Args:
+        dataset_dir (Path): Root directory containing database subdirectories.
+        database_names (Optional[List[str]]): Databases to refresh, all of them when empty.
+        full (bool): Rescan every candidate column instead of only those of tables whose
+            row count or maximum rowid changed.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Refresh statistics of every database refreshed successfully.
+    """
+    databases = database_names or get_database_list(dataset_directory=dataset_dir)
+
+    refreshed = {}
+    for database_name in tqdm(databases, desc=INFO_REFRESHING_VALUE_INDEXES):
+        try:
+            stats = refresh_db_value_index(database_name, full=full)
+            VALUE_INDEX_REGISTRY.evict(database_name)
+            logger.info(
+                INFO_VALUE_INDEX_REFRESHED.format(database_name=database_name, **stats)
+            )
+            refreshed[database_name] = stats
+        except Exception as e:
+            logger.error(
+                ERROR_REFRESHING_VALUE_INDEX.format(
+                    database_name=database_name, error=str(e)
+                )
+            )
+
+    return refreshed
+
+
+def main():
+    """
+    Main function to execute the script.
+    It refreshes the value indexes of the configured databases.
+    """
+    try:
+        refresh_value_indexes(
+            PATH_CONFIG.dataset_dir(), DATABASES_TO_REFRESH, FULL_CONTENT_CHECK
+        )
+    except Exception as e:
+        logger.error(ERROR_FAILED_TO_REFRESH_VALUE_INDEXES.format(error=str(e)))
+
+
+if __name__ == "__main__":
+    """
+    To run this script:
+
+    1. Ensure you have set the correct DATASET_TYPE in .env. The value indexes of its databases
+       are refreshed in place.
+
+    2. Configuration Options:
+    - In the script, several constants at the top of the file control the processing mode:
+        • DATABASES_TO_REFRESH (List[str]): Databases to refresh. Leave empty to refresh every
+          database in DATASET_DIR.
+        • FULL_CONTENT_CHECK (bool): Set to True to rescan every indexed column. By default only
+          columns of tables whose row count or maximum rowid changed are rescanned, which misses
+          in-place UPDATEs that keep both unchanged.
+
+    3. Expected Outputs:
+    - Each value index stores a fingerprint (row count, max rowid and a hash of the distinct
+      values) for every candidate column. Only columns whose fingerprint changed are re-indexed.
+      The index of the configured VALUE_INDEX_ENGINE is refreshed: the MinHash LSH only signs the
+      values the changed columns gained, the FTS5 index is rebuilt from the updated unique values
+      and replaces the old one. Indexes built before fingerprints existed are rebuilt from scratch
+      once. The unique values file is updated to match.
+
+    Run the script from server directory as follows:
+
+    PYTHONPATH=$(pwd) python3 -u ./preprocess/refresh_value_indexes.py
+    """
+
+    main()
@@ -5,4 +5,10 @@ echo '''Adding descriptions to Testing Dataset'''
 python3 -u ./preprocess/add_descriptions_bird_dataset.py
 
 echo '''Adding runtime pruned schema to Testing items'''
-python3 -u ./preprocess/add_runtime_pruned_schema.py
\ No newline at end of file
+python3 -u ./preprocess/add_runtime_pruned_schema.py
+
+echo '''Adding few shots to Testing items'''
+python3 -u ./preprocess/add_few_shot_examples.py
+
+echo '''Storing gold results of Testing items'''
+python3 -u ./preprocess/build_gold_results.py
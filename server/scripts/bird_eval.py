@@ -1,14 +1,12 @@
 import argparse
 import json
-import multiprocessing as mp
 import os
-import sqlite3
-import sys
 from datetime import datetime
 
 import pandas as pd
-from func_timeout import FunctionTimedOut, func_timeout
 from utilities.config import PATH_CONFIG
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.execution_evaluation import EvaluationTask, evaluate_tasks
 
 
 def load_json(dir):
@@ -16,50 +14,10 @@ def load_json(dir):
         contents = json.loads(j.read())
     return contents
 
-def result_callback(result):
-    exec_result.append(result)
-
-
-def execute_sql(predicted_sql,ground_truth, db_path):
-    conn = sqlite3.connect(db_path)
-    # Connect to the database
-    cursor = conn.cursor()
-    cursor.execute(predicted_sql)
-    predicted_res = cursor.fetchall()
-    cursor.execute(ground_truth)
-    ground_truth_res = cursor.fetchall()
-    res = 0
-    if set(predicted_res) == set(ground_truth_res):
-        res = 1
-    return res
-
-
-
-def execute_model(predicted_sql,ground_truth, db_place, idx, meta_time_out):
-    try:
-        res = func_timeout(meta_time_out, execute_sql,
-                                  args=(predicted_sql, ground_truth, db_place))
-        error=None
-    except KeyboardInterrupt:
-        sys.exit(0)
-    except FunctionTimedOut:
-        result = [(f'timeout',)]
-        res = 0
-    except Exception as e:
-        split_dir=str(db_place).split('/')
-        db=split_dir[-1][:-7]
-        result = [(f'error',)]  # possibly len(query) > 512 or not executable
-        res = 0
-        error=e
-
-    result = {'sql_idx': idx, 'res': res, 'error':[predicted_sql, error]}
-
-    return result
-
-
 def package_sqls_pred(sql_path, db_root_path):
     clean_sqls = []
     db_path_list = []
+    question_ids = []
     
     sql_data = json.load(open(sql_path, 'r'))
     for idx, sql_str in sql_data.items():
@@ -69,10 +27,9 @@ def package_sqls_pred(sql_path, db_root_path):
             sql, db_name = " ", "financial"
         clean_sqls.append(sql)
         db_path_list.append(db_root_path)
+        question_ids.append(int(idx))
 
-  
-
-    return clean_sqls, db_path_list
+    return clean_sqls, db_path_list, question_ids
 
 def package_sqls_gold(sql_path, db_root_path):
     clean_sqls = []
@@ -88,21 +45,9 @@ def package_sqls_gold(sql_path, db_root_path):
 
     return clean_sqls, db_path_list
 
-def run_sqls_parallel(sqls, db_places, num_cpus=1, meta_time_out=30.0):
-    pool = mp.Pool(processes=num_cpus)
-    for i,sql_pair in enumerate(sqls):
-
-        predicted_sql, ground_truth = sql_pair
-        pool.apply_async(execute_model, args=(predicted_sql, ground_truth, db_places[i], i, meta_time_out), callback=result_callback)
-    pool.close()
-    pool.join()
-
-def sort_results(list_of_dicts):
-  return sorted(list_of_dicts, key=lambda x: x['sql_idx'])
-
 def compute_acc_by_diff(exec_results,diff_json_path):
     num_queries = len(exec_results)
-    results = [res['res'] for res in exec_results]
+    results = [int(res.correct) for res in exec_results]
     all_acc = sum(results)/num_queries
     return all_acc * 100, num_queries-sum(results)
 
@@ -118,66 +63,78 @@ def print_data(score_lists,count_lists):
 
 
 if __name__ == '__main__':
-
-
-    directories = [d for d in os.listdir(PATH_CONFIG.dataset_dir()) if os.path.isdir(os.path.join(PATH_CONFIG.dataset_dir(), d))]
-
+    """
+    This script evaluates the formatted predictions of every database in the dataset directory
+    on the execution evaluation engine and writes the accuracy, errors and mismatches per
+    database to the BIRD results directory. Questions of all databases are evaluated by one
+    pool of worker processes. Gold results are read from the gold result store filled by
+    preprocess/build_gold_results.py, so only the predictions are executed.
+    Run the script from server directory as follows:
+
+    python -m scripts.bird_eval
+    python -m scripts.bird_eval --num_cpus 8 --meta_time_out 30 --comparison multiset
+    """
+    args_parser = argparse.ArgumentParser()
     # allocate number of CPUs for concurrency
-    num_cpus=16
-    # max timeout value for a thread
-    meta_time_out=30.0
+    args_parser.add_argument('--num_cpus', type=int, default=16)
+    # max timeout value for a query
+    args_parser.add_argument('--meta_time_out', type=float, default=30.0)
+    args_parser.add_argument('--comparison', type=str, default=ComparisonMode.SET.value,
+                             choices=[mode.value for mode in ComparisonMode])
+    args = args_parser.parse_args()
 
-    acc_string=[]
-    acc_score=[]
-    score_dict={"database":[],"accuracy":[],"num_queries":[], 'errors':[],'mismatch':[]}
-    errors={} 
-    db_error_count={}
-    total_error_count=0
-    total_mismatch=0
+    directories = [d for d in os.listdir(PATH_CONFIG.dataset_dir()) if os.path.isdir(os.path.join(PATH_CONFIG.dataset_dir(), d))]
 
+    tasks = []
+    database_paths = {}
+    predicted_queries = {}
     for database in directories:
         predicted_sql_path=PATH_CONFIG.formatted_predictions_path(database_name=database)
         ground_truth_path=PATH_CONFIG.test_gold_path(database_name=database)
         db_path=PATH_CONFIG.sqlite_path(database_name=database)
-        diff_json_path=PATH_CONFIG.processed_test_path(database_name=database)
 
         if not os.path.exists(predicted_sql_path):
             print(f"Cant find predicted queries for {database}")
             continue
 
-        exec_result = []
-
-        pred_queries, db_paths = package_sqls_pred(predicted_sql_path, db_path)
-    
-        gt_queries, db_paths_gt = package_sqls_gold(ground_truth_path, db_path)
-
-
-        print("Running for DB:",database)
-        query_pairs = list(zip(pred_queries,gt_queries))
         try:
-            run_sqls_parallel(query_pairs, db_places=db_paths, num_cpus=num_cpus, meta_time_out=meta_time_out)
-            exec_result = sort_results(exec_result)
-            
-        
-            acc,mismatched= compute_acc_by_diff(exec_result,diff_json_path)
+            pred_queries, _, question_ids = package_sqls_pred(predicted_sql_path, db_path)
+            gt_queries, _ = package_sqls_gold(ground_truth_path, db_path)
+        except Exception as e:
+            print(f"Failure for {database} because of: {e}")
+            continue
 
-            score_dict['database'].append(database)
-            score_dict['accuracy'].append(acc)
-            score_dict['num_queries'].append(len(query_pairs))
-            
+        database_paths[database] = db_path
+        for predicted_sql, gold_sql, question_id in zip(pred_queries, gt_queries, question_ids):
+            predicted_queries[len(tasks)] = predicted_sql
+            tasks.append(EvaluationTask(index=len(tasks), database=database, predicted_sql=predicted_sql,
+                                        gold_sql=gold_sql, question_id=question_id))
 
-            acc_string.append(f"Total Accuracy for {database}: {acc}\n")
-            acc_score.append(acc)
+    exec_results = {database: [] for database in database_paths}
+    for result in evaluate_tasks(tasks, database_paths, mode=ComparisonMode(args.comparison),
+                                 timeout=args.meta_time_out, num_workers=args.num_cpus,
+                                 gold_store_path=PATH_CONFIG.gold_results_path()):
+        exec_results[result.database].append(result)
 
-        except Exception as e: 
-            print(f"Failure for {database} because of: {e}")
-            acc_score.append(f"Failure on DB: {database}")
-        db_error=[]
-       
-        for error in exec_result:
-            if not error['error'][1]==None:
-                db_error.append(f"Predicted: {error['error'][0]}, Error: {error['error'][1]}")
-            
+    score_dict={"database":[],"accuracy":[],"num_queries":[], 'errors':[],'mismatch':[]}
+    errors={}
+    db_error_count={}
+    total_error_count=0
+    total_mismatch=0
+
+    for database, exec_result in exec_results.items():
+        if not exec_result:
+            continue
+        acc, mismatched = compute_acc_by_diff(exec_result, PATH_CONFIG.processed_test_path(database_name=database))
+        score_dict['database'].append(database)
+        score_dict['accuracy'].append(acc)
+        score_dict['num_queries'].append(len(exec_result))
+
+        db_error = [
+            f"Predicted: {predicted_queries[result.index]}, Error: {result.error}"
+            for result in exec_result
+            if result.error is not None
+        ]
         errors[database]=db_error
         error_count=len(db_error)
         mismatched=mismatched-error_count
@@ -208,4 +165,3 @@ if __name__ == '__main__':
             file.write('\n\n')
 
         file.close()
-
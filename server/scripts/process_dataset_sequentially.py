@@ -9,12 +9,16 @@ from services.clients.client_factory import ClientFactory
 from tqdm import tqdm
 from utilities.candidate_selection import xiyan_basic_llm_selector
 from utilities.config import PATH_CONFIG
+from utilities.constants.bird_utils.indexing_constants import \
+    RUNTIME_FEW_SHOTS_KEY
 from utilities.constants.services.llm_enums import LLMConfig, LLMType, ModelType
 from utilities.constants.prompts_enums import (FormatType, PromptType,
                                                RefinerPromptType)
 from utilities.logging_utils import setup_logger
+from utilities.prediction_log import LoggedPrediction, append_prediction
 from utilities.prompts.prompt_factory import PromptFactory
 from utilities.selection_metadata_collection import SelectionMetadata
+from utilities.sql_canonicalization import group_equivalent_candidates
 from utilities.sql_improvement import improve_sql_query
 from utilities.utility_functions import check_config_types, format_sql_response
 from utilities.vectorize import make_samples_collection
@@ -47,6 +51,7 @@ def generate_sql(candidate: Dict, item: Dict, database: str) -> List:
         prompt = PromptFactory.get_prompt_class(
             prompt_type=candidate["prompt_config"]["type"],
             target_question=item["question"],
+            examples=item.get(RUNTIME_FEW_SHOTS_KEY),
             shots=candidate["prompt_config"]["shots"],
             schema_format=candidate["prompt_config"]["format_type"],
             schema=item["runtime_schema_used"] if candidate["prune_schema"] else None,
@@ -80,6 +85,7 @@ def generate_sql(candidate: Dict, item: Dict, database: str) -> List:
                     ),
                     refiner_prompt_type=improve_config["prompt_config"]["type"],
                     chat_mode=improve_config["prompt_config"]["chat_mode"],
+                    examples=item.get(RUNTIME_FEW_SHOTS_KEY),
                 )
             except Exception as e:
                 logger.error(f"Error improving SQL query: {str(e)}")
@@ -152,9 +158,12 @@ def process_database(
                         logger.error(f"Error processing candidate in database {database}: {e}", exc_info=True)
                         raise
 
-            if len(all_results) > 1:
+            # Collapse equivalent candidates, the selector only runs when distinct ones remain
+            candidate_groups = group_equivalent_candidates(all_results)
+
+            if len(candidate_groups) > 1:
                 sql, config_id = xiyan_basic_llm_selector(
-                    all_results,
+                    [(group.sql, group.config_id) for group in candidate_groups],
                     item["question"],
                     selector_client,
                     database,
@@ -162,7 +171,7 @@ def process_database(
                     item["evidence"],
                 )
             else:
-                sql, config_id = all_results[0][0], all_results[0][1]
+                sql, config_id = candidate_groups[0].sql, candidate_groups[0].config_id
 
             if collect_data:
                 selection_metadata.update_selection_metadata(
@@ -170,6 +179,7 @@ def process_database(
                     gold_sql=item["SQL"],
                     database=database,
                     selected_config=config_id,
+                    question_id=item["question_id"],
                 )
 
             predicted_scripts[int(item["question_id"])] = (
@@ -185,6 +195,17 @@ def process_database(
                 for line in gold_items:
                     file.write(f"{line}\n")
 
+            # Let the streaming evaluation score the prediction while the run continues
+            append_prediction(
+                LoggedPrediction(
+                    question_id=int(item["question_id"]),
+                    database=database,
+                    predicted_sql=sql,
+                    gold_sql=item["SQL"],
+                    difficulty=item.get("difficulty"),
+                )
+            )
+
             if collect_data:
                 selection_metadata.save_metadata()
 
@@ -294,6 +315,8 @@ if __name__ == "__main__":
     5. Expected Outputs:
         - Formatted Predictions: Predictions for each processed database are saved.
         - Gold SQL Scripts: Gold standard SQL scripts are saved alongside predictions.
+        - Prediction Log: Every prediction is also appended to the prediction log of the dataset, which
+          `python -m scripts.stream_eval` tails to report the accuracy while the run is in progress.
 
     6. Additional Notes:
         - Processing includes formatting predictions, executing LLM prompts, and saving results. The script pauses for a short delay between processing to manage API rate limits.
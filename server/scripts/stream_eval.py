@@ -0,0 +1,74 @@
+import argparse
+import time
+from pathlib import Path
+
+from utilities.bird_utils import get_database_list
+from utilities.config import PATH_CONFIG
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.constants.utilities.streaming_evaluation.response_messages import \
+    WARNING_ACCURACY_BELOW_THRESHOLD
+from utilities.logging_utils import setup_logger
+from utilities.streaming_evaluation import StreamingEvaluator
+
+logger = setup_logger(__name__)
+
+
+if __name__ == '__main__':
+    """
+    This script scores the predictions of a running `scripts.process_dataset_sequentially` run as
+    they are produced. It tails the prediction log of the dataset, evaluates every new prediction
+    against the gold result of its question from the gold result store in --num_cpus background
+    worker processes, and prints the accuracy by difficulty and by database whenever new predictions
+    are scored. Once --min_questions predictions are scored, a warning is logged while the accuracy
+    is below --min_accuracy, so that a bad run can be stopped early. With --once the predictions
+    already in the log are scored and the script exits, otherwise it follows the log until
+    interrupted.
+    Run the script from server directory as follows:
+
+    python -m scripts.stream_eval
+    python -m scripts.stream_eval --num_cpus 4 --poll_interval 10 --min_accuracy 50 --min_questions 100
+    """
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument('--log_path', type=str, default=str(PATH_CONFIG.prediction_log_path()))
+    # allocate number of CPUs for concurrency
+    args_parser.add_argument('--num_cpus', type=int, default=4)
+    # max timeout value for a query
+    args_parser.add_argument('--meta_time_out', type=float, default=30.0)
+    args_parser.add_argument('--comparison', type=str, default=ComparisonMode.SET.value,
+                             choices=[mode.value for mode in ComparisonMode])
+    # seconds between two reads of the prediction log
+    args_parser.add_argument('--poll_interval', type=float, default=5.0)
+    args_parser.add_argument('--min_accuracy', type=float, default=0.0)
+    args_parser.add_argument('--min_questions', type=int, default=50)
+    args_parser.add_argument('--once', action='store_true')
+    args = args_parser.parse_args()
+
+    database_paths = {
+        database: PATH_CONFIG.sqlite_path(database_name=database)
+        for database in get_database_list(dataset_directory=PATH_CONFIG.dataset_dir())
+    }
+    evaluator = StreamingEvaluator(Path(args.log_path), database_paths, mode=ComparisonMode(args.comparison),
+                                   timeout=args.meta_time_out, num_workers=args.num_cpus,
+                                   gold_store_path=PATH_CONFIG.gold_results_path())
+    try:
+        while True:
+            evaluator.poll()
+            scored = evaluator.collect(timeout=None if args.once else args.poll_interval)
+            if scored:
+                accuracy = evaluator.accuracy()
+                print(accuracy.report())
+                print(f"pending: {evaluator.pending}")
+                print('===========================================================================================')
+                if accuracy.overall.total >= args.min_questions and accuracy.overall.accuracy < args.min_accuracy:
+                    logger.warning(WARNING_ACCURACY_BELOW_THRESHOLD.format(
+                        accuracy=accuracy.overall.accuracy, questions=accuracy.overall.total,
+                        min_accuracy=args.min_accuracy))
+            if args.once and not evaluator.pending:
+                break
+            if not evaluator.pending:
+                time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        evaluator.close()
+    print("Finished evaluation")
@@ -2,13 +2,18 @@
 This module provides a retry mechanism for handling API calls to Language Model (LLM) services.
 
 It includes functionality to manage API keys, handle rate limit and quota exceeded errors,
-and retry failed API calls with a backoff delay.
+and retry failed API calls with a backoff delay. Every attempt first waits for the rate
+limiter shared by the clients of the same LLM provider. A client may be shared by several
+threads, so quota errors are handled under a lock and the API key is rotated at most once
+per failed key, however many threads failed with it.
 """
 
+import threading
 import time
 from typing import Any, Callable
 
 from services.utils.api_key_manager import APIKeyManager
+from services.utils.rate_limiter import get_rate_limiter
 from utilities.constants.services.llm_enums import LLMType
 from utilities.constants.services.response_messages import (
     ERROR_API_FAILURE, WARNING_ALL_API_KEYS_QUOTA_EXCEEDED)
@@ -34,6 +39,8 @@ class LLMCallRetryHandler:
         llm_type (LLMType): The type of LLM service (for logging).
         on_api_key_rotation (Callable[[str], None]): A callback function to reinitialize the client with a new API key.
         error_count (int): Counts the number of consecutive errors encountered.
+        rate_limiter (Optional[RateLimiter]): The process-wide rate limiter of the LLM service.
+        key_generation (int): Number of key rotations so far, identifies the key an attempt used.
     """
 
     def __init__(
@@ -56,6 +63,9 @@ class LLMCallRetryHandler:
         self.error_count = 0
         self.on_api_key_rotation = on_api_key_rotation
         self.llm_type = llm_type
+        self.rate_limiter = get_rate_limiter(llm_type)
+        self.key_generation = 0
+        self._quota_lock = threading.Lock()
 
     def execute_with_retries(self, execute_llm_request: Callable[[], Any]) -> str:
         """
@@ -69,43 +79,61 @@ class LLMCallRetryHandler:
         """
         response = None
         while response is None:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            key_generation = self.key_generation
             try:
                 response = execute_llm_request()
             except Exception as e:
-                self._handle_llm_call_exception(e)
+                self._handle_llm_call_exception(e, key_generation)
 
         return response
 
-    def _handle_llm_call_exception(self, e: Exception):
+    def _handle_llm_call_exception(self, e: Exception, key_generation: int):
         """
         Handle exceptions raised during LLM API calls.
 
         Args:
             e (Exception): The raised exception.
+            key_generation (int): The key generation the failed attempt was made with.
         """
         if not self.is_quota_exceeded_error(e):
             raise RuntimeError(
                 ERROR_API_FAILURE.format(llm_type=self.llm_type.value, error=str(e))
             )
 
-        self._handle_quota_exceeded()
+        self._handle_quota_exceeded(key_generation)
 
-    def _handle_quota_exceeded(self):
-        """Handle the scenario where the quota is exceeded."""
-        self.error_count += 1
-        self.key_manager.rotate_api_key()
+    def _handle_quota_exceeded(self, key_generation: int):
+        """
+        Handle the scenario where the quota is exceeded.
 
-        # Call the parent function's callback to manage new client creation with new api key or anything else
-        self.on_api_key_rotation()
+        Only the first thread failing with a key rotates it, the others retry with the key it
+        rotated to. Once every key failed, the backoff delay holds the lock, so threads whose
+        attempts fail in the meantime wait for it as well.
 
-        if self.error_count >= self.key_manager.get_num_of_keys():
-            logger.warning(
-                WARNING_ALL_API_KEYS_QUOTA_EXCEEDED.format(
-                    llm_type=self.llm_type.value,
+        Args:
+            key_generation (int): The key generation the failed attempt was made with.
+        """
+        with self._quota_lock:
+            if key_generation != self.key_generation:
+                return
+
+            self.error_count += 1
+            self.key_manager.rotate_api_key()
+            self.key_generation += 1
+
+            # Call the parent function's callback to manage new client creation with new api key or anything else
+            self.on_api_key_rotation()
+
+            if self.error_count >= self.key_manager.get_num_of_keys():
+                logger.warning(
+                    WARNING_ALL_API_KEYS_QUOTA_EXCEEDED.format(
+                        llm_type=self.llm_type.value,
+                    )
                 )
-            )
-            self._backoff_delay(BACKOFF_DELAY_SECONDS)
-            self.error_count = 0
+                self._backoff_delay(BACKOFF_DELAY_SECONDS)
+                self.error_count = 0
 
     def _backoff_delay(self, seconds: int) -> None:
         """
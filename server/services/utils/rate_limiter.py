@@ -0,0 +1,76 @@
+"""
+This module provides a rate limiter shared by all the LLM clients of a process.
+
+Every client call goes through the retry handler, which waits for the rate limiter of its
+LLM provider before each attempt. Requests to a provider are spaced evenly so that the
+process sends at most LLM_REQUESTS_PER_MINUTE of them, whichever client or thread sends
+them, instead of relying on quota errors and backoff delays.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from utilities.config import LLM_REQUESTS_PER_MINUTE
+from utilities.constants.services.llm_enums import LLMType
+
+# Constants
+SECONDS_PER_MINUTE = 60.0
+
+
+class RateLimiter:
+    """
+    A thread-safe limiter spacing requests evenly.
+
+    Attributes:
+        interval (float): Minimum number of seconds between two requests.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (float): Maximum number of requests per minute.
+        """
+        self.interval = SECONDS_PER_MINUTE / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self) -> float:
+        """
+        Block until the next request may be sent.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_rate_limiters: Dict[LLMType, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(llm_type: LLMType) -> Optional[RateLimiter]:
+    """
+    Return the process-wide rate limiter of an LLM provider.
+
+    Args:
+        llm_type (LLMType): The LLM provider.
+
+    Returns:
+        Optional[RateLimiter]: The rate limiter of the provider, None if requests are not limited.
+    """
+    if LLM_REQUESTS_PER_MINUTE <= 0:
+        return None
+    with _rate_limiters_lock:
+        if llm_type not in _rate_limiters:
+            _rate_limiters[llm_type] = RateLimiter(LLM_REQUESTS_PER_MINUTE)
+        return _rate_limiters[llm_type]
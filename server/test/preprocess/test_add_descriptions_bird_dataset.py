@@ -1,22 +1,28 @@
 import json
 import os
 import sqlite3
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from unittest.mock import MagicMock, call, mock_open, patch
+from unittest.mock import ANY, MagicMock, call, mock_open, patch
 
 import pandas as pd
 # Import the functions from the main script
 from preprocess.add_descriptions_bird_dataset import (
     DESCRIPTION_FILE_EXTENSION, SQL_GET_TABLE_INFO, SQL_SELECT_FIRST_ROW,
     TABLE_DESCRIPTION_PLACEHOLDER, add_database_descriptions,
-    create_database_tables_csv, ensure_description_files_exist,
-    extract_column_type_from_schema, get_improved_column_description,
+    chunk_columns_by_token_budget, create_database_tables_csv,
+    ensure_description_files_exist, estimate_tokens,
+    extract_column_type_from_schema, format_batch_column,
+    get_improved_column_description, get_improved_column_descriptions,
     get_table_description, get_table_description_df,
     get_table_first_row_values, improve_column_descriptions,
     improve_column_descriptions_for_table, initialize_column_descriptions,
-    is_column_description_file, read_csv, table_in_db_check,
-    update_column_descriptions)
+    is_column_description_file, parse_column_descriptions, read_csv,
+    table_in_db_check, update_column_descriptions)
 from preprocess.AddDescriptionErrorLogs import AddDescriptionErrorLogs
 from services.clients.base_client import Client
 from utilities.constants.database_enums import DatasetType
@@ -339,6 +345,130 @@ class TestGetImprovedColumnDescription(unittest.TestCase):
                       errors_to_fix.errors[0]["error"])
 
 
+class TestBatchedColumnDescriptions(unittest.TestCase):
+    """Tests for describing several columns of a table in one request."""
+
+    def setUp(self):
+        self.connection = MagicMock()
+        self.client = MagicMock()
+        self.rows = pd.DataFrame(
+            {
+                ORIG_COLUMN_NAME_COL: ["id", "name", "city"],
+                DATA_FORMAT_COL: ["integer", "text", "text"],
+                COLUMN_DESCRIPTION_COL: ["school id", None, ""],
+            },
+            index=[3, 5, 8],
+        )
+        AddDescriptionErrorLogs().errors.clear()
+
+    def tearDown(self):
+        AddDescriptionErrorLogs().errors.clear()
+
+    def describe(self):
+        """Describe the test columns in one batch."""
+        return get_improved_column_descriptions(
+            self.rows, "schools", ["1", "Lincoln", "Fresno"], self.connection, self.client,
+            "Schools of California.", "test_db",
+        )
+
+    def test_format_batch_column(self):
+        """Should include the original description only when there is one."""
+        # Call the function
+        with_description = format_batch_column(self.rows.loc[3])
+        without_description = format_batch_column(self.rows.loc[8])
+
+        # Assertions
+        self.assertIn("Name: id; Type: integer; Description: school id", with_description)
+        self.assertNotIn("Description", without_description)
+
+    def test_parse_column_descriptions(self):
+        """Should read a fenced JSON object and match column names loosely."""
+        response = '```json\n{"ID": "Identifier.", " name ": "School name.", "city": "", "other": "x"}\n```'
+
+        # Call the function
+        descriptions = parse_column_descriptions(response, ["id", "name", "city"])
+
+        # Assertions
+        self.assertEqual(descriptions, {"id": "Identifier.", "name": "School name."})
+
+    def test_parse_column_descriptions_without_json(self):
+        """Should raise a ValueError when the answer has no JSON object."""
+        with self.assertRaises(ValueError):
+            parse_column_descriptions("The id column identifies a school.", ["id"])
+        with self.assertRaises(ValueError):
+            parse_column_descriptions('["id"]', ["id"])
+
+    def test_chunk_columns_by_token_budget(self):
+        """Should fill batches up to the budget, in order, with at least one column each."""
+        column_tokens = estimate_tokens(format_batch_column(self.rows.loc[5]))
+
+        # Call the function
+        batches = chunk_columns_by_token_budget(self.rows, 10, 10 + 2 * column_tokens + 1)
+        single = chunk_columns_by_token_budget(self.rows, 10, 0)
+        oversized = chunk_columns_by_token_budget(self.rows, 10, 1)
+
+        # Assertions
+        self.assertEqual([list(batch.index) for batch in batches], [[3], [5, 8]])
+        self.assertEqual([list(batch.index) for batch in single], [[3], [5], [8]])
+        self.assertEqual([list(batch.index) for batch in oversized], [[3], [5], [8]])
+
+    def test_describes_all_columns_in_one_request(self):
+        """Should send the table context once and return the descriptions by row index."""
+        self.client.execute_prompt.return_value = json.dumps(
+            {"id": "Identifier.", "name": "School name.", "city": "School city."}
+        )
+
+        # Call the function
+        descriptions = self.describe()
+
+        # Assertions
+        self.assertEqual(descriptions, {3: "Identifier.", 5: "School name.", 8: "School city."})
+        self.client.execute_prompt.assert_called_once()
+        prompt = self.client.execute_prompt.call_args[0][0]
+        self.assertEqual(prompt.count("Schools of California."), 1)
+        self.assertIn("Name: city; Type: text", prompt)
+
+    def test_falls_back_for_undescribed_columns(self):
+        """Should describe the columns missing from the answer one by one."""
+        self.client.execute_prompt.side_effect = [
+            json.dumps({"id": "Identifier.", "name": ""}),
+            "School name.",
+            "School city.",
+        ]
+
+        # Call the function
+        descriptions = self.describe()
+
+        # Assertions
+        self.assertEqual(descriptions, {3: "Identifier.", 5: "School name.", 8: "School city."})
+        self.assertEqual(self.client.execute_prompt.call_count, 3)
+        self.assertIn("Name: name\n", self.client.execute_prompt.call_args_list[1][0][0])
+
+    def test_falls_back_when_the_batch_fails(self):
+        """Should describe every column one by one when the batched answer cannot be parsed."""
+        self.client.execute_prompt.side_effect = ["Sure! Here are the descriptions.", "a", "b", "c"]
+
+        # Call the function
+        descriptions = self.describe()
+
+        # Assertions
+        self.assertEqual(descriptions, {3: "a", 5: "b", 8: "c"})
+        self.assertEqual(AddDescriptionErrorLogs().errors, [])
+
+    def test_single_column_uses_single_prompt(self):
+        """Should describe a lone column with the single column prompt."""
+        self.client.execute_prompt.return_value = "Identifier."
+
+        # Call the function
+        descriptions = get_improved_column_descriptions(
+            self.rows.iloc[:1], "schools", [], self.connection, self.client, "", "test_db"
+        )
+
+        # Assertions
+        self.assertEqual(descriptions, {3: "Identifier."})
+        self.assertIn("Name: id\n", self.client.execute_prompt.call_args[0][0])
+
+
 class TestTableInDbCheck(unittest.TestCase):
     """Tests for the table_in_db_check function."""
 
@@ -647,7 +777,7 @@ class TestImproveColumnDescriptions(unittest.TestCase):
 
     @patch("pandas.DataFrame.to_csv")
     @patch(
-        "preprocess.add_descriptions_bird_dataset.improve_column_descriptions_for_table"
+        "preprocess.add_descriptions_bird_dataset.submit_column_descriptions"
     )
     @patch("preprocess.add_descriptions_bird_dataset.read_csv")
     @patch("preprocess.add_descriptions_bird_dataset.table_in_db_check")
@@ -665,7 +795,7 @@ class TestImproveColumnDescriptions(unittest.TestCase):
         mock_is_column_description_file,
         mock_table_in_db_check,
         mock_read_csv,
-        mock_improve_column_descriptions_for_table,
+        mock_submit_column_descriptions,
         mock_to_csv,
     ):
         # Mock return values
@@ -677,9 +807,7 @@ class TestImproveColumnDescriptions(unittest.TestCase):
         mock_is_column_description_file.side_effect = [True, True, False]
         mock_table_in_db_check.return_value = None
         mock_read_csv.return_value = pd.DataFrame({"column": ["col1", "col2"]})
-        mock_improve_column_descriptions_for_table.return_value = pd.DataFrame(
-            {"column": ["col1", "col2"]}
-        )
+        mock_submit_column_descriptions.return_value = {}
         mock_to_csv.return_value = None
 
         # Mock database connection
@@ -708,7 +836,8 @@ class TestImproveColumnDescriptions(unittest.TestCase):
         self.assertEqual(mock_table_in_db_check.call_count, 2)
         self.assertEqual(mock_read_csv.call_count, 2)
         self.assertEqual(
-            mock_improve_column_descriptions_for_table.call_count, 2)
+            mock_submit_column_descriptions.call_count, 2)
+        mock_to_csv.assert_not_called()
 
     @patch("preprocess.add_descriptions_bird_dataset.PATH_CONFIG")
     @patch("preprocess.add_descriptions_bird_dataset.get_table_names")
@@ -771,6 +900,141 @@ class TestImproveColumnDescriptions(unittest.TestCase):
         mock_listdir.assert_called_once_with("/mock/path")
 
 
+class TestResumableColumnDescriptions(unittest.TestCase):
+    """Tests for the concurrent, checkpointed column description generation."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.description_dir = Path(self.temp_dir.name) / "database_description"
+        self.description_dir.mkdir()
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.executescript(
+            """
+            CREATE TABLE schools (id INTEGER, name TEXT, city TEXT);
+            CREATE TABLE scores (school_id INTEGER, score REAL);
+            INSERT INTO schools VALUES (1, 'Lincoln', 'Fresno');
+            """
+        )
+        pd.DataFrame(
+            {
+                ORIG_COLUMN_NAME_COL: ["id", "name", "city"],
+                DATA_FORMAT_COL: ["integer", None, "text"],
+                COLUMN_DESCRIPTION_COL: ["school id", "", "city"],
+                IMPROVED_COLUMN_DESCRIPTIONS_COL: ["kept", None, None],
+            }
+        ).to_csv(self.description_dir / "schools.csv", index=False)
+        pd.DataFrame(
+            {
+                ORIG_COLUMN_NAME_COL: ["school_id", "score"],
+                DATA_FORMAT_COL: ["integer", "real"],
+                COLUMN_DESCRIPTION_COL: ["", ""],
+            }
+        ).to_csv(self.description_dir / "scores.csv", index=False)
+        AddDescriptionErrorLogs().errors.clear()
+
+    def tearDown(self):
+        self.connection.close()
+        self.temp_dir.cleanup()
+        AddDescriptionErrorLogs().errors.clear()
+
+    def describe(self, client):
+        """Improve the column descriptions of the test database."""
+        with patch(
+            "preprocess.add_descriptions_bird_dataset.PATH_CONFIG.description_dir",
+            return_value=self.description_dir,
+        ), patch(
+            "preprocess.add_descriptions_bird_dataset.get_table_description_df",
+            return_value=pd.DataFrame(columns=[TABLE_NAME_COL, TABLE_DESCRIPTION_COL]),
+        ):
+            improve_column_descriptions(
+                database_name="test_db",
+                dataset_type=DatasetType.BIRD_DEV,
+                improvement_client=client,
+                connection=self.connection,
+            )
+
+    def read_descriptions(self, table_name):
+        """Read the improved descriptions of a table's CSV file."""
+        table_df = pd.read_csv(self.description_dir / f"{table_name}.csv")
+        return [None if pd.isna(value) else value for value in table_df[IMPROVED_COLUMN_DESCRIPTIONS_COL]]
+
+    def test_resumes_with_missing_descriptions_only(self):
+        """Should checkpoint every generated description and only describe missing ones when run again."""
+        def execute_prompt(prompt):
+            if "Name: score\n" in prompt:
+                raise RuntimeError("provider unavailable")
+            return "described"
+
+        failing_client = MagicMock(spec=Client)
+        failing_client.execute_prompt.side_effect = execute_prompt
+        client = MagicMock(spec=Client)
+        client.execute_prompt.return_value = "described again"
+
+        # Call the function
+        self.describe(failing_client)
+        first_run = {table: self.read_descriptions(table) for table in ("schools", "scores")}
+        self.describe(client)
+        second_run = {table: self.read_descriptions(table) for table in ("schools", "scores")}
+
+        # Assertions
+        self.assertEqual(first_run["schools"], ["kept", "described", "described"])
+        self.assertEqual(first_run["scores"][0], "described")
+        self.assertIsNone(first_run["scores"][1])
+        self.assertEqual(client.execute_prompt.call_count, 1)
+        self.assertEqual(second_run["scores"], ["described", "described again"])
+        self.assertEqual(second_run["schools"], first_run["schools"])
+
+    def test_describes_each_table_in_one_request(self):
+        """Should describe the missing columns of each table with a single batched request."""
+        client = MagicMock(spec=Client)
+        client.execute_prompt.return_value = json.dumps(
+            {"name": "School name.", "city": "School city.", "school_id": "School.", "score": "Score."}
+        )
+
+        # Call the function
+        self.describe(client)
+
+        # Assertions
+        self.assertEqual(client.execute_prompt.call_count, 2)
+        self.assertEqual(self.read_descriptions("schools"), ["kept", "School name.", "School city."])
+        self.assertEqual(self.read_descriptions("scores"), ["School.", "Score."])
+
+    def test_failed_batch_checkpoints_the_running_ones(self):
+        """Should await and write the batches still running in a shared pool when one fails."""
+        failed = threading.Event()
+
+        def describe_batch(batch, table_name, *args):
+            if table_name == "scores":
+                failed.set()
+                raise ValueError("unexpected response")
+            failed.wait(timeout=5)
+            time.sleep(0.1)
+            return {index: "described" for index in batch.index}
+
+        # Call the function
+        with ThreadPoolExecutor(max_workers=2) as executor, patch(
+            "preprocess.add_descriptions_bird_dataset.get_improved_column_descriptions",
+            side_effect=describe_batch,
+        ), patch(
+            "preprocess.add_descriptions_bird_dataset.PATH_CONFIG.description_dir",
+            return_value=self.description_dir,
+        ), patch(
+            "preprocess.add_descriptions_bird_dataset.get_table_description_df",
+            return_value=pd.DataFrame(columns=[TABLE_NAME_COL, TABLE_DESCRIPTION_COL]),
+        ):
+            with self.assertRaises(RuntimeError):
+                improve_column_descriptions(
+                    database_name="test_db",
+                    dataset_type=DatasetType.BIRD_DEV,
+                    improvement_client=MagicMock(spec=Client),
+                    connection=self.connection,
+                    executor=executor,
+                )
+
+        # Assertions
+        self.assertEqual(self.read_descriptions("schools"), ["kept", "described", "described"])
+
+
 class TestCreateDatabaseTablesCsv(unittest.TestCase):
     """Tests for the create_database_tables_csv function."""
 
@@ -1479,6 +1743,7 @@ class TestAddDatabaseDescriptions(unittest.TestCase):
             dataset_type=self.dataset_type,
             improvement_client=mock_client,
             connection=mock_connection,
+            executor=ANY,
         )
 
     @patch("preprocess.add_descriptions_bird_dataset.logger")
@@ -0,0 +1,203 @@
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from preprocess.add_few_shot_examples import (
+    add_few_shots_to_bird_items, items_missing_few_shots,
+    process_each_database_test_file_with_few_shots,
+    process_global_test_file_with_few_shots)
+from utilities.config import PATH_CONFIG
+from utilities.constants.bird_utils.indexing_constants import (
+    DB_ID_KEY, QUESTION_KEY, RUNTIME_FEW_SHOTS_KEY)
+from utilities.constants.preprocess.add_few_shot_examples.response_messages import \
+    ERROR_PROCESSING_DATABASE_TEST_FILE
+
+
+def fake_fetch_few_shots_batch(few_shot_count, queries):
+    """Return few_shot_count fake few shots derived from every query."""
+    return [
+        [{"question": f"{query} {index}"} for index in range(few_shot_count)]
+        for query in queries
+    ]
+
+
+class TestItemsMissingFewShots(unittest.TestCase):
+    """Tests for the items_missing_few_shots function."""
+
+    def test_returns_items_without_enough_few_shots(self):
+        """Should return items with no few shots or fewer than top_k."""
+
+        # Set up items in different states
+        items = [
+            {QUESTION_KEY: "q0"},
+            {QUESTION_KEY: "q1", RUNTIME_FEW_SHOTS_KEY: [{}, {}]},
+            {QUESTION_KEY: "q2", RUNTIME_FEW_SHOTS_KEY: [{}]},
+        ]
+
+        # Call the function to test
+        result = items_missing_few_shots(items, top_k=2)
+
+        # Assertions
+        self.assertEqual(result, [0, 2])
+
+
+class TestAddFewShotsToBirdItems(unittest.TestCase):
+    """Tests for the add_few_shots_to_bird_items function."""
+
+    @patch(
+        "preprocess.add_few_shot_examples.fetch_few_shots_batch",
+        side_effect=fake_fetch_few_shots_batch,
+    )
+    def test_fetches_missing_few_shots_in_batches(self, mock_fetch_few_shots_batch):
+        """Should fetch few shots for missing items only, batch_size questions at a time."""
+
+        # Set up items, one of which is already annotated
+        items = [
+            {QUESTION_KEY: "q0"},
+            {QUESTION_KEY: "q1", RUNTIME_FEW_SHOTS_KEY: [{"question": "done"}]},
+            {QUESTION_KEY: "q2"},
+            {QUESTION_KEY: "q3"},
+        ]
+
+        # Call the function to test
+        result = add_few_shots_to_bird_items(items, top_k=1, batch_size=2)
+
+        # Assertions
+        self.assertEqual(
+            [call.args for call in mock_fetch_few_shots_batch.call_args_list],
+            [(1, ["q0", "q2"]), (1, ["q3"])],
+        )
+        self.assertEqual(result[0][RUNTIME_FEW_SHOTS_KEY], [{"question": "q0 0"}])
+        self.assertEqual(result[1][RUNTIME_FEW_SHOTS_KEY], [{"question": "done"}])
+        self.assertEqual(result[3][RUNTIME_FEW_SHOTS_KEY], [{"question": "q3 0"}])
+        self.assertNotIn(RUNTIME_FEW_SHOTS_KEY, items[0])
+
+    @patch("preprocess.add_few_shot_examples.fetch_few_shots_batch")
+    def test_skips_lookup_when_all_items_annotated(self, mock_fetch_few_shots_batch):
+        """Should not query the vector store when every item already has its few shots."""
+
+        # Set up annotated items
+        items = [{QUESTION_KEY: "q0", RUNTIME_FEW_SHOTS_KEY: [{}, {}]}]
+
+        # Call the function to test
+        result = add_few_shots_to_bird_items(items, top_k=2)
+
+        # Assertions
+        mock_fetch_few_shots_batch.assert_not_called()
+        self.assertEqual(result, items)
+
+
+class TestProcessTestFilesWithFewShots(unittest.TestCase):
+    """Tests for the test file processing functions."""
+
+    def setUp(self):
+        # The functions select databases on the shared path configuration
+        patcher = patch.object(PATH_CONFIG, "database_name", PATH_CONFIG.database_name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("preprocess.add_few_shot_examples.save_json_to_file")
+    @patch("preprocess.add_few_shot_examples.add_few_shots_to_bird_items")
+    @patch("preprocess.add_few_shot_examples.load_json_from_file")
+    def test_global_file_is_annotated_in_place(
+        self, mock_load_json, mock_add_few_shots, mock_save_json
+    ):
+        """Should load, annotate and save the global test file."""
+
+        # Set up mocks
+        test_file = Path("processed_test.json")
+        mock_load_json.return_value = [{QUESTION_KEY: "q0", DB_ID_KEY: "db1"}]
+        mock_add_few_shots.return_value = [{QUESTION_KEY: "q0", DB_ID_KEY: "db1", RUNTIME_FEW_SHOTS_KEY: []}]
+
+        # Call the function to test
+        process_global_test_file_with_few_shots(test_file, top_k=3)
+
+        # Assertions
+        mock_add_few_shots.assert_called_once_with([{QUESTION_KEY: "q0", DB_ID_KEY: "db1"}], 3)
+        mock_save_json.assert_called_once_with(test_file, mock_add_few_shots.return_value)
+
+    @patch("preprocess.add_few_shot_examples.save_json_to_file")
+    @patch("preprocess.add_few_shot_examples.load_json_from_file")
+    @patch("utilities.vectorize.get_embedding_function")
+    @patch("utilities.vectorize.sync_collection")
+    def test_per_database_samples_are_searched_for_each_database(
+        self, mock_sync_collection, mock_get_embedding_function, mock_load_json, mock_save_json
+    ):
+        """Should search the samples of each item's own database when the samples are per database."""
+
+        # Set up items of two databases, interleaved, and a collection without matches
+        test_file = Path("processed_test.json")
+        mock_load_json.return_value = [
+            {QUESTION_KEY: "q0", DB_ID_KEY: "db1"},
+            {QUESTION_KEY: "q1", DB_ID_KEY: "db2"},
+            {QUESTION_KEY: "q2", DB_ID_KEY: "db1"},
+        ]
+        searched = []
+        collection = MagicMock()
+        collection.query.side_effect = lambda query_embeddings, **kwargs: {
+            key: [[] for _ in query_embeddings] for key in ("documents", "distances", "metadatas")
+        }
+
+        def sync_collection(collection_name, load_documents):
+            searched.append((collection_name, PATH_CONFIG.processed_train_path()))
+            return collection
+
+        mock_sync_collection.side_effect = sync_collection
+        mock_get_embedding_function.return_value.embed_texts.side_effect = list
+
+        # Call the function to test
+        with patch.object(PATH_CONFIG, "sample_dataset_type", PATH_CONFIG.dataset_type):
+            process_global_test_file_with_few_shots(test_file, top_k=2)
+
+        # Assertions
+        self.assertEqual(
+            searched,
+            [
+                ("db1_unmasked_data_samples", PATH_CONFIG.processed_train_path("db1")),
+                ("db2_unmasked_data_samples", PATH_CONFIG.processed_train_path("db2")),
+            ],
+        )
+        saved_items = mock_save_json.call_args.args[1]
+        self.assertEqual([item[QUESTION_KEY] for item in saved_items], ["q0", "q1", "q2"])
+        self.assertEqual([item[RUNTIME_FEW_SHOTS_KEY] for item in saved_items], [[], [], []])
+
+    @patch("preprocess.add_few_shot_examples.save_json_to_file")
+    @patch("preprocess.add_few_shot_examples.add_few_shots_to_bird_items")
+    @patch("preprocess.add_few_shot_examples.load_json_from_file")
+    @patch("preprocess.add_few_shot_examples.get_database_list")
+    def test_each_database_is_selected_before_its_lookups(
+        self, mock_get_database_list, mock_load_json, mock_add_few_shots, mock_save_json
+    ):
+        """Should point the path configuration at each database before annotating its test file."""
+
+        # Set up mocks
+        mock_get_database_list.return_value = ["db1", "db2"]
+        mock_load_json.return_value = [{QUESTION_KEY: "q0"}]
+        selected = []
+        mock_add_few_shots.side_effect = lambda items, top_k: selected.append(PATH_CONFIG.database_name)
+
+        # Call the function to test
+        process_each_database_test_file_with_few_shots(Path("dataset"), top_k=3)
+
+        # Assertions
+        self.assertEqual(selected, ["db1", "db2"])
+
+    @patch("preprocess.add_few_shot_examples.logger")
+    @patch("preprocess.add_few_shot_examples.load_json_from_file")
+    @patch("preprocess.add_few_shot_examples.get_database_list")
+    def test_database_errors_are_logged(self, mock_get_database_list, mock_load_json, mock_logger):
+        """Should log and continue when a database test file cannot be processed."""
+
+        # Set up mocks
+        mock_get_database_list.return_value = ["db1"]
+        mock_load_json.side_effect = Exception("missing file")
+
+        # Call the function to test
+        process_each_database_test_file_with_few_shots(Path("dataset"), top_k=3)
+
+        # Assertions
+        mock_logger.error.assert_called_once_with(
+            ERROR_PROCESSING_DATABASE_TEST_FILE.format(
+                database_name="db1", error="missing file"
+            )
+        )
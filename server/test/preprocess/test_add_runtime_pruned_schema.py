@@ -12,8 +12,8 @@ from preprocess.add_runtime_pruned_schema import (
 from utilities.constants.bird_utils.indexing_constants import (
     QUESTION_KEY, RUNTIME_SCHEMA_USED_KEY)
 from utilities.constants.preprocess.add_runtime_pruned_schema.indexing_constants import (
-    KEYWORD_EXTRACTION_CLIENT_KEY, LSH_KEY, MINHASH_KEY,
-    TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY, TOP_K_VALUE_MATCHES_KEY)
+    KEYWORD_EXTRACTION_CLIENT_KEY, TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY,
+    TOP_K_VALUE_MATCHES_KEY, VALUE_INDEX_KEY)
 from utilities.constants.preprocess.add_runtime_pruned_schema.response_messages import (
     ERROR_FAILED_ITEM, ERROR_FAILED_TO_ADD_PRUNED_SCHEMA,
     ERROR_PROCESSING_DATABASE_GLOBAL_FILE, ERROR_PROCESSING_DATABASE_TEST_FILE)
@@ -98,9 +98,9 @@ class TestUpdatePipelineConfiguration(unittest.TestCase):
     """Tests for the update_pipeline_configuration function."""
 
     @patch("preprocess.add_runtime_pruned_schema.make_column_description_collection")
-    @patch("preprocess.add_runtime_pruned_schema.load_db_lsh")
+    @patch("preprocess.add_runtime_pruned_schema.VALUE_INDEX_REGISTRY")
     def test_returns_none_when_no_existing_pipeline_args(
-        self, mock_load_db_lsh, mock_make_column_description_collection
+        self, mock_value_index_registry, mock_make_column_description_collection
     ):
         """Should return None when no existing pipeline args are provided."""
 
@@ -110,12 +110,12 @@ class TestUpdatePipelineConfiguration(unittest.TestCase):
         # Assertions
         self.assertIsNone(result)
         mock_make_column_description_collection.assert_not_called()
-        mock_load_db_lsh.assert_not_called()
+        mock_value_index_registry.get.assert_not_called()
 
     @patch("preprocess.add_runtime_pruned_schema.make_column_description_collection")
-    @patch("preprocess.add_runtime_pruned_schema.load_db_lsh")
+    @patch("preprocess.add_runtime_pruned_schema.VALUE_INDEX_REGISTRY")
     def test_returns_updated_args_when_existing_pipeline_args_provided(
-        self, mock_load_db_lsh, mock_make_column_description_collection
+        self, mock_value_index_registry, mock_make_column_description_collection
     ):
         """Should return updated pipeline arguments when existing pipeline args are provided."""
 
@@ -123,22 +123,20 @@ class TestUpdatePipelineConfiguration(unittest.TestCase):
         pipeline_args = {"key": "value"}
 
         # Mock the return values of the functions
-        mock_lsh = MagicMock(name="LSH")
-        mock_minhash = MagicMock(name="MinHash")
-        mock_load_db_lsh.return_value = (mock_lsh, mock_minhash)
+        mock_value_index = MagicMock(name="ValueIndex")
+        mock_value_index_registry.get.return_value = mock_value_index
 
         # Call the function to test
         result = update_pipeline_configuration("test_database_name", pipeline_args)
 
         # Assertions
         mock_make_column_description_collection.assert_called_once()
-        mock_load_db_lsh.assert_called_once_with("test_database_name")
+        mock_value_index_registry.get.assert_called_once_with("test_database_name")
         self.assertEqual(
             result,
             {
                 "key": "value",
-                LSH_KEY: mock_lsh,
-                MINHASH_KEY: mock_minhash,
+                VALUE_INDEX_KEY: mock_value_index,
             },
         )
 
@@ -0,0 +1,63 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from preprocess.build_gold_results import build_gold_results
+from utilities.constants.preprocess.build_gold_results.response_messages import \
+    ERROR_BUILDING_GOLD_RESULTS
+from utilities.gold_result_store import GoldResultStore
+
+GOLD_ITEMS = [
+    {"question_id": 1, "SQL": "SELECT County FROM schools"},
+    {"question_id": 2, "SQL": "SELECT Missing FROM schools"},
+]
+
+
+class TestBuildGoldResults(unittest.TestCase):
+    """Tests for the build_gold_results function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("CREATE TABLE schools (County TEXT)")
+        connection.close()
+        self.store = GoldResultStore(
+            Path(self.temp_dir.name) / "gold.sqlite", database_path=lambda database: self.db_path
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    @patch("preprocess.build_gold_results.load_gold_items", return_value=GOLD_ITEMS)
+    def test_stores_each_gold_result_once(self, mock_load_gold_items):
+        """Should execute the gold queries of new questions only."""
+
+        # Call the function to test
+        first = build_gold_results(Path("dataset"), ["schools"], store=self.store)
+        second = build_gold_results(Path("dataset"), ["schools"], store=self.store)
+
+        # Assertions
+        self.assertEqual(first, {"schools": {"executed": 2, "reused": 0, "failed": 1}})
+        self.assertEqual(second, {"schools": {"executed": 0, "reused": 2, "failed": 0}})
+        self.assertEqual(len(self.store), 2)
+
+    @patch("preprocess.build_gold_results.logger")
+    @patch("preprocess.build_gold_results.load_gold_items")
+    def test_database_errors_are_logged(self, mock_load_gold_items, mock_logger):
+        """Should log and continue when the questions of a database cannot be loaded."""
+
+        # Set up mocks
+        mock_load_gold_items.side_effect = [FileNotFoundError("missing"), GOLD_ITEMS[:1]]
+
+        # Call the function to test
+        result = build_gold_results(Path("dataset"), ["db1", "schools"], store=self.store)
+
+        # Assertions
+        self.assertEqual(list(result), ["schools"])
+        mock_logger.error.assert_called_once_with(
+            ERROR_BUILDING_GOLD_RESULTS.format(database_name="db1", error="missing")
+        )
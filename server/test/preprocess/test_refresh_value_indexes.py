@@ -0,0 +1,59 @@
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from preprocess.refresh_value_indexes import refresh_value_indexes
+from utilities.constants.preprocess.refresh_value_indexes.response_messages import \
+    ERROR_REFRESHING_VALUE_INDEX
+
+REFRESH_STATS = {"added_values": 1, "removed_values": 0, "reindexed_columns": 1}
+
+
+class TestRefreshValueIndexes(unittest.TestCase):
+    """Tests for the refresh_value_indexes function."""
+
+    @patch("preprocess.refresh_value_indexes.VALUE_INDEX_REGISTRY")
+    @patch("preprocess.refresh_value_indexes.refresh_db_value_index", return_value=REFRESH_STATS)
+    @patch("preprocess.refresh_value_indexes.get_database_list")
+    def test_refreshes_every_database_and_evicts_it(
+        self, mock_get_database_list, mock_refresh_db_value_index, mock_value_index_registry
+    ):
+        """Should refresh all databases when none are given and drop their open indexes."""
+
+        # Set up mocks
+        mock_get_database_list.return_value = ["db1", "db2"]
+
+        # Call the function to test
+        result = refresh_value_indexes(Path("dataset"), full=True)
+
+        # Assertions
+        self.assertEqual(result, {"db1": REFRESH_STATS, "db2": REFRESH_STATS})
+        self.assertEqual(
+            [call.args for call in mock_refresh_db_value_index.call_args_list], [("db1",), ("db2",)]
+        )
+        mock_refresh_db_value_index.assert_called_with("db2", full=True)
+        self.assertEqual(
+            [call.args for call in mock_value_index_registry.evict.call_args_list],
+            [("db1",), ("db2",)],
+        )
+
+    @patch("preprocess.refresh_value_indexes.logger")
+    @patch("preprocess.refresh_value_indexes.VALUE_INDEX_REGISTRY")
+    @patch("preprocess.refresh_value_indexes.refresh_db_value_index")
+    def test_database_errors_are_logged(
+        self, mock_refresh_db_value_index, mock_value_index_registry, mock_logger
+    ):
+        """Should log and continue when a database cannot be refreshed."""
+
+        # Set up mocks
+        mock_refresh_db_value_index.side_effect = [Exception("locked"), REFRESH_STATS]
+
+        # Call the function to test
+        result = refresh_value_indexes(Path("dataset"), ["db1", "db2"])
+
+        # Assertions
+        self.assertEqual(result, {"db2": REFRESH_STATS})
+        mock_value_index_registry.evict.assert_called_once_with("db2")
+        mock_logger.error.assert_called_once_with(
+            ERROR_REFRESHING_VALUE_INDEX.format(database_name="db1", error="locked")
+        )
@@ -0,0 +1,43 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from services.utils.api_key_manager import APIKeyManager
+from services.utils.call_retry_handler import LLMCallRetryHandler
+from utilities.constants.services.llm_enums import LLMType
+
+
+class TestLLMCallRetryHandler(unittest.TestCase):
+    """Test suite for the LLMCallRetryHandler class."""
+
+    def test_concurrent_quota_errors_rotate_the_key_once(self):
+        """Should rotate once when several threads fail with the same key at the same time."""
+        threads = 4
+        key_manager = APIKeyManager(["key-1", "key-2", "key-3"])
+        on_api_key_rotation = MagicMock()
+        with patch("services.utils.call_retry_handler.get_rate_limiter", return_value=None):
+            handler = LLMCallRetryHandler(key_manager, LLMType.OPENAI, on_api_key_rotation)
+        barrier = threading.Barrier(threads)
+        failing_key = key_manager.get_current_key()
+        next_key = key_manager.keys[(key_manager.index + 1) % 3]
+
+        def request():
+            if key_manager.get_current_key() == failing_key:
+                barrier.wait(timeout=5)
+                raise Exception("429 rate limit")
+            return key_manager.get_current_key()
+
+        # Call the function
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            responses = list(executor.map(lambda _: handler.execute_with_retries(request), range(threads)))
+
+        # Assertions
+        self.assertEqual(responses, [next_key] * threads)
+        on_api_key_rotation.assert_called_once_with()
+        self.assertEqual(handler.key_generation, 1)
+        self.assertEqual(handler.error_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from services.utils.call_retry_handler import LLMCallRetryHandler
+from services.utils.rate_limiter import RateLimiter, get_rate_limiter
+from utilities.constants.services.llm_enums import LLMType
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test suite for the rate limiter shared by the LLM clients."""
+
+    def test_spaces_requests_across_threads(self):
+        """Should give every request of every thread its own slot one interval apart."""
+        limiter = RateLimiter(requests_per_minute=60 * 50)
+        delays = []
+
+        # Call the function
+        with patch("services.utils.rate_limiter.time.sleep"):
+            threads = [threading.Thread(target=lambda: delays.append(limiter.acquire())) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # Assertions
+        self.assertEqual(len(delays), 5)
+        self.assertAlmostEqual(max(delays), 4 * limiter.interval, delta=0.01)
+
+    def test_limiter_is_shared_per_provider(self):
+        """Should return one limiter per provider, and none without a limit."""
+        # Call the function
+        with patch("services.utils.rate_limiter.LLM_REQUESTS_PER_MINUTE", 120):
+            first = get_rate_limiter(LLMType.OPENAI)
+            second = get_rate_limiter(LLMType.OPENAI)
+            other = get_rate_limiter(LLMType.ANTHROPIC)
+        with patch("services.utils.rate_limiter.LLM_REQUESTS_PER_MINUTE", 0):
+            unlimited = get_rate_limiter(LLMType.OPENAI)
+
+        # Assertions
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertIsNone(unlimited)
+
+    def test_retry_handler_waits_for_the_limiter(self):
+        """Should acquire a slot before every attempt of an LLM call."""
+        limiter = MagicMock()
+        key_manager = MagicMock()
+        key_manager.get_num_of_keys.return_value = 2
+        with patch("services.utils.call_retry_handler.get_rate_limiter", return_value=limiter):
+            handler = LLMCallRetryHandler(key_manager, LLMType.OPENAI, MagicMock())
+        request = MagicMock(side_effect=[Exception("429 rate limit"), "response"])
+
+        # Call the function
+        response = handler.execute_with_retries(request)
+
+        # Assertions
+        self.assertEqual(response, "response")
+        self.assertEqual(limiter.acquire.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
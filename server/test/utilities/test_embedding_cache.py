@@ -0,0 +1,157 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from utilities.constants.utilities.embedding_cache.response_messages import \
+    ERROR_EMBEDDING_FUNCTION_UNAVAILABLE
+from utilities.embedding_cache import (CachedEmbeddingFunction,
+                                       EmbeddingCache, make_embedding_key)
+
+
+class CountingEmbeddingFunction:
+    """Deterministic stand-in for an embedding model that records every text it embeds."""
+
+    MODEL_NAME = "counting-model"
+
+    def __init__(self):
+        self.embedded_texts = []
+
+    def __call__(self, input):
+        self.embedded_texts.extend(input)
+        return [np.array([len(text), 1.0, 0.5], dtype=np.float32) for text in input]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test suite for the EmbeddingCache class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.temp_dir.name) / "embeddings.sqlite"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trips_vectors_through_float16(self):
+        """Should return stored vectors as float32 after float16 storage."""
+
+        # Store a vector
+        cache = EmbeddingCache(cache_path=self.cache_path)
+        cache.put_many({"key": np.array([0.1, 0.2, 0.3], dtype=np.float32)})
+
+        # Call the function
+        result = cache.get_many(["key", "missing"])
+
+        # Assertions
+        self.assertEqual(list(result.keys()), ["key"])
+        self.assertEqual(result["key"].dtype, np.float32)
+        np.testing.assert_allclose(result["key"], [0.1, 0.2, 0.3], atol=1e-3)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+    def test_persists_vectors_across_instances(self):
+        """Should serve vectors stored by a previous cache instance from disk."""
+
+        # Store a vector and close the cache
+        cache = EmbeddingCache(cache_path=self.cache_path)
+        cache.put_many({"key": np.ones(4, dtype=np.float32)})
+        cache.close()
+
+        # Call the function on a new instance
+        reopened = EmbeddingCache(cache_path=self.cache_path)
+        result = reopened.get_many(["key"])
+
+        # Assertions
+        np.testing.assert_array_equal(result["key"], np.ones(4, dtype=np.float32))
+        reopened.close()
+
+    def test_evicts_least_recently_used_entries(self):
+        """Should drop the least recently used entries once the bound is exceeded."""
+
+        # Fill the cache beyond its bound, touching the first entry in between
+        cache = EmbeddingCache(cache_path=self.cache_path, max_entries=2, memory_entries=1)
+        cache.put_many({"first": np.zeros(2)})
+        cache.put_many({"second": np.zeros(2)})
+        cache.get_many(["first"])
+        cache.put_many({"third": np.zeros(2)})
+
+        # Assertions
+        self.assertEqual(len(cache), 2)
+        self.assertIn("first", cache.get_many(["first"]))
+        self.assertNotIn("second", cache.get_many(["second"]))
+        cache.close()
+
+    def test_reads_do_not_write_until_flushed(self):
+        """Should buffer the access ticks of reads and write them on close."""
+
+        # Store a vector and read it back from disk only
+        cache = EmbeddingCache(cache_path=self.cache_path, memory_entries=0)
+        cache.put_many({"key": np.ones(2)})
+        stored_tick = self.last_used("key")
+
+        # Call the function
+        cache.get_many(["key"])
+        tick_after_read = self.last_used("key")
+        cache.close()
+
+        # Assertions
+        self.assertEqual(tick_after_read, stored_tick)
+        self.assertGreater(self.last_used("key"), stored_tick)
+
+    def last_used(self, key):
+        """Read the persisted access tick of an entry."""
+        with sqlite3.connect(self.cache_path) as connection:
+            tick = connection.execute("SELECT last_used FROM embeddings WHERE key = ?", (key,)).fetchone()[0]
+        connection.close()
+        return tick
+
+
+class TestCachedEmbeddingFunction(unittest.TestCase):
+    """Test suite for the CachedEmbeddingFunction class."""
+
+    def test_embeds_each_distinct_text_once(self):
+        """Should only forward uncached, distinct texts to the embedding model."""
+
+        # Set up the embedding function
+        base_function = CountingEmbeddingFunction()
+        embedding_function = CachedEmbeddingFunction(
+            cache=EmbeddingCache(), embedding_function=base_function
+        )
+
+        # Call the function twice with overlapping texts
+        first = embedding_function.embed_texts(["name", "year", "name"])
+        second = embedding_function.embed_texts(["year", "count"])
+
+        # Assertions
+        self.assertEqual(base_function.embedded_texts, ["name", "year", "count"])
+        self.assertEqual(len(first), 3)
+        np.testing.assert_array_equal(first[0], first[2])
+        np.testing.assert_array_equal(first[1], second[0])
+
+    @patch("utilities.embedding_cache.DefaultEmbeddingFunction", return_value=None)
+    def test_raises_without_a_default_embedding_function(self, mock_default_embedding_function):
+        """Should fail when ChromaDB provides no default embedding function."""
+
+        # Call the function
+        with self.assertRaises(RuntimeError) as context:
+            CachedEmbeddingFunction(cache=EmbeddingCache())
+
+        # Assertions
+        self.assertEqual(str(context.exception), ERROR_EMBEDDING_FUNCTION_UNAVAILABLE)
+
+    def test_uses_model_name_in_key(self):
+        """Should hash the model name together with the text."""
+
+        # Set up the embedding function
+        embedding_function = CachedEmbeddingFunction(
+            cache=EmbeddingCache(), embedding_function=CountingEmbeddingFunction()
+        )
+
+        # Assertions
+        self.assertEqual(embedding_function.model_name, "counting-model")
+        self.assertNotEqual(
+            make_embedding_key("counting-model", "name"),
+            make_embedding_key("other-model", "name"),
+        )
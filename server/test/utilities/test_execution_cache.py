@@ -0,0 +1,256 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.execution_cache import (ExecutionCache,
+                                       execute_cached_concurrently,
+                                       normalize_sql, run_query)
+from utilities.sql_execution import QueryBudget
+
+
+class TestNormalizeSql(unittest.TestCase):
+    """Test suite for the normalize_sql function."""
+
+    def test_formatting_differences_share_a_key(self):
+        """Should map queries that only differ in formatting to the same text."""
+
+        # Call the function
+        first = normalize_sql("select  County\nFROM schools where School = 'Oak High';")
+        second = normalize_sql("SELECT County FROM schools WHERE School = 'Oak High'")
+
+        # Assertions
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, normalize_sql("SELECT County FROM schools WHERE School = 'oak high'"))
+
+    def test_unparsable_queries_fall_back_to_whitespace(self):
+        """Should collapse whitespace of queries sqlglot cannot parse."""
+
+        # Call the function
+        result = normalize_sql("SELECT  (  FROM\nschools;")
+
+        # Assertions
+        self.assertEqual(result, "SELECT ( FROM schools")
+
+
+class TestExecutionCache(unittest.TestCase):
+    """Test suite for the ExecutionCache class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+        self.cache_path = Path(self.temp_dir.name) / "execution_cache.sqlite"
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (County TEXT, Enrollment REAL);
+                INSERT INTO schools VALUES ('Alameda', 10), ('Fresno', 20), ('Alameda', 30);
+                """
+            )
+        connection.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_cache(self, **kwargs):
+        """Create a cache resolving every database name to the test database."""
+        return ExecutionCache(database_path=lambda database: self.db_path, **kwargs)
+
+    def test_summarizes_the_result(self):
+        """Should keep the row count, columns, a preview and hashes instead of the rows."""
+
+        # Call the function
+        outcome = run_query(self.db_path, "SELECT County FROM schools")
+
+        # Assertions
+        self.assertTrue(outcome.succeeded)
+        self.assertEqual(outcome.row_count, 3)
+        self.assertEqual(outcome.columns, ["County"])
+        self.assertEqual(len(outcome.preview), 3)
+        self.assertTrue(outcome.to_markdown().startswith("| County |\n| --- |\n"))
+
+    def test_set_hash_follows_set_comparison(self):
+        """Should give equal set hashes exactly when the row sets are equal."""
+
+        # Call the function
+        distinct = run_query(self.db_path, "SELECT DISTINCT County FROM schools ORDER BY County DESC")
+        duplicated = run_query(self.db_path, "SELECT County FROM schools")
+        integral = run_query(self.db_path, "SELECT CAST(Enrollment AS INTEGER) FROM schools")
+        real = run_query(self.db_path, "SELECT Enrollment FROM schools")
+
+        # Assertions
+        self.assertEqual(distinct.set_hash, duplicated.set_hash)
+        self.assertNotEqual(distinct.result_hash, duplicated.result_hash)
+        self.assertEqual(integral.set_hash, real.set_hash)
+
+    def test_errors_and_empty_results(self):
+        """Should report errors as messages and render empty results as an empty list."""
+
+        # Call the function
+        error = run_query(self.db_path, "SELECT Missing FROM schools")
+        empty = run_query(self.db_path, "SELECT County FROM schools WHERE 0")
+
+        # Assertions
+        self.assertFalse(error.succeeded)
+        self.assertEqual(error.to_markdown(), "no such column: Missing")
+        self.assertEqual(empty.to_markdown(), "[]")
+
+    def test_reports_queries_past_their_budget(self):
+        """Should record timeouts and exceeded limits as errors of the outcome."""
+
+        # A recursive query that never ends
+        sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n"
+
+        # Call the function
+        timed_out = run_query(self.db_path, sql, QueryBudget(timeout=0.2))
+        too_large = run_query(self.db_path, "SELECT County FROM schools", QueryBudget(max_rows=2))
+
+        # Assertions
+        self.assertTrue(timed_out.timed_out)
+        self.assertEqual(timed_out.error, "Query execution exceeded 0.2 seconds")
+        self.assertTrue(too_large.limit_exceeded)
+        self.assertEqual(too_large.error, "Query returned more than 2 rows")
+
+    def test_runs_equivalent_queries_once(self):
+        """Should serve queries that only differ in formatting from the cache."""
+        cache = self.make_cache()
+
+        with patch("utilities.execution_cache.run_query", wraps=run_query) as mock_run:
+            # Call the function
+            first = cache.execute("schools", "SELECT County FROM schools")
+            second = cache.execute("schools", "select County\n  from schools;")
+
+        # Assertions
+        self.assertIs(first, second)
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_reruns_timeouts_with_a_larger_budget(self):
+        """Should only reuse a timeout for executions that allow no more time."""
+        cache = self.make_cache()
+        sql = "SELECT County FROM schools"
+
+        timed_out = run_query(self.db_path, sql, QueryBudget(timeout=1))
+        timed_out.timed_out = True
+
+        with patch("utilities.execution_cache.run_query", return_value=timed_out) as mock_run:
+            # Call the function
+            cache.execute("schools", sql, QueryBudget(timeout=1))
+            cache.execute("schools", sql, QueryBudget(timeout=0.5))
+            cache.execute("schools", sql, QueryBudget(timeout=5))
+
+        # Assertions
+        self.assertEqual(mock_run.call_count, 2)
+
+    def test_transient_failures_are_not_cached(self):
+        """Should run a query again after a transient failure but reuse its own SQL errors."""
+        cache = self.make_cache(cache_path=self.cache_path)
+        sql = "SELECT County FROM schools"
+
+        with patch(
+            "utilities.execution_cache.summarize_query",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ):
+            # Call the function
+            locked = cache.execute("schools", sql)
+        with patch("utilities.execution_cache.run_query", wraps=run_query) as mock_run:
+            retried = cache.execute("schools", sql)
+            cache.execute("schools", "SELECT Missing FROM schools")
+            missing = cache.execute("schools", "SELECT Missing FROM schools")
+
+        # Assertions
+        self.assertTrue(locked.transient)
+        self.assertTrue(retried.succeeded)
+        self.assertEqual(mock_run.call_count, 2)
+        self.assertFalse(missing.transient)
+        self.assertEqual(missing.error, "no such column: Missing")
+        cache.close()
+
+    def test_changed_database_is_not_served_stale_outcomes(self):
+        """Should key outcomes on the database file so rewritten databases run again."""
+        cache = self.make_cache()
+        before = cache.execute("schools", "SELECT COUNT(*) FROM schools")
+
+        # Grow the database
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("INSERT INTO schools VALUES ('Kern', 40)")
+        connection.close()
+
+        # Call the function
+        after = cache.execute("schools", "SELECT COUNT(*) FROM schools")
+
+        # Assertions
+        self.assertEqual(before.preview, [(3,)])
+        self.assertEqual(after.preview, [(4,)])
+
+    def test_persists_outcomes_across_instances(self):
+        """Should serve outcomes stored by another instance from the backing file."""
+        cache = self.make_cache(cache_path=self.cache_path)
+        cache.execute("schools", "SELECT County FROM schools")
+        cache.close()
+
+        reopened = self.make_cache(cache_path=self.cache_path)
+        with patch("utilities.execution_cache.run_query") as mock_run:
+            # Call the function
+            outcome = reopened.execute("schools", "SELECT County FROM schools")
+
+        # Assertions
+        mock_run.assert_not_called()
+        self.assertEqual(outcome.row_count, 3)
+        reopened.close()
+
+    def test_evicts_least_recently_used_outcomes(self):
+        """Should keep at most max_entries outcomes in memory."""
+        cache = self.make_cache(max_entries=2)
+
+        # Call the function
+        for limit in range(1, 5):
+            cache.execute("schools", f"SELECT County FROM schools LIMIT {limit}")
+
+        # Assertions
+        self.assertEqual(len(cache), 2)
+
+
+class TestExecuteCachedConcurrently(unittest.TestCase):
+    """Test suite for the execute_cached_concurrently function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (County TEXT);
+                INSERT INTO schools VALUES ('Alameda'), ('Fresno');
+                """
+            )
+        connection.close()
+
+        cache = ExecutionCache(database_path=lambda database: self.db_path)
+        patcher = patch("utilities.execution_cache.get_execution_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_yields_the_outcome_of_every_query(self):
+        """Should yield each query's index with its outcome, each within its own deadline."""
+        sqls = [
+            "SELECT County FROM schools",
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n",
+            "SELECT COUNT(*) FROM schools",
+        ]
+
+        # Call the function
+        outcomes = dict(execute_cached_concurrently("schools", sqls, QueryBudget(timeout=0.2)))
+
+        # Assertions
+        self.assertEqual(sorted(outcomes), [0, 1, 2])
+        self.assertEqual(outcomes[0].row_count, 2)
+        self.assertTrue(outcomes[1].timed_out)
+        self.assertEqual(outcomes[2].preview, [(2,)])
@@ -0,0 +1,174 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.execution_cache import run_query
+from utilities.execution_evaluation import (EvaluationTask, chunk_by_database,
+                                            evaluate_tasks)
+from utilities.gold_result_store import file_checksum
+from utilities.ves_timing import TimingConfig
+
+RUNAWAY_SQL = (
+    "WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter) "
+    "SELECT COUNT(*) FROM counter"
+)
+
+
+class TestEvaluateTasks(unittest.TestCase):
+    """Test suite for the evaluate_tasks function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database_paths = {}
+        for database in ("schools", "cards"):
+            db_path = Path(self.temp_dir.name) / f"{database}.sqlite"
+            with sqlite3.connect(db_path) as connection:
+                connection.executescript(
+                    """
+                    CREATE TABLE items (name TEXT, amount INTEGER);
+                    INSERT INTO items VALUES ('a', 1), ('b', 2), ('a', 1);
+                    """
+                )
+            connection.close()
+            self.database_paths[database] = db_path
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def evaluate(self, pairs, **kwargs):
+        """Evaluate (database, predicted, gold) triples in the calling process."""
+        tasks = [
+            EvaluationTask(index=i, database=database, predicted_sql=predicted, gold_sql=gold)
+            for i, (database, predicted, gold) in enumerate(pairs)
+        ]
+        return list(evaluate_tasks(tasks, self.database_paths, num_workers=1, **kwargs))
+
+    def test_comparison_modes(self):
+        """Should compare results as sets, multisets or ordered lists of rows."""
+        pairs = [
+            ("schools", "SELECT DISTINCT name FROM items", "SELECT name FROM items"),
+            ("cards", "SELECT name FROM items ORDER BY name DESC", "SELECT name FROM items ORDER BY name"),
+            ("schools", "SELECT name FROM items ORDER BY name", "SELECT name FROM items ORDER BY 1"),
+        ]
+
+        # Call the function
+        by_mode = {mode: [result.correct for result in self.evaluate(pairs, mode=mode)] for mode in ComparisonMode}
+
+        # Assertions
+        self.assertEqual(by_mode[ComparisonMode.SET], [True, True, True])
+        self.assertEqual(by_mode[ComparisonMode.MULTISET], [False, True, True])
+        self.assertEqual(by_mode[ComparisonMode.ORDERED], [False, False, True])
+
+    def test_reports_errors_and_timeouts(self):
+        """Should mark failing and interrupted queries incorrect and report their errors."""
+        pairs = [
+            ("schools", "SELECT missing FROM items", "SELECT name FROM items"),
+            ("schools", RUNAWAY_SQL, "SELECT name FROM items"),
+        ]
+
+        # Call the function
+        error, timeout = self.evaluate(pairs, timeout=0.1)
+
+        # Assertions
+        self.assertFalse(error.correct)
+        self.assertEqual(error.error, "no such column: missing")
+        self.assertFalse(timeout.correct)
+        self.assertTrue(timeout.predicted_timed_out)
+        self.assertIsNone(timeout.error)
+
+    def test_yields_results_in_task_order_from_worker_processes(self):
+        """Should stream results in task order when chunks are evaluated by several processes."""
+        pairs = [
+            ("schools" if i % 3 else "cards", "SELECT name FROM items", "SELECT name FROM items WHERE amount > 0")
+            for i in range(10)
+        ]
+        tasks = [
+            EvaluationTask(index=100 - i, database=database, predicted_sql=predicted, gold_sql=gold)
+            for i, (database, predicted, gold) in enumerate(pairs)
+        ]
+
+        # Call the function
+        results = list(evaluate_tasks(tasks, self.database_paths, num_workers=2, chunk_size=2))
+
+        # Assertions
+        self.assertEqual([result.index for result in results], [task.index for task in tasks])
+        self.assertEqual([result.database for result in results], [task.database for task in tasks])
+        self.assertTrue(all(result.correct for result in results))
+
+    def test_reads_gold_results_from_the_gold_store(self):
+        """Should execute each gold query once across evaluations when a gold store is given."""
+        tasks = [
+            EvaluationTask(index=0, database="schools", predicted_sql="SELECT name FROM items",
+                           gold_sql="SELECT DISTINCT name FROM items", question_id=3),
+            EvaluationTask(index=1, database="cards", predicted_sql="SELECT 1",
+                           gold_sql="SELECT amount FROM items", question_id=4),
+        ]
+        gold_store_path = Path(self.temp_dir.name) / "gold.sqlite"
+
+        # Call the function
+        with patch("utilities.gold_result_store.run_query", wraps=run_query) as mock_run_query:
+            first = list(evaluate_tasks(tasks, self.database_paths, num_workers=1, gold_store_path=gold_store_path))
+            second = list(evaluate_tasks(tasks, self.database_paths, num_workers=1, gold_store_path=gold_store_path))
+
+        # Assertions
+        self.assertEqual(mock_run_query.call_count, 2)
+        self.assertEqual([result.correct for result in first], [True, False])
+        self.assertEqual([result.correct for result in second], [True, False])
+        self.assertEqual([result.gold_seconds for result in second], [result.gold_seconds for result in first])
+
+    def test_checksums_databases_once_before_starting_the_workers(self):
+        """Should hash each database file in the calling process and hand the checksums to the workers."""
+        tasks = [
+            EvaluationTask(index=i, database=database, predicted_sql="SELECT name FROM items",
+                           gold_sql="SELECT name FROM items", question_id=i)
+            for i, database in enumerate(["schools", "cards", "schools", "cards"])
+        ]
+        gold_store_path = Path(self.temp_dir.name) / "gold.sqlite"
+
+        # Call the function
+        with patch("utilities.gold_result_store.file_checksum", wraps=file_checksum) as mock_checksum:
+            results = list(evaluate_tasks(
+                tasks, self.database_paths, num_workers=2, chunk_size=1, gold_store_path=gold_store_path
+            ))
+
+        # Assertions
+        self.assertEqual(sorted(call.args[0].name for call in mock_checksum.call_args_list),
+                         ["cards.sqlite", "schools.sqlite"])
+        self.assertTrue(all(result.correct for result in results))
+
+    def test_times_correct_predictions_in_pinned_workers(self):
+        """Should measure the time ratio of correct predictions only, in worker processes."""
+        tasks = [
+            EvaluationTask(index=0, database="schools", predicted_sql="SELECT name FROM items",
+                           gold_sql="SELECT DISTINCT name FROM items"),
+            EvaluationTask(index=1, database="cards", predicted_sql="SELECT amount FROM items",
+                           gold_sql="SELECT name FROM items"),
+        ]
+        timing = TimingConfig(min_iterations=2, max_iterations=4, tolerance=0.0)
+
+        # Call the function
+        correct, wrong = evaluate_tasks(tasks, self.database_paths, num_workers=1, timing=timing)
+
+        # Assertions
+        self.assertTrue(correct.correct)
+        self.assertGreater(correct.time_ratio, 0)
+        self.assertEqual(correct.timing_iterations, 4)
+        self.assertFalse(wrong.correct)
+        self.assertEqual(wrong.time_ratio, 0)
+        self.assertEqual(wrong.timing_iterations, 0)
+
+    def test_chunks_group_tasks_by_database(self):
+        """Should split each database's tasks into chunks ordered by their first task."""
+        tasks = [
+            EvaluationTask(index=i, database=database, predicted_sql="", gold_sql="")
+            for i, database in enumerate(["a", "b", "a", "a", "b"])
+        ]
+
+        # Call the function
+        chunks = chunk_by_database(tasks, chunk_size=2)
+
+        # Assertions
+        self.assertEqual([[task.index for task in chunk] for chunk in chunks], [[0, 2], [1, 4], [3]])
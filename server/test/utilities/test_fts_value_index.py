@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from utilities.schema_linking.fts_value_index import (FtsValueIndex,
+                                                      build_fts_value_index)
+from utilities.schema_linking.value_retrieval import (
+    get_table_column_of_similar_values, query_lsh)
+
+UNIQUE_VALUES = {
+    "schools": {
+        "County": ["Alameda", "Fresno", "Los Angeles"],
+        "District": ["Fremont Unified", "Oakland Unified", "Fresno Unified"],
+        "Empty": [],
+    },
+    "frpm": {"School Type": ["High Schools (Public)", 'Elementary "K-8" Schools']},
+}
+
+
+class TestFtsValueIndex(unittest.TestCase):
+    """Test suite for the FTS5 trigram value index."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        index_path = Path(self.temp_dir.name) / "db_values_fts.sqlite"
+        build_fts_value_index(UNIQUE_VALUES, index_path)
+        self.index = FtsValueIndex(index_path)
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_stores_values_and_columns(self):
+        """Should map every row back to its value, table and column."""
+
+        # Call the function
+        stored = [
+            (self.index.table_column(row), self.index.value(row))
+            for row in range(1, len(self.index) + 1)
+        ]
+
+        # Assertions
+        self.assertEqual(len(stored), 8)
+        self.assertEqual(stored[0], (("schools", "County"), "Alameda"))
+        self.assertEqual(stored[5], (("schools", "District"), "Fresno Unified"))
+        self.assertEqual(stored[7], (("frpm", "School Type"), 'Elementary "K-8" Schools'))
+
+    def test_query_ranks_by_trigram_similarity(self):
+        """Should rank the closest value first, ignoring case."""
+
+        # Call the function
+        results = self.index.query("fresno unified", top_n=2)
+
+        # Assertions
+        self.assertEqual(self.index.value(results[0][0]), "Fresno Unified")
+        self.assertEqual(results[0][1], 1.0)
+        self.assertEqual(self.index.value(results[1][0]), "Fremont Unified")
+
+    def test_query_handles_short_and_quoted_keywords(self):
+        """Should return nothing for keywords without trigrams and escape quotes."""
+
+        # Call the function
+        short = self.index.query("LA", top_n=3)
+        quoted = self.index.query('"K-8"', top_n=1)
+
+        # Assertions
+        self.assertEqual(short, [])
+        self.assertEqual(self.index.table_column(quoted[0][0]), ("frpm", "School Type"))
+
+    def test_returns_same_schema_shape_as_lsh(self):
+        """Should plug into the value retrieval functions like the LSH value index."""
+
+        # Call the function
+        schema = get_table_column_of_similar_values(
+            ["Fresno", "Elementary"], top_n=1, value_index=self.index
+        )
+
+        # Assertions
+        self.assertEqual(schema, {"schools": ["County"], "frpm": ["School Type"]})
+        self.assertEqual(query_lsh(self.index, "Oakland", top_n=1), {"schools": ["District"]})
+
+    def test_reopens_after_close(self):
+        """Should serve lookups made after the index was closed."""
+
+        # Call the function
+        self.index.close()
+        results = self.index.query("Fresno", top_n=1)
+
+        # Assertions
+        self.assertEqual(self.index.value(results[0][0]), "Fresno")
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.gold_result_store import GoldResultStore
+
+RUNAWAY_SQL = (
+    "WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter) "
+    "SELECT COUNT(*) FROM counter"
+)
+
+
+class TestGoldResultStore(unittest.TestCase):
+    """Test suite for the GoldResultStore class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (County TEXT, Enrollment INTEGER);
+                INSERT INTO schools VALUES ('Alameda', 10), ('Fresno', 20), ('Alameda', 10);
+                """
+            )
+        connection.close()
+
+        self.store = GoldResultStore(
+            Path(self.temp_dir.name) / "gold_results" / "bird_dev.sqlite",
+            database_path=lambda database: self.db_path,
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_executes_gold_queries_once(self):
+        """Should store every fingerprint of a gold result and serve it without executing again."""
+
+        # Call the function
+        with patch("utilities.gold_result_store.run_query", wraps=__import__(
+            "utilities.gold_result_store", fromlist=["run_query"]
+        ).run_query) as mock_run_query:
+            first = self.store.outcome(7, "schools", "SELECT County FROM schools")
+            second = self.store.outcome(7, "schools", "select County from schools;")
+
+        # Assertions
+        mock_run_query.assert_called_once()
+        self.assertEqual(second, first)
+        self.assertEqual(second.row_count, 3)
+        self.assertIsNotNone(second.set_hash)
+        self.assertIsNotNone(second.result_hash)
+        self.assertIsNotNone(second.ordered_hash)
+        self.assertEqual(len(self.store), 1)
+
+    def test_uses_given_checksums(self):
+        """Should key results by the checksums it was given without reading the database file."""
+        store = GoldResultStore(
+            self.store.store_path,
+            database_path=lambda database: self.db_path,
+            checksums={"schools": "given"},
+        )
+
+        # Call the function
+        with patch("utilities.gold_result_store.file_checksum") as mock_checksum:
+            store.outcome(7, "schools", "SELECT County FROM schools")
+        store.close()
+
+        # Assertions
+        mock_checksum.assert_not_called()
+        self.assertIsNone(self.store.get(7, "schools", "SELECT County FROM schools"))
+
+    def test_changed_databases_and_gold_queries_are_executed_again(self):
+        """Should key results by database checksum and ignore them once the gold query changed."""
+        self.store.outcome(7, "schools", "SELECT County FROM schools")
+
+        # Call the function
+        changed_sql = self.store.get(7, "schools", "SELECT DISTINCT County FROM schools")
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("INSERT INTO schools VALUES ('Kern', 30)")
+        connection.close()
+        os.utime(self.db_path, ns=(0, 0))
+        changed_database = self.store.get(7, "schools", "SELECT County FROM schools")
+        outcome = self.store.outcome(7, "schools", "SELECT County FROM schools")
+
+        # Assertions
+        self.assertIsNone(changed_sql)
+        self.assertIsNone(changed_database)
+        self.assertEqual(outcome.row_count, 4)
+        self.assertEqual(len(self.store), 2)
+
+    def test_timed_out_results_are_retried_with_a_longer_deadline(self):
+        """Should reuse a timed out result only for deadlines that are not longer."""
+        first = self.store.outcome(8, "schools", RUNAWAY_SQL, timeout=0.05)
+
+        # Call the function
+        with patch("utilities.gold_result_store.run_query") as mock_run_query:
+            self.store.outcome(8, "schools", RUNAWAY_SQL, timeout=0.05)
+            mock_run_query.assert_not_called()
+            mock_run_query.return_value = first
+            self.store.outcome(8, "schools", RUNAWAY_SQL, timeout=0.2)
+
+        # Assertions
+        self.assertTrue(first.timed_out)
+        mock_run_query.assert_called_once()
@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from datasketch import LeanMinHash, MinHash, MinHashLSH
+from utilities.schema_linking.minhash_signatures import (
+    DEFAULT_SEED, compute_signatures, compute_signatures_parallel)
+
+
+def datasketch_signature(value, num_perm=16, n_gram=3):
+    """Build the signature of a value one shingle at a time with datasketch."""
+    minhash = MinHash(num_perm=num_perm)
+    for index in range(len(value) - n_gram + 1):
+        minhash.update(value[index : index + n_gram].encode("utf8"))
+    return minhash.hashvalues
+
+
+class TestComputeSignatures(unittest.TestCase):
+    """Test suite for the batched MinHash signature functions."""
+
+    VALUES = ["Alameda", "Fremont Unified", "ab", "", "aaaaaa", "Oakland", "Fremont"]
+
+    def test_matches_datasketch_signatures(self):
+        """Should produce exactly the signatures datasketch builds value by value."""
+
+        # Call the function
+        signatures = compute_signatures(self.VALUES, num_perm=16, n_gram=3)
+
+        # Assertions
+        expected = np.vstack([datasketch_signature(value) for value in self.VALUES])
+        np.testing.assert_array_equal(signatures, expected)
+
+    @patch("utilities.schema_linking.minhash_signatures.SHINGLE_BATCH_SIZE", 4)
+    def test_values_split_across_batches(self):
+        """Should combine shingles of a value that spans several hash batches."""
+
+        # Call the function with a tiny batch size
+        signatures = compute_signatures(self.VALUES, num_perm=16, n_gram=3)
+
+        # Assertions
+        expected = np.vstack([datasketch_signature(value) for value in self.VALUES])
+        np.testing.assert_array_equal(signatures, expected)
+
+    def test_single_worker_runs_in_process(self):
+        """Should sign small inputs in the calling process and keep the input order."""
+
+        # Call the function
+        signatures = compute_signatures_parallel(
+            self.VALUES, num_perm=16, n_gram=3, max_workers=4, chunk_size=100
+        )
+
+        # Assertions
+        np.testing.assert_array_equal(
+            signatures, compute_signatures(self.VALUES, num_perm=16, n_gram=3)
+        )
+
+    def test_signatures_work_with_minhash_lsh(self):
+        """Should be usable as LeanMinHash entries of a datasketch MinHashLSH."""
+
+        # Insert the batched signatures into an LSH
+        lsh = MinHashLSH(threshold=0.1, num_perm=16)
+        signatures = compute_signatures(self.VALUES, num_perm=16, n_gram=3)
+        for index, signature in enumerate(signatures):
+            lsh.insert(str(index), LeanMinHash(seed=DEFAULT_SEED, hashvalues=signature))
+
+        # Call the function with a query built by datasketch
+        query = MinHash(num_perm=16, hashvalues=datasketch_signature("Fremont"))
+        results = lsh.query(query)
+
+        # Assertions
+        self.assertIn("6", results)
+        self.assertIn("1", results)
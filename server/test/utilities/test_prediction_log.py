@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from utilities.prediction_log import (LoggedPrediction, PredictionLogTail,
+                                      append_prediction)
+
+
+class TestPredictionLog(unittest.TestCase):
+    """Test suite for the prediction log."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = Path(self.temp_dir.name) / "logs" / "prediction_log.jsonl"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_reads_only_new_complete_lines(self):
+        """Should return each appended prediction once and leave a partial line for later."""
+        tail = PredictionLogTail(self.log_path)
+        first = LoggedPrediction(1, "schools", "SELECT 1", "SELECT 1", "simple")
+        second = LoggedPrediction(2, "cards", "SELECT 2", "SELECT 3")
+
+        # Call the function
+        before = tail.read_new()
+        append_prediction(first, self.log_path)
+        with open(self.log_path, "a") as file:
+            file.write('{"question_id": 2, "data')
+        partial = tail.read_new()
+        with open(self.log_path, "w") as file:
+            file.write("")
+        truncated = tail.read_new()
+        append_prediction(first, self.log_path)
+        append_prediction(second, self.log_path)
+        restarted = tail.read_new()
+
+        # Assertions
+        self.assertEqual(before, [])
+        self.assertEqual(partial, [first])
+        self.assertEqual(truncated, [])
+        self.assertEqual(restarted, [first, second])
+        self.assertEqual(tail.read_new(), [])
+
+    def test_skips_malformed_lines(self):
+        """Should skip lines that are not predictions and keep reading."""
+        prediction = LoggedPrediction(3, "schools", "SELECT 1", "SELECT 1")
+        self.log_path.parent.mkdir(parents=True)
+        self.log_path.write_text('not json\n{"question_id": 3}\n')
+
+        # Call the function
+        append_prediction(prediction, self.log_path)
+        predictions = PredictionLogTail(self.log_path).read_new()
+
+        # Assertions
+        self.assertEqual(predictions, [prediction])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import random
+import unittest
+
+from utilities.result_fingerprint import ReservoirSample, ResultFingerprint
+
+
+def fingerprint(rows, batch_size=2):
+    """Fingerprint rows fed in batches of the given size."""
+    result = ResultFingerprint()
+    for start in range(0, len(rows), batch_size):
+        result.update(rows[start:start + batch_size])
+    return result
+
+
+class TestResultFingerprint(unittest.TestCase):
+    """Test suite for the ResultFingerprint class."""
+
+    def test_ignores_row_order_and_batching(self):
+        """Should hash the same rows in any order and batch split to the same value."""
+        rows = [("Alameda", 10), ("Fresno", 20), ("Kern", None), ("Alameda", 10)]
+
+        # Call the function
+        first = fingerprint(rows, batch_size=1)
+        second = fingerprint(list(reversed(rows)), batch_size=3)
+
+        # Assertions
+        self.assertEqual(first.multiset_hash(), second.multiset_hash())
+        self.assertEqual(first.set_hash(), second.set_hash())
+        self.assertEqual(first.row_count, 4)
+
+    def test_multiset_hash_counts_duplicates(self):
+        """Should separate results that only differ in duplicated rows, unlike the set hash."""
+
+        # Call the function
+        once = fingerprint([("Alameda",), ("Fresno",)])
+        twice = fingerprint([("Alameda",), ("Fresno",), ("Alameda",)])
+
+        # Assertions
+        self.assertNotEqual(once.multiset_hash(), twice.multiset_hash())
+        self.assertEqual(once.set_hash(), twice.set_hash())
+
+    def test_integral_floats_match_ints(self):
+        """Should treat rows that compare equal in Python as the same row."""
+
+        # Call the function
+        integral = fingerprint([(1, "a"), (2.5, "b")])
+        real = fingerprint([(1.0, "a"), (2.5, "b")])
+        different = fingerprint([(1, "a"), (2, "b")])
+
+        # Assertions
+        self.assertEqual(integral.multiset_hash(), real.multiset_hash())
+        self.assertNotEqual(integral.multiset_hash(), different.multiset_hash())
+
+    def test_groups_match_streamed_rows(self):
+        """Should give the same hashes for distinct rows with multiplicities as for the rows."""
+        grouped = ResultFingerprint()
+
+        # Call the function
+        grouped.add_group(("Alameda",), 2)
+        grouped.add_group(("Fresno",), 1)
+        streamed = fingerprint([("Alameda",), ("Fresno",), ("Alameda",)])
+
+        # Assertions
+        self.assertEqual(grouped.multiset_hash(), streamed.multiset_hash())
+        self.assertEqual(grouped.set_hash(), streamed.set_hash())
+        self.assertEqual(grouped.row_count, 3)
+
+    def test_ordered_hash_depends_on_row_order(self):
+        """Should hash rows in order independently of batching and drop the hash for groups."""
+        rows = [("Alameda",), ("Fresno",), ("Kern",)]
+        grouped = ResultFingerprint()
+
+        # Call the function
+        first = fingerprint(rows, batch_size=1)
+        second = fingerprint(rows, batch_size=3)
+        reordered = fingerprint(list(reversed(rows)))
+        grouped.add_group(("Alameda",), 2)
+
+        # Assertions
+        self.assertEqual(first.ordered_hash(), second.ordered_hash())
+        self.assertNotEqual(first.ordered_hash(), reordered.ordered_hash())
+        self.assertIsNone(grouped.ordered_hash())
+
+
+class TestReservoirSample(unittest.TestCase):
+    """Test suite for the ReservoirSample class."""
+
+    def test_keeps_every_row_of_short_streams(self):
+        """Should keep all rows while fewer than size rows were offered."""
+        sample = ReservoirSample(10)
+
+        # Call the function
+        sample.update([(1,), (2,), (3,)])
+
+        # Assertions
+        self.assertEqual(sample.rows, [(1,), (2,), (3,)])
+
+    def test_samples_long_streams_uniformly(self):
+        """Should keep size rows with every row about equally likely to be kept."""
+        counts = [0] * 20
+        rng = random.Random(0)
+
+        # Call the function
+        for _ in range(2000):
+            sample = ReservoirSample(5, rng)
+            sample.update(range(0, 10))
+            sample.update(range(10, 20))
+            for row in sample.rows:
+                counts[row] += 1
+
+        # Assertions
+        self.assertEqual(sum(counts), 2000 * 5)
+        for count in counts:
+            self.assertAlmostEqual(count / 2000, 5 / 20, delta=0.05)
+
+    def test_samples_repeated_rows_by_their_count(self):
+        """Should keep a row offered several times at once as often as its share of the stream."""
+        counts = {"a": 0, "b": 0, "c": 0}
+        rng = random.Random(0)
+
+        # Call the function
+        for _ in range(4000):
+            sample = ReservoirSample(2, rng)
+            sample.add("a", 10)
+            sample.add("b", 30)
+            sample.add("c", 60)
+            for row in sample.rows:
+                counts[row] += 1
+
+        # Assertions
+        self.assertAlmostEqual(counts["a"] / 8000, 0.1, delta=0.02)
+        self.assertAlmostEqual(counts["b"] / 8000, 0.3, delta=0.03)
+        self.assertAlmostEqual(counts["c"] / 8000, 0.6, delta=0.03)
+
+    def test_large_counts_take_few_steps(self):
+        """Should add a row offered a billion times without iterating over every copy."""
+        sample = ReservoirSample(3, random.Random(0))
+
+        # Call the function
+        sample.add("a", 1)
+        sample.add("b", 10 ** 9)
+
+        # Assertions
+        self.assertEqual(sample.seen, 10 ** 9 + 1)
+        self.assertEqual(len(sample.rows), 3)
@@ -0,0 +1,61 @@
+import unittest
+
+from utilities.sql_canonicalization import (canonicalize_sql,
+                                            group_equivalent_candidates)
+
+
+class TestCanonicalizeSql(unittest.TestCase):
+    """Test suite for the canonicalize_sql function."""
+
+    def test_equivalent_variants_share_a_form(self):
+        """Should map formatting, case, alias and semicolon variants to the same text."""
+
+        # Call the function
+        first = canonicalize_sql(
+            "select T1.County, count(*) from schools AS T1 join frpm T2 on T1.CDSCode = T2.CDSCode group by T1.County;"
+        )
+        second = canonicalize_sql(
+            "SELECT s.county, COUNT(*)\nFROM Schools s JOIN FRPM AS f ON s.cdscode = f.cdscode\nGROUP BY s.county"
+        )
+
+        # Assertions
+        self.assertEqual(first, second)
+
+    def test_keeps_literals_and_quoted_names(self):
+        """Should not change string literals or double-quoted names, which SQLite may read as strings."""
+
+        # Call the function
+        result = canonicalize_sql("SELECT \"County\" FROM Schools WHERE City = 'Fresno'")
+
+        # Assertions
+        self.assertEqual(result, "SELECT \"County\" FROM schools WHERE city = 'Fresno'")
+        self.assertNotEqual(result, canonicalize_sql("SELECT \"County\" FROM schools WHERE city = 'fresno'"))
+
+    def test_keeps_aliases_that_would_clash_with_tables(self):
+        """Should not rename aliases when a canonical name is already a table name."""
+
+        # Call the function
+        result = canonicalize_sql("SELECT x.a FROM t1 AS x")
+
+        # Assertions
+        self.assertEqual(result, "SELECT x.a FROM t1 AS x")
+
+
+class TestGroupEquivalentCandidates(unittest.TestCase):
+    """Test suite for the group_equivalent_candidates function."""
+
+    def test_keeps_the_provenance_of_collapsed_candidates(self):
+        """Should keep one group per distinct query with the ids of all its candidates."""
+        candidates = [
+            ("SELECT County FROM schools", 1),
+            ("SELECT Phone FROM schools", 2),
+            ("select county from schools;", 3),
+        ]
+
+        # Call the function
+        groups = group_equivalent_candidates(candidates)
+
+        # Assertions
+        self.assertEqual([group.sql for group in groups], ["SELECT County FROM schools", "SELECT Phone FROM schools"])
+        self.assertEqual([group.config_ids for group in groups], [[1, 3], [2]])
+        self.assertEqual(groups[0].config_id, 1)
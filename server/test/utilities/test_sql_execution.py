@@ -0,0 +1,237 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.sql_execution import (QueryBudget, QueryCancelledError,
+                                     QueryLimitError, QueryTimeoutError,
+                                     execute_query, summarize_query)
+
+# A recursive query that never ends
+RUNAWAY_SQL = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n"
+
+
+class TestExecuteQuery(unittest.TestCase):
+    """Test suite for the execute_query function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "numbers.sqlite"
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("CREATE TABLE numbers (value INTEGER, label TEXT)")
+            connection.executemany(
+                "INSERT INTO numbers VALUES (?, ?)", ((i, "x" * 100) for i in range(1000))
+            )
+        connection.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_returns_rows_and_columns(self):
+        """Should return every row of a result within the budget."""
+
+        # Call the function
+        result = execute_query(self.db_path, "SELECT value FROM numbers WHERE value < 3")
+
+        # Assertions
+        self.assertEqual(result.rows, [(0,), (1,), (2,)])
+        self.assertEqual(result.columns, ["value"])
+        self.assertGreater(result.elapsed_seconds, 0)
+
+    def test_interrupts_queries_past_their_deadline(self):
+        """Should stop a runaway query inside SQLite once the deadline has passed."""
+
+        # Call the function
+        with self.assertRaises(QueryTimeoutError) as context:
+            execute_query(self.db_path, RUNAWAY_SQL, QueryBudget(timeout=0.1))
+
+        # Assertions
+        self.assertEqual(str(context.exception), "Query execution exceeded 0.1 seconds")
+
+    def test_cancels_queries_from_another_thread(self):
+        """Should stop a running query once its cancellation event is set."""
+        cancel_event = threading.Event()
+        threading.Timer(0.1, cancel_event.set).start()
+
+        # Call the function
+        with self.assertRaises(QueryCancelledError):
+            execute_query(self.db_path, RUNAWAY_SQL, QueryBudget(timeout=None), cancel_event)
+
+    def test_stops_fetching_past_the_row_and_memory_limits(self):
+        """Should raise once the result exceeds its row or memory limit."""
+
+        # Call the function
+        with self.assertRaises(QueryLimitError) as rows_context:
+            execute_query(self.db_path, "SELECT * FROM numbers", QueryBudget(max_rows=999))
+        with self.assertRaises(QueryLimitError) as memory_context:
+            execute_query(self.db_path, "SELECT * FROM numbers", QueryBudget(max_memory_mb=0.05))
+        result = execute_query(self.db_path, "SELECT * FROM numbers", QueryBudget(max_rows=1000))
+
+        # Assertions
+        self.assertEqual(str(rows_context.exception), "Query returned more than 999 rows")
+        self.assertEqual(str(memory_context.exception), "Query result exceeded 0.05 MB")
+        self.assertEqual(len(result.rows), 1000)
+
+    def test_budget_comparison(self):
+        """Should treat a budget as within another only if no limit is larger."""
+
+        # Call the function
+        smaller = QueryBudget(timeout=5, max_rows=10, max_memory_mb=None)
+        larger = QueryBudget(timeout=10, max_rows=10, max_memory_mb=None)
+        unlimited = QueryBudget(timeout=None, max_rows=None, max_memory_mb=None)
+
+        # Assertions
+        self.assertTrue(smaller.within(larger))
+        self.assertFalse(larger.within(smaller))
+        self.assertTrue(larger.within(unlimited))
+        self.assertFalse(unlimited.within(larger))
+
+    def test_streams_batches_without_keeping_rows(self):
+        """Should hand every batch to on_batch and skip the memory limit for unkept rows."""
+        batches = []
+
+        # Call the function
+        result = execute_query(
+            self.db_path,
+            "SELECT value, label FROM numbers",
+            QueryBudget(max_memory_mb=0.01),
+            on_batch=batches.append,
+        )
+
+        # Assertions
+        self.assertEqual(result.rows, [])
+        self.assertEqual(result.row_count, 1000)
+        self.assertEqual(sum(len(batch) for batch in batches), 1000)
+
+
+class TestSummarizeQuery(unittest.TestCase):
+    """Test suite for the summarize_query function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (County TEXT COLLATE NOCASE, Enrollment REAL);
+                INSERT INTO schools VALUES
+                    ('Alameda', 10), ('alameda', 10), ('Fresno', 20.5), ('Alameda', 10), (NULL, NULL);
+                """
+            )
+        connection.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def summarize_fetched(self, sql, **kwargs):
+        """Summarize a query from its fetched rows, which ordered summaries always use."""
+        return summarize_query(self.db_path, sql, ordered=True, **kwargs)
+
+    def test_matches_the_fetched_rows(self):
+        """Should give the same hashes, counts and columns inside SQLite as in Python."""
+        queries = [
+            "SELECT County, Enrollment FROM schools",
+            "SELECT County FROM schools ORDER BY County DESC;",
+            "SELECT a.County, b.County FROM schools a JOIN schools b ON a.Enrollment = b.Enrollment",
+            "SELECT COUNT(*) FROM schools -- trailing comment",
+            "SELECT County FROM schools WHERE 0",
+        ]
+
+        for sql in queries:
+            # Call the function
+            in_database = summarize_query(self.db_path, sql)
+            fetched = self.summarize_fetched(sql)
+
+            # Assertions
+            self.assertEqual(in_database.multiset_hash, fetched.multiset_hash, sql)
+            self.assertEqual(in_database.set_hash, fetched.set_hash, sql)
+            self.assertEqual(in_database.row_count, fetched.row_count, sql)
+            self.assertEqual(in_database.columns, fetched.columns, sql)
+
+    def test_samples_a_preview(self):
+        """Should sample up to preview_rows rows of the result."""
+
+        # Call the function
+        summary = summarize_query(self.db_path, "SELECT County FROM schools", preview_rows=2)
+
+        # Assertions
+        self.assertEqual(summary.row_count, 5)
+        self.assertEqual(len(summary.preview), 2)
+
+    def test_ordered_summaries_hash_the_row_order(self):
+        """Should compute the ordered hash only when asked and keep the other hashes equal."""
+        ascending = "SELECT County FROM schools ORDER BY County COLLATE BINARY"
+        descending = "SELECT County FROM schools ORDER BY County COLLATE BINARY DESC"
+
+        # Call the function
+        unordered = summarize_query(self.db_path, ascending)
+        first = summarize_query(self.db_path, ascending, ordered=True)
+        second = summarize_query(self.db_path, descending, ordered=True)
+
+        # Assertions
+        self.assertIsNone(unordered.ordered_hash)
+        self.assertEqual(first.multiset_hash, unordered.multiset_hash)
+        self.assertEqual(first.multiset_hash, second.multiset_hash)
+        self.assertNotEqual(first.ordered_hash, second.ordered_hash)
+
+    def test_falls_back_for_queries_that_cannot_be_wrapped(self):
+        """Should run statements that are not wrappable as written."""
+
+        # Call the function
+        summary = summarize_query(self.db_path, "PRAGMA table_info(schools)")
+
+        # Assertions
+        self.assertEqual(summary.row_count, 2)
+        self.assertEqual(summary.columns[1], "name")
+
+    def test_reports_errors_and_limits(self):
+        """Should raise the query's own error and enforce the row limit."""
+
+        # Call the function
+        with self.assertRaises(sqlite3.OperationalError) as context:
+            summarize_query(self.db_path, "SELECT Missing FROM schools")
+        with self.assertRaises(QueryLimitError):
+            summarize_query(self.db_path, "SELECT County FROM schools", QueryBudget(max_rows=4))
+        with self.assertRaises(QueryTimeoutError):
+            summarize_query(self.db_path, RUNAWAY_SQL, QueryBudget(timeout=0.1))
+
+        # Assertions
+        self.assertEqual(str(context.exception), "no such column: Missing")
+
+    def test_runs_invalid_queries_once(self):
+        """Should raise the errors of the query itself without fetching its rows again."""
+        queries = {
+            "SELECT Missing FROM schools": "no such column: Missing",
+            "SELECT abs(-9223372036854775807 - 1)": "integer overflow",
+        }
+
+        for sql, error in queries.items():
+            with patch("utilities.sql_execution._summarize_fetched_rows") as mock_fetched:
+                # Call the function
+                with self.assertRaises(sqlite3.OperationalError) as context:
+                    summarize_query(self.db_path, sql)
+
+            # Assertions
+            mock_fetched.assert_not_called()
+            self.assertEqual(str(context.exception), error)
+
+    def test_stops_reading_rows_past_the_row_limit(self):
+        """Should stop the grouped query at the row limit instead of running until the deadline."""
+        budget = QueryBudget(timeout=10, max_rows=1000)
+
+        # Call the function
+        start = time.perf_counter()
+        with self.assertRaises(QueryLimitError):
+            summarize_query(
+                self.db_path,
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT i FROM n",
+                budget,
+            )
+
+        # Assertions
+        self.assertLess(time.perf_counter() - start, 5)
@@ -0,0 +1,127 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.execution_cache import ExecutionCache
+from utilities.sql_execution import QueryBudget
+from utilities.sql_preflight import preflight_query
+
+
+class TestPreflightQuery(unittest.TestCase):
+    """Test suite for the preflight_query function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (id INTEGER PRIMARY KEY, County TEXT);
+                CREATE TABLE scores (school_id INTEGER, Score REAL);
+                """
+            )
+            connection.executemany(
+                "INSERT INTO schools VALUES (?, ?)", ((i, f"County {i % 5}") for i in range(200))
+            )
+            connection.executemany(
+                "INSERT INTO scores VALUES (?, ?)", ((i % 200, i) for i in range(50))
+            )
+        connection.close()
+
+        for name, value in (("PREFLIGHT_LARGE_TABLE_ROWS", 100), ("PREFLIGHT_NESTED_SCAN_ROWS", 10)):
+            patcher = patch(f"utilities.sql_preflight.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_rejects_queries_that_do_not_compile(self):
+        """Should report syntax and schema errors without running the query."""
+
+        # Call the function
+        missing_column = preflight_query(self.db_path, "SELECT Missing FROM schools")
+        syntax_error = preflight_query(self.db_path, "SELECT County FROM")
+
+        # Assertions
+        self.assertFalse(missing_column.succeeded)
+        self.assertEqual(missing_column.error, "no such column: Missing")
+        self.assertFalse(syntax_error.succeeded)
+
+    def test_flags_full_scans_of_large_tables(self):
+        """Should flag a full scan of a large table but not an indexed lookup."""
+
+        # Call the function
+        scan = preflight_query(self.db_path, "SELECT County FROM schools WHERE County = 'County 1'")
+        lookup = preflight_query(self.db_path, "SELECT County FROM schools WHERE id = 42")
+
+        # Assertions
+        self.assertEqual(scan.expensive_scans, ["full scan of schools (~199 rows)"])
+        self.assertFalse(lookup.expensive)
+
+    def test_flags_nested_scans_without_index(self):
+        """Should flag scans driven by an outer loop, through aliases and correlated subqueries."""
+
+        # Call the function
+        join = preflight_query(
+            self.db_path,
+            "SELECT T1.Score FROM scores AS T1, scores AS T2 WHERE T1.Score > T2.Score",
+        )
+        correlated = preflight_query(
+            self.db_path,
+            "SELECT id, (SELECT SUM(Score) FROM scores AS s WHERE s.school_id = schools.id) FROM schools WHERE id < 5",
+        )
+        single = preflight_query(self.db_path, "SELECT MAX(Score) FROM scores")
+
+        # Assertions
+        self.assertEqual(join.expensive_scans, ["nested scan of scores (~50 rows)"])
+        self.assertEqual(correlated.expensive_scans, ["nested scan of scores (~50 rows)"])
+        self.assertFalse(single.expensive)
+
+    def test_caps_the_deadline_of_expensive_queries(self):
+        """Should lower the timeout of expensive queries only."""
+        expensive = preflight_query(self.db_path, "SELECT County FROM schools")
+        cheap = preflight_query(self.db_path, "SELECT County FROM schools WHERE id = 1")
+
+        with patch("utilities.sql_preflight.PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS", 2):
+            # Call the function
+            capped = expensive.budget(QueryBudget(timeout=30, max_rows=10))
+            unchanged = cheap.budget(QueryBudget(timeout=30))
+
+        # Assertions
+        self.assertEqual(capped, QueryBudget(timeout=2, max_rows=10))
+        self.assertEqual(unchanged, QueryBudget(timeout=30))
+
+    def test_cache_rejects_without_running(self):
+        """Should answer queries that do not compile with their execution error, without caching it."""
+        cache = ExecutionCache(database_path=lambda database: self.db_path)
+
+        with patch("utilities.execution_cache.run_query") as mock_run:
+            # Call the function
+            outcome = cache.execute("schools", "SELECT Missing FROM schools", preflight=True)
+
+        # Assertions
+        mock_run.assert_not_called()
+        self.assertEqual(outcome.to_markdown(), "no such column: Missing")
+        self.assertEqual(
+            outcome.to_markdown(),
+            cache.execute("schools", "SELECT Missing FROM schools").to_markdown(),
+        )
+        self.assertEqual(cache.stats()["rejected"], 1)
+
+    def test_cache_hits_skip_the_preflight(self):
+        """Should answer a cached query without compiling it again."""
+        cache = ExecutionCache(database_path=lambda database: self.db_path)
+        cache.execute("schools", "SELECT County FROM schools WHERE id = 1", preflight=True)
+
+        with patch("utilities.execution_cache.preflight_query") as mock_preflight:
+            # Call the function
+            outcome = cache.execute("schools", "SELECT County FROM schools WHERE id = 1", preflight=True)
+
+        # Assertions
+        mock_preflight.assert_not_called()
+        self.assertTrue(outcome.succeeded)
+        self.assertEqual(cache.stats()["hits"], 1)
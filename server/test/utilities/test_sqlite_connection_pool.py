@@ -0,0 +1,175 @@
+import gc
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from utilities.connections.sqlite import SqliteConnectionPool
+from utilities.constants.database_enums import SqliteConnectionMode
+
+
+class TestSqliteConnectionPool(unittest.TestCase):
+    """Test suite for the SqliteConnectionPool class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+        self.execute("CREATE TABLE schools (County TEXT)")
+        self.execute("INSERT INTO schools VALUES ('Alameda')")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def execute(self, sql):
+        """Run a write statement against the test database."""
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(sql)
+        connection.close()
+
+    def test_reuses_the_connection_of_a_thread(self):
+        """Should open one connection per thread and database and reuse it."""
+        pool = SqliteConnectionPool(mode=SqliteConnectionMode.FILE)
+        other_thread_connections = []
+
+        def borrow():
+            with pool.connect(self.db_path) as connection:
+                other_thread_connections.append(connection)
+
+        # Call the function
+        with pool.connect(self.db_path) as first:
+            pass
+        with pool.connect(self.db_path) as second:
+            pass
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        thread.join()
+
+        # Assertions
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_thread_connections[0])
+        self.assertEqual(pool.stats()["opened"], 2)
+        self.assertEqual(pool.stats()["reused"], 1)
+
+    def test_connections_are_read_only_in_every_mode(self):
+        """Should reject writes on file and in-memory connections."""
+        for mode in (SqliteConnectionMode.FILE, SqliteConnectionMode.MEMORY):
+            pool = SqliteConnectionPool(mode=mode)
+
+            # Call the function
+            with pool.connect(self.db_path) as connection:
+                rows = connection.execute("SELECT County FROM schools").fetchall()
+                with self.assertRaises(sqlite3.OperationalError):
+                    connection.execute("INSERT INTO schools VALUES ('Fresno')")
+
+            # Assertions
+            self.assertEqual(rows, [("Alameda",)])
+
+    def test_auto_mode_copies_only_small_databases(self):
+        """Should copy databases up to the size limit into memory."""
+
+        # Call the function
+        with SqliteConnectionPool(mode=SqliteConnectionMode.AUTO).connect(self.db_path) as small:
+            small_files = small.execute("PRAGMA database_list").fetchall()
+        with SqliteConnectionPool(
+            mode=SqliteConnectionMode.AUTO, in_memory_max_mb=0
+        ).connect(self.db_path) as large:
+            large_files = large.execute("PRAGMA database_list").fetchall()
+
+        # Assertions
+        self.assertEqual(small_files[0][2], "")
+        self.assertEqual(Path(large_files[0][2]), self.db_path.resolve())
+
+    def test_reopens_rewritten_databases(self):
+        """Should open a new connection once the database file changes."""
+        pool = SqliteConnectionPool(mode=SqliteConnectionMode.MEMORY)
+        with pool.connect(self.db_path) as connection:
+            before = connection.execute("SELECT COUNT(*) FROM schools").fetchone()
+
+        # Add a row
+        self.execute("INSERT INTO schools VALUES ('Fresno')")
+
+        # Call the function
+        with pool.connect(self.db_path) as connection:
+            after = connection.execute("SELECT COUNT(*) FROM schools").fetchone()
+
+        # Assertions
+        self.assertEqual((before, after), ((1,), (2,)))
+
+    def test_restores_the_connection_when_returned(self):
+        """Should reset the row factory and progress handler after each use."""
+        pool = SqliteConnectionPool(mode=SqliteConnectionMode.FILE)
+
+        # Call the function
+        with pool.connect(self.db_path, row_factory=sqlite3.Row) as connection:
+            row = connection.execute("SELECT County FROM schools").fetchone()
+            connection.set_progress_handler(lambda: 1, 1)
+        with pool.connect(self.db_path) as connection:
+            row_factory = connection.row_factory
+            reused_row = connection.execute("SELECT County FROM schools").fetchone()
+
+        # Assertions
+        self.assertEqual(row["County"], "Alameda")
+        self.assertIsNone(row_factory)
+        self.assertEqual(reused_row, ("Alameda",))
+
+    def test_closes_least_recently_used_connections(self):
+        """Should keep at most max_connections_per_thread connections open."""
+        pool = SqliteConnectionPool(mode=SqliteConnectionMode.FILE, max_connections_per_thread=1)
+        other_path = Path(self.temp_dir.name) / "other.sqlite"
+        with sqlite3.connect(other_path) as connection:
+            connection.execute("CREATE TABLE t (x)")
+        connection.close()
+
+        # Call the function
+        with pool.connect(self.db_path):
+            pass
+        with pool.connect(other_path):
+            pass
+
+        # Assertions
+        self.assertEqual(pool.stats()["closed"], 1)
+
+    def test_in_memory_copies_share_one_budget(self):
+        """Should read the file once the in-memory copies of all threads fill the budget, until they are freed."""
+        size_mb = self.db_path.stat().st_size / (1024 * 1024)
+        pool = SqliteConnectionPool(mode=SqliteConnectionMode.MEMORY, in_memory_pool_max_mb=1.5 * size_mb)
+        files = []
+
+        def borrow():
+            with pool.connect(self.db_path) as connection:
+                files.append(connection.execute("PRAGMA database_list").fetchone()[2])
+
+        # Call the function
+        for _ in range(2):
+            thread = threading.Thread(target=borrow)
+            thread.start()
+            thread.join()
+        # The copy of the finished thread is freed with it
+        gc.collect()
+        borrow()
+
+        # Assertions
+        self.assertEqual(files[0], "")
+        self.assertEqual(Path(files[1]), self.db_path.resolve())
+        self.assertEqual(files[2], "")
+        self.assertEqual(pool.stats()["in_memory_fallbacks"], 1)
+
+    def test_reads_the_write_ahead_log(self):
+        """Should see rows that are only in the write-ahead log of the database."""
+        writer = sqlite3.connect(self.db_path)
+        writer.execute("PRAGMA journal_mode = WAL")
+        writer.execute("PRAGMA wal_autocheckpoint = 0")
+        writer.execute("INSERT INTO schools VALUES ('Fresno')")
+        writer.commit()
+
+        try:
+            for mode in (SqliteConnectionMode.FILE, SqliteConnectionMode.MEMORY):
+                # Call the function
+                with SqliteConnectionPool(mode=mode).connect(self.db_path) as connection:
+                    count = connection.execute("SELECT COUNT(*) FROM schools").fetchone()[0]
+
+                # Assertions
+                self.assertEqual(count, 2)
+        finally:
+            writer.close()
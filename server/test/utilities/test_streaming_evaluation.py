@@ -0,0 +1,107 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from utilities.prediction_log import LoggedPrediction, append_prediction
+from utilities.streaming_evaluation import LiveAccuracy, StreamingEvaluator
+
+
+class TestStreamingEvaluator(unittest.TestCase):
+    """Test suite for the StreamingEvaluator class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = Path(self.temp_dir.name) / "prediction_log.jsonl"
+        self.database_paths = {}
+        for database in ("schools", "cards"):
+            db_path = Path(self.temp_dir.name) / f"{database}.sqlite"
+            with sqlite3.connect(db_path) as connection:
+                connection.executescript(
+                    """
+                    CREATE TABLE items (name TEXT, amount INTEGER);
+                    INSERT INTO items VALUES ('a', 1), ('b', 2);
+                    """
+                )
+            connection.close()
+            self.database_paths[database] = db_path
+        self.evaluator = StreamingEvaluator(self.log_path, self.database_paths, num_workers=2)
+
+    def tearDown(self):
+        self.evaluator.close()
+        self.temp_dir.cleanup()
+
+    def test_scores_predictions_as_they_are_logged(self):
+        """Should score new predictions on every poll and break the accuracy down."""
+        append_prediction(LoggedPrediction(1, "schools", "SELECT name FROM items", "SELECT name FROM items", "simple"), self.log_path)
+        append_prediction(LoggedPrediction(2, "cards", "SELECT amount FROM items", "SELECT name FROM items", "moderate"), self.log_path)
+
+        # Call the function
+        submitted = self.evaluator.poll()
+        self.evaluator.collect(timeout=None)
+        first = self.evaluator.accuracy()
+        append_prediction(LoggedPrediction(3, "cards", "SELECT name FROM items", "SELECT name FROM items", "simple"), self.log_path)
+        self.evaluator.poll()
+        self.evaluator.collect(timeout=None)
+        second = self.evaluator.accuracy()
+
+        # Assertions
+        self.assertEqual(submitted, 2)
+        self.assertEqual((first.overall.correct, first.overall.total), (1, 2))
+        self.assertEqual(second.by_difficulty["simple"].accuracy, 100.0)
+        self.assertEqual(second.by_difficulty["moderate"].accuracy, 0.0)
+        self.assertEqual((second.by_database["cards"].correct, second.by_database["cards"].total), (1, 2))
+        self.assertEqual(self.evaluator.pending, 0)
+
+    def test_latest_prediction_of_a_question_wins(self):
+        """Should replace the score of a question that is logged again."""
+        append_prediction(LoggedPrediction(1, "schools", "SELECT 1", "SELECT name FROM items"), self.log_path)
+        append_prediction(LoggedPrediction(1, "schools", "SELECT name FROM items", "SELECT name FROM items"), self.log_path)
+
+        # Call the function
+        self.evaluator.poll()
+        self.evaluator.collect(timeout=None)
+        accuracy = self.evaluator.accuracy()
+
+        # Assertions
+        self.assertEqual((accuracy.overall.correct, accuracy.overall.total), (1, 1))
+        self.assertEqual(len(self.evaluator.results()), 1)
+
+    def test_failed_evaluation_counts_as_incorrect(self):
+        """Should record a prediction whose evaluation raises as incorrect and keep scoring the others."""
+        append_prediction(LoggedPrediction(1, "unknown", "SELECT name FROM items", "SELECT name FROM items"), self.log_path)
+        append_prediction(LoggedPrediction(2, "schools", "SELECT name FROM items", "SELECT name FROM items"), self.log_path)
+
+        # Call the function
+        self.evaluator.poll()
+        self.evaluator.collect(timeout=None)
+        accuracy = self.evaluator.accuracy()
+
+        # Assertions
+        self.assertEqual((accuracy.overall.correct, accuracy.overall.total), (1, 2))
+        self.assertEqual((accuracy.by_database["unknown"].correct, accuracy.by_database["unknown"].total), (0, 1))
+        self.assertIsNotNone(next(result for result in self.evaluator.results() if result.index == 1).error)
+        self.assertEqual(self.evaluator.pending, 0)
+
+
+class TestLiveAccuracy(unittest.TestCase):
+    """Test suite for the LiveAccuracy class."""
+
+    def test_report(self):
+        """Should report counts and accuracies by difficulty, in total and by database."""
+        accuracy = LiveAccuracy()
+        accuracy.add(LoggedPrediction(1, "schools", "", "", "simple"), True)
+        accuracy.add(LoggedPrediction(2, "cards", "", "", "challenging"), False)
+
+        # Call the function
+        report = accuracy.report().splitlines()
+
+        # Assertions
+        self.assertEqual(report[1].split(), ["count", "1", "0", "1", "2"])
+        self.assertEqual(report[2].split(), ["accuracy", "100.00", "0.00", "0.00", "50.00"])
+        self.assertEqual(report[-2].split(), ["cards", "1", "0.00"])
+        self.assertEqual(report[-1].split(), ["schools", "1", "100.00"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.schema_linking.unique_values import (find_changed_columns,
+                                                     get_column_fingerprints,
+                                                     get_unique_values)
+
+
+class TestGetUniqueValues(unittest.TestCase):
+    """Test suite for the get_unique_values function."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "test.sqlite")
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (
+                    CDSCode TEXT PRIMARY KEY,
+                    County TEXT,
+                    School TEXT,
+                    SchoolId TEXT,
+                    Website TEXT,
+                    Enrollment INTEGER
+                );
+                CREATE TABLE frpm (
+                    CDSCode TEXT,
+                    Notes TEXT,
+                    "District Name" TEXT
+                );
+                """
+            )
+            connection.executemany(
+                "INSERT INTO schools VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    ("1", "Alameda", "Oak High", "a", "x.org", 10),
+                    ("2", "Alameda", "Elm Middle", "b", "y.org", 20),
+                    ("3", None, "Pine Elementary", "c", "z.org", 30),
+                ],
+            )
+            connection.executemany(
+                "INSERT INTO frpm VALUES (?, ?, ?)",
+                [(str(i), "n" * 40 + str(i), f"District {i % 3}") for i in range(200)],
+            )
+        connection.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_collects_distinct_values_of_candidate_columns(self):
+        """Should return the distinct values of text columns that are not keys or skipped."""
+
+        # Call the function
+        unique_values = get_unique_values(self.db_path)
+
+        # Assertions
+        self.assertEqual(
+            {table: sorted(columns) for table, columns in unique_values.items()},
+            {"schools": ["County", "School"], "frpm": ["District Name"]},
+        )
+        self.assertEqual(unique_values["schools"]["County"], ["Alameda"])
+        self.assertEqual(
+            sorted(unique_values["frpm"]["District Name"]),
+            ["District 0", "District 1", "District 2"],
+        )
+
+    @patch("utilities.schema_linking.unique_values.FETCH_BATCH_SIZE", 10)
+    @patch("utilities.schema_linking.unique_values.MAX_TOTAL_LENGTH", 1000)
+    def test_stops_scanning_columns_over_the_length_limit(self):
+        """Should skip a column as soon as its distinct values exceed the length limits."""
+
+        # Call the function
+        unique_values = get_unique_values(self.db_path)
+
+        # Assertions
+        self.assertNotIn("Notes", unique_values["frpm"])
+        self.assertIn("District Name", unique_values["frpm"])
+
+    def test_parallel_tables_match_single_connection(self):
+        """Should return the same values when tables are scanned in worker processes."""
+
+        # Call the function
+        single = get_unique_values(self.db_path, max_workers=1)
+        parallel = get_unique_values(self.db_path, max_workers=2)
+
+        # Assertions
+        self.assertEqual(single, parallel)
+
+
+class TestFindChangedColumns(unittest.TestCase):
+    """Test suite for column fingerprints and find_changed_columns."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "test.sqlite")
+
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE schools (County TEXT, School TEXT);
+                CREATE TABLE districts (Region TEXT);
+                INSERT INTO schools VALUES ('Alameda', 'Oak High'), ('Fresno', 'Elm Middle');
+                INSERT INTO districts VALUES ('North'), ('South');
+                """
+            )
+        connection.close()
+        self.fingerprints = get_column_fingerprints(
+            self.db_path, get_unique_values(self.db_path)
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def execute(self, sql):
+        """Run a write statement against the test database."""
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(sql)
+        connection.close()
+
+    def test_unchanged_database_has_no_changed_columns(self):
+        """Should report nothing when the database is unchanged."""
+
+        # Call the function
+        changed, fingerprints = find_changed_columns(self.db_path, self.fingerprints)
+
+        # Assertions
+        self.assertEqual(changed, {})
+        self.assertEqual(fingerprints, self.fingerprints)
+
+    def test_reports_only_columns_whose_values_changed(self):
+        """Should rescan the grown table and report only the columns with new values."""
+
+        # Add a row that only introduces a new school
+        self.execute("INSERT INTO schools VALUES ('Alameda', 'Pine Elementary')")
+
+        # Call the function
+        changed, fingerprints = find_changed_columns(self.db_path, self.fingerprints)
+
+        # Assertions
+        self.assertEqual(list(changed), ["schools"])
+        self.assertEqual(list(changed["schools"]), ["School"])
+        self.assertEqual(
+            sorted(changed["schools"]["School"]),
+            ["Elm Middle", "Oak High", "Pine Elementary"],
+        )
+        self.assertEqual(fingerprints["schools"]["County"]["row_count"], 3)
+        self.assertEqual(fingerprints["districts"], self.fingerprints["districts"])
+
+    def test_full_check_catches_in_place_updates(self):
+        """Should only notice updates that keep the row count when asked for a full check."""
+
+        # Update a value in place
+        self.execute("UPDATE districts SET Region = 'East' WHERE Region = 'North'")
+
+        # Call the function
+        quick_changed, _ = find_changed_columns(self.db_path, self.fingerprints)
+        full_changed, _ = find_changed_columns(self.db_path, self.fingerprints, full=True)
+
+        # Assertions
+        self.assertEqual(quick_changed, {})
+        self.assertEqual(list(full_changed), ["districts"])
+        self.assertEqual(sorted(full_changed["districts"]["Region"]), ["East", "South"])
+
+    def test_reports_dropped_columns(self):
+        """Should report columns that are no longer candidates for removal."""
+
+        # Drop a table
+        self.execute("DROP TABLE districts")
+
+        # Call the function
+        changed, fingerprints = find_changed_columns(self.db_path, self.fingerprints)
+
+        # Assertions
+        self.assertEqual(changed, {"districts": {"Region": None}})
+        self.assertNotIn("districts", fingerprints)
@@ -0,0 +1,30 @@
+import unittest
+from unittest.mock import patch
+
+from utilities.sql_execution import QueryBudget
+from utilities.utility_functions import execute_sql_timeout
+
+
+class TestExecuteSqlTimeout(unittest.TestCase):
+    """Test suite for the execute_sql_timeout function."""
+
+    @patch("utilities.utility_functions.PATH_CONFIG")
+    @patch("utilities.utility_functions.execute_query")
+    def test_only_limits_execution_time(self, mock_execute_query, mock_path_config):
+        """Should return every row of the query, bounded by the timeout alone."""
+        mock_execute_query.return_value.rows = [(1,), (2,)]
+
+        # Call the function
+        rows = execute_sql_timeout("db", "SELECT 1", timeout=5)
+
+        # Assertions
+        self.assertEqual(rows, [(1,), (2,)])
+        mock_execute_query.assert_called_once_with(
+            mock_path_config.sqlite_path.return_value,
+            "SELECT 1",
+            QueryBudget(timeout=5, max_rows=None, max_memory_mb=None),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from datasketch import LeanMinHash, MinHashLSH
+from utilities.schema_linking.minhash_signatures import (
+    DEFAULT_SEED, compute_signatures, compute_signatures_parallel)
+from utilities.schema_linking.value_index import (ValueIndex,
+                                                  build_value_index,
+                                                  update_value_index)
+from utilities.schema_linking.value_retrieval import \
+    get_table_column_of_similar_values
+
+UNIQUE_VALUES = {
+    "schools": {
+        "County": ["Alameda", "Fresno", "Los Angeles"],
+        "District": ["Fremont Unified", "Oakland Unified", "Fresno Unified"],
+    },
+    "frpm": {"School Type": ["High Schools (Public)", "Elementary Schools"]},
+    "empty": {},
+}
+
+
+class TestValueIndex(unittest.TestCase):
+    """Test suite for the memory-mapped value index."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.temp_dir.name) / "db_value_index"
+        build_value_index(
+            UNIQUE_VALUES, self.index_dir, num_perm=32, n_gram=3, threshold=0.1
+        )
+        self.index = ValueIndex(self.index_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stores_values_and_columns(self):
+        """Should round trip every value together with its table and column."""
+
+        # Call the function
+        stored = [(self.index.table_column(row), self.index.value(row)) for row in range(len(self.index))]
+
+        # Assertions
+        self.assertEqual(len(self.index), 8)
+        self.assertEqual(stored[0], (("schools", "County"), "Alameda"))
+        self.assertEqual(stored[4], (("schools", "District"), "Oakland Unified"))
+        self.assertEqual(stored[7], (("frpm", "School Type"), "Elementary Schools"))
+
+    def test_candidates_match_datasketch_lsh(self):
+        """Should return the same LSH candidates as a datasketch MinHashLSH."""
+
+        # Build the equivalent datasketch LSH
+        values = [self.index.value(row) for row in range(len(self.index))]
+        lsh = MinHashLSH(threshold=0.1, num_perm=32)
+        for row, signature in enumerate(compute_signatures(values, num_perm=32, n_gram=3)):
+            lsh.insert(row, LeanMinHash(seed=DEFAULT_SEED, hashvalues=signature))
+
+        for keyword in ["Fresno", "Unified", "Schools", "xyz"]:
+            signature = self.index.signature(keyword)
+
+            # Call the function
+            candidates = self.index.candidates(signature)
+
+            # Assertions
+            expected = lsh.query(LeanMinHash(seed=DEFAULT_SEED, hashvalues=signature))
+            self.assertEqual(set(candidates.tolist()), set(expected), keyword)
+
+    def test_query_ranks_by_similarity(self):
+        """Should rank exact matches first and respect top_n."""
+
+        # Call the function
+        results = self.index.query("Fresno Unified", top_n=2)
+
+        # Assertions
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.index.value(results[0][0]), "Fresno Unified")
+        self.assertEqual(results[0][1], 1.0)
+        self.assertGreaterEqual(results[0][1], results[1][1])
+
+    def test_missing_index_raises(self):
+        """Should raise FileNotFoundError when no index has been built."""
+
+        # Assertions
+        self.assertFalse(ValueIndex.exists(Path(self.temp_dir.name) / "missing"))
+        with self.assertRaises(FileNotFoundError):
+            ValueIndex(Path(self.temp_dir.name) / "missing")
+
+    def test_batch_query_matches_single_queries(self):
+        """Should rank every keyword of a batch exactly as a query of its own."""
+
+        keywords = ["Fresno", "Unified", "Schools", "xyz", "Alameda County"]
+
+        # Call the function
+        results = self.index.batch_query(keywords, top_n=3)
+
+        # Assertions
+        self.assertEqual(len(results), len(keywords))
+        for keyword, keyword_results in zip(keywords, results):
+            self.assertLessEqual(len(keyword_results), 3)
+            self.assertEqual(keyword_results, self.index.query(keyword, top_n=3))
+            similarities = [similarity for _, similarity in keyword_results]
+            self.assertEqual(similarities, sorted(similarities, reverse=True))
+        self.assertEqual(results[3], [])
+        self.assertEqual(self.index.batch_query([], top_n=3), [])
+
+
+class TestGetTableColumnOfSimilarValues(unittest.TestCase):
+    """Test suite for the get_table_column_of_similar_values function."""
+
+    def test_merges_columns_of_all_keywords(self):
+        """Should merge the tables and columns matched by every keyword without duplicates."""
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_dir = Path(temp_dir) / "db_value_index"
+            build_value_index(
+                UNIQUE_VALUES, index_dir, num_perm=32, n_gram=3, threshold=0.1
+            )
+
+            # Call the function
+            schema = get_table_column_of_similar_values(
+                ["Fresno", "Fresno Unified", "Elementary Schools"],
+                top_n=1,
+                value_index=ValueIndex(index_dir),
+            )
+
+        # Assertions
+        self.assertEqual(
+            schema,
+            {"schools": ["County", "District"], "frpm": ["School Type"]},
+        )
+
+
+class TestUpdateValueIndex(unittest.TestCase):
+    """Test suite for the update_value_index function."""
+
+    def test_matches_a_full_rebuild(self):
+        """Should produce the same index as a rebuild while only re-signing new values."""
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_dir = Path(temp_dir) / "db_value_index"
+            rebuilt_dir = Path(temp_dir) / "rebuilt_value_index"
+            build_value_index(
+                UNIQUE_VALUES, index_dir, num_perm=32, n_gram=3, threshold=0.1
+            )
+            changed_columns = {
+                "schools": {"County": ["Alameda", "Fresno", "Kern"], "District": None},
+                "frpm": {"Charter": ["Yes", "No"]},
+            }
+            fingerprints = {"schools": {"County": {"content_hash": "new"}}}
+
+            # Call the function
+            with patch(
+                "utilities.schema_linking.value_index.compute_signatures_parallel",
+                wraps=compute_signatures_parallel,
+            ) as mock_compute_signatures:
+                stats = update_value_index(index_dir, changed_columns, fingerprints)
+
+            build_value_index(
+                {
+                    "schools": {"County": ["Alameda", "Fresno", "Kern"]},
+                    "frpm": {
+                        "School Type": UNIQUE_VALUES["frpm"]["School Type"],
+                        "Charter": ["Yes", "No"],
+                    },
+                },
+                rebuilt_dir,
+                num_perm=32,
+                n_gram=3,
+                threshold=0.1,
+            )
+            updated, rebuilt = ValueIndex(index_dir), ValueIndex(rebuilt_dir)
+
+            # Assertions
+            self.assertEqual(
+                mock_compute_signatures.call_args.args[0], ["Kern", "Yes", "No"]
+            )
+            self.assertEqual(
+                stats,
+                {"added_values": 3, "removed_values": 4, "reindexed_columns": 3},
+            )
+            self.assertEqual(updated.fingerprints, fingerprints)
+            self.assertEqual(updated.columns, rebuilt.columns)
+            self.assertEqual(
+                [updated.value(row) for row in range(len(updated))],
+                [rebuilt.value(row) for row in range(len(rebuilt))],
+            )
+            np.testing.assert_array_equal(updated.signatures, rebuilt.signatures)
+            np.testing.assert_array_equal(updated.band_keys, rebuilt.band_keys)
@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import MagicMock, PropertyMock
+
+from utilities.schema_linking.value_index_registry import (BYTES_PER_MB,
+                                                           ValueIndexRegistry)
+
+
+def fake_value_index(size_mb):
+    """Return a stand-in value index of the given mapped size."""
+    value_index = MagicMock(name="ValueIndex")
+    value_index.nbytes = int(size_mb * BYTES_PER_MB)
+    return value_index
+
+
+class TestValueIndexRegistry(unittest.TestCase):
+    """Test suite for the ValueIndexRegistry class."""
+
+    def setUp(self):
+        self.loader = MagicMock(side_effect=lambda database_name: fake_value_index(4))
+        self.registry = ValueIndexRegistry(memory_budget_mb=10, loader=self.loader)
+
+    def test_opens_each_database_once(self):
+        """Should open an index on first use and serve later requests from the registry."""
+
+        # Call the function
+        first = self.registry.get("db1")
+        second = self.registry.get("db1")
+
+        # Assertions
+        self.assertIs(first, second)
+        self.loader.assert_called_once_with("db1")
+        stats = self.registry.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["resident_bytes"], 4 * BYTES_PER_MB)
+
+    def test_evicts_least_recently_used_over_budget(self):
+        """Should close the least recently used index once the memory budget is exceeded."""
+
+        # Call the function
+        self.registry.get("db1")
+        evicted = self.registry.get("db2")
+        self.registry.get("db1")
+        self.registry.get("db3")
+
+        # Assertions
+        stats = self.registry.stats()
+        self.assertEqual(stats["databases"], ["db1", "db3"])
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["resident_bytes"], 8 * BYTES_PER_MB)
+        evicted.close.assert_called_once_with()
+
+    def test_keeps_newest_index_over_budget(self):
+        """Should keep the requested index even if it alone exceeds the budget."""
+
+        # Set up an index larger than the budget
+        self.loader.side_effect = lambda database_name: fake_value_index(20)
+
+        # Call the function
+        self.registry.get("db1")
+        self.registry.get("db2")
+
+        # Assertions
+        self.assertEqual(self.registry.stats()["databases"], ["db2"])
+
+    def test_evict_closes_index(self):
+        """Should reopen an index after it has been evicted explicitly."""
+
+        # Call the function
+        self.registry.get("db1")
+        self.registry.evict("db1")
+        self.registry.get("db1")
+
+        # Assertions
+        self.assertEqual(self.loader.call_count, 2)
+        self.assertEqual(self.registry.stats()["resident_bytes"], 4 * BYTES_PER_MB)
+
+    def test_closes_evicted_indexes_with_their_size_at_load(self):
+        """Should close evicted indexes and release the size recorded when they were opened."""
+
+        # Call the function
+        first = self.registry.get("db1")
+        second = self.registry.get("db2")
+        # The index files changed size or disappeared after they were opened
+        first.nbytes = 0
+        type(second).nbytes = PropertyMock(side_effect=FileNotFoundError)
+        self.registry.evict("db1")
+        self.registry.clear()
+
+        # Assertions
+        first.close.assert_called_once_with()
+        second.close.assert_called_once_with()
+        self.assertEqual(self.registry.stats()["resident_bytes"], 0)
@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.schema_linking.value_retrieval import \
+    create_lsh_for_all_databases
+
+
+class TestCreateLshForAllDatabases(unittest.TestCase):
+    """Test suite for the create_lsh_for_all_databases function."""
+
+    @patch("utilities.schema_linking.value_retrieval.MAX_LSH_PROCESSES", 8)
+    @patch("utilities.schema_linking.value_retrieval.MAX_LSH_DATABASE_WORKERS", 4)
+    @patch("utilities.schema_linking.value_retrieval.make_db_value_index")
+    def test_databases_share_the_process_budget(self, mock_make_db_value_index):
+        """Should split the processes between the databases built at the same time."""
+        with tempfile.TemporaryDirectory() as dataset_dir:
+            for database in ("db1", "db2", "db3", "db4", "db5"):
+                (Path(dataset_dir) / database).mkdir()
+
+            # Call the function
+            create_lsh_for_all_databases(dataset_dir)
+
+        # Assertions
+        self.assertEqual(
+            sorted(call.args for call in mock_make_db_value_index.call_args_list),
+            [("db1", 2), ("db2", 2), ("db3", 2), ("db4", 2), ("db5", 2)],
+        )
+
+    @patch("utilities.schema_linking.value_retrieval.MAX_LSH_PROCESSES", 8)
+    @patch("utilities.schema_linking.value_retrieval.make_db_value_index")
+    def test_single_database_gets_every_process(self, mock_make_db_value_index):
+        """Should give all processes to a database built alone."""
+        with tempfile.TemporaryDirectory() as dataset_dir:
+            (Path(dataset_dir) / "db1").mkdir()
+
+            # Call the function
+            create_lsh_for_all_databases(dataset_dir)
+
+        # Assertions
+        mock_make_db_value_index.assert_called_once_with("db1", 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from utilities.constants.retrieval_enums import ValueIndexEngine
+from utilities.schema_linking.fts_value_index import FtsValueIndex
+from utilities.schema_linking.value_index import ValueIndex
+from utilities.schema_linking.value_retrieval import (make_db_fts_index,
+                                                      refresh_db_lsh,
+                                                      refresh_db_value_index)
+
+
+class TestRefreshValueIndex(unittest.TestCase):
+    """Test suite for refreshing the value index of a database."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.db_path = self.root / "db.sqlite"
+        sqlite3.connect(self.db_path).close()
+
+        path_config = MagicMock()
+        path_config.sqlite_path.return_value = self.db_path
+        path_config.database_preprocessed_dir.return_value = self.root / "preprocessed"
+        path_config.unique_values_path.return_value = self.root / "preprocessed" / "unique_values.pkl"
+        path_config.value_index_dir.return_value = self.root / "preprocessed" / "value_index"
+        path_config.fts_value_index_path.return_value = self.root / "preprocessed" / "values_fts.sqlite"
+        self.path_config_patch = patch(
+            "utilities.schema_linking.value_retrieval.PATH_CONFIG", path_config
+        )
+        self.path_config_patch.start()
+
+    def tearDown(self):
+        self.path_config_patch.stop()
+        self.temp_dir.cleanup()
+
+    def execute(self, sql):
+        """Run a write script against the test database."""
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(sql)
+        connection.close()
+
+    def test_lsh_without_candidate_columns_is_not_rebuilt(self):
+        """Should keep an index whose empty fingerprints were stored instead of rebuilding it."""
+
+        # Call the function
+        refresh_db_lsh("db")
+        with patch("utilities.schema_linking.value_retrieval.make_db_lsh") as mock_make_db_lsh:
+            stats = refresh_db_lsh("db")
+
+        # Assertions
+        self.assertEqual(ValueIndex(self.root / "preprocessed" / "value_index").fingerprints, {})
+        mock_make_db_lsh.assert_not_called()
+        self.assertEqual(stats, {"added_values": 0, "removed_values": 0, "reindexed_columns": 0})
+
+    @patch("utilities.schema_linking.value_retrieval.VALUE_INDEX_ENGINE", ValueIndexEngine.FTS5)
+    def test_fts_index_is_rebuilt_from_changed_columns(self):
+        """Should rebuild the FTS index with the new values of a changed column and leave the LSH alone."""
+        self.execute(
+            """
+            CREATE TABLE schools (County TEXT, School TEXT);
+            INSERT INTO schools VALUES ('Alameda', 'Oak High'), ('Fresno', 'Elm Middle');
+            """
+        )
+        fts_index_path = self.root / "preprocessed" / "values_fts.sqlite"
+        make_db_fts_index("db")
+        self.execute("UPDATE schools SET School = 'Pine Elementary' WHERE County = 'Fresno'")
+
+        # Call the function
+        stats = refresh_db_value_index("db", full=True)
+        fts_index = FtsValueIndex(fts_index_path)
+        try:
+            values = {fts_index.value(row) for row in range(1, len(fts_index) + 1)}
+            top_match = fts_index.value(fts_index.query("Pine Elementary", top_n=1)[0][0])
+        finally:
+            fts_index.close()
+
+        # Assertions
+        self.assertEqual(stats, {"added_values": 1, "removed_values": 1, "reindexed_columns": 1})
+        self.assertIn("Pine Elementary", values)
+        self.assertNotIn("Elm Middle", values)
+        self.assertEqual(top_match, "Pine Elementary")
+        self.assertFalse(ValueIndex.exists(self.root / "preprocessed" / "value_index"))
+        self.assertEqual(
+            refresh_db_value_index("db"),
+            {"added_values": 0, "removed_values": 0, "reindexed_columns": 0},
+        )
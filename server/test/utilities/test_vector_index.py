@@ -0,0 +1,93 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from utilities.vector_index import NumpyVectorIndex, open_vector_index
+
+
+def one_hot_embedding_function(input):
+    """Embed each text as a one-hot vector selected by its first character."""
+    embeddings = []
+    for text in input:
+        vector = np.zeros(4, dtype=np.float32)
+        vector["abcd".index(text[0])] = 1.0
+        embeddings.append(vector)
+    return embeddings
+
+
+class TestNumpyVectorIndex(unittest.TestCase):
+    """Test suite for the NumpyVectorIndex class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.temp_dir.name) / "samples"
+        self.index = NumpyVectorIndex("samples", self.index_dir, one_hot_embedding_function)
+        self.index.add(
+            documents=["a1", "b1", "a2", "c1"],
+            metadatas=[{"db_id": "x"}, {"db_id": "x"}, {"db_id": "y"}, {"db_id": "y"}],
+            ids=["0", "1", "2", "3"],
+            embeddings=[
+                np.array([1.0, 0.0, 0.0, 0.0]),
+                np.array([0.0, 1.0, 0.0, 0.0]),
+                np.array([0.9, 0.1, 0.0, 0.0]),
+                np.array([0.0, 0.0, 1.0, 0.0]),
+            ],
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_returns_nearest_neighbours_in_chroma_shape(self):
+        """Should return the k nearest documents per query ordered by cosine distance."""
+
+        # Call the function with a batch of two queries
+        result = self.index.query(
+            query_embeddings=[np.array([1.0, 0.0, 0.0, 0.0]), np.array([0.5, 0.0, 2.0, 0.0])],
+            n_results=2,
+        )
+
+        # Assertions
+        self.assertEqual(result["ids"], [["0", "2"], ["3", "0"]])
+        self.assertEqual(result["documents"][0], ["a1", "a2"])
+        self.assertEqual(result["metadatas"][1][0], {"db_id": "y"})
+        self.assertAlmostEqual(result["distances"][0][0], 0.0, places=6)
+        self.assertLess(result["distances"][1][0], result["distances"][1][1])
+
+    def test_applies_metadata_filters(self):
+        """Should only return documents whose metadata matches the where filter."""
+
+        # Call the function with equality and $in filters
+        query = [np.array([1.0, 0.0, 0.0, 0.0])]
+        equality = self.index.query(query_embeddings=query, n_results=3, where={"db_id": "y"})
+        membership = self.index.query(
+            query_embeddings=query, n_results=1, where={"db_id": {"$in": ["x"]}}
+        )
+
+        # Assertions
+        self.assertEqual(equality["ids"], [["2", "3"]])
+        self.assertEqual(membership["ids"], [["0"]])
+
+    def test_embeds_query_texts(self):
+        """Should embed query texts with the index's embedding function."""
+
+        # Call the function
+        result = self.index.query(query_texts=["b-question"], n_results=1)
+
+        # Assertions
+        self.assertEqual(result["ids"], [["1"]])
+
+    def test_persists_and_reopens_index(self):
+        """Should reload a persisted index and keep appending to it."""
+
+        # Reopen the index and add another document
+        reopened = open_vector_index("samples", self.index_dir, one_hot_embedding_function)
+        reopened.add(documents=["d1"], metadatas=[{"db_id": "z"}], ids=["4"])
+
+        # Assertions
+        self.assertTrue(NumpyVectorIndex.exists(self.index_dir))
+        self.assertEqual(reopened.count(), 5)
+        self.assertEqual(
+            reopened.query(query_texts=["d"], n_results=1, where={"db_id": "z"})["ids"],
+            [["4"]],
+        )
@@ -0,0 +1,160 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from utilities.constants.retrieval_enums import RetrievalBackend
+from utilities.vector_index import NumpyVectorIndex
+from utilities.vectorize import (make_document_id, sync_collection,
+                                 vectorize_data)
+
+
+class CountingEmbeddingFunction:
+    """Deterministic stand-in for an embedding model that records every text it embeds."""
+
+    def __init__(self):
+        self.embedded_texts = []
+
+    def __call__(self, input):
+        self.embedded_texts.extend(input)
+        return [np.array([len(text), 1.0], dtype=np.float32) for text in input]
+
+
+class TestMakeDocumentId(unittest.TestCase):
+    """Test suite for the make_document_id function."""
+
+    def test_derives_id_from_document_and_metadata(self):
+        """Should return the same id for the same content and a new id when it changes."""
+
+        # Call the function
+        first = make_document_id("question", {"db_id": "a", "question_id": 1})
+        reordered = make_document_id("question", {"question_id": 1, "db_id": "a"})
+        changed = make_document_id("question", {"db_id": "b", "question_id": 1})
+
+        # Assertions
+        self.assertEqual(first, reordered)
+        self.assertNotEqual(first, changed)
+
+
+class TestVectorizeData(unittest.TestCase):
+    """Test suite for incremental collection builds with the numpy backend."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.embedding_function = CountingEmbeddingFunction()
+
+        patches = [
+            patch("utilities.vectorize.RETRIEVAL_BACKEND", RetrievalBackend.NUMPY),
+            patch(
+                "utilities.vectorize.PATH_CONFIG.vector_index_dir",
+                side_effect=lambda name: Path(self.temp_dir.name) / name,
+            ),
+            patch(
+                "utilities.vectorize.get_embedding_function",
+                return_value=self.embedding_function,
+            ),
+            patch("utilities.vectorize.VECTORIZE_CHUNK_SIZE", 2),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, documents):
+        """Vectorize the documents with content-derived ids."""
+        metadatas = [{"source": "test"} for _ in documents]
+        ids = [make_document_id(doc, meta) for doc, meta in zip(documents, metadatas)]
+        return vectorize_data(documents, metadatas, ids, "incremental_test")
+
+    def test_only_embeds_new_documents(self):
+        """Should skip documents already in the collection and remove stale ones."""
+
+        # Build the collection, then rebuild it with one document replaced
+        self.build(["alpha", "beta", "gamma"])
+        collection = self.build(["alpha", "beta", "delta"])
+
+        # Assertions
+        self.assertEqual(
+            sorted(self.embedding_function.embedded_texts),
+            ["alpha", "beta", "delta", "gamma"],
+        )
+        self.assertEqual(collection.count(), 3)
+        self.assertEqual(
+            sorted(collection.get()["documents"]), ["alpha", "beta", "delta"]
+        )
+
+    @patch("utilities.vectorize.VECTORIZE_CHECKPOINT_SECONDS", 3600)
+    def test_buffers_chunks_into_growing_checkpoints(self):
+        """Should write a numpy index in checkpoints that grow with it rather than once per chunk."""
+        documents = [f"document {i}" for i in range(40)]
+
+        # Call the function
+        with patch.object(
+            NumpyVectorIndex, "upsert", autospec=True, side_effect=NumpyVectorIndex.upsert
+        ) as mock_upsert:
+            collection = self.build(documents)
+        reopened = NumpyVectorIndex("incremental_test", collection.index_dir, self.embedding_function)
+
+        # Assertions
+        self.assertEqual(
+            [len(call.kwargs["ids"]) for call in mock_upsert.call_args_list],
+            [2, 2, 2, 4, 6, 8, 12, 4],
+        )
+        self.assertEqual(sorted(reopened.get()["documents"]), sorted(documents))
+
+    def test_moves_legacy_ids_without_embedding_again(self):
+        """Should keep the embeddings of documents stored under random ids and move them to content ids."""
+        documents = ["alpha", "beta"]
+        metadatas = [{"source": "test"} for _ in documents]
+        vectorize_data(documents, metadatas, ["legacy-1", "legacy-2"], "incremental_test")
+        self.embedding_function.embedded_texts.clear()
+
+        # Call the function
+        collection = self.build(["alpha", "beta", "gamma"])
+
+        # Assertions
+        self.assertEqual(self.embedding_function.embedded_texts, ["gamma"])
+        self.assertEqual(
+            sorted(collection.get(include=[])["ids"]),
+            sorted(make_document_id(doc, {"source": "test"}) for doc in ["alpha", "beta", "gamma"]),
+        )
+        self.assertEqual(
+            collection.query(query_texts=["alpha"], n_results=1)["documents"], [["alpha"]]
+        )
+
+
+class TestSyncCollection(unittest.TestCase):
+    """Test suite for the sync_collection function."""
+
+    @patch("utilities.vectorize.vectorize_data", side_effect=lambda *args, **kwargs: args[3])
+    def test_other_collections_do_not_wait_for_a_sync(self, mock_vectorize_data):
+        """Should sync a collection while another one is still loading its documents."""
+        loading = threading.Event()
+        release = threading.Event()
+
+        def load_slow_documents():
+            loading.set()
+            release.wait(timeout=5)
+            return [], [], []
+
+        slow = threading.Thread(target=sync_collection, args=("slow_sync_test", load_slow_documents))
+        slow.start()
+        loading.wait(timeout=5)
+
+        # Call the function
+        try:
+            collection = sync_collection("fast_sync_test", lambda: ([], [], []))
+            slow_still_loading = slow.is_alive()
+        finally:
+            release.set()
+            slow.join()
+
+        # Assertions
+        self.assertEqual(collection, "fast_sync_test")
+        self.assertTrue(slow_still_loading)
+        self.assertEqual(sync_collection("slow_sync_test", lambda: ([], [], [])), "slow_sync_test")
+        self.assertEqual(mock_vectorize_data.call_count, 2)
@@ -0,0 +1,92 @@
+import math
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utilities.sql_execution import QueryTimeoutError, time_query
+from utilities.ves_timing import (TimingConfig, clean_abnormal,
+                                  estimate_time_ratio, summarize_ratios)
+
+RUNAWAY_SQL = (
+    "WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter) "
+    "SELECT COUNT(*) FROM counter"
+)
+
+
+class TestVesTiming(unittest.TestCase):
+    """Test suite for the adaptive VES timing."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "schools.sqlite"
+        with sqlite3.connect(self.db_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE items (name TEXT, amount INTEGER);
+                INSERT INTO items VALUES ('a', 1), ('b', 2), ('c', 3);
+                """
+            )
+        connection.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_clean_abnormal_drops_outliers_and_keeps_equal_values(self):
+        """Should drop values beyond three standard deviations and keep constant values."""
+        values = [1.0] * 20 + [50.0]
+
+        # Call the function
+        cleaned = clean_abnormal(values)
+
+        # Assertions
+        self.assertEqual(cleaned, [1.0] * 20)
+        self.assertEqual(clean_abnormal([2.0, 2.0, 2.0]), [2.0, 2.0, 2.0])
+
+    def test_summarize_ratios(self):
+        """Should report the mean ratio with a confidence interval once there are two ratios."""
+        # Call the function
+        estimate = summarize_ratios([0.9, 1.1, 1.0, 1.0])
+        single = summarize_ratios([2.0])
+
+        # Assertions
+        self.assertAlmostEqual(estimate.ratio, 1.0)
+        self.assertAlmostEqual(estimate.half_width, 1.96 * math.sqrt(0.02 / 3) / 2)
+        self.assertEqual(estimate.iterations, 4)
+        self.assertEqual(single.ratio, 2.0)
+        self.assertEqual(single.half_width, math.inf)
+
+    def test_stops_once_the_interval_is_narrow(self):
+        """Should stop after the minimum iterations when the ratios agree, and at the maximum otherwise."""
+        steady = [0.01] * 200
+        noisy = [0.01, 0.02, 0.03, 0.04] * 50
+
+        # Call the function
+        with patch("utilities.ves_timing.time_query", side_effect=steady):
+            settled = estimate_time_ratio(self.db_path, "SELECT 1", "SELECT 2", None, TimingConfig(3, 50, 0.05))
+        with patch("utilities.ves_timing.time_query", side_effect=noisy):
+            capped = estimate_time_ratio(self.db_path, "SELECT 1", "SELECT 2", None, TimingConfig(3, 10, 0.05))
+
+        # Assertions
+        self.assertEqual(settled.iterations, 3)
+        self.assertAlmostEqual(settled.ratio, 1.0)
+        self.assertEqual(capped.iterations, 10)
+
+    def test_times_queries_on_the_database(self):
+        """Should time real queries and interrupt a run past its deadline."""
+        # Call the function
+        estimate = estimate_time_ratio(
+            self.db_path, "SELECT name FROM items", "SELECT DISTINCT name FROM items", 5.0, TimingConfig(2, 3, 0.0)
+        )
+
+        # Assertions
+        self.assertEqual(estimate.iterations, 3)
+        self.assertGreater(estimate.ratio, 0)
+        self.assertGreater(time_query(self.db_path, "SELECT COUNT(*) FROM items"), 0)
+        with self.assertRaises(QueryTimeoutError):
+            estimate_time_ratio(self.db_path, RUNAWAY_SQL, "SELECT 1", 0.1, TimingConfig(1, 1, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
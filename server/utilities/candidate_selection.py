@@ -1,16 +1,15 @@
 import hashlib
-import random
-import sqlite3
 import time
 from collections import defaultdict
 
-from utilities.config import PATH_CONFIG
 from utilities.constants.prompts_enums import FormatType
+from utilities.execution_cache import execute_cached_concurrently
 from utilities.format_schema import format_schema
 from utilities.logging_utils import setup_logger
 from utilities.prompts.prompt_templates import (
     XIYAN_CANDIDATE_PROMPT, XIYAN_CANDIDATE_SELECTION_PREFIX)
-from utilities.utility_functions import normalize_execution_results
+from utilities.sql_canonicalization import group_equivalent_candidates
+from utilities.sql_execution import DEFAULT_BUDGET
 
 logger = setup_logger(__name__)
 
@@ -47,13 +46,8 @@ def get_candidate_selector_prompt(selected_sqls_with_config, target_question, da
     prompt = prompt_prefix + candidate_string + suffix
     return prompt, candidate_dict, sql_dict, idx_dict
 
-def xiyan_basic_llm_selector(sqls_with_config,target_question, client, database, pruned_schema, evidence=None):
-    """ Select SQL from a list of sqls using XiYan Selector"""
-
-    connection = sqlite3.connect(
-        PATH_CONFIG.sqlite_path(database_name=database)
-    )
-    cursor = connection.cursor()
+def xiyan_basic_llm_selector(sqls_with_config,target_question, client, database, pruned_schema, evidence=None, budget=DEFAULT_BUDGET):
+    """ Select SQL from a list of sqls using XiYan Selector, executing the candidates concurrently within `budget` each"""
 
     candidate_dict = {}
     sql_dict = {}
@@ -62,35 +56,20 @@ def xiyan_basic_llm_selector(sqls_with_config,target_question, client, database,
     # Group SQLs by their results using a hash
     result_groups = defaultdict(list)
 
-    for idx, (sql, config_id) in enumerate(sqls_with_config):
-        try:
-            cursor.execute(sql)
-            res = cursor.fetchall()
-            result_hash = hash_result(res)
-
-            # Only consider top 10 results 
-            if res and len(res) > 0:
-                res = random.sample(res, min(10, len(res)))
-                res = normalize_execution_results(res, fetchall=True)
-                columns = [desc[0] for desc in cursor.description]
-
-                markdown_table = "| " + " | ".join(columns) + " |\n"
-                markdown_table += "| " + " | ".join(["---"] * len(columns)) + " |\n"
-
-                for row in res:
-                    markdown_table += "| " + " | ".join(map(str, row)) + " |\n"
-                res = markdown_table
-
-        except Exception as e:
-            res = str(e)
-            result_hash = hash_result(res)
+    # Equivalent candidates are collapsed so each distinct query runs once
+    candidate_groups = group_equivalent_candidates(sqls_with_config)
 
-        if result_hash not in result_groups:
-            result_groups[result_hash] = []
-        result_groups[result_hash].append((sql, config_id, res)) 
+    # Candidates are pre-flight checked, run concurrently and grouped as they complete,
+    # the ones already executed by the refiner are served from the execution cache
+    sqls = [group.sql for group in candidate_groups]
+    for idx, outcome in execute_cached_concurrently(database, sqls, budget, preflight=True):
+        sql, config_id = candidate_groups[idx].sql, candidate_groups[idx].config_id
+        res = outcome.to_markdown()
+        result_hash = outcome.result_hash if outcome.succeeded else hash_result(res)
+        result_groups[result_hash].append((idx, sql, config_id, res))
 
-    # Select one SQL from each unique result group
-    selected_sqls_with_config = [group[0] for group in result_groups.values()]  
+    # Select the first SQL of each unique result group, in candidate order whatever the completion order
+    selected_sqls_with_config = [min(group)[1:] for group in sorted(result_groups.values(), key=min)]
 
     # If only one SQL is left, return it
     if len(selected_sqls_with_config) == 1:
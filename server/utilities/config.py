@@ -2,8 +2,11 @@ import os
 
 import chromadb
 from dotenv import load_dotenv
-from utilities.constants.database_enums import DatasetType
+from utilities.constants.database_enums import (DatasetType,
+                                                SqliteConnectionMode)
 from utilities.constants.response_messages import ERROR_API_KEY_MISSING
+from utilities.constants.retrieval_enums import (RetrievalBackend,
+                                                 ValueIndexEngine)
 from utilities.path_config import PathConfig
 
 load_dotenv()
@@ -14,6 +17,68 @@ PATH_CONFIG = PathConfig(
     sample_dataset_type=DatasetType(os.getenv("SAMPLE_DATASET_TYPE", "bird_train"))
 )
 
+# Vector search backend used for few-shot and column description retrieval
+RETRIEVAL_BACKEND = RetrievalBackend(os.getenv("RETRIEVAL_BACKEND", "chroma"))
+
+# Engine used to find database values similar to the question keywords
+VALUE_INDEX_ENGINE = ValueIndexEngine(os.getenv("VALUE_INDEX_ENGINE", "lsh"))
+
+# Memory budget of the value indexes kept open by the process-wide value index registry
+VALUE_INDEX_MEMORY_BUDGET_MB = float(os.getenv("VALUE_INDEX_MEMORY_BUDGET_MB", "1024"))
+
+# Number of query execution outcomes kept by the process-wide execution cache, and whether
+# they are persisted so later runs and the BIRD evaluation can reuse them
+EXECUTION_CACHE_MAX_ENTRIES = int(os.getenv("EXECUTION_CACHE_MAX_ENTRIES", "50000"))
+EXECUTION_CACHE_PERSIST = os.getenv("EXECUTION_CACHE_PERSIST", "false").lower() == "true"
+
+# Default budget of a query run by the SQL execution service: its deadline and the number of
+# rows and estimated megabytes of result it may fetch before it is stopped
+EXECUTION_TIMEOUT_SECONDS = float(os.getenv("EXECUTION_TIMEOUT_SECONDS", "30"))
+EXECUTION_MAX_ROWS = int(os.getenv("EXECUTION_MAX_ROWS", "1000000"))
+EXECUTION_MAX_MEMORY_MB = float(os.getenv("EXECUTION_MAX_MEMORY_MB", "1024"))
+
+# Deadline of a gold query executed for the gold result store, which keeps the result of
+# every gold query so that evaluations only execute the predictions
+GOLD_RESULT_TIMEOUT_SECONDS = float(os.getenv("GOLD_RESULT_TIMEOUT_SECONDS", "600"))
+
+# Stopping rule of the VES timing of a correct prediction against its gold query: at least
+# VES_MIN_ITERATIONS and at most VES_MAX_ITERATIONS pairs of runs, stopping once the 95%
+# confidence interval of the mean time ratio is within VES_CI_TOLERANCE of the mean
+VES_MIN_ITERATIONS = int(os.getenv("VES_MIN_ITERATIONS", "5"))
+VES_MAX_ITERATIONS = int(os.getenv("VES_MAX_ITERATIONS", "100"))
+VES_CI_TOLERANCE = float(os.getenv("VES_CI_TOLERANCE", "0.05"))
+
+# Number of threads shared by the process to execute queries concurrently, e.g. the
+# candidates of the selector, each on its own pooled read-only connection
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", "8"))
+
+# Pre-flight checks of refiner and selector candidates: full scans of tables with at least
+# PREFLIGHT_LARGE_TABLE_ROWS rows, or nested scans of tables with at least
+# PREFLIGHT_NESTED_SCAN_ROWS rows, run within PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS
+PREFLIGHT_LARGE_TABLE_ROWS = int(os.getenv("PREFLIGHT_LARGE_TABLE_ROWS", "1000000"))
+PREFLIGHT_NESTED_SCAN_ROWS = int(os.getenv("PREFLIGHT_NESTED_SCAN_ROWS", "10000"))
+PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS = float(os.getenv("PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS", "5"))
+
+# How pooled read-only connections open a database: the memory-mapped file, an in-memory
+# copy, or an in-memory copy only for databases up to SQLITE_IN_MEMORY_MAX_MB
+SQLITE_CONNECTION_MODE = SqliteConnectionMode(os.getenv("SQLITE_CONNECTION_MODE", "file"))
+SQLITE_IN_MEMORY_MAX_MB = float(os.getenv("SQLITE_IN_MEMORY_MAX_MB", "256"))
+# Total size of the in-memory copies held by all threads, beyond which connections read the
+# memory-mapped file instead
+SQLITE_IN_MEMORY_POOL_MAX_MB = float(os.getenv("SQLITE_IN_MEMORY_POOL_MAX_MB", "1024"))
+
+# Requests per minute sent to each LLM provider by the process, shared by all its clients and
+# threads, 0 for no limit
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+
+# Number of threads generating column descriptions concurrently
+DESCRIPTION_WORKERS = int(os.getenv("DESCRIPTION_WORKERS", "8"))
+
+# Estimated prompt tokens of one request describing several columns of a table at once, the
+# columns of a table are split into requests within this budget, 0 describes every column in
+# its own request
+DESCRIPTION_BATCH_MAX_TOKENS = int(os.getenv("DESCRIPTION_BATCH_MAX_TOKENS", "2000"))
+
 OPENAI_API_KEYS = os.getenv("OPENAI_API_KEYS", "").split()
 ANTHROPIC_API_KEYS = os.getenv("ANTHROPIC_API_KEYS", "").split()
 GOOGLE_AI_API_KEYS = os.getenv("GOOGLE_AI_API_KEYS", "").split()
@@ -33,4 +98,5 @@ if not DASHSCOPE_API_KEYS:
     raise RuntimeError(ERROR_API_KEY_MISSING.format(api_key="DASHSCOPE_API_KEY"))
 
 class ChromadbClient:
-    CHROMADB_CLIENT=chromadb.PersistentClient() # Default path is "./chroma"
\ No newline at end of file
+    # Default path is "./chroma", the numpy backend keeps its indexes elsewhere and needs no client
+    CHROMADB_CLIENT=chromadb.PersistentClient() if RETRIEVAL_BACKEND == RetrievalBackend.CHROMA else None
\ No newline at end of file
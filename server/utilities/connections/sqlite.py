@@ -2,20 +2,45 @@
 
 This module provides utilities for creating and managing SQLite database connections,
 particularly for in-memory database operations to improve query performance.
+
+Queries against the datasets go through `SQLITE_CONNECTION_POOL`, a per-thread pool of
+read-only connections that are opened once per database and reused, either on the
+memory-mapped file or on an in-memory copy of small databases. The in-memory copies of all
+threads share one size budget. Pooled connections have the result summary aggregate
+registered, so results can be fingerprinted in SQLite.
 """
 
+import os
 import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utilities.config import (SQLITE_CONNECTION_MODE, SQLITE_IN_MEMORY_MAX_MB,
+                              SQLITE_IN_MEMORY_POOL_MAX_MB)
+from utilities.constants.database_enums import SqliteConnectionMode
+from utilities.result_fingerprint import register_result_functions
+
+# Constants
+BYTES_PER_MB = 1024 * 1024
+MMAP_SIZE_BYTES = 1024 * BYTES_PER_MB
+CACHE_SIZE_KIB = 64 * 1024
+MAX_CONNECTIONS_PER_THREAD = 16
+WAL_SUFFIX = "-wal"
 
 
 def make_sqlite_connection(path):
     """Create an in-memory SQLite connection from a database file.
-    
+
     Loads a SQLite database from the provided path into memory for faster
     query execution, and configures the connection to return rows as dictionaries.
-    
+
     Args:
         path: Path to the source SQLite database file.
-        
+
     Returns:
         sqlite3.Connection: An in-memory SQLite connection with the database contents.
     """
@@ -25,3 +50,263 @@ def make_sqlite_connection(path):
         dest.row_factory = sqlite3.Row
         source.backup(dest)
     return dest
+
+
+def make_read_only_sqlite_connection(path, timeout=60, immutable=False):
+    """Open a read-only SQLite connection to a database file.
+
+    The file is opened through a `mode=ro` URI, so the connection can neither modify
+    the database nor create it when the path does not exist.
+
+    Args:
+        path: Path to the SQLite database file.
+        timeout: Seconds to wait for a lock before raising.
+        immutable: Declare the file as unchanging so SQLite skips all locking and change
+            detection. Only safe while no other process writes to the file.
+
+    Returns:
+        sqlite3.Connection: A read-only connection to the database file.
+    """
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    return sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+
+
+class InMemoryConnection(sqlite3.Connection):
+    """Connection to an in-memory copy, which unlike `sqlite3.Connection` can be weakly referenced."""
+
+
+def make_in_memory_copy(path, immutable=True):
+    """Copy a database file into a read-only in-memory connection.
+
+    Args:
+        path: Path to the source SQLite database file.
+        immutable: Read the file as unchanging, see `make_read_only_sqlite_connection`.
+
+    Returns:
+        InMemoryConnection: An in-memory connection holding the database, with writes disabled.
+    """
+    source = make_read_only_sqlite_connection(path, immutable=immutable)
+    try:
+        dest = sqlite3.connect(":memory:", check_same_thread=False, factory=InMemoryConnection)
+        source.backup(dest)
+    finally:
+        source.close()
+    dest.execute("PRAGMA query_only = ON")
+    return dest
+
+
+def make_mapped_sqlite_connection(path, immutable=True):
+    """Open a read-only connection that reads the file through mmap.
+
+    Args:
+        path: Path to the SQLite database file.
+        immutable: Read the file as unchanging, see `make_read_only_sqlite_connection`.
+
+    Returns:
+        sqlite3.Connection: A read-only connection with a large mmap window and page cache.
+    """
+    connection = make_read_only_sqlite_connection(path, immutable=immutable)
+    connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    connection.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    return connection
+
+
+class SqliteConnectionPool:
+    """Per-thread pool of read-only connections keyed by database file.
+
+    Each thread keeps at most `max_connections_per_thread` open connections and closes
+    the least recently used one beyond that. Connections are keyed by the size and
+    modification time of the file and of its write-ahead log, so a rewritten database is
+    reopened, and a forked process starts with an empty pool.
+
+    Every thread copies the databases it reads in memory on its own, so the copies of all
+    threads share `in_memory_pool_max_bytes`. A database that does not fit in what is left
+    is read through the memory-mapped file, whose pages the threads share. A copy returns
+    its size to the budget once it is closed or, for the copies of finished threads, once
+    it is garbage collected. Databases are
+    opened as immutable unless they have a write-ahead log, whose content an immutable
+    connection would not see.
+
+    Attributes:
+        mode (SqliteConnectionMode): How databases are opened.
+        in_memory_max_bytes (int): Largest database copied into memory in `AUTO` mode.
+        in_memory_pool_max_bytes (int): Total size of the in-memory copies of all threads.
+        max_connections_per_thread (int): Maximum number of connections a thread keeps open.
+    """
+
+    def __init__(
+        self,
+        mode: SqliteConnectionMode = SQLITE_CONNECTION_MODE,
+        in_memory_max_mb: float = SQLITE_IN_MEMORY_MAX_MB,
+        max_connections_per_thread: int = MAX_CONNECTIONS_PER_THREAD,
+        in_memory_pool_max_mb: float = SQLITE_IN_MEMORY_POOL_MAX_MB,
+    ):
+        """Create an empty pool.
+
+        Args:
+            mode: How databases are opened.
+            in_memory_max_mb: Largest database, in MB, copied into memory in `AUTO` mode.
+            max_connections_per_thread: Maximum number of connections a thread keeps open.
+            in_memory_pool_max_mb: Total size, in MB, of the in-memory copies of all threads.
+        """
+        self.mode = mode
+        self.in_memory_max_bytes = int(in_memory_max_mb * BYTES_PER_MB)
+        self.in_memory_pool_max_bytes = int(in_memory_pool_max_mb * BYTES_PER_MB)
+        self.max_connections_per_thread = max_connections_per_thread
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._in_memory_bytes = 0
+        self._stats = {"opened": 0, "reused": 0, "closed": 0, "in_memory_fallbacks": 0}
+
+    @contextmanager
+    def connect(
+        self, path, row_factory: Optional[Callable] = None
+    ) -> Iterator[sqlite3.Connection]:
+        """Borrow the calling thread's connection to a database.
+
+        The row factory is restored and any progress handler is removed when the
+        context exits, so the connection can be reused by the next caller.
+
+        Args:
+            path: Path to the SQLite database file.
+            row_factory: Row factory to use while the connection is borrowed.
+
+        Yields:
+            sqlite3.Connection: A read-only connection to the database.
+        """
+        connection = self._get(Path(path))
+        previous_row_factory = connection.row_factory
+        if row_factory is not None:
+            connection.row_factory = row_factory
+        try:
+            yield connection
+        finally:
+            connection.row_factory = previous_row_factory
+            connection.set_progress_handler(None, 0)
+
+    def clear(self) -> None:
+        """Close the calling thread's connections and let other threads reopen theirs."""
+        with self._lock:
+            self._generation += 1
+        self._close_all(self._connections())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of connections opened, reused and closed by the pool.
+
+        Returns:
+            Dict[str, Any]: The counters, the size of the in-memory copies and the pool mode.
+        """
+        with self._lock:
+            return dict(self._stats) | {
+                "in_memory_bytes": self._in_memory_bytes,
+                "mode": self.mode.value,
+            }
+
+    def _resolve_mode(self, path: Path, size: int) -> SqliteConnectionMode:
+        """Return the mode used for a database of the given size."""
+        if self.mode == SqliteConnectionMode.AUTO:
+            if size <= self.in_memory_max_bytes:
+                return SqliteConnectionMode.MEMORY
+            return SqliteConnectionMode.FILE
+        return self.mode
+
+    def _reserve_in_memory(self, size: int) -> bool:
+        """Count an in-memory copy of the given size if it fits in the pool budget."""
+        with self._lock:
+            if self._in_memory_bytes + size > self.in_memory_pool_max_bytes:
+                self._stats["in_memory_fallbacks"] += 1
+                return False
+            self._in_memory_bytes += size
+            return True
+
+    def _connections(
+        self,
+    ) -> "OrderedDict[str, Tuple[Tuple, sqlite3.Connection, Optional[weakref.finalize]]]":
+        """Return the calling thread's connections, dropping those of a previous process or generation."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._local = threading.local()
+                self._in_memory_bytes = 0
+            generation = self._generation
+
+        local = self._local
+        if getattr(local, "generation", None) != generation:
+            self._close_all(getattr(local, "connections", OrderedDict()))
+            local.connections = OrderedDict()
+            local.generation = generation
+        return local.connections
+
+    def _get(self, path: Path) -> sqlite3.Connection:
+        """Return the calling thread's connection to a database, opening it if needed."""
+        path = path.resolve()
+        stat = path.stat()
+        wal_path = path.with_name(path.name + WAL_SUFFIX)
+        wal_stat = wal_path.stat() if wal_path.exists() else None
+        version = (
+            stat.st_size,
+            stat.st_mtime_ns,
+            None if wal_stat is None else (wal_stat.st_size, wal_stat.st_mtime_ns),
+        )
+        key = str(path)
+
+        connections = self._connections()
+        entry = connections.get(key)
+        if entry is not None and entry[0] == version:
+            connections.move_to_end(key)
+            with self._lock:
+                self._stats["reused"] += 1
+            return entry[1]
+
+        if entry is not None:
+            self._close(entry[1], entry[2])
+        immutable = wal_stat is None
+        release = None
+        in_memory = self._resolve_mode(path, stat.st_size) == SqliteConnectionMode.MEMORY
+        if in_memory and self._reserve_in_memory(stat.st_size):
+            try:
+                connection = make_in_memory_copy(path, immutable=immutable)
+            except Exception:
+                self._release_in_memory(stat.st_size)
+                raise
+            release = weakref.finalize(connection, self._release_in_memory, stat.st_size)
+        else:
+            connection = make_mapped_sqlite_connection(path, immutable=immutable)
+        register_result_functions(connection)
+        connections[key] = (version, connection, release)
+        connections.move_to_end(key)
+        with self._lock:
+            self._stats["opened"] += 1
+
+        while len(connections) > self.max_connections_per_thread:
+            _, (_, oldest, oldest_release) = connections.popitem(last=False)
+            self._close(oldest, oldest_release)
+        return connection
+
+    def _close_all(self, connections) -> None:
+        """Close and forget every connection of a thread."""
+        for _, connection, release in connections.values():
+            self._close(connection, release)
+        connections.clear()
+
+    def _close(
+        self, connection: sqlite3.Connection, release: Optional[weakref.finalize] = None
+    ) -> None:
+        """Close a connection, count it and release the budget of its in-memory copy."""
+        connection.close()
+        with self._lock:
+            self._stats["closed"] += 1
+        if release is not None:
+            release()
+
+    def _release_in_memory(self, size: int) -> None:
+        """Return the size of an in-memory copy to the pool budget."""
+        with self._lock:
+            self._in_memory_bytes = max(0, self._in_memory_bytes - size)
+
+
+SQLITE_CONNECTION_POOL = SqliteConnectionPool()
@@ -9,5 +9,7 @@ QUESTION_ID_KEY = 'question_id'
 QUESTION_KEY = 'question'
 EVIDENCE_KEY = 'evidence'
 RUNTIME_SCHEMA_USED_KEY = 'runtime_schema_used'
+RUNTIME_FEW_SHOTS_KEY = 'runtime_few_shots'
 SCHEMA_USED = "schema_used"
-SQL="SQL"
\ No newline at end of file
+SQL="SQL"
+DIFFICULTY_KEY = 'difficulty'
\ No newline at end of file
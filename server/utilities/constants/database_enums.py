@@ -22,3 +22,9 @@ class DatasetType(Enum):
     BIRD_DEV = "bird_dev"
     BIRD_TEST = "bird_test"
     SYNTHETIC = "synthetic"
+
+
+class SqliteConnectionMode(Enum):
+    FILE = "file"
+    MEMORY = "memory"
+    AUTO = "auto"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ComparisonMode(Enum):
+    SET = "set"
+    MULTISET = "multiset"
+    ORDERED = "ordered"
@@ -10,3 +10,6 @@ ERROR_SQLITE_EXECUTION_ERROR = "Excuting SQL: {sql} failed with error: {error}"
 
 INFO_TABLE_ALREADY_HAS_DESCRIPTIONS = "Table {table_name} already has descriptions. Skipping LLM call."
 INFO_COLUMN_ALREADY_HAS_DESCRIPTIONS = "Column {column_name} already has descriptions. Skipping LLM call."
+
+WARNING_COLUMN_BATCH_FAILED = "Batched description of {count} columns of table {table_name} failed, describing them one by one: {error}"
+WARNING_COLUMN_BATCH_INCOMPLETE = "Batched description of table {table_name} did not describe columns {columns}, describing them one by one."
@@ -0,0 +1,6 @@
+ERROR_PROCESSING_DATABASE_TEST_FILE = "Error adding few shots to {database_name} test file: {error}"
+ERROR_FAILED_TO_ADD_FEW_SHOTS = "Failed to add few shots for test files: {error}"
+
+INFO_ADDING_FEW_SHOTS = "Adding few shots to {count} items"
+INFO_FEW_SHOTS_UP_TO_DATE = "Few shots already present for all {count} items"
+INFO_PROCESSING_DATABASES = "Processing Databases"
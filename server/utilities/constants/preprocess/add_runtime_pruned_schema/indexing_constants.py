@@ -2,5 +2,4 @@
 TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY = 'top_k_column_description_matches'
 TOP_K_VALUE_MATCHES_KEY = 'top_k_value_matches'
 KEYWORD_EXTRACTION_CLIENT_KEY = 'keyword_extraction_client'
-LSH_KEY = 'lsh'
-MINHASH_KEY = 'minhash'
\ No newline at end of file
+VALUE_INDEX_KEY = 'value_index'
\ No newline at end of file
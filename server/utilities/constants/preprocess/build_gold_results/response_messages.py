@@ -0,0 +1,5 @@
+ERROR_BUILDING_GOLD_RESULTS = "Error storing gold results of {database_name}: {error}"
+ERROR_FAILED_TO_BUILD_GOLD_RESULTS = "Failed to build gold results: {error}"
+
+INFO_GOLD_RESULTS_STORED = "Stored gold results of {database_name}: {executed} executed, {reused} reused, {failed} failed"
+INFO_BUILDING_GOLD_RESULTS = "Executing Gold Queries"
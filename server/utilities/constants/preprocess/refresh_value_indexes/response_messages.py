@@ -0,0 +1,5 @@
+ERROR_REFRESHING_VALUE_INDEX = "Error refreshing value index of {database_name}: {error}"
+ERROR_FAILED_TO_REFRESH_VALUE_INDEXES = "Failed to refresh value indexes: {error}"
+
+INFO_VALUE_INDEX_REFRESHED = "Refreshed value index of {database_name}: {reindexed_columns} columns re-indexed, {added_values} values added, {removed_values} removed"
+INFO_REFRESHING_VALUE_INDEXES = "Refreshing Value Indexes"
@@ -57,6 +57,9 @@ ERROR_INVALID_FETCH_ARGUMENT = "Invalid fetch argument. Must be 'all', 'one', 'r
 ERROR_SQL_QUERY_TIMEOUT = "SQL query execution exceeded the timeout of {timeout} seconds."
 ERROR_LSH_CREATION = "Error creating LSH: {error}"
 ERROR_LSH_LOADING = "Error loading LSH for {database_name}: {error}"
+ERROR_LSH_REFRESH = "Error refreshing LSH for {database_name}: {error}"
+ERROR_FTS_INDEX_CREATION = "Error creating FTS value index for {database_name}: {error}"
+ERROR_FTS_INDEX_REFRESH = "Error refreshing FTS value index for {database_name}: {error}"
 ERROR_DATABASE_PROCESSING = "Error processing database {database_name}: {error}"
 
 UNKNOWN_ERROR = "An unknown error occurred`{error}`"
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class RetrievalBackend(Enum):
+    CHROMA = "chroma"
+    NUMPY = "numpy"
+
+
+class ValueIndexEngine(Enum):
+    LSH = "lsh"
+    FTS5 = "fts5"
@@ -0,0 +1,7 @@
+"""
+This module contains response messages used by the embedding cache.
+
+These messages are used for error handling and logging purposes.
+"""
+ERROR_EMBEDDING_FUNCTION_UNAVAILABLE = "No embedding function is available to back the embedding cache."
+ERROR_EMBEDDING_COUNT_MISMATCH = "Embedding function returned {received} embeddings for {expected} texts."
@@ -0,0 +1,6 @@
+"""
+This module contains response messages used by the execution cache.
+
+These messages are used for error handling and logging purposes.
+"""
+INFO_EXECUTION_CACHE_OPENED = "Using execution cache at {cache_path}"
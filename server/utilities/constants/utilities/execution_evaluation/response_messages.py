@@ -0,0 +1,8 @@
+"""
+This module contains response messages used by the execution evaluation.
+
+These messages are used for error handling and logging purposes.
+"""
+INFO_EVALUATION_STARTED = (
+    "Evaluating {questions} questions on {databases} databases with {workers} workers"
+)
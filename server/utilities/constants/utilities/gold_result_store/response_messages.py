@@ -0,0 +1,6 @@
+"""
+This module contains response messages used by the gold result store.
+
+These messages are used for error handling and logging purposes.
+"""
+INFO_GOLD_RESULT_STORE_OPENED = "Using gold result store at {store_path}"
@@ -0,0 +1,7 @@
+"""
+This module contains response messages used by the prediction log.
+
+These messages are used for error handling and logging purposes.
+"""
+WARNING_MALFORMED_PREDICTION_LOG_LINE = "Skipping malformed line of the prediction log {log_path}: {error}"
+INFO_PREDICTION_LOG_TRUNCATED = "Prediction log {log_path} was truncated, reading it from the start"
@@ -0,0 +1,6 @@
+"""
+This module contains response messages used by the FTS5 trigram value index.
+
+These messages are used for error handling and logging purposes.
+"""
+ERROR_FTS_VALUE_INDEX_NOT_FOUND = "No FTS value index found at {index_path}."
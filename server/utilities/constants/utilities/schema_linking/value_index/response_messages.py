@@ -0,0 +1,7 @@
+"""
+This module contains response messages used by the value index.
+
+These messages are used for error handling and logging purposes.
+"""
+ERROR_VALUE_INDEX_NOT_FOUND = "No value index found in {index_dir}."
+ERROR_UNSUPPORTED_VALUE_INDEX_FORMAT = "Unsupported value index format version {version} in {index_dir}, expected {expected}."
@@ -0,0 +1,7 @@
+"""
+This module contains response messages used by the value index registry.
+
+These messages are used for logging purposes.
+"""
+INFO_VALUE_INDEX_LOADED = "Loaded value index of {database_name} ({size_mb:.1f} MB) in {seconds:.3f}s."
+INFO_VALUE_INDEX_EVICTED = "Evicted value index of {database_name} ({size_mb:.1f} MB) to stay within {budget_mb:.1f} MB."
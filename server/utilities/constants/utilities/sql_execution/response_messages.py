@@ -0,0 +1,9 @@
+"""
+This module contains response messages used by the SQL execution service.
+
+These messages are used for error handling and logging purposes.
+"""
+ERROR_QUERY_TIMEOUT = "Query execution exceeded {timeout} seconds"
+ERROR_QUERY_CANCELLED = "Query execution was cancelled"
+ERROR_ROW_LIMIT_EXCEEDED = "Query returned more than {max_rows} rows"
+ERROR_MEMORY_LIMIT_EXCEEDED = "Query result exceeded {max_memory_mb} MB"
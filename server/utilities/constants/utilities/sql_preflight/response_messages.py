@@ -0,0 +1,8 @@
+"""
+This module contains response messages used by the pre-flight checks of candidate queries.
+
+These messages are used for error handling and logging purposes.
+"""
+INFO_EXPENSIVE_PLAN = "Running a query with an expensive plan within {timeout} seconds: {scans}"
+EXPENSIVE_FULL_SCAN = "full scan of {table} (~{rows} rows)"
+EXPENSIVE_NESTED_SCAN = "nested scan of {table} (~{rows} rows)"
@@ -0,0 +1,15 @@
+"""
+This module contains response messages used by the streaming evaluation.
+
+These messages are used for error handling and logging purposes.
+"""
+ERROR_STREAMING_EVALUATION_FAILED = (
+    "Evaluation of question {question_id} on database {database} failed: {error}"
+)
+INFO_STREAMING_EVALUATION_STARTED = (
+    "Tailing prediction log {log_path} with {workers} workers on {databases} databases"
+)
+WARNING_ACCURACY_BELOW_THRESHOLD = (
+    "Accuracy {accuracy:.2f} after {questions} questions is below {min_accuracy:.2f}, "
+    "consider stopping the run"
+)
@@ -0,0 +1,9 @@
+"""
+This module contains response messages used by the NumPy vector index.
+
+These messages are used for error handling and logging purposes.
+"""
+ERROR_INDEX_LENGTH_MISMATCH = "Documents, metadatas and ids must have the same length."
+ERROR_EMBEDDING_DIMENSION_MISMATCH = "Index stores {expected} dimensional embeddings, received {received} dimensional embeddings."
+ERROR_QUERY_INPUT_REQUIRED = "Either query_texts or query_embeddings must be provided."
+ERROR_UNSUPPORTED_WHERE_OPERATOR = "Unsupported metadata filter operator: {operator}"
@@ -0,0 +1,343 @@
+"""
+Persistent text to embedding cache placed in front of the ChromaDB embedding function.
+
+Questions, keywords and few-shot queries are embedded over and over during a run. This
+module stores every computed embedding in a small SQLite file keyed by a content hash of
+the model name and the text, so repeated lookups never reach the embedding model. Vectors
+are stored as float16 to halve the footprint and the store is bounded with an LRU policy,
+both in memory and on disk.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from utilities.config import PATH_CONFIG
+from utilities.constants.utilities.embedding_cache.response_messages import (
+    ERROR_EMBEDDING_COUNT_MISMATCH, ERROR_EMBEDDING_FUNCTION_UNAVAILABLE)
+from utilities.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Constants
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MEMORY_ENTRIES = 20_000
+EVICTION_SLACK_RATIO = 0.1
+# Number of read entries whose last_used tick is buffered before it is written
+TOUCH_FLUSH_ENTRIES = 1000
+STORAGE_DTYPE = np.float16
+
+CREATE_EMBEDDINGS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        key TEXT PRIMARY KEY,
+        dimension INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        last_used INTEGER NOT NULL
+    )
+"""
+CREATE_LAST_USED_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+)
+
+
+def make_embedding_key(model_name: str, text: str) -> str:
+    """
+    Build the content hash used to identify an embedding.
+
+    Args:
+        model_name (str): Name of the embedding model, so different models never share entries.
+        text (str): The embedded text.
+
+    Returns:
+        str: Hex digest identifying the (model, text) pair.
+    """
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Bounded, persistent store of float16 embeddings keyed by content hash.
+
+    A small in-memory LRU sits in front of a SQLite table. Each read bumps the entry's
+    `last_used` tick in memory, and the buffered ticks are written together with the next
+    stored embeddings, once `TOUCH_FLUSH_ENTRIES` entries were read or on close, so reads do
+    not write to the table. Once the table grows past `max_entries` (plus a slack ratio so
+    evictions are batched) the least recently used rows are deleted.
+
+    Attributes:
+        cache_path (Optional[Path]): SQLite file backing the cache, None for memory only.
+        max_entries (int): Maximum number of persisted embeddings.
+        memory_entries (int): Maximum number of embeddings kept in the in-memory LRU.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to be embedded.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+    ):
+        """
+        Initialize the cache and create the backing table if needed.
+
+        Args:
+            cache_path (Optional[Path]): Location of the SQLite file. Memory only if None.
+            max_entries (int): Maximum number of persisted embeddings.
+            memory_entries (int): Maximum number of embeddings kept in memory.
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tick = 0
+        self._touched: Dict[str, int] = {}
+        self._connection = None
+
+        if cache_path is not None:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(cache_path), check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(CREATE_EMBEDDINGS_TABLE_SQL)
+            self._connection.execute(CREATE_LAST_USED_INDEX_SQL)
+            self._connection.commit()
+            self._tick = self._connection.execute(
+                "SELECT COALESCE(MAX(last_used), 0) FROM embeddings"
+            ).fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up embeddings for the given keys.
+
+        Args:
+            keys (Sequence[str]): Content hashes to look up.
+
+        Returns:
+            Dict[str, np.ndarray]: float32 vectors for every key that is cached.
+        """
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            self._tick += 1
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+
+            if missing and self._connection is not None:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start : start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._connection.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=STORAGE_DTYPE).astype(np.float32)
+                        found[key] = vector
+                        self._remember(key, vector)
+
+            if self._connection is not None:
+                self._touched.update(dict.fromkeys(found, self._tick))
+                if len(self._touched) >= TOUCH_FLUSH_ENTRIES:
+                    self._flush_touched()
+                    self._connection.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[str, np.ndarray]) -> None:
+        """
+        Store embeddings, evicting the least recently used entries if the cache is full.
+
+        Args:
+            entries (Dict[str, np.ndarray]): Vectors keyed by content hash.
+        """
+        if not entries:
+            return
+
+        with self._lock:
+            self._tick += 1
+            rows = []
+            for key, vector in entries.items():
+                stored = np.asarray(vector, dtype=STORAGE_DTYPE)
+                self._remember(key, stored.astype(np.float32))
+                rows.append((key, stored.shape[0], stored.tobytes(), self._tick))
+
+            if self._connection is None:
+                return
+
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dimension, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._flush_touched()
+            self._evict_persisted()
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        """Return the number of persisted embeddings, or in-memory ones when not persisted."""
+        with self._lock:
+            if self._connection is None:
+                return len(self._memory)
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        """Write the buffered last_used ticks and close the backing SQLite connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._flush_touched()
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """Insert a vector into the in-memory LRU, dropping the oldest entry when full."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touched(self) -> None:
+        """Write the buffered last_used ticks of read entries, without committing."""
+        if not self._touched:
+            return
+        self._connection.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+            [(tick, key) for key, tick in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict_persisted(self) -> None:
+        """Delete least recently used rows once the table exceeds its bound plus slack."""
+        count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count <= self.max_entries * (1 + EVICTION_SLACK_RATIO):
+            return
+
+        self._connection.execute(
+            """
+            DELETE FROM embeddings WHERE key IN (
+                SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+            )
+            """,
+            (count - self.max_entries,),
+        )
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    ChromaDB embedding function that serves repeated texts from an EmbeddingCache.
+
+    Only texts that are not cached are forwarded, in a single batch, to the wrapped
+    embedding function. It can be handed to ChromaDB when building collections and
+    called directly to produce `query_embeddings`.
+    """
+
+    def __init__(
+        self,
+        cache: EmbeddingCache,
+        embedding_function: Optional[Callable[[Documents], Embeddings]] = None,
+        model_name: Optional[str] = None,
+    ):
+        """
+        Initialize the cached embedding function.
+
+        Args:
+            cache (EmbeddingCache): Cache used to store and serve embeddings.
+            embedding_function (Optional[Callable]): Underlying embedding function. Defaults
+                to ChromaDB's default embedding function.
+            model_name (Optional[str]): Name used in the content hash. Defaults to the wrapped
+                function's model name.
+        """
+        if embedding_function is None:
+            # ChromaDB returns no default function in its thin client, which has no local model
+            embedding_function = DefaultEmbeddingFunction()
+            if embedding_function is None:
+                raise RuntimeError(ERROR_EMBEDDING_FUNCTION_UNAVAILABLE)
+
+        self.cache = cache
+        self.embedding_function = embedding_function
+        self.model_name = model_name or getattr(
+            embedding_function, "MODEL_NAME", type(embedding_function).__name__
+        )
+
+    def __call__(self, input: Documents) -> Embeddings:
+        """
+        Embed the given texts, reusing cached vectors wherever possible.
+
+        Args:
+            input (Documents): Texts to embed.
+
+        Returns:
+            Embeddings: One float32 vector per input text, in input order.
+        """
+        keys = [make_embedding_key(self.model_name, text) for text in input]
+        vectors = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            computed = self.embedding_function(list(missing.values()))
+            if len(computed) != len(missing):
+                raise RuntimeError(
+                    ERROR_EMBEDDING_COUNT_MISMATCH.format(
+                        expected=len(missing), received=len(computed)
+                    )
+                )
+            new_vectors = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing.keys(), computed)
+            }
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embed texts for use as ChromaDB `query_embeddings`.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            List[np.ndarray]: One float32 vector per text.
+        """
+        return self(texts)
+
+
+_embedding_function: Optional[CachedEmbeddingFunction] = None
+_embedding_function_lock = threading.Lock()
+
+
+def get_embedding_function() -> CachedEmbeddingFunction:
+    """
+    Return the process-wide cached embedding function, creating it on first use.
+
+    Returns:
+        CachedEmbeddingFunction: Embedding function backed by the persistent cache.
+    """
+    global _embedding_function
+
+    with _embedding_function_lock:
+        if _embedding_function is None:
+            cache = EmbeddingCache(cache_path=PATH_CONFIG.embedding_cache_path())
+            _embedding_function = CachedEmbeddingFunction(cache=cache)
+            logger.info(f"Using embedding cache at {cache.cache_path}")
+        return _embedding_function
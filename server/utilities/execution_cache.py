@@ -0,0 +1,584 @@
+"""
+Process-wide cache of SQL execution outcomes keyed by database and normalized SQL.
+
+The same query is executed many times in one run: the refiner runs it on every attempt,
+the candidate selector runs every candidate again, the selection metadata runs the gold
+query and every candidate once more and the BIRD evaluation repeats all of it. This module
+runs a query once and keeps a compact `ExecutionOutcome` (result hashes, row count, a
+sampled preview, error and elapsed time) built while the rows stream in, instead of the
+full result. Keys combine the database name, the size and modification time of its file
+and the SQL normalized with sqlglot, so formatting differences share an entry and
+rewritten databases never serve stale outcomes. Outcomes are bounded with an LRU policy and can be persisted to a SQLite
+file so that evaluation reuses the outcomes computed during prediction. Several queries can
+be executed concurrently on a process-wide pool of worker threads. Refiner and selector
+candidates can be pre-flight checked from their query plan first: queries that do not
+compile are rejected without running, and expensive ones run within a tighter budget.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple)
+
+import sqlglot
+from sqlglot.errors import SqlglotError
+from utilities.config import (EXECUTION_CACHE_MAX_ENTRIES,
+                              EXECUTION_CACHE_PERSIST, EXECUTION_WORKERS,
+                              PATH_CONFIG)
+from utilities.constants.utilities.execution_cache.response_messages import \
+    INFO_EXECUTION_CACHE_OPENED
+from utilities.constants.utilities.sql_preflight.response_messages import \
+    INFO_EXPENSIVE_PLAN
+from utilities.logging_utils import setup_logger
+from utilities.sql_execution import (DEFAULT_BUDGET, PREVIEW_ROWS,
+                                     QueryBudget, QueryLimitError,
+                                     QueryTimeoutError, summarize_query)
+from utilities.sql_preflight import preflight_query
+from utilities.utility_functions import normalize_execution_results
+
+logger = setup_logger(__name__)
+
+# Constants
+EVICTION_SLACK_RATIO = 0.1
+
+# Part of every key, bumped whenever the fields or hashes of ExecutionOutcome change
+OUTCOME_FORMAT_VERSION = 5
+
+# Lower cased fragments of SQLite errors caused by the state of the database file or the
+# process rather than by the query, which may not happen again
+TRANSIENT_SQLITE_ERRORS = (
+    "unable to open database",
+    "database is locked",
+    "database table is locked",
+    "disk i/o error",
+    "database disk image is malformed",
+    "file is not a database",
+    "out of memory",
+    "interrupted",
+)
+
+CREATE_OUTCOMES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS outcomes (
+        key TEXT PRIMARY KEY,
+        outcome BLOB NOT NULL,
+        last_used INTEGER NOT NULL
+    )
+"""
+CREATE_LAST_USED_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS outcomes_last_used ON outcomes (last_used)"
+)
+
+
+@dataclass
+class ExecutionOutcome:
+    """
+    Compact outcome of executing a query.
+
+    Attributes:
+        result_hash (Optional[str]): Order-insensitive hash of the multiset of rows, equal
+            for two results holding the same rows the same number of times, None on error.
+        set_hash (Optional[str]): Hash of the set of rows, equal for two results exactly
+            when `set(rows)` is, None on error.
+        row_count (int): Number of returned rows.
+        columns (List[str]): Names of the result columns.
+        preview (List[Any]): Up to `PREVIEW_ROWS` randomly sampled, truncated rows.
+        error (Optional[str]): Error message if the query failed or exceeded its budget.
+        timed_out (bool): Whether the query was interrupted by its deadline.
+        limit_exceeded (bool): Whether the result exceeded the row or memory limit.
+        budget (Optional[QueryBudget]): Budget the query ran with.
+        elapsed_seconds (float): Execution time of the query.
+        ordered_hash (Optional[str]): Hash of the rows in their order, only computed by
+            `run_query` with `ordered`, never for cached outcomes.
+        transient (bool): Whether the query failed for a reason other than the query itself,
+            e.g. a locked database or a cancellation, so that the outcome is not cached.
+    """
+
+    result_hash: Optional[str] = None
+    set_hash: Optional[str] = None
+    row_count: int = 0
+    columns: List[str] = field(default_factory=list)
+    preview: List[Any] = field(default_factory=list)
+    error: Optional[str] = None
+    timed_out: bool = False
+    limit_exceeded: bool = False
+    budget: Optional[QueryBudget] = None
+    elapsed_seconds: float = 0.0
+    ordered_hash: Optional[str] = None
+    transient: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        """Return True if the query ran to completion."""
+        return self.error is None
+
+    def to_markdown(self) -> str:
+        """
+        Render the outcome the way it is shown to the LLM in refiner and selector prompts.
+
+        Returns:
+            str: The error message, a markdown table of the preview rows, or `[]` for an
+            empty result.
+        """
+        if self.error is not None:
+            return self.error
+        if not self.preview:
+            return str([])
+
+        markdown_table = "| " + " | ".join(self.columns) + " |\n"
+        markdown_table += "| " + " | ".join(["---"] * len(self.columns)) + " |\n"
+        for row in self.preview:
+            markdown_table += "| " + " | ".join(map(str, row)) + " |\n"
+        return markdown_table
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalize a query so that formatting differences map to the same cache key.
+
+    Whitespace, keyword case, comments and trailing semicolons are normalized by parsing
+    and regenerating the query with sqlglot. Identifiers and literals are kept as written.
+    Queries sqlglot cannot parse fall back to collapsing their whitespace.
+
+    Args:
+        sql (str): The query.
+
+    Returns:
+        str: The normalized query.
+    """
+    try:
+        statements = sqlglot.parse(sql, read="sqlite")
+        return "; ".join(
+            statement.sql(dialect="sqlite", comments=False)
+            for statement in statements
+            if statement is not None
+        )
+    except SqlglotError:
+        return " ".join(sql.split()).rstrip(";")
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Check whether an execution error may not happen again for the same query.
+
+    Timeouts, exceeded limits and the SQLite errors of the query itself, such as unknown
+    columns or syntax errors, are deterministic. Cancellations, errors outside SQLite and
+    SQLite errors caused by the state of the database file are not.
+
+    Args:
+        error (BaseException): The error raised by the execution.
+
+    Returns:
+        bool: True if the error is transient.
+    """
+    if isinstance(error, (QueryTimeoutError, QueryLimitError)):
+        return False
+    if not isinstance(error, sqlite3.Error):
+        return True
+    message = str(error).lower()
+    return any(fragment in message for fragment in TRANSIENT_SQLITE_ERRORS)
+
+
+def run_query(
+    database_path: Path, sql: str, budget: QueryBudget = DEFAULT_BUDGET, ordered: bool = False
+) -> ExecutionOutcome:
+    """
+    Execute a query through the SQL execution service and summarize its result.
+
+    The result is fingerprinted inside SQLite where possible and otherwise batch by batch
+    as it is fetched, so the full result is never held in memory.
+
+    Args:
+        database_path (Path): Path to the SQLite database file.
+        sql (str): The query.
+        budget (QueryBudget): Deadline and result limits of the query.
+        ordered (bool): Whether to also compute the order-sensitive hash of the result.
+
+    Returns:
+        ExecutionOutcome: The outcome of the query.
+    """
+    start = time.perf_counter()
+    try:
+        summary = summarize_query(
+            database_path, sql, budget, preview_rows=PREVIEW_ROWS, ordered=ordered
+        )
+    except Exception as e:
+        return ExecutionOutcome(
+            error=str(e),
+            timed_out=isinstance(e, QueryTimeoutError),
+            limit_exceeded=isinstance(e, QueryLimitError),
+            budget=budget,
+            elapsed_seconds=time.perf_counter() - start,
+            transient=is_transient_error(e),
+        )
+
+    return ExecutionOutcome(
+        result_hash=summary.multiset_hash,
+        set_hash=summary.set_hash,
+        row_count=summary.row_count,
+        columns=summary.columns,
+        preview=normalize_execution_results(summary.preview, fetchall=True),
+        budget=budget,
+        elapsed_seconds=summary.elapsed_seconds,
+        ordered_hash=summary.ordered_hash,
+    )
+
+
+@dataclass
+class ExecutionCacheStats:
+    """
+    Counters of an execution cache.
+
+    Attributes:
+        hits (int): Executions served from the cache.
+        misses (int): Executions that had to run the query.
+        saved_seconds (float): Execution time of the queries served from the cache.
+        rejected (int): Pre-flight checked queries rejected without running.
+        tightened (int): Pre-flight checked queries given a tighter budget.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+    rejected: int = 0
+    tightened: int = 0
+
+
+class ExecutionCache:
+    """
+    Bounded, optionally persistent store of execution outcomes.
+
+    An in-memory LRU sits in front of an optional SQLite table that is bounded by the same
+    number of entries. Concurrent executions of the same query wait for the first one
+    instead of running it again.
+
+    Attributes:
+        cache_path (Optional[Path]): SQLite file backing the cache, None for memory only.
+        max_entries (int): Maximum number of outcomes kept in memory and on disk.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = None,
+        max_entries: int = EXECUTION_CACHE_MAX_ENTRIES,
+        database_path: Callable[[str], Path] = PATH_CONFIG.sqlite_path,
+    ):
+        """
+        Initialize the cache and create the backing table if needed.
+
+        Args:
+            cache_path (Optional[Path]): Location of the SQLite file. Memory only if None.
+            max_entries (int): Maximum number of cached outcomes.
+            database_path (Callable[[str], Path]): Resolves a database name to its file.
+        """
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._database_path = database_path
+        self._memory: "OrderedDict[str, ExecutionOutcome]" = OrderedDict()
+        self._running: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stats = ExecutionCacheStats()
+        self._tick = 0
+        self._connection = None
+
+        if cache_path is not None:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(
+                str(cache_path), timeout=60, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(CREATE_OUTCOMES_TABLE_SQL)
+            self._connection.execute(CREATE_LAST_USED_INDEX_SQL)
+            self._connection.commit()
+            self._tick = self._connection.execute(
+                "SELECT COALESCE(MAX(last_used), 0) FROM outcomes"
+            ).fetchone()[0]
+
+    def key(self, database: str, sql: str) -> Tuple[str, Path]:
+        """
+        Build the cache key of a query together with the resolved database file.
+
+        Args:
+            database (str): The name of the database.
+            sql (str): The query.
+
+        Returns:
+            Tuple[str, Path]: The key and the path of the database file.
+        """
+        database_path = Path(self._database_path(database))
+        try:
+            stat = database_path.stat()
+            version = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            version = "missing"
+        key = hashlib.sha256(
+            f"{OUTCOME_FORMAT_VERSION}\0{database}\0{version}\0{normalize_sql(sql)}".encode(
+                "utf-8"
+            )
+        ).hexdigest()
+        return key, database_path
+
+    def execute(
+        self,
+        database: str,
+        sql: str,
+        budget: QueryBudget = DEFAULT_BUDGET,
+        preflight: bool = False,
+    ) -> ExecutionOutcome:
+        """
+        Return the outcome of a query, executing it only if it is not cached.
+
+        An outcome that exceeded its budget is only reused if the new budget allows no
+        more than the one the query ran with. Transient failures, see `is_transient_error`,
+        are returned without being cached. With `preflight`, a query that is not cached is
+        first compiled: one that does not compile is rejected with the error it would have
+        raised when run, without running or being cached, and one with an expensive plan
+        gets a tighter deadline.
+
+        Args:
+            database (str): The name of the database.
+            sql (str): The query.
+            budget (QueryBudget): Deadline and result limits of the query.
+            preflight (bool): Whether to check the query plan first.
+
+        Returns:
+            ExecutionOutcome: The outcome of the query.
+        """
+        key, database_path = self.key(database, sql)
+
+        with self._lock:
+            outcome = self._lookup(key, budget)
+            if outcome is not None:
+                return outcome
+
+        if preflight:
+            check = preflight_query(database_path, sql)
+            if not check.succeeded:
+                with self._lock:
+                    self._stats.rejected += 1
+                return ExecutionOutcome(error=check.error, budget=budget)
+            if check.budget(budget) != budget:
+                budget = check.budget(budget)
+                logger.info(
+                    INFO_EXPENSIVE_PLAN.format(
+                        timeout=budget.timeout, scans=", ".join(check.expensive_scans)
+                    )
+                )
+                with self._lock:
+                    self._stats.tightened += 1
+
+        with self._lock:
+            outcome = self._lookup(key, budget)
+            if outcome is not None:
+                return outcome
+            running = self._running.setdefault(key, threading.Lock())
+
+        with running:
+            with self._lock:
+                outcome = self._lookup(key, budget)
+                if outcome is not None:
+                    return outcome
+
+            outcome = run_query(database_path, sql, budget)
+
+            with self._lock:
+                self._stats.misses += 1
+                if not outcome.transient:
+                    self._store(key, outcome)
+                self._running.pop(key, None)
+
+        return outcome
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the hit and miss counters of the cache.
+
+        Returns:
+            Dict[str, Any]: The counters and the number of outcomes held in memory.
+        """
+        with self._lock:
+            return asdict(self._stats) | {"entries": len(self._memory)}
+
+    def clear(self) -> None:
+        """Drop every cached outcome, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM outcomes")
+                self._connection.commit()
+
+    def __len__(self) -> int:
+        """Return the number of persisted outcomes, or in-memory ones when not persisted."""
+        with self._lock:
+            if self._connection is None:
+                return len(self._memory)
+            return self._connection.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the backing SQLite connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _lookup(self, key: str, budget: QueryBudget) -> Optional[ExecutionOutcome]:
+        """Return a reusable cached outcome and count the hit, or None."""
+        outcome = self._memory.get(key)
+        if outcome is not None:
+            self._memory.move_to_end(key)
+        elif self._connection is not None:
+            row = self._connection.execute(
+                "SELECT outcome FROM outcomes WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                outcome = pickle.loads(row[0])
+                self._remember(key, outcome)
+
+        if outcome is None:
+            return None
+        if (outcome.timed_out or outcome.limit_exceeded) and not budget.within(outcome.budget):
+            return None
+
+        self._stats.hits += 1
+        self._stats.saved_seconds += outcome.elapsed_seconds
+        return outcome
+
+    def _store(self, key: str, outcome: ExecutionOutcome) -> None:
+        """Keep an outcome in memory and persist it, evicting the oldest entries."""
+        self._remember(key, outcome)
+        if self._connection is None:
+            return
+
+        self._tick += 1
+        self._connection.execute(
+            "INSERT OR REPLACE INTO outcomes (key, outcome, last_used) VALUES (?, ?, ?)",
+            (key, pickle.dumps(outcome), self._tick),
+        )
+        count = self._connection.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0]
+        if count > self.max_entries * (1 + EVICTION_SLACK_RATIO):
+            self._connection.execute(
+                """
+                DELETE FROM outcomes WHERE key IN (
+                    SELECT key FROM outcomes ORDER BY last_used ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            )
+        self._connection.commit()
+
+    def _remember(self, key: str, outcome: ExecutionOutcome) -> None:
+        """Insert an outcome into the in-memory LRU, dropping the oldest entry when full."""
+        self._memory[key] = outcome
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_execution_cache: Optional[ExecutionCache] = None
+_execution_cache_pid: Optional[int] = None
+_execution_cache_lock = threading.Lock()
+_execution_executor: Optional[ThreadPoolExecutor] = None
+_execution_executor_pid: Optional[int] = None
+
+
+def get_execution_cache() -> ExecutionCache:
+    """
+    Return the process-wide execution cache, creating it on first use.
+
+    The cache is persisted to `PATH_CONFIG.execution_cache_path()` when
+    `EXECUTION_CACHE_PERSIST` is enabled. Forked worker processes open their own cache.
+
+    Returns:
+        ExecutionCache: The shared execution cache.
+    """
+    global _execution_cache, _execution_cache_pid
+
+    with _execution_cache_lock:
+        if _execution_cache is None or _execution_cache_pid != os.getpid():
+            cache_path = PATH_CONFIG.execution_cache_path() if EXECUTION_CACHE_PERSIST else None
+            _execution_cache = ExecutionCache(cache_path=cache_path)
+            _execution_cache_pid = os.getpid()
+            if cache_path is not None:
+                logger.info(INFO_EXECUTION_CACHE_OPENED.format(cache_path=cache_path))
+        return _execution_cache
+
+
+def execute_cached(
+    database: str, sql: str, budget: QueryBudget = DEFAULT_BUDGET, preflight: bool = False
+) -> ExecutionOutcome:
+    """
+    Execute a query through the process-wide execution cache.
+
+    Args:
+        database (str): The name of the database.
+        sql (str): The query.
+        budget (QueryBudget): Deadline and result limits of the query.
+        preflight (bool): Whether to check the query plan first, see `ExecutionCache.execute`.
+
+    Returns:
+        ExecutionOutcome: The outcome of the query.
+    """
+    return get_execution_cache().execute(database, sql, budget, preflight)
+
+
+def get_execution_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide pool of threads executing queries, creating it on first use.
+
+    The threads live as long as the process, so each keeps its pooled read-only
+    connections open across calls. Forked worker processes create their own pool.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool of `EXECUTION_WORKERS` threads.
+    """
+    global _execution_executor, _execution_executor_pid
+
+    with _execution_cache_lock:
+        if _execution_executor is None or _execution_executor_pid != os.getpid():
+            _execution_executor = ThreadPoolExecutor(
+                max_workers=EXECUTION_WORKERS, thread_name_prefix="sql-execution"
+            )
+            _execution_executor_pid = os.getpid()
+        return _execution_executor
+
+
+def execute_cached_concurrently(
+    database: str,
+    sqls: Sequence[str],
+    budget: QueryBudget = DEFAULT_BUDGET,
+    preflight: bool = False,
+) -> Iterator[Tuple[int, ExecutionOutcome]]:
+    """
+    Execute queries concurrently through the process-wide execution cache.
+
+    Every query has its own deadline from `budget` and runs on the pooled connection of
+    the worker thread executing it. Outcomes are yielded as soon as they are available,
+    and the queries not started yet are cancelled if the caller stops early.
+
+    Args:
+        database (str): The name of the database.
+        sqls (Sequence[str]): The queries.
+        budget (QueryBudget): Deadline and result limits of each query.
+        preflight (bool): Whether to check the query plans first, see `ExecutionCache.execute`.
+
+    Yields:
+        Tuple[int, ExecutionOutcome]: The index of a query in `sqls` and its outcome.
+    """
+    executor = get_execution_executor()
+    futures = {
+        executor.submit(execute_cached, database, sql, budget, preflight): idx
+        for idx, sql in enumerate(sqls)
+    }
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,416 @@
+"""
+Execution accuracy evaluation of predicted queries against gold queries.
+
+Both BIRD evaluation scripts run on this engine. Questions are grouped by database and
+split into chunks that a pool of worker processes evaluates, so every worker keeps a warm
+pooled read-only connection to each database it has seen instead of opening one per
+question. Queries are interrupted inside SQLite at their deadline and their results are
+fingerprinted without being kept, through the execution cache unless the order of the
+rows matters. Gold results are read from the gold result store when one is given, so only
+the predictions are executed. Results are yielded in question order as soon as all earlier
+questions are evaluated.
+
+Results are compared as sets of rows like the official BIRD evaluation, as multisets that
+also count duplicate rows, or as ordered lists of rows.
+
+With a timing configuration the engine also measures the VES time ratio of every correct
+prediction, adaptively as in `utilities.ves_timing`. Timing always runs in worker processes,
+each pinned to its own CPU and at most one per CPU, to keep the measurements quiet.
+"""
+
+import multiprocessing as mp
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utilities.config import EXECUTION_CACHE_PERSIST, PATH_CONFIG
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.constants.utilities.execution_evaluation.response_messages import \
+    INFO_EVALUATION_STARTED
+from utilities.execution_cache import (ExecutionCache, ExecutionOutcome,
+                                       run_query)
+from utilities.gold_result_store import GoldResultStore
+from utilities.logging_utils import setup_logger
+from utilities.sql_execution import QueryBudget, QueryTimeoutError
+from utilities.ves_timing import (TimingConfig, available_cpus,
+                                  estimate_time_ratio, pin_to_cpu)
+
+logger = setup_logger(__name__)
+
+# Constants
+CHUNK_SIZE = 50
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class EvaluationTask:
+    """
+    A predicted query to evaluate against the gold query of its question.
+
+    Attributes:
+        index (int): Identifier of the question, unique among the evaluated tasks.
+        database (str): The name of the database.
+        predicted_sql (str): The predicted query.
+        gold_sql (str): The gold query.
+        question_id (Optional[int]): Key of the gold result in the gold result store, the
+            gold query is executed if None.
+    """
+
+    index: int
+    database: str
+    predicted_sql: str
+    gold_sql: str
+    question_id: Optional[int] = None
+
+
+@dataclass
+class EvaluationResult:
+    """
+    Outcome of the evaluation of one question.
+
+    Attributes:
+        index (int): Identifier of the question.
+        database (str): The name of the database.
+        correct (bool): Whether both queries ran and their results are equal.
+        predicted_error (Optional[str]): Error of the predicted query.
+        gold_error (Optional[str]): Error of the gold query.
+        predicted_timed_out (bool): Whether the predicted query ran past its deadline.
+        gold_timed_out (bool): Whether the gold query ran past its deadline.
+        predicted_seconds (float): Execution time of the predicted query.
+        gold_seconds (float): Execution time of the gold query.
+        time_ratio (float): VES time ratio of a correct prediction, the gold query's time over
+            the predicted query's time, 0 if it was not timed or a run failed.
+        timing_iterations (int): Number of pairs of runs timed for the time ratio.
+    """
+
+    index: int
+    database: str
+    correct: bool
+    predicted_error: Optional[str] = None
+    gold_error: Optional[str] = None
+    predicted_timed_out: bool = False
+    gold_timed_out: bool = False
+    predicted_seconds: float = 0.0
+    gold_seconds: float = 0.0
+    time_ratio: float = 0.0
+    timing_iterations: int = 0
+
+    @property
+    def error(self) -> Optional[str]:
+        """Return the error of the predicted query, else of the gold query, timeouts excluded."""
+        if self.predicted_error is not None and not self.predicted_timed_out:
+            return self.predicted_error
+        if self.gold_error is not None and not self.gold_timed_out:
+            return self.gold_error
+        return None
+
+
+def comparison_key(outcome: ExecutionOutcome, mode: ComparisonMode) -> Optional[str]:
+    """
+    Return the hash two outcomes are compared by.
+
+    Args:
+        outcome (ExecutionOutcome): The outcome of a query.
+        mode (ComparisonMode): How results are compared.
+
+    Returns:
+        Optional[str]: The set, multiset or ordered hash of the result, None on error.
+    """
+    if mode is ComparisonMode.SET:
+        return outcome.set_hash
+    if mode is ComparisonMode.MULTISET:
+        return outcome.result_hash
+    return outcome.ordered_hash
+
+
+class _EvaluationWorker:
+    """Evaluates chunks of tasks within one process."""
+
+    def __init__(
+        self,
+        database_paths: Dict[str, Path],
+        mode: ComparisonMode,
+        timeout: float,
+        gold_store_path: Optional[Path] = None,
+        timing: Optional[TimingConfig] = None,
+        gold_checksums: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            database_paths (Dict[str, Path]): The database files by database name.
+            mode (ComparisonMode): How results are compared.
+            timeout (float): Deadline of each query in seconds.
+            gold_store_path (Optional[Path]): The gold result store, None to execute gold
+                queries.
+            timing (Optional[TimingConfig]): How correct predictions are timed, None to skip
+                timing.
+            gold_checksums (Optional[Dict[str, str]]): Checksums of the database files by
+                database name, None to compute them in the gold store.
+        """
+        self.database_paths = database_paths
+        self.timing = timing
+        self.mode = mode
+        self.timeout = timeout
+        # Evaluation compares complete results, so only the deadline is limited
+        self.budget = QueryBudget(timeout=timeout, max_rows=None, max_memory_mb=None)
+        self.cache = ExecutionCache(
+            cache_path=PATH_CONFIG.execution_cache_path() if EXECUTION_CACHE_PERSIST else None,
+            database_path=self.database_paths.__getitem__,
+        )
+        self.gold_store = None
+        if gold_store_path is not None:
+            self.gold_store = GoldResultStore(
+                gold_store_path,
+                database_path=self.database_paths.__getitem__,
+                checksums=gold_checksums,
+            )
+
+    def execute(self, database: str, sql: str) -> ExecutionOutcome:
+        """Execute a query, through the execution cache unless the order of rows is compared."""
+        if self.mode is ComparisonMode.ORDERED:
+            return run_query(self.database_paths[database], sql, self.budget, ordered=True)
+        return self.cache.execute(database, sql, self.budget)
+
+    def gold_outcome(self, task: EvaluationTask) -> ExecutionOutcome:
+        """Return the outcome of the gold query of a task, from the gold store if possible."""
+        if self.gold_store is None or task.question_id is None:
+            return self.execute(task.database, task.gold_sql)
+        return self.gold_store.outcome(task.question_id, task.database, task.gold_sql, self.timeout)
+
+    def time(self, task: EvaluationTask, result: EvaluationResult) -> None:
+        """Measure the time ratio of a correct prediction, leaving it 0 if a run fails."""
+        try:
+            estimate = estimate_time_ratio(
+                self.database_paths[task.database],
+                task.predicted_sql,
+                task.gold_sql,
+                self.timeout,
+                self.timing,
+            )
+        except (QueryTimeoutError, sqlite3.Error):
+            return
+        result.time_ratio = estimate.ratio
+        result.timing_iterations = estimate.iterations
+
+    def evaluate(self, task: EvaluationTask) -> EvaluationResult:
+        """Compare the result of the predicted query of a task with the gold result."""
+        gold = self.gold_outcome(task)
+        predicted = self.execute(task.database, task.predicted_sql)
+        result = EvaluationResult(
+            index=task.index,
+            database=task.database,
+            correct=(
+                predicted.succeeded
+                and gold.succeeded
+                and comparison_key(predicted, self.mode) == comparison_key(gold, self.mode)
+            ),
+            predicted_error=predicted.error,
+            gold_error=gold.error,
+            predicted_timed_out=predicted.timed_out,
+            gold_timed_out=gold.timed_out,
+            predicted_seconds=predicted.elapsed_seconds,
+            gold_seconds=gold.elapsed_seconds,
+        )
+        if self.timing is not None and result.correct:
+            self.time(task, result)
+        return result
+
+    def evaluate_chunk(self, chunk: List[EvaluationTask]) -> List[EvaluationResult]:
+        """Evaluate the tasks of a chunk one after the other."""
+        return [self.evaluate(task) for task in chunk]
+
+
+_worker: Optional[_EvaluationWorker] = None
+
+
+def initialize_worker(
+    database_paths: Dict[str, Path],
+    mode: ComparisonMode,
+    timeout: float,
+    gold_store_path: Optional[Path],
+    gold_checksums: Optional[Dict[str, str]] = None,
+    timing: Optional[TimingConfig] = None,
+    cpus: Optional[mp.Queue] = None,
+) -> None:
+    """
+    Create the evaluation worker of a pool process, pinned to the next free CPU if given.
+
+    Pass it as the initializer of a process pool whose tasks call `evaluate_task`.
+
+    Args:
+        database_paths (Dict[str, Path]): The database files by database name.
+        mode (ComparisonMode): How results are compared.
+        timeout (float): Deadline of each query in seconds.
+        gold_store_path (Optional[Path]): The gold result store, None to execute gold queries.
+        gold_checksums (Optional[Dict[str, str]]): Checksums of the database files by database
+            name, see `gold_checksums`.
+        timing (Optional[TimingConfig]): How correct predictions are timed, None to skip timing.
+        cpus (Optional[mp.Queue]): Free CPUs to pin the process to, None to leave it unpinned.
+    """
+    global _worker
+    if cpus is not None:
+        pin_to_cpu(cpus.get())
+    _worker = _EvaluationWorker(
+        database_paths, mode, timeout, gold_store_path, timing, gold_checksums
+    )
+
+
+def gold_checksums(
+    gold_store_path: Optional[Path], database_paths: Dict[str, Path], databases: Iterable[str]
+) -> Optional[Dict[str, str]]:
+    """
+    Compute the checksums of database files once, for the gold stores of the workers.
+
+    Every worker would otherwise hash the database files it reads at the same time.
+
+    Args:
+        gold_store_path (Optional[Path]): The gold result store, whose checksums are reused.
+        database_paths (Dict[str, Path]): The database files by database name.
+        databases (Iterable[str]): The databases to checksum, unknown ones are skipped.
+
+    Returns:
+        Optional[Dict[str, str]]: The checksums by database name, None without a gold store.
+    """
+    if gold_store_path is None:
+        return None
+    store = GoldResultStore(gold_store_path, database_path=database_paths.__getitem__)
+    try:
+        return {
+            database: store.checksum(database)
+            for database in set(databases)
+            if database in database_paths
+        }
+    finally:
+        store.close()
+
+
+def evaluate_task(task: EvaluationTask) -> EvaluationResult:
+    """
+    Evaluate one task on the worker of the current pool process.
+
+    Args:
+        task (EvaluationTask): The task to evaluate.
+
+    Returns:
+        EvaluationResult: The result of the task.
+    """
+    return _worker.evaluate(task)
+
+
+def _evaluate_chunk(chunk: List[EvaluationTask]) -> List[EvaluationResult]:
+    """Evaluate a chunk on the worker of the current pool process."""
+    return _worker.evaluate_chunk(chunk)
+
+
+def chunk_by_database(
+    tasks: List[EvaluationTask], chunk_size: int = CHUNK_SIZE
+) -> List[List[EvaluationTask]]:
+    """
+    Group tasks by database and split the groups into chunks.
+
+    Args:
+        tasks (List[EvaluationTask]): The tasks, in question order.
+        chunk_size (int): Maximum number of tasks of a chunk.
+
+    Returns:
+        List[List[EvaluationTask]]: Chunks of tasks on the same database, ordered by their
+        first task so that the first questions are evaluated first.
+    """
+    by_database: Dict[str, List[EvaluationTask]] = {}
+    for task in tasks:
+        by_database.setdefault(task.database, []).append(task)
+
+    position = {task.index: i for i, task in enumerate(tasks)}
+    chunks = [
+        group[start : start + chunk_size]
+        for group in by_database.values()
+        for start in range(0, len(group), chunk_size)
+    ]
+    return sorted(chunks, key=lambda chunk: position[chunk[0].index])
+
+
+def evaluate_tasks(
+    tasks: Iterable[EvaluationTask],
+    database_paths: Dict[str, Path],
+    mode: ComparisonMode = ComparisonMode.SET,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    num_workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    gold_store_path: Optional[Path] = None,
+    timing: Optional[TimingConfig] = None,
+) -> Iterator[EvaluationResult]:
+    """
+    Evaluate predicted queries against gold queries.
+
+    Chunks are evaluated by a pool of worker processes in any order, and their results are
+    buffered until they can be yielded in question order. With a single worker the chunks
+    are evaluated in the calling process, unless predictions are timed: timing workers are
+    dedicated processes, each pinned to its own CPU.
+
+    Args:
+        tasks (Iterable[EvaluationTask]): The tasks, in question order.
+        database_paths (Dict[str, Path]): The database files by database name.
+        mode (ComparisonMode): How results are compared.
+        timeout (float): Deadline of each query in seconds.
+        num_workers (Optional[int]): Number of worker processes, one per CPU if None.
+        chunk_size (int): Maximum number of tasks handed to a worker at once.
+        gold_store_path (Optional[Path]): Gold result store to read the gold results of
+            tasks with a question id from, and to store them in when missing.
+        timing (Optional[TimingConfig]): How the VES time ratio of correct predictions is
+            measured, None to skip timing.
+
+    Yields:
+        EvaluationResult: The result of each task, in the order of `tasks`.
+    """
+    tasks = list(tasks)
+    chunks = chunk_by_database(tasks, chunk_size)
+    num_workers = max(1, min(num_workers or os.cpu_count() or 1, len(chunks)))
+    cpus = None
+    if timing is not None:
+        # Never share a CPU between timing workers
+        free_cpus = available_cpus()
+        num_workers = min(num_workers, len(free_cpus))
+        cpus = mp.Queue()
+        for cpu in free_cpus[:num_workers]:
+            cpus.put(cpu)
+    logger.info(
+        INFO_EVALUATION_STARTED.format(
+            questions=len(tasks),
+            databases=len({task.database for task in tasks}),
+            workers=num_workers,
+        )
+    )
+
+    checksums = gold_checksums(
+        gold_store_path, database_paths, (task.database for task in tasks)
+    )
+    pending: Dict[int, EvaluationResult] = {}
+    next_position = 0
+
+    def ready(chunk_results: List[EvaluationResult]) -> Iterator[EvaluationResult]:
+        nonlocal next_position
+        for result in chunk_results:
+            pending[result.index] = result
+        while next_position < len(tasks) and tasks[next_position].index in pending:
+            yield pending.pop(tasks[next_position].index)
+            next_position += 1
+
+    if num_workers == 1 and timing is None:
+        worker = _EvaluationWorker(
+            database_paths, mode, timeout, gold_store_path, gold_checksums=checksums
+        )
+        for chunk in chunks:
+            yield from ready(worker.evaluate_chunk(chunk))
+        return
+
+    with mp.Pool(
+        processes=num_workers,
+        initializer=initialize_worker,
+        initargs=(database_paths, mode, timeout, gold_store_path, checksums, timing, cpus),
+    ) as pool:
+        for chunk_results in pool.imap_unordered(_evaluate_chunk, chunks):
+            yield from ready(chunk_results)
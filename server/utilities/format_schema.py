@@ -5,6 +5,7 @@ from typing import Dict, List, Optional, Union
 import yaml
 from utilities.bird_utils import generate_description_dict
 from utilities.config import PATH_CONFIG
+from utilities.connections.sqlite import SQLITE_CONNECTION_POOL
 from utilities.constants.common.indexing_constants import (
     COLUMNS_KEY, TABLE_DESCRIPTION_STR)
 from utilities.constants.database_enums import DatasetType
@@ -572,7 +573,7 @@ def format_schema(
         database_name=database_name, dataset_type=dataset_type, schema_dict=schema_dict
     )
 
-    with sqlite3.connect(
+    with SQLITE_CONNECTION_POOL.connect(
         PATH_CONFIG.sqlite_path(
             database_name=database_name, dataset_type=dataset_type)
     ) as conn:
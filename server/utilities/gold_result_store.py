@@ -0,0 +1,371 @@
+"""
+Persistent store of the results of gold queries.
+
+Every evaluation compares predictions against the same gold queries, some of which take
+tens of seconds on BIRD databases. This module executes a gold query once and stores the
+fingerprints of its result (set, multiset and ordered hashes), its row count, its error and
+its execution time in a SQLite file, keyed by question id and by the checksum of the
+database file, so that the stored result is never served for a modified database. The
+normalized gold query is stored too and a question whose gold query changed is executed
+again. `preprocess/build_gold_results.py` fills the store for a whole dataset, and the
+evaluators, the selection metadata and the selection benchmark read from it.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from utilities.config import GOLD_RESULT_TIMEOUT_SECONDS, PATH_CONFIG
+from utilities.constants.utilities.gold_result_store.response_messages import \
+    INFO_GOLD_RESULT_STORE_OPENED
+from utilities.execution_cache import (ExecutionOutcome, normalize_sql,
+                                       run_query)
+from utilities.logging_utils import setup_logger
+from utilities.sql_execution import QueryBudget
+
+logger = setup_logger(__name__)
+
+# Constants
+CHECKSUM_CHUNK_BYTES = 1 << 20
+
+CREATE_GOLD_RESULTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS gold_results (
+        question_id INTEGER NOT NULL,
+        checksum TEXT NOT NULL,
+        database TEXT NOT NULL,
+        sql_hash TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        set_hash TEXT,
+        multiset_hash TEXT,
+        ordered_hash TEXT,
+        error TEXT,
+        timed_out INTEGER NOT NULL,
+        timeout REAL,
+        elapsed_seconds REAL NOT NULL,
+        PRIMARY KEY (question_id, checksum)
+    )
+"""
+CREATE_CHECKSUMS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS database_checksums (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        checksum TEXT NOT NULL
+    )
+"""
+GOLD_RESULT_COLUMNS = (
+    "question_id, checksum, database, sql_hash, row_count, set_hash, multiset_hash, "
+    "ordered_hash, error, timed_out, timeout, elapsed_seconds"
+)
+
+
+def sql_hash(sql: str) -> str:
+    """Return the hash of a normalized query."""
+    return hashlib.sha256(normalize_sql(sql).encode("utf-8")).hexdigest()
+
+
+def file_checksum(path: Path) -> str:
+    """
+    Compute the checksum of a file's content.
+
+    Args:
+        path (Path): The file.
+
+    Returns:
+        str: The hex BLAKE2b digest of the file.
+    """
+    digest = hashlib.blake2b()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHECKSUM_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class GoldResult:
+    """
+    Stored result of a gold query.
+
+    Attributes:
+        question_id (int): The question the gold query answers.
+        checksum (str): Checksum of the database file the query ran on.
+        database (str): The name of the database.
+        sql_hash (str): Hash of the normalized gold query.
+        row_count (int): Number of returned rows.
+        set_hash (Optional[str]): Hash of the set of rows, None on error.
+        multiset_hash (Optional[str]): Order-insensitive hash of the rows counting duplicates.
+        ordered_hash (Optional[str]): Hash of the rows in the order they were returned.
+        error (Optional[str]): Error message if the query failed or timed out.
+        timed_out (bool): Whether the query was interrupted by its deadline.
+        timeout (Optional[float]): Deadline the query ran with, None for no limit.
+        elapsed_seconds (float): Execution time of the query.
+    """
+
+    question_id: int
+    checksum: str
+    database: str
+    sql_hash: str
+    row_count: int = 0
+    set_hash: Optional[str] = None
+    multiset_hash: Optional[str] = None
+    ordered_hash: Optional[str] = None
+    error: Optional[str] = None
+    timed_out: bool = False
+    timeout: Optional[float] = None
+    elapsed_seconds: float = 0.0
+
+    def to_outcome(self) -> ExecutionOutcome:
+        """
+        Return the stored result as an execution outcome for comparisons.
+
+        Returns:
+            ExecutionOutcome: The outcome, without columns or preview.
+        """
+        return ExecutionOutcome(
+            result_hash=self.multiset_hash,
+            set_hash=self.set_hash,
+            ordered_hash=self.ordered_hash,
+            row_count=self.row_count,
+            error=self.error,
+            timed_out=self.timed_out,
+            budget=QueryBudget(timeout=self.timeout, max_rows=None, max_memory_mb=None),
+            elapsed_seconds=self.elapsed_seconds,
+        )
+
+
+class GoldResultStore:
+    """
+    SQLite file of gold query results keyed by question id and database checksum.
+
+    Checksums of database files are stored alongside and only recomputed once the size
+    or modification time of a file changes. Stores opened by worker processes can be given
+    the checksums computed once by their parent instead.
+
+    Attributes:
+        store_path (Path): The SQLite file of the store.
+    """
+
+    def __init__(
+        self,
+        store_path: Path,
+        database_path: Callable[[str], Path] = PATH_CONFIG.sqlite_path,
+        checksums: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Open the store and create its tables if needed.
+
+        Args:
+            store_path (Path): Location of the SQLite file.
+            database_path (Callable[[str], Path]): Resolves a database name to its file.
+            checksums (Optional[Dict[str, str]]): Checksums of database files by database
+                name, used as they are instead of checking the files.
+        """
+        self.store_path = store_path
+        self._database_path = database_path
+        self._checksums = checksums or {}
+        self._lock = threading.Lock()
+
+        Path(store_path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(store_path), timeout=60, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(CREATE_GOLD_RESULTS_TABLE_SQL)
+        self._connection.execute(CREATE_CHECKSUMS_TABLE_SQL)
+        self._connection.commit()
+
+    def checksum(self, database: str) -> str:
+        """
+        Return the checksum of a database file, computing it only if the file changed.
+
+        Args:
+            database (str): The name of the database.
+
+        Returns:
+            str: The checksum of the database file, `missing` if there is no such file.
+        """
+        if database in self._checksums:
+            return self._checksums[database]
+
+        database_path = Path(self._database_path(database)).resolve()
+        try:
+            stat = database_path.stat()
+        except OSError:
+            return "missing"
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT checksum FROM database_checksums WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(database_path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        checksum = file_checksum(database_path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO database_checksums VALUES (?, ?, ?, ?)",
+                (str(database_path), stat.st_size, stat.st_mtime_ns, checksum),
+            )
+            self._connection.commit()
+        return checksum
+
+    def get(self, question_id: int, database: str, gold_sql: str) -> Optional[GoldResult]:
+        """
+        Look up the stored result of a gold query.
+
+        Args:
+            question_id (int): The question the gold query answers.
+            database (str): The name of the database.
+            gold_sql (str): The gold query.
+
+        Returns:
+            Optional[GoldResult]: The stored result, None if the question is not stored for
+            the current database file or its gold query changed.
+        """
+        checksum = self.checksum(database)
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {GOLD_RESULT_COLUMNS} FROM gold_results WHERE question_id = ? AND checksum = ?",
+                (int(question_id), checksum),
+            ).fetchone()
+        if row is None:
+            return None
+
+        result = GoldResult(*row)
+        result.timed_out = bool(result.timed_out)
+        if result.sql_hash != sql_hash(gold_sql):
+            return None
+        return result
+
+    def put(self, result: GoldResult) -> None:
+        """
+        Store the result of a gold query, replacing an earlier one.
+
+        Args:
+            result (GoldResult): The result.
+        """
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO gold_results ({GOLD_RESULT_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    int(result.question_id),
+                    result.checksum,
+                    result.database,
+                    result.sql_hash,
+                    result.row_count,
+                    result.set_hash,
+                    result.multiset_hash,
+                    result.ordered_hash,
+                    result.error,
+                    int(result.timed_out),
+                    result.timeout,
+                    result.elapsed_seconds,
+                ),
+            )
+            self._connection.commit()
+
+    def compute(
+        self, question_id: int, database: str, gold_sql: str, timeout: Optional[float]
+    ) -> GoldResult:
+        """
+        Execute a gold query, fingerprinting its rows in order, and store its result unless
+        it failed transiently.
+
+        Args:
+            question_id (int): The question the gold query answers.
+            database (str): The name of the database.
+            gold_sql (str): The gold query.
+            timeout (Optional[float]): Deadline of the query in seconds, None for no limit.
+
+        Returns:
+            GoldResult: The stored result.
+        """
+        checksum = self.checksum(database)
+        budget = QueryBudget(timeout=timeout, max_rows=None, max_memory_mb=None)
+        outcome = run_query(Path(self._database_path(database)), gold_sql, budget, ordered=True)
+        result = GoldResult(
+            question_id=int(question_id),
+            checksum=checksum,
+            database=database,
+            sql_hash=sql_hash(gold_sql),
+            row_count=outcome.row_count,
+            set_hash=outcome.set_hash,
+            multiset_hash=outcome.result_hash,
+            ordered_hash=outcome.ordered_hash,
+            error=outcome.error,
+            timed_out=outcome.timed_out,
+            timeout=timeout,
+            elapsed_seconds=outcome.elapsed_seconds,
+        )
+        if not outcome.transient:
+            self.put(result)
+        return result
+
+    def outcome(
+        self,
+        question_id: int,
+        database: str,
+        gold_sql: str,
+        timeout: Optional[float] = GOLD_RESULT_TIMEOUT_SECONDS,
+    ) -> ExecutionOutcome:
+        """
+        Return the outcome of a gold query, executing and storing it only if it is not stored.
+
+        A stored result that timed out is only reused if `timeout` is not longer than the
+        deadline it ran with.
+
+        Args:
+            question_id (int): The question the gold query answers.
+            database (str): The name of the database.
+            gold_sql (str): The gold query.
+            timeout (Optional[float]): Deadline of the query if it has to run.
+
+        Returns:
+            ExecutionOutcome: The outcome of the gold query.
+        """
+        result = self.get(question_id, database, gold_sql)
+        if result is None or (
+            result.timed_out
+            and not QueryBudget(timeout=timeout).within(QueryBudget(timeout=result.timeout))
+        ):
+            result = self.compute(question_id, database, gold_sql, timeout)
+        return result.to_outcome()
+
+    def __len__(self) -> int:
+        """Return the number of stored results."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM gold_results").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the SQLite file."""
+        with self._lock:
+            self._connection.close()
+
+
+_gold_result_store: Optional[GoldResultStore] = None
+_gold_result_store_pid: Optional[int] = None
+_gold_result_store_lock = threading.Lock()
+
+
+def get_gold_result_store() -> GoldResultStore:
+    """
+    Return the process-wide gold result store of the dataset, opening it on first use.
+
+    The store is kept at `PATH_CONFIG.gold_results_path()`. Forked worker processes open
+    their own connection.
+
+    Returns:
+        GoldResultStore: The shared gold result store.
+    """
+    global _gold_result_store, _gold_result_store_pid
+
+    with _gold_result_store_lock:
+        if _gold_result_store is None or _gold_result_store_pid != os.getpid():
+            store_path = PATH_CONFIG.gold_results_path()
+            _gold_result_store = GoldResultStore(store_path)
+            _gold_result_store_pid = os.getpid()
+            logger.info(INFO_GOLD_RESULT_STORE_OPENED.format(store_path=store_path))
+        return _gold_result_store
@@ -156,19 +156,19 @@ class PathConfig:
 
         return None
 
-    def lsh_path(self, database_name: Optional[str] = None) -> Path:
+    def value_index_dir(self, database_name: Optional[str] = None) -> Path:
         database_name = database_name if database_name is not None else self.database_name
 
         if self.dataset_type in (DatasetType.BIRD_TRAIN, DatasetType.BIRD_DEV, DatasetType.BIRD_TEST):
-            return self.database_preprocessed_dir(database_name=database_name) / f"{database_name}_lsh.pkl"
-        
+            return self.database_preprocessed_dir(database_name=database_name) / f"{database_name}_value_index"
+
         return None
 
-    def minhashes_path(self, database_name: Optional[str] = None) -> Path:
+    def fts_value_index_path(self, database_name: Optional[str] = None) -> Path:
         database_name = database_name if database_name is not None else self.database_name
 
         if self.dataset_type in (DatasetType.BIRD_TRAIN, DatasetType.BIRD_DEV, DatasetType.BIRD_TEST):
-            return self.database_preprocessed_dir(database_name=database_name) / f"{database_name}_minhashes.pkl"
+            return self.database_preprocessed_dir(database_name=database_name) / f"{database_name}_values_fts.sqlite"
 
         return None
 
@@ -199,6 +199,24 @@ class PathConfig:
 
         return None
     
+    def embedding_cache_path(self) -> Path:
+        return self.repo_root / "embedding_cache" / "embeddings.sqlite"
+
+    def execution_cache_path(self, dataset_type: Optional[DatasetType] = None) -> Path:
+        dataset_type = dataset_type if dataset_type is not None else self.dataset_type
+        return self.repo_root / "execution_cache" / f"{dataset_type.value}.sqlite"
+
+    def gold_results_path(self, dataset_type: Optional[DatasetType] = None) -> Path:
+        dataset_type = dataset_type if dataset_type is not None else self.dataset_type
+        return self.repo_root / "gold_results" / f"{dataset_type.value}.sqlite"
+
+    def prediction_log_path(self, dataset_type: Optional[DatasetType] = None) -> Path:
+        dataset_type = dataset_type if dataset_type is not None else self.dataset_type
+        return self.base_dir(dataset_type=dataset_type) / "prediction_log.jsonl"
+
+    def vector_index_dir(self, collection_name: str) -> Path:
+        return self.repo_root / "vector_indexes" / collection_name
+
     def bird_results_dir(self) -> Path:
         return self.repo_root / "bird_results"
 
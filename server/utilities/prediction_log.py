@@ -0,0 +1,119 @@
+"""
+Append-only log of the predictions of a dataset run.
+
+`process_dataset_sequentially` rewrites the formatted predictions file of a database after
+every question, which makes it unsuitable for following a run. Each prediction is also
+appended to the prediction log as one JSON line, with its gold query and difficulty, so
+that the streaming evaluation can tail the log and score predictions as they are produced.
+Like the formatted predictions, the log is kept across resumed runs and a question logged
+again replaces its earlier prediction.
+"""
+
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from utilities.config import PATH_CONFIG
+from utilities.constants.utilities.prediction_log.response_messages import (
+    INFO_PREDICTION_LOG_TRUNCATED, WARNING_MALFORMED_PREDICTION_LOG_LINE)
+from utilities.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_append_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class LoggedPrediction:
+    """
+    A prediction of the prediction log.
+
+    Attributes:
+        question_id (int): The question the prediction answers.
+        database (str): The name of the database.
+        predicted_sql (str): The predicted query.
+        gold_sql (str): The gold query.
+        difficulty (Optional[str]): BIRD difficulty of the question, if known.
+    """
+
+    question_id: int
+    database: str
+    predicted_sql: str
+    gold_sql: str
+    difficulty: Optional[str] = None
+
+
+def append_prediction(prediction: LoggedPrediction, log_path: Optional[Path] = None) -> None:
+    """
+    Append a prediction to the prediction log as one JSON line.
+
+    Args:
+        prediction (LoggedPrediction): The prediction.
+        log_path (Optional[Path]): The log, `PATH_CONFIG.prediction_log_path()` if None.
+    """
+    log_path = Path(log_path or PATH_CONFIG.prediction_log_path())
+    line = json.dumps(asdict(prediction)) + "\n"
+    with _append_lock:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as file:
+            file.write(line)
+            file.flush()
+
+
+class PredictionLogTail:
+    """
+    Reads the predictions appended to a prediction log since the last read.
+
+    Attributes:
+        log_path (Path): The prediction log.
+        offset (int): Position in bytes after the last complete line read.
+    """
+
+    def __init__(self, log_path: Path, offset: int = 0):
+        """
+        Initialize the reader.
+
+        Args:
+            log_path (Path): The prediction log, which does not need to exist yet.
+            offset (int): Position to start reading from.
+        """
+        self.log_path = Path(log_path)
+        self.offset = offset
+
+    def read_new(self) -> List[LoggedPrediction]:
+        """
+        Return the predictions of the complete lines appended since the last read.
+
+        A line still being written is left for the next read. If the log became shorter
+        than the position already read, it was replaced and is read from the start again.
+
+        Returns:
+            List[LoggedPrediction]: The new predictions, in log order.
+        """
+        try:
+            size = self.log_path.stat().st_size
+        except OSError:
+            return []
+        if size < self.offset:
+            logger.info(INFO_PREDICTION_LOG_TRUNCATED.format(log_path=self.log_path))
+            self.offset = 0
+
+        with open(self.log_path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read()
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+
+        predictions = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                predictions.append(LoggedPrediction(**json.loads(line)))
+            except (ValueError, TypeError) as e:
+                logger.warning(
+                    WARNING_MALFORMED_PREDICTION_LOG_LINE.format(log_path=self.log_path, error=str(e))
+                )
+        return predictions
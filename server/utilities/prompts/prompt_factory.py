@@ -18,14 +18,14 @@ class PromptFactory:
         elif prompt_type == PromptType.ALPACA_SFT:
             return AlpacaSFTPrompt(target_question=target_question, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
         elif prompt_type == PromptType.FULL_INFORMATION:
-            return FullInformationOrganizationPrompt(shots=shots, target_question=target_question, schema_format=schema_format, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
+            return FullInformationOrganizationPrompt(examples=examples, shots=shots, target_question=target_question, schema_format=schema_format, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
         elif prompt_type == PromptType.SQL_ONLY:
-            return SQLOnlyOrganizationPrompt(shots=shots, target_question=target_question, evidence=evidence, database_name=database_name).get_prompt()
+            return SQLOnlyOrganizationPrompt(examples=examples, shots=shots, target_question=target_question, evidence=evidence, database_name=database_name).get_prompt()
         elif prompt_type == PromptType.DAIL_SQL:
-            return DailSQLOrganizationPrompt(shots=shots, target_question=target_question, evidence=evidence, database_name=database_name).get_prompt()
+            return DailSQLOrganizationPrompt(examples=examples, shots=shots, target_question=target_question, evidence=evidence, database_name=database_name).get_prompt()
         elif prompt_type == PromptType.SEMANTIC_FULL_INFORMATION:
-            return SemanticAndFullInformationOrganizationPrompt(shots=shots, target_question=target_question, schema_format=schema_format, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
+            return SemanticAndFullInformationOrganizationPrompt(examples=examples, shots=shots, target_question=target_question, schema_format=schema_format, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
         elif prompt_type == PromptType.ICL_XIYAN:
-            return ICLXiyanPrompt(shots=shots, target_question=target_question, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
+            return ICLXiyanPrompt(examples=examples, shots=shots, target_question=target_question, schema=schema, evidence=evidence, database_name=database_name).get_prompt()
         else:
             raise ValueError(ERROR_PROMPT_TYPE_NOT_FOUND.format(prompt_type=prompt_type))
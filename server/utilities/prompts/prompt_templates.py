@@ -16,6 +16,17 @@ Here is a column from table {table_name}:
 Please provide a short one-line business description for the column. Only return the description without any other text.
 """
 
+COLUMN_DESCRIPTIONS_BATCH_PROMPT_TEMPLATE = """
+Here are columns from table {table_name}:
+    Table description: {table_description}
+    Table Value Examples: {table_first_row_values}
+    Columns:
+{columns}
+Please provide a short one-line business description for each column. Only return a JSON object mapping every column name, exactly as given, to its description, without any other text.
+"""
+
+COLUMN_DESCRIPTIONS_BATCH_COLUMN_TEMPLATE = "        - Name: {column_name}; Type: {datatype}{column_comment_part}\n"
+
 EXTRACT_KEYWORD_PROMPT_TEMPLATE = """
 Objective: Analyze the given question and hint to identify and extract keywords, keyphrases, and named entities. These elements are crucial for understanding the core components of the inquiry and the guidance provided. This process involves recognizing and isolating significant terms and phrases that could be instrumental in formulating searches or queries related to the posed question.
 
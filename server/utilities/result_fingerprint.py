@@ -0,0 +1,286 @@
+"""
+Streaming summaries of query results.
+
+Comparing or grouping query results does not need the rows themselves. This module
+summarizes a result in one pass over its batches: `ResultFingerprint` builds
+order-insensitive hashes of the multiset and of the set of rows incrementally, and
+`ReservoirSample` keeps a uniform random sample of rows for previews. The multiset hash is
+the sum of 128-bit row digests, so it only needs a counter however many rows are fetched.
+Rows fetched in order also feed an order-sensitive hash for comparisons where the order of
+the rows matters.
+
+The same summary can be computed inside SQLite: `register_result_functions` adds the
+`result_summary` aggregate to a connection, which is fed the distinct rows of a result
+with their multiplicities and returns a pickled `ResultSummary` whose hashes equal those
+computed from the fetched rows.
+"""
+
+import hashlib
+import math
+import pickle
+import random
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional, Set
+
+# Constants
+DIGEST_BYTES = 16
+DIGEST_MODULUS = 1 << (8 * DIGEST_BYTES)
+RESULT_SUMMARY_FUNCTION = "result_summary"
+
+
+def canonical_value(value: Any) -> Any:
+    """Map integral floats to ints, mirroring `1 == 1.0` in set comparisons."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def row_digest(row: Iterable[Any]) -> int:
+    """
+    Hash a row to a 128-bit integer.
+
+    Rows that compare equal in Python, e.g. `(1,)` and `(1.0,)`, have the same digest.
+
+    Args:
+        row (Iterable[Any]): The values of the row.
+
+    Returns:
+        int: The digest of the row.
+    """
+    canonical_row = repr(tuple(canonical_value(value) for value in row))
+    return int.from_bytes(
+        hashlib.blake2b(canonical_row.encode("utf-8"), digest_size=DIGEST_BYTES).digest(),
+        "big",
+    )
+
+
+def combine_digests(total: int, count: int) -> str:
+    """
+    Render a sum of row digests and the number of summed rows as a hash.
+
+    Args:
+        total (int): Sum of the row digests modulo 2^128.
+        count (int): Number of summed digests.
+
+    Returns:
+        str: The hex digest.
+    """
+    return f"{total:032x}{count:x}"
+
+
+class ResultFingerprint:
+    """
+    Incremental, order-insensitive fingerprint of a query result.
+
+    The multiset hash is equal for two results exactly when they hold the same rows the
+    same number of times, in any order, and uses constant memory. The set hash ignores
+    duplicates: rows added through `update` have to remember the digest of every distinct
+    row, rows added through `add_group` are already known to be distinct and do not. The
+    ordered hash chains the digests of the rows added through `update` in their order and
+    is not available once a group was added.
+
+    Attributes:
+        row_count (int): Number of rows seen.
+        distinct_count (int): Number of distinct rows seen.
+    """
+
+    def __init__(self):
+        """Create an empty fingerprint."""
+        self.row_count = 0
+        self.distinct_count = 0
+        self._multiset_total = 0
+        self._set_total = 0
+        self._digests: Set[int] = set()
+        self._ordered = hashlib.blake2b(digest_size=DIGEST_BYTES)
+
+    def update(self, rows: Iterable[Iterable[Any]]) -> None:
+        """
+        Add a batch of rows to the fingerprint.
+
+        Args:
+            rows (Iterable[Iterable[Any]]): The rows.
+        """
+        for row in rows:
+            digest = row_digest(row)
+            if self._ordered is not None:
+                self._ordered.update(digest.to_bytes(DIGEST_BYTES, "big"))
+            self._multiset_total += digest
+            self.row_count += 1
+            if digest not in self._digests:
+                self._digests.add(digest)
+                self._set_total += digest
+                self.distinct_count += 1
+        self._multiset_total %= DIGEST_MODULUS
+        self._set_total %= DIGEST_MODULUS
+
+    def add_group(self, row: Iterable[Any], multiplicity: int) -> None:
+        """
+        Add a row that occurs `multiplicity` times and was not added before.
+
+        Args:
+            row (Iterable[Any]): The values of the row.
+            multiplicity (int): Number of occurrences of the row.
+        """
+        digest = row_digest(row)
+        self._multiset_total = (self._multiset_total + digest * multiplicity) % DIGEST_MODULUS
+        self._set_total = (self._set_total + digest) % DIGEST_MODULUS
+        self.row_count += multiplicity
+        self.distinct_count += 1
+        self._ordered = None
+
+    def multiset_hash(self) -> str:
+        """Return the hash of the rows seen, counting duplicates and ignoring their order."""
+        return combine_digests(self._multiset_total, self.row_count)
+
+    def set_hash(self) -> str:
+        """Return the hash of the distinct rows seen, ignoring their order."""
+        return combine_digests(self._set_total, self.distinct_count)
+
+    def ordered_hash(self) -> Optional[str]:
+        """Return the hash of the rows seen in their order, None once a group was added."""
+        if self._ordered is None:
+            return None
+        return f"{self._ordered.hexdigest()}{self.row_count:x}"
+
+
+class ReservoirSample:
+    """
+    Uniform random sample of a stream of rows of unknown length.
+
+    Once the sample is full, the position of the next row that enters it is drawn directly
+    (Algorithm L) instead of drawing for every row, so a row offered many times at once
+    costs as many steps as the times it enters the sample, not as the times it is offered.
+
+    Attributes:
+        size (int): Maximum number of sampled rows.
+        seen (int): Number of rows offered so far.
+        rows (List[Any]): The sampled rows, in the order they were sampled.
+    """
+
+    def __init__(self, size: int, rng: Optional[random.Random] = None):
+        """
+        Create an empty sample.
+
+        Args:
+            size (int): Maximum number of sampled rows.
+            rng (Optional[random.Random]): Source of randomness, the `random` module if None.
+        """
+        self.size = size
+        self.seen = 0
+        self.rows: List[Any] = []
+        self._rng = rng or random
+        # Position of the next offered row that enters the full sample, and the Algorithm L
+        # weight it was drawn with
+        self._next = 0
+        self._weight = 1.0
+
+    def update(self, rows: Iterable[Any]) -> None:
+        """
+        Offer a batch of rows to the sample.
+
+        Args:
+            rows (Iterable[Any]): The rows.
+        """
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: Any, count: int = 1) -> None:
+        """
+        Offer a row `count` times in a row.
+
+        Args:
+            row (Any): The row.
+            count (int): Number of times the row is offered.
+        """
+        if self.size <= 0:
+            self.seen += count
+            return
+
+        while count > 0 and len(self.rows) < self.size:
+            self.rows.append(row)
+            self.seen += 1
+            count -= 1
+            if len(self.rows) == self.size:
+                self._next = self.seen
+                self._draw_next()
+
+        self.seen += count
+        while self._next <= self.seen and len(self.rows) == self.size:
+            self.rows[self._rng.randrange(self.size)] = row
+            self._draw_next()
+
+    def _uniform(self) -> float:
+        """Return a random number in (0, 1)."""
+        value = self._rng.random()
+        while value == 0.0:
+            value = self._rng.random()
+        return value
+
+    def _draw_next(self) -> None:
+        """Draw the position of the next row that enters the full sample."""
+        self._weight *= math.exp(math.log(self._uniform()) / self.size)
+        gap = 0.0
+        if self._weight < 1.0:
+            gap = math.log(self._uniform()) / math.log1p(-self._weight)
+        self._next += math.floor(gap) + 1
+
+
+@dataclass
+class ResultSummary:
+    """
+    Fingerprint and preview of a query result computed inside SQLite.
+
+    Attributes:
+        row_count (int): Number of rows of the result.
+        multiset_hash (str): Order-insensitive hash of the rows counting duplicates.
+        set_hash (str): Order-insensitive hash of the distinct rows.
+        preview (List[tuple]): Uniformly sampled rows.
+    """
+
+    row_count: int = 0
+    multiset_hash: str = combine_digests(0, 0)
+    set_hash: str = combine_digests(0, 0)
+    preview: List[tuple] = field(default_factory=list)
+
+
+class ResultSummaryAggregate:
+    """
+    SQLite aggregate summarizing the distinct rows of a result.
+
+    Called as `result_summary(sample_size, multiplicity, value_1, ..., value_n)` once per
+    distinct row and returns the pickled `ResultSummary` of the whole result.
+    """
+
+    def __init__(self):
+        """Create an empty aggregate."""
+        self.fingerprint = ResultFingerprint()
+        self.sample: Optional[ReservoirSample] = None
+
+    def step(self, sample_size: int, multiplicity: int, *values: Any) -> None:
+        """Add a distinct row and its number of occurrences."""
+        if self.sample is None:
+            self.sample = ReservoirSample(sample_size)
+        self.fingerprint.add_group(values, multiplicity)
+        self.sample.add(values, multiplicity)
+
+    def finalize(self) -> bytes:
+        """Return the pickled summary of the rows added."""
+        return pickle.dumps(
+            ResultSummary(
+                row_count=self.fingerprint.row_count,
+                multiset_hash=self.fingerprint.multiset_hash(),
+                set_hash=self.fingerprint.set_hash(),
+                preview=self.sample.rows if self.sample is not None else [],
+            )
+        )
+
+
+def register_result_functions(connection: sqlite3.Connection) -> None:
+    """
+    Register the result summary aggregate on a connection.
+
+    Args:
+        connection (sqlite3.Connection): The connection.
+    """
+    connection.create_aggregate(RESULT_SUMMARY_FUNCTION, -1, ResultSummaryAggregate)
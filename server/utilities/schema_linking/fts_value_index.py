@@ -0,0 +1,289 @@
+"""
+SQLite FTS5 trigram index over the distinct text values of a database.
+
+An alternative to the MinHash LSH value index: the values selected for a database are
+written to a side database holding an FTS5 table with the `trigram` tokenizer. A keyword
+is looked up with an OR of its trigrams, the best `bm25` matches form a candidate pool, and
+the pool is re-ranked by the exact Jaccard similarity of the character trigram sets, the
+quantity the MinHash signatures estimate. Like the tokenizer, the re-ranking ignores case.
+
+The index exposes the same `batch_query` / `query` / `table_column` interface as
+`ValueIndex`, so both engines plug into `get_table_column_of_similar_values` unchanged.
+Like the LSH, it stores the column fingerprints of the database it was built from, so that
+it can be rebuilt when the database contents change.
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from utilities.connections.sqlite import make_read_only_sqlite_connection
+from utilities.constants.utilities.schema_linking.fts_value_index.response_messages import \
+    ERROR_FTS_VALUE_INDEX_NOT_FOUND
+
+# Constants
+TRIGRAM_SIZE = 3
+
+# Number of bm25 matches per requested result that are re-ranked by trigram Jaccard
+RERANK_POOL_FACTOR = 10
+
+INSERT_BATCH_SIZE = 10000
+
+FINGERPRINTS_KEY = "fingerprints"
+
+
+def trigrams(value: str) -> Set[str]:
+    """Return the distinct, lower cased character trigrams of a value."""
+    value = value.lower()
+    return {
+        value[i : i + TRIGRAM_SIZE] for i in range(len(value) - TRIGRAM_SIZE + 1)
+    }
+
+
+def _match_expression(keyword_trigrams: Set[str]) -> str:
+    """Build an FTS5 query matching any of the trigrams, each quoted as a phrase."""
+    return " OR ".join(
+        '"' + trigram.replace('"', '""') + '"' for trigram in sorted(keyword_trigrams)
+    )
+
+
+def build_fts_value_index(
+    unique_values: Dict[str, Dict[str, List[str]]],
+    index_path: Path,
+    fingerprints: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+) -> None:
+    """
+    Build the FTS5 trigram value index of a database and write it atomically to `index_path`.
+
+    Args:
+        unique_values (Dict[str, Dict[str, List[str]]]): Distinct values per table and column.
+        index_path (Path): SQLite file the index is written to. Replaced if it exists.
+        fingerprints (Optional[Dict[str, Dict[str, Dict[str, Any]]]]): Fingerprint of every
+            candidate column, stored with the index so that it can be refreshed.
+    """
+    index_path = Path(index_path)
+    temp_path = index_path.with_name(f"{index_path.name}.tmp")
+    if temp_path.exists():
+        temp_path.unlink()
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(
+            """
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE value_columns (
+                first_row INTEGER PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                column_name TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE value_index USING fts5(value, tokenize = 'trigram');
+            CREATE TABLE value_index_metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        if fingerprints is not None:
+            connection.execute(
+                "INSERT INTO value_index_metadata VALUES (?, ?)",
+                (FINGERPRINTS_KEY, json.dumps(fingerprints)),
+            )
+        # The values of a column occupy a contiguous rowid range starting at first_row
+        first_row = 1
+        for table_name, table_values in unique_values.items():
+            for column_name, column_values in table_values.items():
+                if not column_values:
+                    continue
+                connection.execute(
+                    "INSERT INTO value_columns VALUES (?, ?, ?)",
+                    (first_row, table_name, column_name),
+                )
+                for start in range(0, len(column_values), INSERT_BATCH_SIZE):
+                    batch = column_values[start : start + INSERT_BATCH_SIZE]
+                    connection.executemany(
+                        "INSERT INTO value_index (rowid, value) VALUES (?, ?)",
+                        zip(range(first_row + start, first_row + start + len(batch)), batch),
+                    )
+                first_row += len(column_values)
+        connection.execute("INSERT INTO value_index (value_index) VALUES ('optimize')")
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(temp_path, index_path)
+
+
+def save_fts_fingerprints(
+    index_path: Path, fingerprints: Dict[str, Dict[str, Dict[str, Any]]]
+) -> None:
+    """
+    Replace the column fingerprints of an FTS value index whose values did not change.
+
+    Readers open the index read-only with locking, so the update is atomic to them.
+
+    Args:
+        index_path (Path): SQLite file holding the index.
+        fingerprints (Dict[str, Dict[str, Dict[str, Any]]]): Fingerprints to store.
+    """
+    connection = sqlite3.connect(index_path)
+    try:
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO value_index_metadata VALUES (?, ?)",
+                (FINGERPRINTS_KEY, json.dumps(fingerprints)),
+            )
+    finally:
+        connection.close()
+
+
+class FtsValueIndex:
+    """
+    Read-only view of an FTS5 trigram value index built by `build_fts_value_index`.
+
+    Attributes:
+        index_path (Path): SQLite file holding the index.
+        columns (List[Tuple[str, str]]): (table, column) pairs, in rowid order.
+    """
+
+    def __init__(self, index_path: Path):
+        """
+        Open the index stored in `index_path`.
+
+        Args:
+            index_path (Path): SQLite file holding the index.
+
+        Raises:
+            FileNotFoundError: If no index is stored at the path.
+        """
+        self.index_path = Path(index_path)
+        if not self.exists(self.index_path):
+            raise FileNotFoundError(
+                ERROR_FTS_VALUE_INDEX_NOT_FOUND.format(index_path=self.index_path)
+            )
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        column_rows = self._connect().execute(
+            "SELECT first_row, table_name, column_name FROM value_columns ORDER BY first_row"
+        ).fetchall()
+        self._first_rows = [first_row for first_row, _, _ in column_rows]
+        self.columns = [(table_name, column_name) for _, table_name, column_name in column_rows]
+
+    @staticmethod
+    def exists(index_path: Path) -> bool:
+        """
+        Check whether an FTS value index has been written to the given path.
+
+        Args:
+            index_path (Path): Path to check.
+
+        Returns:
+            bool: True if the index file exists.
+        """
+        return Path(index_path).is_file()
+
+    @property
+    def fingerprints(self) -> Optional[Dict[str, Dict[str, Dict[str, Any]]]]:
+        """Return the column fingerprints stored with the index, None if it was built without them."""
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT value FROM value_index_metadata WHERE key = ?", (FINGERPRINTS_KEY,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                # Indexes built before fingerprints were stored have no metadata table
+                return None
+        return json.loads(row[0]) if row else None
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the index file."""
+        return self.index_path.stat().st_size
+
+    def __len__(self) -> int:
+        """Return the number of indexed values."""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM value_index").fetchone()[0]
+
+    def table_column(self, row: int) -> Tuple[str, str]:
+        """Return the (table, column) pair the value in the given row belongs to."""
+        return self.columns[bisect.bisect_right(self._first_rows, row) - 1]
+
+    def value(self, row: int) -> str:
+        """Return the value stored in the given row."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT value FROM value_index WHERE rowid = ?", (row,)
+            ).fetchone()[0]
+
+    def query(self, keyword: str, top_n: int) -> List[Tuple[int, float]]:
+        """
+        Return the values sharing trigrams with a keyword, ranked by trigram Jaccard similarity.
+
+        Args:
+            keyword (str): The keyword to look up.
+            top_n (int): Maximum number of results.
+
+        Returns:
+            List[Tuple[int, float]]: (row, similarity) pairs, most similar first.
+        """
+        keyword_trigrams = trigrams(keyword)
+        if not keyword_trigrams or top_n <= 0:
+            return []
+
+        with self._lock:
+            matches = self._connect().execute(
+                """
+                SELECT rowid, value FROM value_index
+                WHERE value_index MATCH ? ORDER BY rank LIMIT ?
+                """,
+                (_match_expression(keyword_trigrams), top_n * RERANK_POOL_FACTOR),
+            ).fetchall()
+
+        scored = []
+        for row, value in matches:
+            value_trigrams = trigrams(value)
+            similarity = len(keyword_trigrams & value_trigrams) / len(
+                keyword_trigrams | value_trigrams
+            )
+            scored.append((row, similarity))
+
+        scored.sort(key=lambda result: (-result[1], result[0]))
+        return scored[:top_n]
+
+    def batch_query(
+        self, keywords: Sequence[str], top_n: int
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Return the ranked matches of every keyword.
+
+        Args:
+            keywords (Sequence[str]): The keywords to look up.
+            top_n (int): Maximum number of results per keyword.
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, similarity) pairs of every keyword, most
+            similar first.
+        """
+        return [self.query(keyword, top_n) for keyword in keywords]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection to the index, reopening it if the index was closed."""
+        if self._connection is None:
+            self._connection = make_read_only_sqlite_connection(self.index_path)
+        return self._connection
+
+    def close(self) -> None:
+        """
+        Close the connection to the index once the running lookup finishes.
+
+        A lookup made after closing, e.g. by a thread that obtained the index before it was
+        evicted from the registry, reopens the connection.
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,165 @@
+"""
+Batched MinHash signature generation for the value retrieval LSH.
+
+`datasketch.MinHash.update` hashes one shingle at a time and applies every permutation in
+a separate NumPy call per shingle. Here the n-gram shingles of many values are hashed in
+a single pass and the permutations are applied to whole batches of shingle hashes at once,
+reducing each value's rows with `np.minimum.reduceat`. Large inputs are split across a
+process pool so the SHA1 shingle hashing is not serialised by the GIL.
+
+The signatures are identical to those of `datasketch.MinHash` with the same seed, so they
+can be inserted into and queried against a `MinHashLSH` built the usual way.
+"""
+
+import hashlib
+import multiprocessing
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from datasketch import MinHash
+
+# Constants
+DEFAULT_SEED = 1
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+SHINGLE_BATCH_SIZE = 65536
+PROCESS_CHUNK_SIZE = 20000
+
+_permutations: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def get_permutations(num_perm: int, seed: int = DEFAULT_SEED) -> np.ndarray:
+    """
+    Return the (a, b) permutation parameters datasketch uses for the given size and seed.
+
+    Args:
+        num_perm (int): Number of permutations in a signature.
+        seed (int): Seed of the permutations.
+
+    Returns:
+        np.ndarray: uint64 array of shape (2, num_perm).
+    """
+    key = (num_perm, seed)
+    if key not in _permutations:
+        _permutations[key] = MinHash(num_perm=num_perm, seed=seed).permutations
+    return _permutations[key]
+
+
+def shingle_hashes(value: str, n_gram: int) -> List[int]:
+    """
+    Hash the distinct n-gram shingles of a value the way `datasketch.sha1_hash32` does.
+
+    Args:
+        value (str): The value to shingle.
+        n_gram (int): Shingle length in characters.
+
+    Returns:
+        List[int]: One 32-bit hash per distinct shingle, empty if the value is too short.
+    """
+    shingles = {value[i : i + n_gram] for i in range(len(value) - n_gram + 1)}
+    return [
+        struct.unpack("<I", hashlib.sha1(shingle.encode("utf8")).digest()[:4])[0]
+        for shingle in shingles
+    ]
+
+
+def _apply_permutations(
+    signatures: np.ndarray,
+    hashes: List[int],
+    owners: List[int],
+    permutations: np.ndarray,
+) -> None:
+    """Fold a batch of shingle hashes, grouped by ascending owner row, into the signatures."""
+    if not hashes:
+        return
+
+    a, b = permutations
+    hash_values = np.asarray(hashes, dtype=np.uint64)[:, np.newaxis]
+    permuted = np.bitwise_and((hash_values * a + b) % MERSENNE_PRIME, MAX_HASH)
+
+    owners = np.asarray(owners, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    rows = owners[starts]
+    signatures[rows] = np.minimum(
+        signatures[rows], np.minimum.reduceat(permuted, starts, axis=0)
+    )
+
+
+def compute_signatures(
+    values: Sequence[str],
+    num_perm: int,
+    n_gram: int,
+    seed: int = DEFAULT_SEED,
+) -> np.ndarray:
+    """
+    Compute the MinHash signature of every value in a single process.
+
+    Args:
+        values (Sequence[str]): Values to sign.
+        num_perm (int): Number of permutations in a signature.
+        n_gram (int): Shingle length in characters.
+        seed (int): Seed of the permutations.
+
+    Returns:
+        np.ndarray: uint64 matrix of shape (len(values), num_perm). Values without any
+        shingle keep the empty signature, as with `datasketch.MinHash`.
+    """
+    permutations = get_permutations(num_perm, seed)
+    signatures = np.full((len(values), num_perm), MAX_HASH, dtype=np.uint64)
+
+    hashes: List[int] = []
+    owners: List[int] = []
+    for row, value in enumerate(values):
+        value_hashes = shingle_hashes(value, n_gram)
+        hashes.extend(value_hashes)
+        owners.extend([row] * len(value_hashes))
+
+        if len(hashes) >= SHINGLE_BATCH_SIZE:
+            _apply_permutations(signatures, hashes, owners, permutations)
+            hashes, owners = [], []
+
+    _apply_permutations(signatures, hashes, owners, permutations)
+    return signatures
+
+
+def compute_signatures_parallel(
+    values: Sequence[str],
+    num_perm: int,
+    n_gram: int,
+    max_workers: int,
+    seed: int = DEFAULT_SEED,
+    chunk_size: int = PROCESS_CHUNK_SIZE,
+) -> np.ndarray:
+    """
+    Compute the MinHash signature of every value, spreading chunks across processes.
+
+    Inputs smaller than two chunks, or a single worker, are signed in the calling process.
+    Workers are spawned rather than forked since callers build several databases from threads.
+
+    Args:
+        values (Sequence[str]): Values to sign.
+        num_perm (int): Number of permutations in a signature.
+        n_gram (int): Shingle length in characters.
+        max_workers (int): Maximum number of worker processes.
+        seed (int): Seed of the permutations.
+        chunk_size (int): Number of values per worker task.
+
+    Returns:
+        np.ndarray: uint64 matrix of shape (len(values), num_perm), in input order.
+    """
+    if max_workers <= 1 or len(values) < 2 * chunk_size:
+        return compute_signatures(values, num_perm, n_gram, seed)
+
+    chunks = [
+        list(values[start : start + chunk_size])
+        for start in range(0, len(values), chunk_size)
+    ]
+    sign_chunk = partial(compute_signatures, num_perm=num_perm, n_gram=n_gram, seed=seed)
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        return np.vstack(list(executor.map(sign_chunk, chunks)))
@@ -1,18 +1,16 @@
 import json
 import re
-from typing import Dict, Tuple
-
-from datasketch import MinHash, MinHashLSH
 from services.clients.base_client import Client
 from utilities.constants.preprocess.add_runtime_pruned_schema.indexing_constants import (
-    KEYWORD_EXTRACTION_CLIENT_KEY, LSH_KEY, MINHASH_KEY,
-    TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY, TOP_K_VALUE_MATCHES_KEY)
+    KEYWORD_EXTRACTION_CLIENT_KEY, TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY,
+    TOP_K_VALUE_MATCHES_KEY, VALUE_INDEX_KEY)
 from utilities.constants.prompts_enums import FormatType
 from utilities.format_schema import format_schema
 from utilities.logging_utils import setup_logger
 from utilities.prompts.prompt_templates import SCHEMA_SELECTOR_PROMPT_TEMPLATE
 from utilities.schema_linking.extract_keyword import (
     get_keywords_from_question, get_keywords_using_LLM)
+from utilities.schema_linking.value_index_registry import AnyValueIndex
 from utilities.schema_linking.value_retrieval import \
     get_table_column_of_similar_values
 from utilities.vectorize import fetch_similar_columns
@@ -26,8 +24,7 @@ def get_relevant_tables_and_columns(
     top_k_column_description_matches: int,
     top_k_value_matches: int,
     database_name: str,
-    lsh: MinHashLSH,
-    minhash:Dict[str, Tuple[MinHash, str, str, str]],
+    value_index: AnyValueIndex,
     keyword_extraction_client: Client = None,
 ) -> dict:
     """
@@ -62,7 +59,7 @@ def get_relevant_tables_and_columns(
     value_columns = {}
 
     similar_columns = fetch_similar_columns(top_k_column_description_matches, keywords, database_name)
-    value_columns = get_table_column_of_similar_values(keywords, top_k_value_matches, lsh, minhash)
+    value_columns = get_table_column_of_similar_values(keywords, top_k_value_matches, value_index)
 
     for table, columns in similar_columns.items():
         if table not in schema:
@@ -105,8 +102,7 @@ def select_relevant_schema(
             top_k_column_description_matches=pipeline_args[TOP_K_COLUMN_DESCRIPTION_MATCHES_KEY],
             top_k_value_matches=pipeline_args[TOP_K_VALUE_MATCHES_KEY],
             database_name=database_name,
-            lsh=pipeline_args[LSH_KEY],
-            minhash=pipeline_args[MINHASH_KEY],
+            value_index=pipeline_args[VALUE_INDEX_KEY],
             keyword_extraction_client=pipeline_args[KEYWORD_EXTRACTION_CLIENT_KEY],
         )
     else:
@@ -0,0 +1,372 @@
+"""
+Extraction of the distinct text values of a database for the value retrieval LSH.
+
+Each database is opened once through a read-only connection. Every candidate column is
+scanned a single time: its distinct values are streamed and collected while their length
+statistics are accumulated, and the scan stops as soon as the statistics rule the column
+out. Independent tables are spread across a process pool, each worker opening its own
+read-only connection.
+
+Every candidate column also gets a fingerprint: the row count and maximum rowid of its
+table, which are cheap to read, and a content hash of its distinct values. Comparing them
+with the fingerprints stored with a value index tells which columns must be re-indexed.
+"""
+
+import hashlib
+import multiprocessing
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utilities.connections.sqlite import make_read_only_sqlite_connection
+
+# Constants
+SKIPPED_TABLES = {"sqlite_sequence"}
+SKIPPED_COLUMN_KEYWORDS = [
+    "_id",
+    " id",
+    "url",
+    "email",
+    "web",
+    "time",
+    "phone",
+    "date",
+    "address",
+]
+
+# A column is kept when its distinct values satisfy any of these limits
+NAME_COLUMN_MAX_TOTAL_LENGTH = 5000000
+MAX_TOTAL_LENGTH = 2000000
+MAX_AVERAGE_LENGTH = 25
+MIN_DISTINCT_COUNT = 100
+
+FETCH_BATCH_SIZE = 10000
+QUERY_TIMEOUT = 480
+
+
+def _get_table_names(connection: sqlite3.Connection) -> List[str]:
+    """Return the names of the tables of the database."""
+    return [
+        row[0]
+        for row in connection.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    ]
+
+
+def _get_table_infos(
+    connection: sqlite3.Connection, table_names: List[str]
+) -> Dict[str, List[Tuple]]:
+    """Return the `PRAGMA table_info` rows of every table, read once per table."""
+    return {
+        table_name: connection.execute(f"PRAGMA table_info('{table_name}')").fetchall()
+        for table_name in table_names
+    }
+
+
+def get_candidate_columns(
+    table_infos: Dict[str, List[Tuple]],
+) -> Dict[str, List[str]]:
+    """
+    Select the text columns of every table whose values are worth indexing.
+
+    Primary key columns of any table, and columns whose names suggest identifiers, links,
+    dates or contact details, are excluded.
+
+    Args:
+        table_infos (Dict[str, List[Tuple]]): `PRAGMA table_info` rows per table.
+
+    Returns:
+        Dict[str, List[str]]: Candidate column names per table, in table order.
+    """
+    primary_keys: Set[str] = {
+        column[1].lower()
+        for columns in table_infos.values()
+        for column in columns
+        if column[5] > 0
+    }
+
+    candidate_columns: Dict[str, List[str]] = {}
+    for table_name, columns in table_infos.items():
+        if table_name in SKIPPED_TABLES:
+            continue
+
+        candidate_columns[table_name] = [
+            column[1]
+            for column in columns
+            if "TEXT" in column[2]
+            and column[1].lower() not in primary_keys
+            and not any(
+                keyword in column[1].lower() for keyword in SKIPPED_COLUMN_KEYWORDS
+            )
+            and not column[1].endswith("Id")
+        ]
+
+    return candidate_columns
+
+
+def _keeps_column(column_name: str, sum_of_lengths: int, count_distinct: int) -> bool:
+    """Check whether a column with the given distinct value statistics is indexed."""
+    if count_distinct == 0:
+        return False
+
+    average_length = sum_of_lengths / count_distinct
+    return (
+        ("name" in column_name.lower() and sum_of_lengths < NAME_COLUMN_MAX_TOTAL_LENGTH)
+        or (sum_of_lengths < MAX_TOTAL_LENGTH and average_length < MAX_AVERAGE_LENGTH)
+        or count_distinct < MIN_DISTINCT_COUNT
+    )
+
+
+def _scan_column(
+    connection: sqlite3.Connection, table_name: str, column_name: str
+) -> Optional[List[str]]:
+    """
+    Collect the distinct values of a column in a single scan.
+
+    The total length only grows while values are streamed, so once the column has at least
+    MIN_DISTINCT_COUNT values and exceeds its total length limit it can no longer be kept
+    and the scan stops early.
+
+    Returns:
+        Optional[List[str]]: The distinct values, or None if the column is not indexed.
+    """
+    max_total_length = (
+        NAME_COLUMN_MAX_TOTAL_LENGTH
+        if "name" in column_name.lower()
+        else MAX_TOTAL_LENGTH
+    )
+
+    cursor = connection.execute(
+        f"SELECT DISTINCT `{column_name}` FROM `{table_name}` WHERE `{column_name}` IS NOT NULL"
+    )
+    values: List[str] = []
+    sum_of_lengths = 0
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            break
+
+        for (value,) in rows:
+            value = str(value)
+            values.append(value)
+            sum_of_lengths += len(value)
+
+        if len(values) >= MIN_DISTINCT_COUNT and sum_of_lengths >= max_total_length:
+            cursor.close()
+            return None
+
+    if not _keeps_column(column_name, sum_of_lengths, len(values)):
+        return None
+    return values
+
+
+def get_table_unique_values(
+    table: Tuple[str, List[str]],
+    db_path: str,
+    connection: Optional[sqlite3.Connection] = None,
+) -> Dict[str, List[str]]:
+    """
+    Collect the distinct values of the indexed columns of one table.
+
+    Args:
+        table (Tuple[str, List[str]]): Table name and its candidate columns.
+        db_path (str): Path to the SQLite database file.
+        connection (Optional[sqlite3.Connection]): Read-only connection to reuse. A new
+            one is opened, and closed afterwards, when omitted.
+
+    Returns:
+        Dict[str, List[str]]: Distinct values per indexed column.
+    """
+    table_name, columns = table
+    owns_connection = connection is None
+    if owns_connection:
+        connection = make_read_only_sqlite_connection(db_path, timeout=QUERY_TIMEOUT)
+
+    try:
+        table_values: Dict[str, List[str]] = {}
+        for column_name in columns:
+            try:
+                values = _scan_column(connection, table_name, column_name)
+            except sqlite3.Error:
+                values = None
+            if values is not None:
+                table_values[column_name] = values
+        return table_values
+    finally:
+        if owns_connection:
+            connection.close()
+
+
+def get_unique_values(
+    db_path: str, max_workers: int = 1
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Retrieve the distinct text values of a database, excluding primary keys.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        max_workers (int): Maximum number of processes scanning tables in parallel. Tables
+            are scanned in the calling process, over one connection, when this is 1 or the
+            database has a single table.
+
+    Returns:
+        Dict[str, Dict[str, List[str]]]: Distinct values per table and column.
+    """
+    connection = make_read_only_sqlite_connection(db_path, timeout=QUERY_TIMEOUT)
+    try:
+        table_infos = _get_table_infos(connection, _get_table_names(connection))
+        tables = list(get_candidate_columns(table_infos).items())
+
+        if max_workers <= 1 or len(tables) <= 1:
+            return {
+                table[0]: get_table_unique_values(table, db_path, connection)
+                for table in tables
+            }
+    finally:
+        connection.close()
+
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(tables)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        results = executor.map(partial(get_table_unique_values, db_path=db_path), tables)
+        return {table[0]: table_values for table, table_values in zip(tables, results)}
+
+
+def content_hash(values: List[str]) -> str:
+    """
+    Hash a set of distinct values independently of the order they were read in.
+
+    Args:
+        values (List[str]): Distinct values of a column.
+
+    Returns:
+        str: Hex SHA-256 digest of the sorted, length-prefixed values.
+    """
+    digest = hashlib.sha256()
+    for value in sorted(values):
+        encoded = value.encode("utf8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def get_table_stats(connection: sqlite3.Connection, table_name: str) -> Dict[str, Any]:
+    """
+    Read the row count and maximum rowid of a table.
+
+    Args:
+        connection (sqlite3.Connection): Connection to the database.
+        table_name (str): The table to inspect.
+
+    Returns:
+        Dict[str, Any]: The row count and the maximum rowid, None for WITHOUT ROWID tables.
+    """
+    row_count = connection.execute(f"SELECT COUNT(*) FROM `{table_name}`").fetchone()[0]
+    try:
+        max_rowid = connection.execute(f"SELECT MAX(rowid) FROM `{table_name}`").fetchone()[0]
+    except sqlite3.Error:
+        max_rowid = None
+    return {"row_count": row_count, "max_rowid": max_rowid}
+
+
+def get_column_fingerprints(
+    db_path: str, unique_values: Dict[str, Dict[str, List[str]]]
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Fingerprint every candidate column of a database from its extracted unique values.
+
+    Candidate columns that are not indexed get a None content hash, so a later refresh
+    notices when they start, or stop, passing the length limits.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        unique_values (Dict[str, Dict[str, List[str]]]): Distinct values per table and column.
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, Any]]]: Fingerprint per table and column.
+    """
+    connection = make_read_only_sqlite_connection(db_path, timeout=QUERY_TIMEOUT)
+    try:
+        table_infos = _get_table_infos(connection, _get_table_names(connection))
+        fingerprints: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for table_name, columns in get_candidate_columns(table_infos).items():
+            table_stats = get_table_stats(connection, table_name)
+            table_values = unique_values.get(table_name, {})
+            fingerprints[table_name] = {
+                column_name: table_stats
+                | {
+                    "content_hash": content_hash(table_values[column_name])
+                    if column_name in table_values
+                    else None
+                }
+                for column_name in columns
+            }
+        return fingerprints
+    finally:
+        connection.close()
+
+
+def find_changed_columns(
+    db_path: str,
+    fingerprints: Dict[str, Dict[str, Dict[str, Any]]],
+    full: bool = False,
+) -> Tuple[Dict[str, Dict[str, Optional[List[str]]]], Dict[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Compare the candidate columns of a database with their stored fingerprints.
+
+    Columns of tables whose row count and maximum rowid are unchanged are not scanned,
+    unless `full` is set, which also catches in-place updates. Scanned columns are reported
+    as changed only when their content hash differs.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        fingerprints (Dict[str, Dict[str, Dict[str, Any]]]): Fingerprints stored with the
+            value index.
+        full (bool): Scan every candidate column regardless of its table statistics.
+
+    Returns:
+        Tuple: The changed columns, as new distinct values per table and column with None
+        for columns that are no longer indexed, and the fingerprints of all candidate columns.
+    """
+    connection = make_read_only_sqlite_connection(db_path, timeout=QUERY_TIMEOUT)
+    try:
+        table_infos = _get_table_infos(connection, _get_table_names(connection))
+        candidate_columns = get_candidate_columns(table_infos)
+
+        changed: Dict[str, Dict[str, Optional[List[str]]]] = {}
+        new_fingerprints: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for table_name, columns in candidate_columns.items():
+            table_stats = get_table_stats(connection, table_name)
+            stored_table = fingerprints.get(table_name, {})
+            new_fingerprints[table_name] = {}
+
+            for column_name in columns:
+                stored = stored_table.get(column_name)
+                if (
+                    not full
+                    and stored is not None
+                    and all(stored.get(key) == value for key, value in table_stats.items())
+                ):
+                    new_fingerprints[table_name][column_name] = stored
+                    continue
+
+                try:
+                    values = _scan_column(connection, table_name, column_name)
+                except sqlite3.Error:
+                    values = None
+                column_hash = content_hash(values) if values is not None else None
+                new_fingerprints[table_name][column_name] = table_stats | {
+                    "content_hash": column_hash
+                }
+                if (stored or {}).get("content_hash") != column_hash:
+                    changed.setdefault(table_name, {})[column_name] = values
+
+        for table_name, stored_table in fingerprints.items():
+            for column_name in stored_table:
+                if column_name not in candidate_columns.get(table_name, []):
+                    changed.setdefault(table_name, {})[column_name] = None
+
+        return changed, new_fingerprints
+    finally:
+        connection.close()
@@ -0,0 +1,521 @@
+"""
+Compact, memory-mapped MinHash LSH index over the distinct text values of a database.
+
+The index replaces the pickled `datasketch.MinHashLSH` and the dictionary of `MinHash`
+objects. Everything is stored column-wise in a directory so it can be opened with
+`np.load(mmap_mode="r")` in milliseconds, and the pages are shared between every process
+that opens the same index:
+
+- `meta.json`: format version and the MinHash / LSH parameters.
+- `signatures.npy`: uint64 signature matrix, one row per value.
+- `columns.json` and `column_ids.npy`: interned (table, column) pairs and one id per value.
+- `values.bin` and `value_offsets.npy`: UTF-8 blob of all values and their offsets.
+- `band_keys.npy` and `band_rows.npy`: per band, the sorted band hashes and their rows,
+  searched with `np.searchsorted` instead of Python dictionaries.
+- `fingerprints.json`: per column fingerprints of the database contents, used to refresh
+  only the columns that changed with `update_value_index`.
+
+The banding parameters are the ones `datasketch.MinHashLSH` picks for the same threshold,
+so lookups return the same candidates as before.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from datasketch import MinHashLSH
+from utilities.constants.utilities.schema_linking.value_index.response_messages import (
+    ERROR_UNSUPPORTED_VALUE_INDEX_FORMAT, ERROR_VALUE_INDEX_NOT_FOUND)
+from utilities.schema_linking.minhash_signatures import (
+    DEFAULT_SEED, compute_signatures, compute_signatures_parallel)
+
+# Constants
+FORMAT_VERSION = 1
+META_FILE_NAME = "meta.json"
+SIGNATURES_FILE_NAME = "signatures.npy"
+COLUMNS_FILE_NAME = "columns.json"
+COLUMN_IDS_FILE_NAME = "column_ids.npy"
+VALUES_FILE_NAME = "values.bin"
+VALUE_OFFSETS_FILE_NAME = "value_offsets.npy"
+BAND_KEYS_FILE_NAME = "band_keys.npy"
+BAND_ROWS_FILE_NAME = "band_rows.npy"
+FINGERPRINTS_FILE_NAME = "fingerprints.json"
+
+# Number of candidate rows whose signatures are compared with a query at once
+SIMILARITY_CHUNK_SIZE = 65536
+
+FNV_OFFSET_BASIS = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def band_hashes(signatures: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """
+    Hash each band of every signature into a single uint64 with FNV-1a over its values.
+
+    Args:
+        signatures (np.ndarray): uint64 matrix of shape (n, num_perm).
+        bands (int): Number of LSH bands.
+        rows (int): Number of signature values per band.
+
+    Returns:
+        np.ndarray: uint64 matrix of shape (bands, n).
+    """
+    hashes = np.empty((bands, signatures.shape[0]), dtype=np.uint64)
+    for band in range(bands):
+        band_hash = np.full(signatures.shape[0], FNV_OFFSET_BASIS, dtype=np.uint64)
+        for column in range(band * rows, (band + 1) * rows):
+            band_hash ^= signatures[:, column]
+            band_hash *= FNV_PRIME
+        hashes[band] = band_hash
+    return hashes
+
+
+def _flatten_unique_values(
+    unique_values: Dict[str, Dict[str, List[str]]],
+) -> Tuple[List[Tuple[str, str]], List[int], List[str]]:
+    """Flatten distinct values per table and column into interned columns, column ids and values."""
+    columns: List[Tuple[str, str]] = []
+    column_ids: List[int] = []
+    values: List[str] = []
+    for table_name, table_values in unique_values.items():
+        for column_name, column_values in table_values.items():
+            columns.append((table_name, column_name))
+            column_ids.extend([len(columns) - 1] * len(column_values))
+            values.extend(column_values)
+    return columns, column_ids, values
+
+
+def _write_value_index(
+    index_dir: Path,
+    columns: List[Tuple[str, str]],
+    column_ids: List[int],
+    values: List[str],
+    signatures: np.ndarray,
+    meta: Dict[str, Any],
+    fingerprints: Optional[Dict[str, Dict[str, Dict[str, Any]]]],
+) -> None:
+    """Band the signatures and write every index file atomically to `index_dir`."""
+    encoded_values = [value.encode("utf8") for value in values]
+    value_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded_values], out=value_offsets[1:])
+
+    hashes = band_hashes(signatures, meta["bands"], meta["rows"])
+    band_rows = np.argsort(hashes, axis=1, kind="stable").astype(np.int64)
+    band_keys = np.take_along_axis(hashes, band_rows, axis=1)
+
+    temp_dir = index_dir.with_name(f"{index_dir.name}.tmp")
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    temp_dir.mkdir(parents=True)
+
+    np.save(temp_dir / SIGNATURES_FILE_NAME, signatures)
+    np.save(temp_dir / COLUMN_IDS_FILE_NAME, np.asarray(column_ids, dtype=np.int32))
+    np.save(temp_dir / VALUE_OFFSETS_FILE_NAME, value_offsets)
+    np.save(temp_dir / BAND_KEYS_FILE_NAME, band_keys)
+    np.save(temp_dir / BAND_ROWS_FILE_NAME, band_rows)
+    (temp_dir / VALUES_FILE_NAME).write_bytes(b"".join(encoded_values))
+    (temp_dir / COLUMNS_FILE_NAME).write_text(json.dumps(columns), encoding="utf-8")
+    if fingerprints is not None:
+        (temp_dir / FINGERPRINTS_FILE_NAME).write_text(json.dumps(fingerprints), encoding="utf-8")
+    (temp_dir / META_FILE_NAME).write_text(
+        json.dumps(meta | {"format_version": FORMAT_VERSION, "count": len(values)}),
+        encoding="utf-8",
+    )
+
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(temp_dir, index_dir)
+
+
+def build_value_index(
+    unique_values: Dict[str, Dict[str, List[str]]],
+    index_dir: Path,
+    num_perm: int,
+    n_gram: int,
+    threshold: float,
+    max_workers: int = 1,
+    seed: int = DEFAULT_SEED,
+    fingerprints: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+) -> None:
+    """
+    Build the value index of a database and write it atomically to `index_dir`.
+
+    Args:
+        unique_values (Dict[str, Dict[str, List[str]]]): Distinct values per table and column.
+        index_dir (Path): Directory the index is written to. Replaced if it exists.
+        num_perm (int): Number of permutations in a signature.
+        n_gram (int): Shingle length in characters.
+        threshold (float): Jaccard threshold used to choose the LSH banding.
+        max_workers (int): Number of processes used to compute the signatures.
+        seed (int): Seed of the MinHash permutations.
+        fingerprints (Optional[Dict[str, Dict[str, Dict[str, Any]]]]): Fingerprint of every
+            candidate column per table, stored with the index for `update_value_index`.
+    """
+    lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+    columns, column_ids, values = _flatten_unique_values(unique_values)
+    signatures = compute_signatures_parallel(
+        values, num_perm, n_gram, max_workers, seed=seed
+    )
+
+    meta = {
+        "num_perm": num_perm,
+        "n_gram": n_gram,
+        "seed": seed,
+        "threshold": threshold,
+        "bands": lsh.b,
+        "rows": lsh.r,
+    }
+    _write_value_index(
+        Path(index_dir), columns, column_ids, values, signatures, meta, fingerprints
+    )
+
+
+def save_fingerprints(
+    index_dir: Path, fingerprints: Dict[str, Dict[str, Dict[str, Any]]]
+) -> None:
+    """
+    Replace the column fingerprints of a value index whose values did not change.
+
+    Args:
+        index_dir (Path): Directory holding the index.
+        fingerprints (Dict[str, Dict[str, Dict[str, Any]]]): Fingerprints to store.
+    """
+    fingerprints_path = Path(index_dir) / FINGERPRINTS_FILE_NAME
+    temp_path = fingerprints_path.with_name(f"{FINGERPRINTS_FILE_NAME}.tmp")
+    temp_path.write_text(json.dumps(fingerprints), encoding="utf-8")
+    os.replace(temp_path, fingerprints_path)
+
+
+def update_value_index(
+    index_dir: Path,
+    changed_columns: Dict[str, Dict[str, Optional[List[str]]]],
+    fingerprints: Dict[str, Dict[str, Dict[str, Any]]],
+    max_workers: int = 1,
+) -> Dict[str, int]:
+    """
+    Re-index only the given columns of an existing value index and write it atomically.
+
+    Rows of unchanged columns keep their signatures. For a changed column, values it already
+    held keep their signatures too and only its new values are signed; values it no longer
+    holds are dropped. The bands are then re-sorted, which is cheap next to signing.
+
+    Args:
+        index_dir (Path): Directory holding the index.
+        changed_columns (Dict[str, Dict[str, Optional[List[str]]]]): New distinct values
+            per table and column. None removes the column from the index.
+        fingerprints (Dict[str, Dict[str, Dict[str, Any]]]): Fingerprints to store with the
+            updated index.
+        max_workers (int): Number of processes used to compute the new signatures.
+
+    Returns:
+        Dict[str, int]: Number of added and removed values and of re-indexed columns.
+    """
+    index_dir = Path(index_dir)
+    current = ValueIndex(index_dir)
+    rows_by_column: Dict[Tuple[str, str], np.ndarray] = {}
+    order = np.argsort(current.column_ids, kind="stable")
+    bounds = np.searchsorted(
+        current.column_ids[order], np.arange(len(current.columns) + 1)
+    )
+    for column_id, column in enumerate(current.columns):
+        rows_by_column[column] = order[bounds[column_id] : bounds[column_id + 1]]
+
+    new_columns = [
+        (table_name, column_name)
+        for table_name, table_values in changed_columns.items()
+        for column_name, column_values in table_values.items()
+        if column_values is not None and (table_name, column_name) not in rows_by_column
+    ]
+
+    columns: List[Tuple[str, str]] = []
+    column_ids: List[int] = []
+    values: List[str] = []
+    reused_rows: List[int] = []
+    reused_positions: List[int] = []
+    signed_values: List[str] = []
+    signed_positions: List[int] = []
+    added = removed = 0
+
+    for column in current.columns + new_columns:
+        table_name, column_name = column
+        old_rows = rows_by_column.get(column, np.zeros(0, dtype=np.int64))
+        if column_name not in changed_columns.get(table_name, {}):
+            column_values = [current.value(row) for row in old_rows]
+            old_row_of_value = dict(zip(column_values, old_rows.tolist()))
+        else:
+            column_values = changed_columns[table_name][column_name] or []
+            old_row_of_value = {current.value(row): row for row in old_rows.tolist()}
+            added += sum(value not in old_row_of_value for value in column_values)
+            removed += len(old_row_of_value) - sum(
+                value in old_row_of_value for value in column_values
+            )
+
+        if not column_values:
+            continue
+
+        columns.append(column)
+        for value in column_values:
+            if value in old_row_of_value:
+                reused_rows.append(old_row_of_value[value])
+                reused_positions.append(len(values))
+            else:
+                signed_values.append(value)
+                signed_positions.append(len(values))
+            column_ids.append(len(columns) - 1)
+            values.append(value)
+
+    signatures = np.empty((len(values), current.num_perm), dtype=np.uint64)
+    signatures[reused_positions] = current.signatures[reused_rows]
+    if signed_values:
+        signatures[signed_positions] = compute_signatures_parallel(
+            signed_values, current.num_perm, current.n_gram, max_workers, seed=current.seed
+        )
+
+    _write_value_index(
+        index_dir, columns, column_ids, values, signatures, current.meta, fingerprints
+    )
+    return {
+        "added_values": added,
+        "removed_values": removed,
+        "reindexed_columns": sum(len(table) for table in changed_columns.values()),
+    }
+
+
+class ValueIndex:
+    """
+    Read-only, memory-mapped view of a value index built by `build_value_index`.
+
+    Attributes:
+        index_dir (Path): Directory holding the index files.
+        meta (Dict[str, Any]): MinHash and LSH parameters the index was built with.
+        num_perm (int): Number of permutations in a signature.
+        n_gram (int): Shingle length in characters.
+        seed (int): Seed of the MinHash permutations.
+        bands (int): Number of LSH bands.
+        rows (int): Number of signature values per band.
+    """
+
+    def __init__(self, index_dir: Path):
+        """
+        Open the index stored in `index_dir`.
+
+        Args:
+            index_dir (Path): Directory holding the index files.
+
+        Raises:
+            FileNotFoundError: If no index is stored in the directory.
+            ValueError: If the index was written in an unsupported format version.
+        """
+        self.index_dir = Path(index_dir)
+        if not self.exists(self.index_dir):
+            raise FileNotFoundError(
+                ERROR_VALUE_INDEX_NOT_FOUND.format(index_dir=self.index_dir)
+            )
+
+        meta = json.loads((self.index_dir / META_FILE_NAME).read_text(encoding="utf-8"))
+        if meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                ERROR_UNSUPPORTED_VALUE_INDEX_FORMAT.format(
+                    version=meta["format_version"],
+                    index_dir=self.index_dir,
+                    expected=FORMAT_VERSION,
+                )
+            )
+
+        self.meta = {
+            key: meta[key]
+            for key in ("num_perm", "n_gram", "seed", "threshold", "bands", "rows")
+        }
+        self.num_perm = meta["num_perm"]
+        self.n_gram = meta["n_gram"]
+        self.seed = meta["seed"]
+        self.bands = meta["bands"]
+        self.rows = meta["rows"]
+
+        self.columns = [
+            tuple(column)
+            for column in json.loads(
+                (self.index_dir / COLUMNS_FILE_NAME).read_text(encoding="utf-8")
+            )
+        ]
+        self.signatures = self._load_array(SIGNATURES_FILE_NAME)
+        self.column_ids = self._load_array(COLUMN_IDS_FILE_NAME)
+        self.value_offsets = self._load_array(VALUE_OFFSETS_FILE_NAME)
+        self.band_keys = self._load_array(BAND_KEYS_FILE_NAME)
+        self.band_rows = self._load_array(BAND_ROWS_FILE_NAME)
+
+        values_path = self.index_dir / VALUES_FILE_NAME
+        self.values_blob = (
+            np.memmap(values_path, dtype=np.uint8, mode="r")
+            if values_path.stat().st_size > 0
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        """
+        Check whether a value index has been written to the given directory.
+
+        Args:
+            index_dir (Path): Directory to check.
+
+        Returns:
+            bool: True if the index metadata exists.
+        """
+        return (Path(index_dir) / META_FILE_NAME).exists()
+
+    @property
+    def fingerprints(self) -> Optional[Dict[str, Dict[str, Dict[str, Any]]]]:
+        """
+        Return the column fingerprints stored with the index, None if it was built without them.
+
+        A database without any candidate column has an empty dictionary of fingerprints.
+        """
+        fingerprints_path = self.index_dir / FINGERPRINTS_FILE_NAME
+        if not fingerprints_path.exists():
+            return None
+        return json.loads(fingerprints_path.read_text(encoding="utf-8"))
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the mapped index arrays, an upper bound on its resident memory."""
+        return sum(
+            array.nbytes
+            for array in (
+                self.signatures,
+                self.column_ids,
+                self.value_offsets,
+                self.band_keys,
+                self.band_rows,
+                self.values_blob,
+            )
+        )
+
+    def __len__(self) -> int:
+        """Return the number of indexed values."""
+        return self.signatures.shape[0]
+
+    def value(self, row: int) -> str:
+        """Return the value stored in the given row."""
+        start, end = self.value_offsets[row], self.value_offsets[row + 1]
+        return bytes(self.values_blob[start:end]).decode("utf8")
+
+    def table_column(self, row: int) -> Tuple[str, str]:
+        """Return the (table, column) pair the value in the given row belongs to."""
+        return self.columns[self.column_ids[row]]
+
+    def signature(self, keyword: str) -> np.ndarray:
+        """Return the MinHash signature of a keyword, compatible with the stored signatures."""
+        return compute_signatures([keyword], self.num_perm, self.n_gram, self.seed)[0]
+
+    def candidates(self, signature: np.ndarray) -> np.ndarray:
+        """
+        Return the rows that share at least one LSH band with the given signature.
+
+        Args:
+            signature (np.ndarray): uint64 signature of the query.
+
+        Returns:
+            np.ndarray: Sorted, distinct candidate rows.
+        """
+        return self.batch_candidates(signature[np.newaxis, :])[0]
+
+    def batch_candidates(self, signatures: np.ndarray) -> List[np.ndarray]:
+        """
+        Return, for each query signature, the rows sharing at least one LSH band with it.
+
+        The band hashes of all queries are looked up with one `np.searchsorted` call per band.
+
+        Args:
+            signatures (np.ndarray): uint64 matrix of shape (n, num_perm).
+
+        Returns:
+            List[np.ndarray]: Sorted, distinct candidate rows of every query.
+        """
+        query_hashes = band_hashes(signatures, self.bands, self.rows)
+        matches: List[List[np.ndarray]] = [[] for _ in range(signatures.shape[0])]
+        for band in range(self.bands):
+            keys = self.band_keys[band]
+            starts = np.searchsorted(keys, query_hashes[band], side="left")
+            ends = np.searchsorted(keys, query_hashes[band], side="right")
+            for query in np.flatnonzero(ends > starts):
+                matches[query].append(self.band_rows[band, starts[query] : ends[query]])
+
+        return [
+            np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+            for rows in matches
+        ]
+
+    def query(self, keyword: str, top_n: int) -> List[Tuple[int, float]]:
+        """
+        Return the LSH candidates of a keyword ranked by estimated Jaccard similarity.
+
+        Args:
+            keyword (str): The keyword to look up.
+            top_n (int): Maximum number of results.
+
+        Returns:
+            List[Tuple[int, float]]: (row, similarity) pairs, most similar first.
+        """
+        return self.batch_query([keyword], top_n)[0]
+
+    def batch_query(
+        self, keywords: Sequence[str], top_n: int
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Return the LSH candidates of every keyword ranked by estimated Jaccard similarity.
+
+        The candidate signatures of all keywords are gathered into a matrix and compared with
+        their query signature in chunked NumPy operations. Only the `top_n` best rows of each
+        keyword are selected with `np.argpartition` and sorted, ties broken by row.
+
+        Args:
+            keywords (Sequence[str]): The keywords to look up.
+            top_n (int): Maximum number of results per keyword.
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, similarity) pairs of every keyword, most
+            similar first.
+        """
+        if not keywords:
+            return []
+
+        signatures = compute_signatures(keywords, self.num_perm, self.n_gram, self.seed)
+        candidates = self.batch_candidates(signatures)
+
+        sizes = np.array([rows.size for rows in candidates], dtype=np.int64)
+        if top_n <= 0 or sizes.sum() == 0:
+            return [[] for _ in keywords]
+
+        rows = np.concatenate(candidates)
+        owners = np.repeat(np.arange(len(keywords)), sizes)
+        similarities = np.empty(rows.size, dtype=np.float64)
+        for start in range(0, rows.size, SIMILARITY_CHUNK_SIZE):
+            chunk = slice(start, start + SIMILARITY_CHUNK_SIZE)
+            similarities[chunk] = np.count_nonzero(
+                self.signatures[rows[chunk]] == signatures[owners[chunk]], axis=1
+            )
+        similarities /= self.num_perm
+
+        results = []
+        bounds = np.concatenate(([0], np.cumsum(sizes)))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            keyword_rows = rows[start:end]
+            keyword_similarities = similarities[start:end]
+            if keyword_rows.size > top_n:
+                best = np.argpartition(-keyword_similarities, top_n - 1)[:top_n]
+                keyword_rows = keyword_rows[best]
+                keyword_similarities = keyword_similarities[best]
+            order = np.lexsort((keyword_rows, -keyword_similarities))
+            results.append(
+                [
+                    (int(keyword_rows[index]), float(keyword_similarities[index]))
+                    for index in order
+                ]
+            )
+        return results
+
+    def _load_array(self, file_name: str) -> np.ndarray:
+        """Memory-map one of the index's arrays."""
+        return np.load(self.index_dir / file_name, mmap_mode="r")
@@ -0,0 +1,193 @@
+"""
+Process-wide registry of the value indexes of every database.
+
+Value indexes are opened lazily the first time a database needs one and kept open for
+later requests. The registry records the mapped size of every index when it is opened and,
+when the total exceeds its memory budget, closes the least recently used ones. The most
+recently requested index is always kept, even if it alone exceeds the budget.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Tuple, Union
+
+from utilities.config import VALUE_INDEX_MEMORY_BUDGET_MB
+from utilities.constants.utilities.schema_linking.value_index_registry.response_messages import (
+    INFO_VALUE_INDEX_EVICTED, INFO_VALUE_INDEX_LOADED)
+from utilities.logging_utils import setup_logger
+from utilities.schema_linking.fts_value_index import FtsValueIndex
+from utilities.schema_linking.value_index import ValueIndex
+from utilities.schema_linking.value_retrieval import load_db_value_index
+
+# Constants
+BYTES_PER_MB = 1024 * 1024
+
+logger = setup_logger(__name__)
+
+AnyValueIndex = Union[ValueIndex, FtsValueIndex]
+
+
+@dataclass
+class ValueIndexRegistryStats:
+    """
+    Counters of a value index registry.
+
+    Attributes:
+        hits (int): Requests served by an already open index.
+        misses (int): Requests that had to open an index.
+        evictions (int): Indexes closed to stay within the memory budget.
+        load_seconds (float): Total time spent opening indexes.
+        resident_bytes (int): Mapped size of the open indexes.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    load_seconds: float = 0.0
+    resident_bytes: int = 0
+
+
+class ValueIndexRegistry:
+    """
+    Lazily opened, LRU-evicted cache of value indexes keyed by database name.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb: float = VALUE_INDEX_MEMORY_BUDGET_MB,
+        loader: Callable[[str], AnyValueIndex] = load_db_value_index,
+    ):
+        """
+        Create an empty registry.
+
+        Args:
+            memory_budget_mb (float): Maximum mapped size of the open indexes, in MB.
+            loader (Callable[[str], AnyValueIndex]): Opens, and if needed builds, the value
+                index of a database.
+        """
+        self.memory_budget_bytes = int(memory_budget_mb * BYTES_PER_MB)
+        self._loader = loader
+        # Open index of every database and its size when it was opened
+        self._indexes: "OrderedDict[str, Tuple[AnyValueIndex, int]]" = OrderedDict()
+        self._loading_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stats = ValueIndexRegistryStats()
+
+    def get(self, database_name: str) -> AnyValueIndex:
+        """
+        Return the value index of a database, opening it on first use.
+
+        Concurrent requests for the same database open it only once.
+
+        Args:
+            database_name (str): The name of the database.
+
+        Returns:
+            AnyValueIndex: The open value index, of the configured engine.
+        """
+        with self._lock:
+            value_index = self._touch(database_name)
+            if value_index is not None:
+                self._stats.hits += 1
+                return value_index
+            loading_lock = self._loading_locks.setdefault(database_name, threading.Lock())
+
+        with loading_lock:
+            with self._lock:
+                value_index = self._touch(database_name)
+                if value_index is not None:
+                    self._stats.hits += 1
+                    return value_index
+
+            start = time.perf_counter()
+            value_index = self._loader(database_name)
+            nbytes = value_index.nbytes
+            seconds = time.perf_counter() - start
+            logger.info(
+                INFO_VALUE_INDEX_LOADED.format(
+                    database_name=database_name,
+                    size_mb=nbytes / BYTES_PER_MB,
+                    seconds=seconds,
+                )
+            )
+
+            with self._lock:
+                self._stats.misses += 1
+                self._stats.load_seconds += seconds
+                self._indexes[database_name] = (value_index, nbytes)
+                self._stats.resident_bytes += nbytes
+                self._evict()
+                self._loading_locks.pop(database_name, None)
+
+        return value_index
+
+    def evict(self, database_name: str) -> None:
+        """
+        Close the value index of a database, e.g. after it has been rebuilt.
+
+        Args:
+            database_name (str): The name of the database.
+        """
+        with self._lock:
+            entry = self._indexes.pop(database_name, None)
+            if entry is not None:
+                self._stats.resident_bytes -= entry[1]
+        if entry is not None:
+            _close(entry[0])
+
+    def clear(self) -> None:
+        """Close every open value index."""
+        with self._lock:
+            entries = list(self._indexes.values())
+            self._indexes.clear()
+            self._stats.resident_bytes = 0
+        for value_index, _ in entries:
+            _close(value_index)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the hit, miss, eviction and load time counters of the registry.
+
+        Returns:
+            Dict[str, Any]: The counters, with the open databases least recently used first.
+        """
+        with self._lock:
+            return asdict(self._stats) | {"databases": list(self._indexes)}
+
+    def _touch(self, database_name: str):
+        """Return the open index of a database and mark it most recently used."""
+        entry = self._indexes.get(database_name)
+        if entry is None:
+            return None
+        self._indexes.move_to_end(database_name)
+        return entry[0]
+
+    def _evict(self) -> None:
+        """Close least recently used indexes until the budget is met, keeping the newest one."""
+        while (
+            len(self._indexes) > 1
+            and self._stats.resident_bytes > self.memory_budget_bytes
+        ):
+            database_name, (value_index, nbytes) = self._indexes.popitem(last=False)
+            self._stats.resident_bytes -= nbytes
+            self._stats.evictions += 1
+            _close(value_index)
+            logger.info(
+                INFO_VALUE_INDEX_EVICTED.format(
+                    database_name=database_name,
+                    size_mb=nbytes / BYTES_PER_MB,
+                    budget_mb=self.memory_budget_bytes / BYTES_PER_MB,
+                )
+            )
+
+
+def _close(value_index: AnyValueIndex) -> None:
+    """Close an index that holds a connection, memory-mapped indexes are released by GC."""
+    close = getattr(value_index, "close", None)
+    if close is not None:
+        close()
+
+
+VALUE_INDEX_REGISTRY = ValueIndexRegistry()
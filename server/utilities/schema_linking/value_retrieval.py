@@ -3,30 +3,52 @@ import logging
 import os
 import pickle
 import random
-import sqlite3
-from typing import Dict, List, Tuple, Union
+import shutil
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from alive_progress import alive_bar
-from datasketch import MinHash, MinHashLSH
-from utilities.config import PATH_CONFIG
+from utilities.config import PATH_CONFIG, VALUE_INDEX_ENGINE
+from utilities.connections.sqlite import SQLITE_CONNECTION_POOL
 from utilities.constants.response_messages import (
-    ERROR_DATABASE_PROCESSING, ERROR_INVALID_FETCH_ARGUMENT,
-    ERROR_LSH_CREATION, ERROR_LSH_LOADING)
+    ERROR_DATABASE_PROCESSING, ERROR_FTS_INDEX_CREATION,
+    ERROR_FTS_INDEX_REFRESH, ERROR_INVALID_FETCH_ARGUMENT, ERROR_LSH_CREATION, ERROR_LSH_LOADING,
+    ERROR_LSH_REFRESH)
+from utilities.constants.retrieval_enums import ValueIndexEngine
+from utilities.schema_linking.fts_value_index import (FtsValueIndex,
+                                                      build_fts_value_index,
+                                                      save_fts_fingerprints)
+from utilities.schema_linking.unique_values import (find_changed_columns,
+                                                     get_column_fingerprints,
+                                                     get_unique_values)
+from utilities.schema_linking.value_index import (ValueIndex,
+                                                  build_value_index,
+                                                  save_fingerprints,
+                                                  update_value_index)
 
 # Constants
 SIGNATURE_SIZE = 100
 N_GRAM = 3
 THRESHOLD = 0.1
 
+# Number of processes used to compute the MinHash signatures of one database
+MAX_MINHASH_WORKERS = os.cpu_count() or 1
 
-def execute_sql(
-    db_path: str, sql: str, fetch: Union[str, int] = "all", timeout: int = 60
-):
+# Number of processes used to extract the unique values of one database, one table at a time
+MAX_UNIQUE_VALUES_WORKERS = os.cpu_count() or 1
+
+# Number of databases processed concurrently by create_lsh_for_all_databases
+MAX_LSH_DATABASE_WORKERS = 4
+
+# Number of processes shared by the databases create_lsh_for_all_databases builds concurrently
+MAX_LSH_PROCESSES = os.cpu_count() or 1
+
+
+def execute_sql(db_path: str, sql: str, fetch: Union[str, int] = "all"):
     """
-    Executes an SQL query
+    Executes an SQL query on the pooled read-only connection of the calling thread
     """
 
-    with sqlite3.connect(db_path, timeout=timeout) as conn:
+    with SQLITE_CONNECTION_POOL.connect(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute(sql)
 
@@ -43,120 +65,14 @@ def execute_sql(
         raise ValueError(ERROR_INVALID_FETCH_ARGUMENT)
 
 
-def _get_unique_values(db_path: str):
+def _get_unique_values(db_path: str, max_workers: int = MAX_UNIQUE_VALUES_WORKERS):
     """
     Retrieves unique text values from the database excluding primary keys.
+    The database is read through one read-only connection per process, each column is scanned once,
+    and tables are spread over max_workers processes.
     """
 
-    table_names = [
-        table[0]
-        for table in execute_sql(
-            db_path, "SELECT name FROM sqlite_master WHERE type='table';", fetch="all"
-        )
-    ]
-    primary_keys = []
-
-    for table_name in table_names:
-        columns = execute_sql(
-            db_path, f"PRAGMA table_info('{table_name}')", fetch="all"
-        )
-        for column in columns:
-            if column[5] > 0:  # Check if it's a primary key
-                column_name = column[1]
-                if column_name.lower() not in [c.lower() for c in primary_keys]:
-                    primary_keys.append(column_name)
-
-    unique_values: Dict[str, Dict[str, List[str]]] = {}
-    for table_name in table_names:
-        if table_name == "sqlite_sequence":
-            continue
-
-        columns = [
-            col[1]
-            for col in execute_sql(
-                db_path, f"PRAGMA table_info('{table_name}')", fetch="all"
-            )
-            if (
-                "TEXT" in col[2]
-                and col[1].lower() not in [c.lower() for c in primary_keys]
-            )
-        ]
-
-        table_values: Dict[str, List[str]] = {}
-
-        for column in columns:
-            if any(
-                keyword in column.lower()
-                for keyword in [
-                    "_id",
-                    " id",
-                    "url",
-                    "email",
-                    "web",
-                    "time",
-                    "phone",
-                    "date",
-                    "address",
-                ]
-            ) or column.endswith("Id"):
-                continue
-
-            try:
-                result = execute_sql(
-                    db_path,
-                    f"""
-                    SELECT SUM(LENGTH(unique_values)), COUNT(unique_values)
-                    FROM (
-                        SELECT DISTINCT `{column}` AS unique_values
-                        FROM `{table_name}`
-                        WHERE `{column}` IS NOT NULL
-                    ) AS subquery
-                """,
-                    fetch="one",
-                    timeout=480,
-                )
-            except Exception:
-                result = 0, 0
-
-            sum_of_lengths, count_distinct = result
-            if sum_of_lengths is None or count_distinct == 0:
-                continue
-
-            average_length = sum_of_lengths / count_distinct
-
-            if (
-                ("name" in column.lower() and sum_of_lengths < 5000000)
-                or (sum_of_lengths < 2000000 and average_length < 25)
-                or count_distinct < 100
-            ):
-                try:
-                    values = [
-                        str(value[0])
-                        for value in execute_sql(
-                            db_path,
-                            f"SELECT DISTINCT `{column}` FROM `{table_name}` WHERE `{column}` IS NOT NULL",
-                            fetch="all",
-                            timeout=480,
-                        )
-                    ]
-                except Exception:
-                    values = []
-
-                table_values[column] = values
-
-        unique_values[table_name] = table_values
-
-    return unique_values
-
-
-def _create_minhash(string: str):
-    """
-    Creates a MinHash object for a given string.
-    """
-    m = MinHash(num_perm=SIGNATURE_SIZE)
-    for d in [string[i : i + N_GRAM] for i in range(len(string) - N_GRAM + 1)]:
-        m.update(d.encode("utf8"))
-    return m
+    return get_unique_values(db_path, max_workers=max_workers)
 
 
 def skip_column(column_name: str, column_values: List[str]):
@@ -172,122 +88,295 @@ def skip_column(column_name: str, column_values: List[str]):
     return (sum_of_lengths > 50000) and (average_length > 20)
 
 
-def make_lsh(unique_values: Dict[str, Dict[str, List[str]]]):
+def make_lsh(
+    unique_values: Dict[str, Dict[str, List[str]]],
+    index_dir: str,
+    max_workers: int = MAX_MINHASH_WORKERS,
+    fingerprints: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+):
     """
-    Creates a MinHash LSH from unique values.
+    Creates a MinHash LSH value index from unique values and writes it to index_dir.
+    Signatures for all values are computed in vectorized batches, spread over max_workers processes.
+    The column fingerprints are stored with the index so it can later be refreshed incrementally.
     """
 
-    lsh = MinHashLSH(threshold=THRESHOLD, num_perm=SIGNATURE_SIZE)
-
-    minhashes: Dict[str, Tuple[MinHash, str, str, str]] = {}
-
     try:
-        for table_name, table_values in unique_values.items():
-            for column_name, column_values in table_values.items():
-                for idx, value in enumerate(column_values):
-                    minhash = _create_minhash(value)
-                    minhash_key = f"{table_name}_{column_name}_{idx}"
-                    minhashes[minhash_key] = (minhash, table_name, column_name, value)
-                    lsh.insert(minhash_key, minhash)
-
+        build_value_index(
+            unique_values,
+            index_dir,
+            num_perm=SIGNATURE_SIZE,
+            n_gram=N_GRAM,
+            threshold=THRESHOLD,
+            max_workers=max_workers,
+            fingerprints=fingerprints,
+        )
     except Exception as e:
         logging.error(ERROR_LSH_CREATION.format(error=e))
-
-    return lsh, minhashes
+        raise
 
 
-def make_db_lsh(database_name: str):
+def _load_db_unique_values(
+    database_name: str, max_workers: int = MAX_UNIQUE_VALUES_WORKERS
+) -> Dict[str, Dict[str, List[str]]]:
     """
-    Creates a MinHash LSH for the database and saves the results.
-    If the unique values, LSH, and minhashes pickle files already exist, then it skips creation.
+    Loads the unique values of the database if they were saved, otherwise creates and saves them
+    with up to max_workers processes.
     """
 
     # Create the preprocessed directory
     preprocessed_dir = PATH_CONFIG.database_preprocessed_dir(database_name=database_name)
     os.makedirs(preprocessed_dir, exist_ok=True)
 
-    # Build file paths
     unique_values_file = PATH_CONFIG.unique_values_path(database_name=database_name)
-    lsh_file = PATH_CONFIG.lsh_path(database_name=database_name)
-    minhashes_file = PATH_CONFIG.minhashes_path(database_name=database_name)
+    if os.path.exists(unique_values_file):
+        with open(unique_values_file, "rb") as file:
+            return pickle.load(file)
+
+    unique_values = _get_unique_values(
+        PATH_CONFIG.sqlite_path(database_name=database_name), max_workers=max_workers
+    )
+    with open(unique_values_file, "wb") as file:
+        pickle.dump(unique_values, file)
+    return unique_values
+
+
+def make_db_lsh(database_name: str, max_workers: int = MAX_MINHASH_WORKERS):
+    """
+    Creates the MinHash LSH value index for the database and saves it, with up to max_workers processes.
+    If the value index already exists, then it skips creation.
+    """
+
+    value_index_dir = PATH_CONFIG.value_index_dir(database_name=database_name)
+
+    if ValueIndex.exists(value_index_dir):
+        return # Value index already exists
+
+    unique_values = _load_db_unique_values(database_name, max_workers=max_workers)
+    fingerprints = get_column_fingerprints(
+        str(PATH_CONFIG.sqlite_path(database_name=database_name)), unique_values
+    )
+    make_lsh(unique_values, value_index_dir, max_workers=max_workers, fingerprints=fingerprints)
+
+
+def make_db_fts_index(database_name: str, max_workers: int = MAX_UNIQUE_VALUES_WORKERS):
+    """
+    Creates the FTS5 trigram value index for the database and saves it, reading the unique values with up to
+    max_workers processes.
+    It covers the same unique values as the MinHash LSH. If the index already exists, then it skips creation.
+    """
+
+    fts_index_path = PATH_CONFIG.fts_value_index_path(database_name=database_name)
+    if FtsValueIndex.exists(fts_index_path):
+        return # FTS value index already exists
+
+    try:
+        unique_values = _load_db_unique_values(database_name, max_workers=max_workers)
+        fingerprints = get_column_fingerprints(
+            str(PATH_CONFIG.sqlite_path(database_name=database_name)), unique_values
+        )
+        build_fts_value_index(unique_values, fts_index_path, fingerprints=fingerprints)
+    except Exception as e:
+        logging.error(ERROR_FTS_INDEX_CREATION.format(database_name=database_name, error=e))
+        raise
+
+
+def make_db_value_index(database_name: str, max_workers: int = MAX_MINHASH_WORKERS):
+    """
+    Creates the value index of the database with the configured VALUE_INDEX_ENGINE, with up to max_workers processes.
+    """
+
+    if VALUE_INDEX_ENGINE == ValueIndexEngine.FTS5:
+        make_db_fts_index(database_name, max_workers=max_workers)
+    else:
+        make_db_lsh(database_name, max_workers=max_workers)
+
+
+def refresh_db_lsh(database_name: str, full: bool = False) -> Dict[str, int]:
+    """
+    Brings the MinHash LSH value index of the database up to date with its contents.
+    Only columns whose fingerprint changed are re-indexed, and only their new values are signed.
+    With full=True every candidate column is rescanned, which also catches in-place updates.
+    Indexes built without fingerprints are rebuilt from scratch.
+    """
+
+    value_index_dir = PATH_CONFIG.value_index_dir(database_name=database_name)
+    unique_values_file = PATH_CONFIG.unique_values_path(database_name=database_name)
+
+    stored_fingerprints = None
+    if ValueIndex.exists(value_index_dir):
+        stored_fingerprints = ValueIndex(value_index_dir).fingerprints
 
-    if os.path.exists(lsh_file) and os.path.exists(minhashes_file):
-        return # Both files already exist
+    if stored_fingerprints is None:
+        if os.path.exists(unique_values_file):
+            os.remove(unique_values_file)
+        shutil.rmtree(value_index_dir, ignore_errors=True)
+        make_db_lsh(database_name)
+        value_index = ValueIndex(value_index_dir)
+        return {
+            "added_values": len(value_index),
+            "removed_values": 0,
+            "reindexed_columns": len(value_index.columns),
+        }
 
-    # Load unique values if they exist, otherwise create and save them
+    try:
+        changed_columns, fingerprints = find_changed_columns(
+            str(PATH_CONFIG.sqlite_path(database_name=database_name)),
+            stored_fingerprints,
+            full=full,
+        )
+        if not changed_columns:
+            if fingerprints != stored_fingerprints:
+                save_fingerprints(value_index_dir, fingerprints)
+            return {"added_values": 0, "removed_values": 0, "reindexed_columns": 0}
+
+        stats = update_value_index(
+            value_index_dir, changed_columns, fingerprints, max_workers=MAX_MINHASH_WORKERS
+        )
+    except Exception as e:
+        logging.error(ERROR_LSH_REFRESH.format(database_name=database_name, error=e))
+        raise
+
+    # Keep the unique values file in line with the index
     if os.path.exists(unique_values_file):
         with open(unique_values_file, "rb") as file:
             unique_values = pickle.load(file)
-    else:
-        unique_values = _get_unique_values(
-            PATH_CONFIG.sqlite_path(database_name=database_name)
-        )
+        _apply_changed_columns(unique_values, changed_columns)
         with open(unique_values_file, "wb") as file:
             pickle.dump(unique_values, file)
 
-    lsh, minhashes = make_lsh(unique_values)
+    return stats
 
-    with open(lsh_file, "wb") as file:
-        pickle.dump(lsh, file)
-
-    with open(minhashes_file, "wb") as file:
-        pickle.dump(minhashes, file)
 
+def _apply_changed_columns(
+    unique_values: Dict[str, Dict[str, List[str]]],
+    changed_columns: Dict[str, Dict[str, Optional[List[str]]]],
+) -> Dict[str, int]:
+    """
+    Updates the unique values of a database in place with the new values of its changed columns.
+    Returns the number of added and removed values and of changed columns.
+    """
 
-def load_db_lsh(database_name: str):
+    added = removed = 0
+    for table_name, table_values in changed_columns.items():
+        for column_name, column_values in table_values.items():
+            old_values = set(unique_values.get(table_name, {}).get(column_name) or [])
+            new_values = set(column_values or [])
+            added += len(new_values - old_values)
+            removed += len(old_values - new_values)
+            if column_values is None:
+                unique_values.get(table_name, {}).pop(column_name, None)
+            else:
+                unique_values.setdefault(table_name, {})[column_name] = column_values
+
+    return {
+        "added_values": added,
+        "removed_values": removed,
+        "reindexed_columns": sum(len(table) for table in changed_columns.values()),
+    }
+
+
+def refresh_db_fts_index(database_name: str, full: bool = False) -> Dict[str, int]:
     """
-    Loads the LSH and MinHashes from the preprocessed files.
-    If the files do not exist, it creates them and then loads them.
+    Brings the FTS5 trigram value index of the database up to date with its contents.
+    The changed columns are found from the fingerprints stored with the index, the unique values are updated
+    with their new values, and the index is rebuilt from them into a temporary file that replaces it.
+    With full=True every candidate column is rescanned, which also catches in-place updates.
+    Indexes built without fingerprints are rebuilt from scratch.
     """
 
-    lsh_file = PATH_CONFIG.lsh_path(database_name=database_name)
-    minhashes_file = PATH_CONFIG.minhashes_path(database_name=database_name)
+    fts_index_path = PATH_CONFIG.fts_value_index_path(database_name=database_name)
+    unique_values_file = PATH_CONFIG.unique_values_path(database_name=database_name)
 
-    # Check if the required files exist
-    if not os.path.exists(lsh_file) or not os.path.exists(minhashes_file):
-        make_db_lsh(database_name)
+    stored_fingerprints = None
+    if FtsValueIndex.exists(fts_index_path):
+        fts_index = FtsValueIndex(fts_index_path)
+        try:
+            stored_fingerprints = fts_index.fingerprints
+        finally:
+            fts_index.close()
+
+    if stored_fingerprints is None:
+        if os.path.exists(unique_values_file):
+            os.remove(unique_values_file)
+        if os.path.exists(fts_index_path):
+            os.remove(fts_index_path)
+        make_db_fts_index(database_name)
+        fts_index = FtsValueIndex(fts_index_path)
+        try:
+            return {
+                "added_values": len(fts_index),
+                "removed_values": 0,
+                "reindexed_columns": len(fts_index.columns),
+            }
+        finally:
+            fts_index.close()
 
-    # Load the LSH and MinHashes
     try:
-        with open(lsh_file, "rb") as file:
-            lsh = pickle.load(file)
-        with open(minhashes_file, "rb") as file:
-            minhashes = pickle.load(file)
-        return lsh, minhashes
+        changed_columns, fingerprints = find_changed_columns(
+            str(PATH_CONFIG.sqlite_path(database_name=database_name)),
+            stored_fingerprints,
+            full=full,
+        )
+        if not changed_columns:
+            if fingerprints != stored_fingerprints:
+                save_fts_fingerprints(fts_index_path, fingerprints)
+            return {"added_values": 0, "removed_values": 0, "reindexed_columns": 0}
+
+        unique_values = _load_db_unique_values(database_name)
+        stats = _apply_changed_columns(unique_values, changed_columns)
+        build_fts_value_index(unique_values, fts_index_path, fingerprints=fingerprints)
     except Exception as e:
-        logging.error(ERROR_LSH_LOADING.format(database_name=database_name, error=e))
-        raise e
+        logging.error(ERROR_FTS_INDEX_REFRESH.format(database_name=database_name, error=e))
+        raise
 
+    with open(unique_values_file, "wb") as file:
+        pickle.dump(unique_values, file)
 
-def query_lsh(
-    lsh: MinHashLSH,
-    minhashes: Dict[str, Tuple[MinHash, str, str, str]],
-    keyword: str,
-    top_n: int = 10,
-) -> Dict[str, Dict[str, List[str]]]:
+    return stats
+
+
+def refresh_db_value_index(database_name: str, full: bool = False) -> Dict[str, int]:
     """
-    Queries the LSH for similar values to the given keyword and returns the top results.
+    Brings the value index of the configured VALUE_INDEX_ENGINE up to date with the database contents.
     """
 
-    schema = {}
+    if VALUE_INDEX_ENGINE == ValueIndexEngine.FTS5:
+        return refresh_db_fts_index(database_name, full=full)
+    return refresh_db_lsh(database_name, full=full)
 
-    # Create the query minhash
-    query_minhash = _create_minhash(keyword)
 
-    # Query the LSH and get the top results
-    results = lsh.query(query_minhash)
+def load_db_lsh(database_name: str) -> ValueIndex:
+    """
+    Opens the memory-mapped MinHash LSH value index of the database.
+    If the index does not exist, it creates it and then opens it.
+    """
 
-    # Calculate Jaccard similarity for the top results
-    similarities = [
-        (result, query_minhash.jaccard(minhashes[result][0])) for result in results
-    ]
-    similarities = sorted(similarities, key=lambda x: x[1], reverse=True)[
-        :top_n
-    ]  # Get top N results
+    value_index_dir = PATH_CONFIG.value_index_dir(database_name=database_name)
+
+    # Check if the value index exists
+    if not ValueIndex.exists(value_index_dir):
+        make_db_lsh(database_name)
+
+    # Open the value index
+    try:
+        return ValueIndex(value_index_dir)
+    except Exception as e:
+        logging.error(ERROR_LSH_LOADING.format(database_name=database_name, error=e))
+        raise e
+
+
+def _results_to_schema(
+    value_index: Union[ValueIndex, FtsValueIndex],
+    results: List[Tuple[int, float]],
+    schema: Dict[str, List[str]],
+) -> Dict[str, List[str]]:
+    """
+    Adds the table and column of every ranked value index row to the schema.
+    """
 
     # Convert results to schema format {table1: [col2, col2...], table2: [col1, col2...]}
-    for result, _ in similarities:
-        table_name, column_name, _ = minhashes[result][1:]
+    for row, _ in results:
+        table_name, column_name = value_index.table_column(row)
 
         if table_name not in schema:
             schema[table_name] = []
@@ -298,38 +387,66 @@ def query_lsh(
     return schema
 
 
+def load_db_fts_index(database_name: str) -> FtsValueIndex:
+    """
+    Opens the FTS5 trigram value index of the database.
+    If the index does not exist, it creates it and then opens it.
+    """
+
+    fts_index_path = PATH_CONFIG.fts_value_index_path(database_name=database_name)
+    if not FtsValueIndex.exists(fts_index_path):
+        make_db_fts_index(database_name)
+
+    return FtsValueIndex(fts_index_path)
+
+
+def load_db_value_index(database_name: str) -> Union[ValueIndex, FtsValueIndex]:
+    """
+    Opens the value index of the database built with the configured VALUE_INDEX_ENGINE.
+    """
+
+    if VALUE_INDEX_ENGINE == ValueIndexEngine.FTS5:
+        return load_db_fts_index(database_name)
+    return load_db_lsh(database_name)
+
+
+def query_lsh(
+    value_index: Union[ValueIndex, FtsValueIndex],
+    keyword: str,
+    top_n: int = 10,
+) -> Dict[str, List[str]]:
+    """
+    Queries the LSH for similar values to the given keyword and returns the top results.
+    """
+
+    # Query the LSH and rank the candidates by Jaccard similarity
+    results = value_index.query(keyword, top_n=top_n)
+    return _results_to_schema(value_index, results, {})
+
+
 def get_table_column_of_similar_values(
     keywords: list,
     top_n: int,
-    lsh: MinHashLSH,
-    minhashes:Dict[str, Tuple[MinHash, str, str, str]],
+    value_index: Union[ValueIndex, FtsValueIndex],
 ):
     """
-    Retrieves the table and column names of similar values to the given keyword.
+    Retrieves the table and column names of similar values to the given keywords.
+    All keywords are looked up and ranked against the value index in one batch.
+    Works with both the MinHash LSH and the FTS5 trigram value index.
     """
 
-    def process_keyword(keyword: str):
-        return query_lsh(lsh, minhashes, keyword, top_n=top_n)
-
     final_schema = {}
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        results = list(executor.map(process_keyword, keywords))
-
-    # Merge the individual schema dictionaries into one final schema
-    for schema in results:
-        for table, columns in schema.items():
-            if table not in final_schema:
-                final_schema[table] = []
-            for col in columns:
-                if col not in final_schema[table]:
-                    final_schema[table].append(col)
+    for results in value_index.batch_query(keywords, top_n=top_n):
+        _results_to_schema(value_index, results, final_schema)
 
     return final_schema
 
 
 def create_lsh_for_all_databases(dataset_dir: str = PATH_CONFIG.dataset_dir):
     """
-    Creates MinHash LSH for all databases using threads.
+    Creates the value index of the configured VALUE_INDEX_ENGINE for all databases using threads.
+    Each database reads its values and computes its MinHash signatures in its own process pools, which split
+    MAX_LSH_PROCESSES between the databases built concurrently so they do not oversubscribe the CPUs.
     """
 
     databases = [
@@ -338,9 +455,17 @@ def create_lsh_for_all_databases(dataset_dir: str = PATH_CONFIG.dataset_dir):
         if os.path.isdir(os.path.join(dataset_dir, d))
     ]
 
+    database_workers = max(1, min(MAX_LSH_DATABASE_WORKERS, len(databases)))
+    processes_per_database = max(1, MAX_LSH_PROCESSES // database_workers)
+
     with alive_bar(len(databases), bar = 'fish', spinner = 'fish2', title=f'Creating LSH and Minhashes Files') as bar: 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {executor.submit(make_db_lsh, db): db for db in databases}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=database_workers
+        ) as executor:
+            futures = {
+                executor.submit(make_db_value_index, db, processes_per_database): db
+                for db in databases
+            }
             for future in concurrent.futures.as_completed(futures):
                 bar()
                 try:
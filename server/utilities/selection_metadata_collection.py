@@ -4,8 +4,10 @@ from pathlib import Path
 
 import pandas as pd
 from utilities.config import PATH_CONFIG
+from utilities.execution_cache import execute_cached
+from utilities.gold_result_store import get_gold_result_store
 from utilities.logging_utils import setup_logger
-from utilities.utility_functions import execute_sql_timeout
+from utilities.sql_canonicalization import group_equivalent_candidates
 
 logger = setup_logger(__name__)
 
@@ -45,24 +47,27 @@ def save_df(data_dict: dict, file_path: Path) -> None:
     # Save to CSV
     df.to_csv(file_path, sep='\t', index=False)
 
-def compare_sql_result(gold_sql: str, candidate_sql: str, database: str, gold_res = None) -> tuple:
+def compare_sql_result(gold_sql: str, candidate_sql: str, database: str, gold_res = None, question_id = None) -> tuple:
     """
     Compare the results of the gold SQL query and the candidate SQL query.
+    The gold result is read from the gold result store when the question id is given, the queries
+    otherwise run through the execution cache. Results are compared by the hash of their row sets.
     """
 
     if gold_res is None:
-        try:
-            gold_res = execute_sql_timeout(database, sql_query=gold_sql)
-        except Exception as e:
-            logger.critical(f"Error in Gold SQL: {e}")
-
-    try:
-        res = execute_sql_timeout(database, candidate_sql)
-        if set(res) == set(gold_res):
-            return True, gold_res
-    except Exception as e:
-        logger.error(f"Error in Candidate SQL {e}")
-        
+        if question_id is not None:
+            gold_res = get_gold_result_store().outcome(question_id, database, gold_sql)
+        else:
+            gold_res = execute_cached(database, gold_sql)
+        if not gold_res.succeeded:
+            logger.critical(f"Error in Gold SQL: {gold_res.error}")
+
+    res = execute_cached(database, candidate_sql)
+    if not res.succeeded:
+        logger.error(f"Error in Candidate SQL {res.error}")
+    elif gold_res.succeeded and res.set_hash == gold_res.set_hash:
+        return True, gold_res
+
     return False, gold_res
 
 class SelectionMetadata:
@@ -84,8 +89,9 @@ class SelectionMetadata:
         change_database(self, database):
             Changes the database and reloads the metadata dictionaries for the new database.
 
-        update_selection_metadata(self, candidates, gold_sql, database, selected_config):
+        update_selection_metadata(self, candidates, gold_sql, database, selected_config, question_id):
             Updates the metadata based on the comparison of candidate SQL queries with the gold SQL query.
+            The gold result is read from the gold result store when the question id is given.
             This method is thread-safe.
 
         save_metadata(self):
@@ -106,7 +112,7 @@ class SelectionMetadata:
         self.config_sel_dict = get_dict(database, PATH_CONFIG.config_selected_file(), [i+1 for i in range(len(self.run_config))])
         self.correct_sel_dict = get_dict(database, PATH_CONFIG.correct_selected_file(), ['correct_selected', 'correct_generated'])
 
-    def update_selection_metadata(self, candidates: list, gold_sql: str, database: str, selected_config: int) -> None:
+    def update_selection_metadata(self, candidates: list, gold_sql: str, database: str, selected_config: int, question_id: int = None) -> None:
         with self.lock:
             if database != self.database_name:
                 self.load_metadata(database)
@@ -114,11 +120,13 @@ class SelectionMetadata:
             gold_res = None
             correct_gen = []
 
-            for  sql, id in candidates:
-                results_match, gold_res = compare_sql_result(gold_sql, sql, database, gold_res)
+            # Equivalent candidates are compared once and credited to every candidate id of their group
+            for group in group_equivalent_candidates(candidates):
+                results_match, gold_res = compare_sql_result(gold_sql, group.sql, database, gold_res, question_id)
                 if results_match:
-                    self.correct_gen_dict[database][str(id)]+=1
-                    correct_gen.append(id)
+                    for id in group.config_ids:
+                        self.correct_gen_dict[database][str(id)]+=1
+                        correct_gen.append(id)
 
             self.config_sel_dict[database][str(selected_config)]+=1
             if len(correct_gen) > 0:
@@ -0,0 +1,115 @@
+"""
+Canonical forms of SQL candidates for deduplication.
+
+Candidates generated by different configurations often differ only in formatting, keyword
+or identifier case, table alias names or a trailing semicolon. `canonicalize_sql` maps such
+variants to the same text: the query is parsed with sqlglot, unquoted identifiers are
+lower-cased (SQLite resolves them case-insensitively) and table and subquery aliases are
+renamed by order of appearance. Quoted identifiers and literals are kept as written, since
+SQLite reads a double-quoted name that is not a column as a string.
+
+`group_equivalent_candidates` collapses equivalent candidates so each distinct query is
+executed and shown to the selector once, and keeps the ids of all candidates of a group.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from utilities.execution_cache import normalize_sql
+
+# Constants
+CANONICAL_ALIAS_PREFIX = "t"
+
+
+@dataclass
+class CandidateGroup:
+    """
+    Equivalent candidates represented by the first of them.
+
+    Attributes:
+        sql (str): The query of the first candidate of the group.
+        canonical_sql (str): The canonical form shared by the candidates.
+        config_ids (List[Any]): Ids of the candidates of the group, in candidate order.
+    """
+
+    sql: str
+    canonical_sql: str
+    config_ids: List[Any] = field(default_factory=list)
+
+    @property
+    def config_id(self) -> Any:
+        """Return the id of the candidate representing the group."""
+        return self.config_ids[0]
+
+
+def _rename_aliases(expression: exp.Expression) -> None:
+    """Rename the table and subquery aliases of a statement to t1, t2, ... in place."""
+    sources = list(expression.find_all(exp.Table, exp.Subquery))
+    names = {source.name.lower() for source in sources if isinstance(source, exp.Table)}
+    names |= {cte.alias.lower() for cte in expression.find_all(exp.CTE)}
+
+    aliases: Dict[str, str] = {}
+    for source in sources:
+        if source.alias and source.alias not in aliases:
+            aliases[source.alias] = f"{CANONICAL_ALIAS_PREFIX}{len(aliases) + 1}"
+
+    # Keep the aliases if a canonical name is already taken by a table or CTE
+    if not aliases or names & set(aliases.values()):
+        return
+
+    for alias in expression.find_all(exp.TableAlias):
+        if alias.name in aliases:
+            alias.set("this", exp.to_identifier(aliases[alias.name]))
+    for column in expression.find_all(exp.Column):
+        if column.table in aliases:
+            column.set("table", exp.to_identifier(aliases[column.table]))
+
+
+def canonicalize_sql(sql: str) -> str:
+    """
+    Return the canonical form of a query.
+
+    Queries sqlglot cannot parse fall back to `normalize_sql`.
+
+    Args:
+        sql (str): The query.
+
+    Returns:
+        str: The canonical query.
+    """
+    try:
+        statements = [
+            statement for statement in sqlglot.parse(sql, read="sqlite") if statement is not None
+        ]
+    except SqlglotError:
+        return normalize_sql(sql)
+
+    for statement in statements:
+        for identifier in statement.find_all(exp.Identifier):
+            if not identifier.quoted:
+                identifier.set("this", identifier.name.lower())
+        _rename_aliases(statement)
+    return "; ".join(statement.sql(dialect="sqlite", comments=False) for statement in statements)
+
+
+def group_equivalent_candidates(sqls_with_config: Iterable[Tuple[str, Any]]) -> List[CandidateGroup]:
+    """
+    Collapse candidates with the same canonical query.
+
+    Args:
+        sqls_with_config (Iterable[Tuple[str, Any]]): Candidate queries with their ids.
+
+    Returns:
+        List[CandidateGroup]: One group per distinct canonical query, ordered by their first
+        candidate.
+    """
+    groups: Dict[str, CandidateGroup] = {}
+    for sql, config_id in sqls_with_config:
+        canonical_sql = canonicalize_sql(sql)
+        if canonical_sql not in groups:
+            groups[canonical_sql] = CandidateGroup(sql=sql, canonical_sql=canonical_sql)
+        groups[canonical_sql].config_ids.append(config_id)
+    return list(groups.values())
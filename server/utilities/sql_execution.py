@@ -0,0 +1,458 @@
+"""
+Cancellable execution of SQL queries within a per-query budget.
+
+Every query runs on the calling thread's pooled read-only connection. A SQLite progress
+handler checks the query's deadline and an optional cancellation event while the query
+runs, so a runaway query is interrupted inside SQLite instead of being left running in an
+abandoned thread. Rows are fetched in batches and the fetch stops as soon as the result
+exceeds the budget's row limit or its estimated memory limit. Callers that only need a
+summary of the result can consume the batches as they arrive instead of keeping the rows,
+or have the result fingerprinted inside SQLite with `summarize_query`.
+"""
+
+import pickle
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from utilities.config import (EXECUTION_MAX_MEMORY_MB, EXECUTION_MAX_ROWS,
+                              EXECUTION_TIMEOUT_SECONDS)
+from utilities.connections.sqlite import SQLITE_CONNECTION_POOL
+from utilities.constants.utilities.sql_execution.response_messages import (
+    ERROR_MEMORY_LIMIT_EXCEEDED, ERROR_QUERY_CANCELLED, ERROR_QUERY_TIMEOUT,
+    ERROR_ROW_LIMIT_EXCEEDED)
+from utilities.logging_utils import setup_logger
+from utilities.result_fingerprint import (RESULT_SUMMARY_FUNCTION,
+                                          ReservoirSample, ResultFingerprint,
+                                          ResultSummary)
+
+logger = setup_logger(__name__)
+
+# Constants
+BYTES_PER_MB = 1024 * 1024
+FETCH_BATCH_SIZE = 10000
+PREVIEW_ROWS = 10
+MULTIPLICITY_COLUMN = "result_summary_multiplicity"
+
+# SQLite names the duplicate columns of a subquery `name:1`, `name:2`, ...
+DUPLICATE_COLUMN_PATTERN = re.compile(r"^(.*):\d+$")
+
+# Number of SQLite virtual machine instructions between two deadline checks
+PROGRESS_HANDLER_INSTRUCTIONS = 1000
+
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a query is interrupted because it ran past its deadline."""
+
+
+class QueryCancelledError(RuntimeError):
+    """Raised when a query is interrupted through its cancellation event."""
+
+
+class QueryLimitError(RuntimeError):
+    """Raised when a query returns more rows or memory than its budget allows."""
+
+
+class _UnwrappableQueryError(Exception):
+    """Raised when a valid query cannot be summarized as a subquery inside SQLite."""
+
+
+def _within(limit: Optional[float], other: Optional[float]) -> bool:
+    """Return True if `limit` is not larger than `other`, None meaning unlimited."""
+    if limit is None:
+        return other is None
+    return other is None or limit <= other
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """
+    Resources a single query may use.
+
+    Attributes:
+        timeout (Optional[float]): Maximum execution time in seconds, None for no limit.
+        max_rows (Optional[int]): Maximum number of fetched rows, None for no limit.
+        max_memory_mb (Optional[float]): Maximum estimated size of the fetched rows in MB,
+            None for no limit.
+    """
+
+    timeout: Optional[float] = EXECUTION_TIMEOUT_SECONDS
+    max_rows: Optional[int] = EXECUTION_MAX_ROWS
+    max_memory_mb: Optional[float] = EXECUTION_MAX_MEMORY_MB
+
+    def within(self, other: "QueryBudget") -> bool:
+        """
+        Check whether this budget allows no more than another one on every limit.
+
+        A query that exceeded `other` would then exceed this budget as well.
+
+        Args:
+            other (QueryBudget): The budget to compare with.
+
+        Returns:
+            bool: True if no limit of this budget is larger than the one of `other`.
+        """
+        return (
+            _within(self.timeout, other.timeout)
+            and _within(self.max_rows, other.max_rows)
+            and _within(self.max_memory_mb, other.max_memory_mb)
+        )
+
+
+DEFAULT_BUDGET = QueryBudget()
+
+
+@dataclass
+class QueryResult:
+    """
+    Rows returned by a query.
+
+    Attributes:
+        rows (List[tuple]): The fetched rows, empty when they were streamed to a consumer.
+        columns (List[str]): Names of the result columns.
+        row_count (int): Number of fetched rows.
+        elapsed_seconds (float): Execution time of the query, fetching included.
+    """
+
+    rows: List[tuple] = field(default_factory=list)
+    columns: List[str] = field(default_factory=list)
+    row_count: int = 0
+    elapsed_seconds: float = 0.0
+
+
+@dataclass
+class QuerySummary:
+    """
+    Fingerprint and preview of a query result, computed without keeping its rows.
+
+    Attributes:
+        columns (List[str]): Names of the result columns.
+        row_count (int): Number of rows of the result.
+        multiset_hash (str): Order-insensitive hash of the rows counting duplicates.
+        set_hash (str): Order-insensitive hash of the distinct rows.
+        preview (List[tuple]): Uniformly sampled rows.
+        elapsed_seconds (float): Execution time of the query.
+        ordered_hash (Optional[str]): Hash of the rows in the order they were returned,
+            only computed for summaries requested with `ordered`.
+    """
+
+    columns: List[str] = field(default_factory=list)
+    row_count: int = 0
+    multiset_hash: str = ""
+    set_hash: str = ""
+    preview: List[tuple] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    ordered_hash: Optional[str] = None
+
+
+def _estimate_row_bytes(rows: List[tuple]) -> float:
+    """Estimate the average in-memory size of a row from a batch of rows."""
+    total = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in rows
+    )
+    return total / len(rows)
+
+
+def execute_query(
+    database_path: Path,
+    sql: str,
+    budget: QueryBudget = DEFAULT_BUDGET,
+    cancel_event: Optional[threading.Event] = None,
+    on_batch: Optional[Callable[[List[tuple]], None]] = None,
+) -> QueryResult:
+    """
+    Execute a query on the calling thread's pooled read-only connection within a budget.
+
+    The memory limit is enforced on the size of the rows kept so far, estimated from the
+    first batch. When `on_batch` is given the rows are handed to it batch by batch and not
+    kept, so only the row limit applies.
+
+    Args:
+        database_path (Path): Path to the SQLite database file.
+        sql (str): The query.
+        budget (QueryBudget): Deadline and result limits of the query.
+        cancel_event (Optional[threading.Event]): Interrupts the query once set, e.g. from
+            another thread.
+        on_batch (Optional[Callable[[List[tuple]], None]]): Consumes the fetched rows one
+            batch at a time.
+
+    Returns:
+        QueryResult: The rows and columns of the result.
+
+    Raises:
+        QueryTimeoutError: If the query ran past its deadline.
+        QueryCancelledError: If the cancellation event was set.
+        QueryLimitError: If the result exceeded the row or memory limit.
+        sqlite3.Error: If the query failed.
+    """
+    start = time.perf_counter()
+    max_bytes = None if budget.max_memory_mb is None else budget.max_memory_mb * BYTES_PER_MB
+
+    with SQLITE_CONNECTION_POOL.connect(database_path) as connection, _interruptible(
+        connection, budget, cancel_event, start
+    ):
+        cursor = connection.execute(sql)
+        columns = [description[0] for description in cursor.description or []]
+        rows = []
+        row_count = 0
+        row_bytes = None
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                break
+            row_count += len(batch)
+            if budget.max_rows is not None and row_count > budget.max_rows:
+                raise QueryLimitError(ERROR_ROW_LIMIT_EXCEEDED.format(max_rows=budget.max_rows))
+            if on_batch is not None:
+                on_batch(batch)
+                continue
+            rows.extend(batch)
+            if max_bytes is not None:
+                row_bytes = row_bytes or _estimate_row_bytes(batch)
+                if len(rows) * row_bytes > max_bytes:
+                    raise QueryLimitError(
+                        ERROR_MEMORY_LIMIT_EXCEEDED.format(max_memory_mb=budget.max_memory_mb)
+                    )
+
+    return QueryResult(
+        rows=rows,
+        columns=columns,
+        row_count=row_count,
+        elapsed_seconds=time.perf_counter() - start,
+    )
+
+
+def summarize_query(
+    database_path: Path,
+    sql: str,
+    budget: QueryBudget = DEFAULT_BUDGET,
+    cancel_event: Optional[threading.Event] = None,
+    preview_rows: int = PREVIEW_ROWS,
+    ordered: bool = False,
+) -> QuerySummary:
+    """
+    Fingerprint a query result and sample a preview without keeping its rows.
+
+    The query is first wrapped as a subquery and summarized inside SQLite by the
+    `result_summary` aggregate, so only the summary crosses into Python. Queries that
+    cannot be wrapped, e.g. several statements, PRAGMAs or results with more columns than
+    a SQLite function accepts, are executed as written instead and their rows are
+    fingerprinted batch by batch. Both ways give the same hashes. Grouping inside SQLite
+    loses the order of the rows, so `ordered` summaries are always fingerprinted from the
+    fetched rows.
+
+    Args:
+        database_path (Path): Path to the SQLite database file.
+        sql (str): The query.
+        budget (QueryBudget): Deadline and row limit of the query.
+        cancel_event (Optional[threading.Event]): Interrupts the query once set.
+        preview_rows (int): Number of rows sampled for the preview.
+        ordered (bool): Whether to also compute the order-sensitive hash of the result.
+
+    Returns:
+        QuerySummary: The summary of the result.
+
+    Raises:
+        QueryTimeoutError: If the query ran past its deadline.
+        QueryCancelledError: If the cancellation event was set.
+        QueryLimitError: If the result exceeded the row limit.
+        sqlite3.Error: If the query failed.
+    """
+    if ordered:
+        summary = _summarize_fetched_rows(database_path, sql, budget, cancel_event, preview_rows)
+    else:
+        try:
+            summary = _summarize_in_database(
+                database_path, sql, budget, cancel_event, preview_rows
+            )
+        except _UnwrappableQueryError as e:
+            logger.debug(f"Summarizing the fetched rows, the query could not be wrapped: {e}")
+            summary = _summarize_fetched_rows(
+                database_path, sql, budget, cancel_event, preview_rows
+            )
+
+    if budget.max_rows is not None and summary.row_count > budget.max_rows:
+        raise QueryLimitError(ERROR_ROW_LIMIT_EXCEEDED.format(max_rows=budget.max_rows))
+    return summary
+
+
+def time_query(
+    database_path: Path, sql: str, budget: QueryBudget = DEFAULT_BUDGET
+) -> float:
+    """
+    Time a query on the calling thread's pooled read-only connection.
+
+    Like the BIRD VES evaluation, the time is measured until the query yields its first row,
+    with a monotonic high-resolution clock. Repeated calls reuse the same warm connection.
+
+    Args:
+        database_path (Path): Path to the SQLite database file.
+        sql (str): The query.
+        budget (QueryBudget): Deadline of the query, its result limits do not apply.
+
+    Returns:
+        float: The execution time in seconds.
+
+    Raises:
+        QueryTimeoutError: If the query ran past its deadline.
+        sqlite3.Error: If the query failed.
+    """
+    with SQLITE_CONNECTION_POOL.connect(database_path) as connection, _interruptible(
+        connection, budget, None, time.perf_counter()
+    ):
+        start = time.perf_counter_ns()
+        cursor = connection.execute(sql)
+        elapsed = time.perf_counter_ns() - start
+        cursor.close()
+    return elapsed / 1e9
+
+
+@contextmanager
+def _interruptible(
+    connection: sqlite3.Connection,
+    budget: QueryBudget,
+    cancel_event: Optional[threading.Event],
+    start: float,
+) -> Iterator[None]:
+    """Interrupt the connection's queries past the deadline or once cancelled."""
+    deadline = None if budget.timeout is None else start + budget.timeout
+    interruptions = []
+
+    def check_interrupt() -> int:
+        if cancel_event is not None and cancel_event.is_set():
+            interruptions.append(QueryCancelledError(ERROR_QUERY_CANCELLED))
+            return 1
+        if deadline is not None and time.perf_counter() > deadline:
+            interruptions.append(
+                QueryTimeoutError(ERROR_QUERY_TIMEOUT.format(timeout=budget.timeout))
+            )
+            return 1
+        return 0
+
+    if deadline is not None or cancel_event is not None:
+        connection.set_progress_handler(check_interrupt, PROGRESS_HANDLER_INSTRUCTIONS)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if interruptions:
+            raise interruptions[0] from e
+        raise
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a column name for use in SQLite."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _compile(connection: sqlite3.Connection, sql: str) -> None:
+    """
+    Compile a statement without running it and raise its compilation error, if any.
+
+    Statements that cannot be compiled on their own, e.g. several statements at once, are
+    left to the caller.
+    """
+    try:
+        connection.execute(f"EXPLAIN {sql}").close()
+    except (sqlite3.ProgrammingError, sqlite3.Warning):
+        pass
+
+
+def _original_column_names(names: List[str]) -> List[str]:
+    """Undo the suffixes SQLite adds to the duplicate column names of a subquery."""
+    original = []
+    for name in names:
+        match = DUPLICATE_COLUMN_PATTERN.match(name)
+        original.append(match.group(1) if match and match.group(1) in original else name)
+    return original
+
+
+def _summarize_in_database(
+    database_path: Path,
+    sql: str,
+    budget: QueryBudget,
+    cancel_event: Optional[threading.Event],
+    preview_rows: int,
+) -> QuerySummary:
+    """
+    Summarize a query's distinct rows and their multiplicities with the SQLite aggregate.
+
+    The grouped rows are limited to one more than the row limit, so that SQLite stops reading
+    the query's rows once the result is known to exceed it. Only the preview is kept in Python,
+    so like the summaries of fetched rows the memory limit does not apply.
+
+    Both wrapped forms are compiled before anything runs. When they do not compile but the query
+    does on its own, `_UnwrappableQueryError` is raised so that the rows are fetched instead.
+    Errors of the query itself are raised as they are, so invalid queries do not run twice.
+    """
+    start = time.perf_counter()
+    subquery = sql.strip().rstrip(";")
+    limit = "" if budget.max_rows is None else f" LIMIT {int(budget.max_rows) + 1}"
+
+    with SQLITE_CONNECTION_POOL.connect(database_path) as connection, _interruptible(
+        connection, budget, cancel_event, start
+    ):
+        # The subquery ends on its own line so that a trailing comment cannot swallow it
+        try:
+            cursor = connection.execute(f"SELECT * FROM ({subquery}\n) LIMIT 0")
+        except sqlite3.Error as e:
+            # Raises the query's own error if it does not compile as written either
+            _compile(connection, sql)
+            raise _UnwrappableQueryError(str(e)) from e
+        names = [description[0] for description in cursor.description]
+        columns = ", ".join(_quote_identifier(name) for name in names)
+        grouping = ", ".join(f"{_quote_identifier(name)} COLLATE BINARY" for name in names)
+        summary_sql = (
+            f"SELECT {RESULT_SUMMARY_FUNCTION}({int(preview_rows)}, {MULTIPLICITY_COLUMN}, "
+            f"{columns}) FROM (SELECT {columns}, COUNT(*) AS {MULTIPLICITY_COLUMN} "
+            f"FROM (SELECT * FROM ({subquery}\n){limit}) GROUP BY {grouping})"
+        )
+        # E.g. results with more columns than the aggregate accepts, while the query is valid
+        try:
+            _compile(connection, summary_sql)
+        except sqlite3.Error as e:
+            raise _UnwrappableQueryError(str(e)) from e
+        (summary,) = connection.execute(summary_sql).fetchone()
+
+    # SQLite does not create the aggregate for an empty result and returns NULL
+    summary = pickle.loads(summary) if summary is not None else ResultSummary()
+    return QuerySummary(
+        columns=_original_column_names(names),
+        row_count=summary.row_count,
+        multiset_hash=summary.multiset_hash,
+        set_hash=summary.set_hash,
+        preview=summary.preview,
+        elapsed_seconds=time.perf_counter() - start,
+    )
+
+
+def _summarize_fetched_rows(
+    database_path: Path,
+    sql: str,
+    budget: QueryBudget,
+    cancel_event: Optional[threading.Event],
+    preview_rows: int,
+) -> QuerySummary:
+    """Summarize a query's rows in Python while they are fetched batch by batch."""
+    fingerprint = ResultFingerprint()
+    sample = ReservoirSample(preview_rows)
+
+    def consume(batch: List[tuple]) -> None:
+        fingerprint.update(batch)
+        sample.update(batch)
+
+    result = execute_query(database_path, sql, budget, cancel_event, on_batch=consume)
+    return QuerySummary(
+        columns=result.columns,
+        row_count=result.row_count,
+        multiset_hash=fingerprint.multiset_hash(),
+        set_hash=fingerprint.set_hash(),
+        preview=sample.rows,
+        elapsed_seconds=result.elapsed_seconds,
+        ordered_hash=fingerprint.ordered_hash(),
+    )
@@ -1,9 +1,6 @@
-import random
-import sqlite3
-
-from utilities.config import PATH_CONFIG
 from utilities.constants.prompts_enums import FormatType, RefinerPromptType
 from utilities.constants.services.chat_format import ChatRole
+from utilities.execution_cache import execute_cached
 from utilities.format_schema import format_schema
 from utilities.logging_utils import setup_logger
 from utilities.prompts.prompt_templates import (
@@ -12,13 +9,19 @@ from utilities.prompts.prompt_templates import (
     XIYAN_FIXER_PROMPT_INSTRUCTION_TEMPLATE,
     XIYAN_REFINER_PROMPT_INPUT_TEMPLATE,
     XIYAN_REFINER_PROMPT_INSTRUCTION_TEMPLATE)
-from utilities.utility_functions import (format_sql_response,
-                                         normalize_execution_results)
+from utilities.utility_functions import format_sql_response
 from utilities.vectorize import fetch_few_shots
 
 logger = setup_logger(__name__)
 
 
+def get_refiner_examples(shots, target_question, examples=None):
+    """Returns the precomputed few shots if available, otherwise fetches them from the vector store."""
+    if examples is not None:
+        return examples[:shots]
+    return fetch_few_shots(shots, target_question)
+
+
 def generate_refiner_prompt(
     pred_sql,
     results,
@@ -27,12 +30,13 @@ def generate_refiner_prompt(
     evidence,
     schema_used,
     refiner_prompt_type,
-    database_name
+    database_name,
+    examples=None,
 ):
 
     if refiner_prompt_type == RefinerPromptType.BASIC:
         formatted_schema = format_schema(FormatType.CODE, database_name, schema_used)
-        examples = fetch_few_shots(shots, target_question)
+        examples = get_refiner_examples(shots, target_question, examples)
         examples_text = "\n".join(
             f"/* Question: {example['question']} */\n/* Evidence: {example['evidence']} */\n{example['answer']}\n"
             for example in examples
@@ -83,11 +87,12 @@ def generate_refiner_chat(
     refiner_prompt_type,
     chat, 
     database_name,
+    examples=None,
 ):
     if refiner_prompt_type == RefinerPromptType.BASIC:
         formatted_schema = format_schema(FormatType.CODE, database_name, schema_used)
 
-        examples = fetch_few_shots(shots, target_question)
+        examples = get_refiner_examples(shots, target_question, examples)
         examples_text = "\n".join(
             f"/* Question: {example['question']} */\n/* Evidence: {example['evidence']} */\n{example['answer']}\n"
             for example in examples
@@ -141,43 +146,32 @@ def improve_sql_query(
     schema_used,
     evidence,
     refiner_prompt_type=RefinerPromptType.BASIC,
-    chat_mode=False
+    chat_mode=False,
+    examples=None,
 ):
-    """Attempts to improve the given SQL query by executing it and refining it using the improvement prompt."""
+    """
+    Attempts to improve the given SQL query by executing it and refining it using the improvement prompt.
+    Precomputed few shots can be passed as examples to skip the vector store lookup on every attempt.
+    """
 
     chat = []
 
-    connection = sqlite3.connect(PATH_CONFIG.sqlite_path(database_name=database_name))
     for idx in range(max_improve_sql_attempts):
         try:
-            # Try executing the query
-            try:
-                cursor = connection.cursor()
-                cursor.execute(sql)
-                res = cursor.fetchall()
-                if not isinstance(res, RuntimeError):
-                    if res and len(res) > 0:
-                        res = random.sample(res, min(10, len(res)))
-                        res = normalize_execution_results(res, fetchall=True)
-                        columns = [desc[0] for desc in cursor.description]
-
-                        markdown_table = "| " + " | ".join(columns) + " |\n"
-                        markdown_table += "| " + " | ".join(["---"] * len(columns)) + " |\n"
-
-                        for row in res:
-                            markdown_table += "| " + " | ".join(map(str, row)) + " |\n"
-                        res = markdown_table
-                    if idx > 0:
-                        break  # Successfully executed the query
-
-            except Exception as e:
-                logger.error(f"Error executing SQL: {e}")
-                res = str(e)
+            # Execute the query, reusing the outcome if it already ran in this process. Queries
+            # that do not compile are rejected from their plan and go straight to the fixer prompt
+            outcome = execute_cached(database_name, sql, preflight=True)
+            res = outcome.to_markdown()
+            if outcome.succeeded:
+                if idx > 0:
+                    break  # Successfully executed the query
+            else:
+                logger.error(f"Error executing SQL: {outcome.error}")
 
             # Generate and execute improvement prompt
             if chat_mode:
                 chat = generate_refiner_chat(
-                    sql, res, target_question, shots, evidence, schema_used, refiner_prompt_type, chat, database_name
+                    sql, res, target_question, shots, evidence, schema_used, refiner_prompt_type, chat, database_name, examples
                 )
                 improved_sql = client.execute_chat(chat=chat)
                 improved_sql = format_sql_response(improved_sql)
@@ -185,7 +179,7 @@ def improve_sql_query(
                 chat.append([ChatRole.MODEL, improved_sql])
             else:
                 prompt = generate_refiner_prompt(
-                    sql, res, target_question, shots, evidence, schema_used, refiner_prompt_type, database_name
+                    sql, res, target_question, shots, evidence, schema_used, refiner_prompt_type, database_name, examples
                 )
                 improved_sql = client.execute_prompt(prompt=prompt)
                 improved_sql = format_sql_response(improved_sql)
@@ -197,5 +191,4 @@ def improve_sql_query(
             logger.error(f"Unhandled exception: {e}")
             break
 
-    connection.close()
     return sql
@@ -0,0 +1,163 @@
+"""
+Pre-flight checks of candidate queries from their SQLite query plan.
+
+Before a refiner or selector candidate runs, `EXPLAIN QUERY PLAN` compiles it without
+executing it. Syntax and schema errors are found there in a fraction of a millisecond,
+and the plan shows the full scans the query will do. A full scan of a huge table, or a
+scan nested inside another loop over a table without a usable index, marks the query as
+expensive so that it runs within a tighter budget.
+"""
+
+import re
+import sqlite3
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from utilities.config import (PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS,
+                              PREFLIGHT_LARGE_TABLE_ROWS,
+                              PREFLIGHT_NESTED_SCAN_ROWS)
+from utilities.connections.sqlite import SQLITE_CONNECTION_POOL
+from utilities.constants.utilities.sql_preflight.response_messages import (
+    EXPENSIVE_FULL_SCAN, EXPENSIVE_NESTED_SCAN)
+from utilities.sql_execution import QueryBudget
+
+# Plan lines of a full scan, e.g. `SCAN t1`, `SCAN b USING COVERING INDEX bx` or
+# `SCAN TABLE schools AS s` in SQLite versions before 3.36
+SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+LOOP_PREFIXES = ("SCAN ", "SEARCH ")
+CORRELATED_PREFIX = "CORRELATED "
+
+
+@dataclass
+class PreflightResult:
+    """
+    Outcome of the pre-flight check of a query.
+
+    Attributes:
+        error (Optional[str]): Error message if the query does not compile.
+        expensive_scans (List[str]): Descriptions of the scans that make the query expensive.
+    """
+
+    error: Optional[str] = None
+    expensive_scans: List[str] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> bool:
+        """Return True if the query compiles."""
+        return self.error is None
+
+    @property
+    def expensive(self) -> bool:
+        """Return True if the plan has a full scan of a huge table or an unindexed nested scan."""
+        return bool(self.expensive_scans)
+
+    def budget(self, budget: QueryBudget) -> QueryBudget:
+        """
+        Return the budget to run the query with.
+
+        Args:
+            budget (QueryBudget): The budget requested for the query.
+
+        Returns:
+            QueryBudget: The requested budget, with its deadline capped at
+            `PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS` for expensive queries.
+        """
+        if not self.expensive:
+            return budget
+        if budget.timeout is not None and budget.timeout <= PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS:
+            return budget
+        return replace(budget, timeout=PREFLIGHT_EXPENSIVE_TIMEOUT_SECONDS)
+
+
+def _table_aliases(sql: str) -> Dict[str, str]:
+    """Map the aliases and names of the tables of a query to the table names, lower-cased."""
+    try:
+        tables = [
+            table
+            for statement in sqlglot.parse(sql, read="sqlite")
+            if statement is not None
+            for table in statement.find_all(exp.Table)
+        ]
+    except SqlglotError:
+        return {}
+    return {table.alias_or_name.lower(): table.name for table in tables if table.name}
+
+
+@lru_cache(maxsize=4096)
+def _estimate_table_rows(database_path: str, version: Tuple[int, int], table: str) -> int:
+    """
+    Estimate the number of rows of a table, cached per version of the database file.
+
+    The largest rowid is found with a single index lookup and is exact unless rows were
+    deleted. Tables without rowid are counted.
+    """
+    quoted = '"' + table.replace('"', '""') + '"'
+    with SQLITE_CONNECTION_POOL.connect(database_path) as connection:
+        try:
+            (rows,) = connection.execute(f"SELECT MAX(rowid) FROM {quoted}").fetchone()
+        except sqlite3.OperationalError:
+            (rows,) = connection.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()
+    return rows or 0
+
+
+def preflight_query(database_path: Path, sql: str) -> PreflightResult:
+    """
+    Compile a query with `EXPLAIN QUERY PLAN` and flag the plan if it is expensive.
+
+    A scan is nested when an earlier loop of the same plan level drives it, or when it
+    belongs to a correlated subquery, so the table is read once per row of the outer loop.
+
+    Args:
+        database_path (Path): Path to the SQLite database file.
+        sql (str): The query.
+
+    Returns:
+        PreflightResult: The compile error, or the expensive scans of the plan.
+    """
+    try:
+        with SQLITE_CONNECTION_POOL.connect(database_path) as connection:
+            plan = connection.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            tables = {
+                name.lower(): name
+                for (name,) in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+    except (sqlite3.Error, OSError) as e:
+        return PreflightResult(error=str(e))
+
+    aliases = _table_aliases(sql)
+    stat = Path(database_path).stat()
+    version = (stat.st_size, stat.st_mtime_ns)
+
+    expensive_scans = []
+    levels_with_loops = set()
+    correlated_levels = set()
+    for node, parent, _, detail in plan:
+        nested = parent in levels_with_loops or parent in correlated_levels
+        if detail.startswith(LOOP_PREFIXES):
+            levels_with_loops.add(parent)
+        if detail.startswith(CORRELATED_PREFIX) or parent in correlated_levels:
+            correlated_levels.add(node)
+
+        match = SCAN_PATTERN.match(detail)
+        if match is None:
+            continue
+        name = match.group(1).lower()
+        table = tables.get(aliases.get(name, name).lower())
+        if table is None:
+            # Scans of subqueries, CTEs and constant rows
+            continue
+
+        rows = _estimate_table_rows(str(Path(database_path).resolve()), version, table)
+        if rows >= PREFLIGHT_LARGE_TABLE_ROWS:
+            expensive_scans.append(EXPENSIVE_FULL_SCAN.format(table=table, rows=rows))
+        elif nested and rows >= PREFLIGHT_NESTED_SCAN_ROWS:
+            expensive_scans.append(EXPENSIVE_NESTED_SCAN.format(table=table, rows=rows))
+
+    return PreflightResult(expensive_scans=expensive_scans)
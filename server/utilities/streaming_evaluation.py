@@ -0,0 +1,243 @@
+"""
+Streaming evaluation of the predictions of a running dataset run.
+
+`StreamingEvaluator` tails the prediction log and hands every new prediction to a
+background pool of evaluation workers, the same workers the execution evaluation engine
+uses, which compare it against the gold result of its question from the gold result
+store. The accuracy of the predictions scored so far is available at any time, broken down
+by BIRD difficulty and by database, so that a run going badly can be stopped early instead
+of being evaluated once the whole dataset is predicted.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utilities.constants.evaluation_enums import ComparisonMode
+from utilities.constants.utilities.streaming_evaluation.response_messages import (
+    ERROR_STREAMING_EVALUATION_FAILED, INFO_STREAMING_EVALUATION_STARTED)
+from utilities.execution_evaluation import (DEFAULT_TIMEOUT_SECONDS,
+                                            EvaluationResult, EvaluationTask,
+                                            evaluate_task, gold_checksums,
+                                            initialize_worker)
+from utilities.logging_utils import setup_logger
+from utilities.prediction_log import LoggedPrediction, PredictionLogTail
+
+logger = setup_logger(__name__)
+
+# Constants
+DIFFICULTIES = ("simple", "moderate", "challenging")
+
+
+@dataclass
+class AccuracyTally:
+    """
+    Number of correct and scored predictions of a group of questions.
+
+    Attributes:
+        correct (int): Number of correct predictions.
+        total (int): Number of scored predictions.
+    """
+
+    correct: int = 0
+    total: int = 0
+
+    @property
+    def accuracy(self) -> float:
+        """Return the accuracy in percent, 0 if nothing was scored."""
+        return 100 * self.correct / self.total if self.total else 0.0
+
+    def add(self, correct: bool) -> None:
+        """Count a scored prediction."""
+        self.correct += int(correct)
+        self.total += 1
+
+
+@dataclass
+class LiveAccuracy:
+    """
+    Accuracy of the predictions scored so far.
+
+    Attributes:
+        overall (AccuracyTally): All scored predictions.
+        by_difficulty (Dict[str, AccuracyTally]): Scored predictions by BIRD difficulty.
+        by_database (Dict[str, AccuracyTally]): Scored predictions by database.
+    """
+
+    overall: AccuracyTally = field(default_factory=AccuracyTally)
+    by_difficulty: Dict[str, AccuracyTally] = field(default_factory=dict)
+    by_database: Dict[str, AccuracyTally] = field(default_factory=dict)
+
+    def add(self, prediction: LoggedPrediction, correct: bool) -> None:
+        """Count a scored prediction in its difficulty and database."""
+        self.overall.add(correct)
+        if prediction.difficulty is not None:
+            self.by_difficulty.setdefault(prediction.difficulty, AccuracyTally()).add(correct)
+        self.by_database.setdefault(prediction.database, AccuracyTally()).add(correct)
+
+    def report(self) -> str:
+        """
+        Format the accuracy like the BIRD evaluation, followed by one line per database.
+
+        Returns:
+            str: The report.
+        """
+        levels = [
+            self.by_difficulty.get(difficulty, AccuracyTally()) for difficulty in DIFFICULTIES
+        ] + [self.overall]
+        lines = [
+            "{:20} {:20} {:20} {:20} {:20}".format("", *DIFFICULTIES, "total"),
+            "{:20} {:<20} {:<20} {:<20} {:<20}".format("count", *(level.total for level in levels)),
+            "{:20} {:<20.2f} {:<20.2f} {:<20.2f} {:<20.2f}".format(
+                "accuracy", *(level.accuracy for level in levels)
+            ),
+            "",
+            "{:40} {:<20} {:<20}".format("database", "count", "accuracy"),
+        ]
+        for database, tally in sorted(self.by_database.items()):
+            lines.append("{:40} {:<20} {:<20.2f}".format(database, tally.total, tally.accuracy))
+        return "\n".join(lines)
+
+
+class StreamingEvaluator:
+    """
+    Scores the predictions appended to a prediction log in a background pool.
+
+    A question logged again is scored again and its latest prediction replaces the earlier
+    one in the accuracy. A prediction whose evaluation fails, for example because its
+    database is unknown, is logged and counted as incorrect.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        database_paths: Dict[str, Path],
+        mode: ComparisonMode = ComparisonMode.SET,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        num_workers: int = 1,
+        gold_store_path: Optional[Path] = None,
+    ):
+        """
+        Start the evaluation workers.
+
+        Args:
+            log_path (Path): The prediction log to tail.
+            database_paths (Dict[str, Path]): The database files by database name.
+            mode (ComparisonMode): How results are compared.
+            timeout (float): Deadline of each query in seconds.
+            num_workers (int): Number of worker processes.
+            gold_store_path (Optional[Path]): Gold result store to read the gold results from,
+                None to execute the gold queries.
+        """
+        self.tail = PredictionLogTail(log_path)
+        self._executor = ProcessPoolExecutor(
+            max_workers=max(1, num_workers),
+            initializer=initialize_worker,
+            initargs=(
+                database_paths,
+                mode,
+                timeout,
+                gold_store_path,
+                gold_checksums(gold_store_path, database_paths, database_paths),
+            ),
+        )
+        self._pending: Dict[Future, Tuple[int, LoggedPrediction]] = {}
+        self._latest: Dict[int, int] = {}
+        self._scored: Dict[int, Tuple[LoggedPrediction, EvaluationResult]] = {}
+        self._sequence = 0
+        logger.info(
+            INFO_STREAMING_EVALUATION_STARTED.format(
+                log_path=log_path, workers=max(1, num_workers), databases=len(database_paths)
+            )
+        )
+
+    @property
+    def pending(self) -> int:
+        """Return the number of predictions submitted but not scored yet."""
+        return len(self._pending)
+
+    def poll(self) -> int:
+        """
+        Submit the predictions appended to the log since the last poll.
+
+        Returns:
+            int: The number of submitted predictions.
+        """
+        predictions = self.tail.read_new()
+        for prediction in predictions:
+            self._sequence += 1
+            self._latest[prediction.question_id] = self._sequence
+            task = EvaluationTask(
+                index=prediction.question_id,
+                database=prediction.database,
+                predicted_sql=prediction.predicted_sql,
+                gold_sql=prediction.gold_sql,
+                question_id=prediction.question_id,
+            )
+            future = self._executor.submit(evaluate_task, task)
+            self._pending[future] = (self._sequence, prediction)
+        return len(predictions)
+
+    def collect(self, timeout: Optional[float] = 0) -> int:
+        """
+        Record the predictions scored since the last collection.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a first scored prediction, None to
+                wait for all submitted predictions.
+
+        Returns:
+            int: The number of recorded predictions.
+        """
+        if not self._pending:
+            return 0
+        if timeout is None:
+            done, _ = wait(list(self._pending))
+        else:
+            done, _ = wait(list(self._pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            sequence, prediction = self._pending.pop(future)
+            # A prediction replaced while it was being scored is dropped
+            if self._latest[prediction.question_id] == sequence:
+                self._scored[prediction.question_id] = (prediction, self._result(future, prediction))
+        return len(done)
+
+    def _result(self, future: Future, prediction: LoggedPrediction) -> EvaluationResult:
+        """Return the result of a scored prediction, an incorrect one if its evaluation failed."""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(
+                ERROR_STREAMING_EVALUATION_FAILED.format(
+                    question_id=prediction.question_id, database=prediction.database, error=e
+                )
+            )
+            return EvaluationResult(
+                index=prediction.question_id,
+                database=prediction.database,
+                correct=False,
+                predicted_error=str(e),
+            )
+
+    def accuracy(self) -> LiveAccuracy:
+        """
+        Return the accuracy of the latest scored prediction of every question.
+
+        Returns:
+            LiveAccuracy: The overall accuracy and its breakdowns.
+        """
+        accuracy = LiveAccuracy()
+        for prediction, result in self._scored.values():
+            accuracy.add(prediction, result.correct)
+        return accuracy
+
+    def results(self) -> List[EvaluationResult]:
+        """Return the results of the latest scored prediction of every question."""
+        return [result for _, result in self._scored.values()]
+
+    def close(self) -> None:
+        """Stop the evaluation workers, dropping predictions not scored yet."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pending.clear()
@@ -1,4 +1,3 @@
-import concurrent.futures
 import datetime
 import decimal
 import re
@@ -9,6 +8,7 @@ from typing import Dict, List, Union
 from nltk import pos_tag, word_tokenize
 from nltk.corpus import wordnet
 from utilities.config import PATH_CONFIG
+from utilities.connections.sqlite import SQLITE_CONNECTION_POOL
 from utilities.constants.response_messages import (
     ERROR_DATABASE_QUERY_FAILURE, ERROR_FAILED_FECTHING_PRIMARY_KEYS,
     ERROR_FAILED_FETCH_COLUMN_NAMES, ERROR_FAILED_FETCH_COLUMN_TYPES,
@@ -17,6 +17,7 @@ from utilities.constants.response_messages import (
     ERROR_SQL_MASKING_FAILED, ERROR_SQL_QUERY_REQUIRED,
     ERROR_SQLITE_EXECUTION_ERROR)
 from utilities.constants.services.llm_enums import LLMConfig
+from utilities.sql_execution import QueryBudget, execute_query
 
 SQL_GET_TABLE_DDL = (
     'SELECT sql FROM sqlite_master WHERE type="table" AND name="{table_name}"'
@@ -54,34 +55,23 @@ def execute_sql_query(connection: sqlite3.Connection, sql_query: str):
 
 def execute_sql_timeout(database, sql_query: str, timeout=30):
     """
-    Executes a SQL query and returns the results as a list of dictionaries.
-    Times out if the query takes longer than the specified timeout.
+    Executes a SQL query through the SQL execution service and returns the rows.
+    The query is interrupted and a TimeoutError raised if it takes longer than the specified timeout.
+    All of its rows are returned, the row and memory limits of the service do not apply.
     """
     if not sql_query:
         raise ValueError(ERROR_SQL_QUERY_REQUIRED)
 
-    def run_query():
-        try:
-            connection = sqlite3.connect(
-                PATH_CONFIG.sqlite_path(database_name=database), timeout=timeout
-            )  # Set SQLite connection timeout
-            cursor = connection.cursor()
-            cursor.execute(sql_query)
-            res = cursor.fetchall()
-            return res
-        except Exception as e:
-            raise RuntimeError(
-                ERROR_DATABASE_QUERY_FAILURE.format(error=str(e)))
-        finally:
-            cursor.close()
-            connection.close()
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(run_query)
-        try:
-            return future.result(timeout=timeout)
-        except concurrent.futures.TimeoutError:
-            raise TimeoutError(f"Query execution exceeded {timeout} seconds")
+    try:
+        return execute_query(
+            PATH_CONFIG.sqlite_path(database_name=database),
+            sql_query,
+            QueryBudget(timeout=timeout, max_rows=None, max_memory_mb=None),
+        ).rows
+    except TimeoutError:
+        raise
+    except Exception as e:
+        raise RuntimeError(ERROR_DATABASE_QUERY_FAILURE.format(error=str(e)))
 
 
 def get_table_names(connection: sqlite3.Connection):
@@ -112,18 +102,13 @@ def get_table_columns(connection: sqlite3.Connection, table_name: str):
 
 
 def get_array_of_table_and_column_name(database_path: str):
-    try:
-        connection = sqlite3.connect(database_path)
-        connection.row_factory = sqlite3.Row
-
+    with SQLITE_CONNECTION_POOL.connect(database_path, row_factory=sqlite3.Row) as connection:
         table_names = get_table_names(connection)
         column_names = []
         for table_name in table_names:
             column_names.extend(get_table_columns(connection, table_name))
 
         return table_names + column_names
-    finally:
-        connection.close()
 
 
 def prune_code(ddl, columns, connection, table):
@@ -432,8 +417,7 @@ def get_schema_dict(database_path: str) -> Dict[str, List[str]]:
     """
 
     try:
-        with sqlite3.connect(database_path) as connection:
-            connection.row_factory = sqlite3.Row
+        with SQLITE_CONNECTION_POOL.connect(database_path, row_factory=sqlite3.Row) as connection:
             table_names = get_table_names(connection)
             schema = {
                 table_name: get_table_columns(connection, table_name)
@@ -0,0 +1,469 @@
+"""
+In-process exact k-nearest-neighbour index over a memory-mapped embedding matrix.
+
+The sample question collection and the per-database column description collections are
+small enough that a brute force cosine search over a NumPy matrix beats ChromaDB's HNSW
+index and its SQLite persistence layer. `NumpyVectorIndex` mirrors the parts of the
+ChromaDB collection API used by `utilities.vectorize` (`add`, `upsert`, `get`, `delete`,
+`count` and `query`) and returns results in the same shape, so it can be swapped in as a
+retrieval backend.
+
+An index is stored in its own directory as an `embeddings.npy` matrix of L2-normalised
+vectors, opened with `mmap_mode="r"`, and a `records.json` file holding ids, documents
+and metadatas.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from utilities.constants.utilities.vector_index.response_messages import (
+    ERROR_EMBEDDING_DIMENSION_MISMATCH, ERROR_INDEX_LENGTH_MISMATCH,
+    ERROR_QUERY_INPUT_REQUIRED, ERROR_UNSUPPORTED_WHERE_OPERATOR)
+
+# Constants
+EMBEDDINGS_FILE_NAME = "embeddings.npy"
+RECORDS_FILE_NAME = "records.json"
+RECORDS_FILE_ENCODING = "utf-8"
+QUERY_ROW_CHUNK_SIZE = 65536
+
+IDS_KEY = "ids"
+DOCUMENTS_KEY = "documents"
+METADATAS_KEY = "metadatas"
+EMBEDDINGS_KEY = "embeddings"
+DISTANCES_KEY = "distances"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalise each row of a matrix so dot products become cosine similarities.
+
+    Args:
+        vectors (np.ndarray): Matrix of shape (n, d).
+
+    Returns:
+        np.ndarray: float32 matrix of normalised rows. Zero rows are left as zeros.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorIndex:
+    """
+    Exact cosine similarity search with a ChromaDB-compatible query interface.
+
+    Attributes:
+        name (str): Name of the index, mirroring the ChromaDB collection name.
+        index_dir (Path): Directory holding the embeddings matrix and records.
+        embedding_function (Callable): Function used to embed documents and query texts.
+        dtype (np.dtype): Storage dtype of the embedding matrix (float32 or float16).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        index_dir: Path,
+        embedding_function: Callable[[List[str]], List[np.ndarray]],
+        dtype: np.dtype = np.float32,
+    ):
+        """
+        Open the index stored in `index_dir`, or start an empty one if nothing is stored.
+
+        Args:
+            name (str): Name of the index.
+            index_dir (Path): Directory holding the index files.
+            embedding_function (Callable): Function used to embed documents and query texts.
+            dtype (np.dtype): Storage dtype of the embedding matrix.
+        """
+        self.name = name
+        self.index_dir = Path(index_dir)
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._field_values: Dict[str, np.ndarray] = {}
+
+        if self.exists(self.index_dir):
+            self._load()
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        """
+        Check whether an index has been persisted in the given directory.
+
+        Args:
+            index_dir (Path): Directory to check.
+
+        Returns:
+            bool: True if both the embeddings and records files exist.
+        """
+        index_dir = Path(index_dir)
+        return (index_dir / EMBEDDINGS_FILE_NAME).exists() and (
+            index_dir / RECORDS_FILE_NAME
+        ).exists()
+
+    def count(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self._ids)
+
+    def add(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: Optional[Sequence[np.ndarray]] = None,
+    ) -> None:
+        """
+        Append documents to the index and persist it.
+
+        Args:
+            documents (List[str]): Documents to index.
+            metadatas (List[Dict[str, Any]]): One metadata dictionary per document.
+            ids (List[str]): One id per document.
+            embeddings (Optional[Sequence[np.ndarray]]): Precomputed embeddings. The
+                documents are embedded with the index's embedding function if omitted.
+
+        Raises:
+            ValueError: If the argument lengths or embedding dimensions do not match.
+        """
+        vectors = self._prepare_vectors(documents, metadatas, ids, embeddings)
+        if vectors is None:
+            return
+
+        with self._lock:
+            self._check_dimension(vectors)
+            matrix = (
+                vectors
+                if self._matrix is None
+                else np.vstack([np.asarray(self._matrix, dtype=np.float32), vectors])
+            )
+            self._save(
+                matrix,
+                self._ids + list(ids),
+                self._documents + list(documents),
+                self._metadatas + list(metadatas),
+            )
+            self._load()
+
+    def upsert(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: Optional[Sequence[np.ndarray]] = None,
+    ) -> None:
+        """
+        Insert documents, replacing the stored rows of ids that are already indexed.
+
+        Args:
+            documents (List[str]): Documents to index.
+            metadatas (List[Dict[str, Any]]): One metadata dictionary per document.
+            ids (List[str]): One id per document.
+            embeddings (Optional[Sequence[np.ndarray]]): Precomputed embeddings. The
+                documents are embedded with the index's embedding function if omitted.
+
+        Raises:
+            ValueError: If the argument lengths or embedding dimensions do not match.
+        """
+        vectors = self._prepare_vectors(documents, metadatas, ids, embeddings)
+        if vectors is None:
+            return
+
+        with self._lock:
+            self._check_dimension(vectors)
+            matrix = (
+                np.empty((0, vectors.shape[1]), dtype=np.float32)
+                if self._matrix is None
+                else np.array(self._matrix, dtype=np.float32)
+            )
+            stored_ids = list(self._ids)
+            stored_documents = list(self._documents)
+            stored_metadatas = list(self._metadatas)
+            positions = {id_: row for row, id_ in enumerate(stored_ids)}
+
+            appended = []
+            for vector, document, metadata, id_ in zip(vectors, documents, metadatas, ids):
+                row = positions.get(id_)
+                if row is None:
+                    positions[id_] = len(stored_ids)
+                    stored_ids.append(id_)
+                    stored_documents.append(document)
+                    stored_metadatas.append(metadata)
+                    appended.append(vector)
+                else:
+                    matrix[row] = vector
+                    stored_documents[row] = document
+                    stored_metadatas[row] = metadata
+
+            if appended:
+                matrix = np.vstack([matrix, np.vstack(appended)])
+            self._save(matrix, stored_ids, stored_documents, stored_metadatas)
+            self._load()
+
+    def get(
+        self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None
+    ) -> Dict[str, List[Any]]:
+        """
+        Return stored records, ChromaDB style.
+
+        Args:
+            ids (Optional[List[str]]): Ids to return. All records are returned if omitted.
+            include (Optional[List[str]]): Fields to return besides the ids, any of
+                `documents`, `metadatas` and `embeddings`. Documents and metadatas are
+                returned if omitted.
+
+        Returns:
+            Dict[str, List[Any]]: The `ids` and requested fields of the matching records.
+        """
+        if include is None:
+            include = [DOCUMENTS_KEY, METADATAS_KEY]
+
+        if ids is None:
+            rows = range(len(self._ids))
+        else:
+            positions = {id_: row for row, id_ in enumerate(self._ids)}
+            rows = [positions[id_] for id_ in ids if id_ in positions]
+
+        result = {IDS_KEY: [self._ids[row] for row in rows]}
+        if DOCUMENTS_KEY in include:
+            result[DOCUMENTS_KEY] = [self._documents[row] for row in rows]
+        if METADATAS_KEY in include:
+            result[METADATAS_KEY] = [self._metadatas[row] for row in rows]
+        if EMBEDDINGS_KEY in include:
+            matrix = self._matrix
+            result[EMBEDDINGS_KEY] = [np.asarray(matrix[row], dtype=np.float32) for row in rows]
+        return result
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove the given ids from the index and persist it.
+
+        Args:
+            ids (List[str]): Ids to remove. Unknown ids are ignored.
+        """
+        removed = set(ids)
+        with self._lock:
+            keep = [row for row, id_ in enumerate(self._ids) if id_ not in removed]
+            if self._matrix is None or len(keep) == len(self._ids):
+                return
+
+            self._save(
+                np.asarray(self._matrix, dtype=np.float32)[keep],
+                [self._ids[row] for row in keep],
+                [self._documents[row] for row in keep],
+                [self._metadatas[row] for row in keep],
+            )
+            self._load()
+
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[Sequence[np.ndarray]] = None,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Return the `n_results` nearest documents for every query, ChromaDB style.
+
+        Args:
+            query_texts (Optional[List[str]]): Texts to embed and search for.
+            query_embeddings (Optional[Sequence[np.ndarray]]): Precomputed query embeddings.
+            n_results (int): Number of neighbours to return per query.
+            where (Optional[Dict[str, Any]]): ChromaDB style metadata filter, supporting
+                equality, `$eq`, `$ne`, `$in`, `$nin`, `$and` and `$or`.
+
+        Returns:
+            Dict[str, List[List[Any]]]: `ids`, `documents`, `metadatas` and cosine
+            `distances`, each holding one list per query ordered by increasing distance.
+
+        Raises:
+            ValueError: If neither query texts nor query embeddings are given.
+        """
+        if query_embeddings is None:
+            if query_texts is None:
+                raise ValueError(ERROR_QUERY_INPUT_REQUIRED)
+            query_embeddings = self.embedding_function(list(query_texts))
+
+        queries = normalize_rows(np.vstack(query_embeddings))
+        results = {IDS_KEY: [], DOCUMENTS_KEY: [], METADATAS_KEY: [], DISTANCES_KEY: []}
+
+        matrix = self._matrix
+        if matrix is None or n_results <= 0:
+            for key in results:
+                results[key] = [[] for _ in range(len(queries))]
+            return results
+
+        similarities = self._similarities(matrix, queries)
+        if where:
+            similarities[:, ~self._where_mask(where)] = -np.inf
+
+        k = min(n_results, similarities.shape[1])
+        top_indices = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        for row, candidates in enumerate(top_indices):
+            candidate_scores = similarities[row, candidates]
+            order = candidates[np.argsort(-candidate_scores, kind="stable")]
+            order = order[np.isfinite(similarities[row, order])]
+
+            results[IDS_KEY].append([self._ids[i] for i in order])
+            results[DOCUMENTS_KEY].append([self._documents[i] for i in order])
+            results[METADATAS_KEY].append([self._metadatas[i] for i in order])
+            results[DISTANCES_KEY].append(
+                [float(1.0 - similarities[row, i]) for i in order]
+            )
+
+        return results
+
+    def _prepare_vectors(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: Optional[Sequence[np.ndarray]],
+    ) -> Optional[np.ndarray]:
+        """Validate a write and return its normalised embeddings, or None if there is nothing to write."""
+        if not (len(documents) == len(metadatas) == len(ids)):
+            raise ValueError(ERROR_INDEX_LENGTH_MISMATCH)
+        if not documents:
+            return None
+
+        if embeddings is None:
+            embeddings = self.embedding_function(list(documents))
+        return normalize_rows(np.vstack(embeddings))
+
+    def _check_dimension(self, vectors: np.ndarray) -> None:
+        """Raise if the vectors do not match the dimension of the stored embeddings."""
+        if self._matrix is not None and self._matrix.shape[1] != vectors.shape[1]:
+            raise ValueError(
+                ERROR_EMBEDDING_DIMENSION_MISMATCH.format(
+                    expected=self._matrix.shape[1], received=vectors.shape[1]
+                )
+            )
+
+    def _similarities(self, matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Compute cosine similarities of every query against every row, chunk by chunk."""
+        similarities = np.empty((queries.shape[0], matrix.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], QUERY_ROW_CHUNK_SIZE):
+            chunk = np.asarray(
+                matrix[start : start + QUERY_ROW_CHUNK_SIZE], dtype=np.float32
+            )
+            similarities[:, start : start + chunk.shape[0]] = queries @ chunk.T
+        return similarities
+
+    def _where_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a ChromaDB style metadata filter into a boolean row mask."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub_condition in condition:
+                    mask &= self._where_mask(sub_condition)
+                continue
+            if key == "$or":
+                any_mask = np.zeros(len(self._ids), dtype=bool)
+                for sub_condition in condition:
+                    any_mask |= self._where_mask(sub_condition)
+                mask &= any_mask
+                continue
+
+            values = self._metadata_field(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+
+            for operator, operand in condition.items():
+                if operator == "$eq":
+                    mask &= values == operand
+                elif operator == "$ne":
+                    mask &= values != operand
+                elif operator == "$in":
+                    mask &= np.isin(values, list(operand))
+                elif operator == "$nin":
+                    mask &= ~np.isin(values, list(operand))
+                else:
+                    raise ValueError(
+                        ERROR_UNSUPPORTED_WHERE_OPERATOR.format(operator=operator)
+                    )
+        return mask
+
+    def _metadata_field(self, key: str) -> np.ndarray:
+        """Return (and memoise) an object array with one metadata value per row."""
+        if key not in self._field_values:
+            values = np.empty(len(self._metadatas), dtype=object)
+            values[:] = [metadata.get(key) for metadata in self._metadatas]
+            self._field_values[key] = values
+        return self._field_values[key]
+
+    def _save(
+        self,
+        matrix: np.ndarray,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> None:
+        """Atomically write the embeddings matrix and records to the index directory."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        embeddings_path = self.index_dir / EMBEDDINGS_FILE_NAME
+        temp_embeddings_path = self.index_dir / f"{EMBEDDINGS_FILE_NAME}.tmp"
+        with open(temp_embeddings_path, "wb") as file:
+            np.save(file, np.asarray(matrix, dtype=self.dtype))
+
+        records_path = self.index_dir / RECORDS_FILE_NAME
+        temp_records_path = self.index_dir / f"{RECORDS_FILE_NAME}.tmp"
+        temp_records_path.write_text(
+            json.dumps({IDS_KEY: ids, DOCUMENTS_KEY: documents, METADATAS_KEY: metadatas}),
+            encoding=RECORDS_FILE_ENCODING,
+        )
+
+        os.replace(temp_embeddings_path, embeddings_path)
+        os.replace(temp_records_path, records_path)
+
+    def _load(self) -> None:
+        """Memory-map the embeddings matrix and read the records."""
+        records = json.loads(
+            (self.index_dir / RECORDS_FILE_NAME).read_text(encoding=RECORDS_FILE_ENCODING)
+        )
+        self._matrix = np.load(self.index_dir / EMBEDDINGS_FILE_NAME, mmap_mode="r")
+        self.dtype = self._matrix.dtype
+        self._ids = records[IDS_KEY]
+        self._documents = records[DOCUMENTS_KEY]
+        self._metadatas = records[METADATAS_KEY]
+        self._field_values = {}
+
+
+_open_indexes: Dict[Path, NumpyVectorIndex] = {}
+_open_indexes_lock = threading.Lock()
+
+
+def open_vector_index(
+    name: str,
+    index_dir: Path,
+    embedding_function: Callable[[List[str]], List[np.ndarray]],
+) -> NumpyVectorIndex:
+    """
+    Return the process-wide instance of the index stored in `index_dir`.
+
+    The records file is only parsed once per process, later calls reuse the open index.
+
+    Args:
+        name (str): Name of the index.
+        index_dir (Path): Directory holding the index files.
+        embedding_function (Callable): Function used to embed documents and query texts.
+
+    Returns:
+        NumpyVectorIndex: The open index, possibly empty if nothing has been stored yet.
+    """
+    index_dir = Path(index_dir)
+    with _open_indexes_lock:
+        index = _open_indexes.get(index_dir)
+        if index is None or (index.count() == 0 and NumpyVectorIndex.exists(index_dir)):
+            index = NumpyVectorIndex(name, index_dir, embedding_function)
+            _open_indexes[index_dir] = index
+        return index
@@ -1,30 +1,249 @@
+import hashlib
 import json
 import os
 import sqlite3
-import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import pandas as pd
 from chromadb.errors import InvalidCollectionException
-from utilities.config import PATH_CONFIG, ChromadbClient
+from tqdm import tqdm
+from utilities.config import PATH_CONFIG, RETRIEVAL_BACKEND, ChromadbClient
+from utilities.constants.retrieval_enums import RetrievalBackend
+from utilities.embedding_cache import get_embedding_function
 from utilities.logging_utils import setup_logger
 from utilities.utility_functions import get_table_names
+from utilities.vector_index import NumpyVectorIndex, open_vector_index
 
 logger = setup_logger(__name__)
 
+# Number of documents embedded and upserted together while building a collection
+VECTORIZE_CHUNK_SIZE = 256
 
-def vectorize_data(documents, metadatas, ids, collection_name, space="cosine"):
+# Number of chunks embedded in parallel while building a collection
+MAX_VECTORIZE_WORKERS = 4
+
+# A NumPy index rewrites its whole matrix on every write, so embedded chunks are buffered
+# until they reach this fraction of the stored documents, which keeps a build linear, or
+# until this many seconds have passed since the last write, which bounds the lost progress
+VECTORIZE_CHECKPOINT_GROWTH = 0.5
+VECTORIZE_CHECKPOINT_SECONDS = 60
+
+# Collections already synced with their source documents in this process, and one lock per
+# collection name so that building one collection does not block requests for the others
+_synced_collections = {}
+_sync_locks = {}
+_synced_collections_lock = threading.Lock()
+
+
+def make_document_id(document, metadata):
+    """
+    Returns a deterministic id derived from the document and its metadata, so a rebuild
+    recognises documents that are already present in the collection
+    """
+    payload = json.dumps(
+        {"document": document, "metadata": metadata}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_existing_collection(collection_name):
+    """
+    Returns the collection with the given name from the configured retrieval backend,
+    or None if it has not been built yet
+    """
+    if RETRIEVAL_BACKEND == RetrievalBackend.NUMPY:
+        index_dir = PATH_CONFIG.vector_index_dir(collection_name)
+        if not NumpyVectorIndex.exists(index_dir):
+            return None
+        return open_vector_index(collection_name, index_dir, get_embedding_function())
+
+    try:
+        return ChromadbClient.CHROMADB_CLIENT.get_collection(
+            name=collection_name, embedding_function=get_embedding_function()
+        )
+    except InvalidCollectionException:
+        return None
+
+
+def get_or_create_collection(collection_name, space="cosine"):
+    """
+    Returns the collection with the given name from the configured retrieval backend,
+    creating an empty one if it does not exist
+    """
+    if RETRIEVAL_BACKEND == RetrievalBackend.NUMPY:
+        # Exact search is always cosine, the space only matters for Chroma's HNSW index
+        return open_vector_index(
+            collection_name,
+            PATH_CONFIG.vector_index_dir(collection_name),
+            get_embedding_function(),
+        )
+
+    return ChromadbClient.CHROMADB_CLIENT.get_or_create_collection(
+        name=collection_name,
+        metadata={"hnsw:space": space},
+        embedding_function=get_embedding_function(),
+    )
+
+
+def vectorize_data(
+    documents, metadatas, ids, collection_name, space="cosine", remove_stale=True
+):
+    """
+    Vectorizes the documents and syncs them into the collection.
+    Documents whose ids are already present are skipped, the rest are embedded in parallel
+    chunks and upserted as they complete so an interrupted build keeps its progress. A NumPy
+    index receives the chunks in checkpoints that grow with the index instead.
+    Ids that are no longer among the documents are removed if remove_stale is set. Documents
+    stored under ids that are not derived from their content, such as the random ids of
+    older builds, keep their embeddings and move to their content-derived ids.
+    """
+    collection = get_or_create_collection(collection_name, space=space)
+    existing_ids = set(collection.get(include=[])["ids"])
+
+    # Index the pending documents by id, which also drops duplicates
+    pending = {}
+    for index, id_ in enumerate(ids):
+        if id_ not in existing_ids and id_ not in pending:
+            pending[id_] = index
+
+    unknown_ids = existing_ids.difference(ids)
+    migrated_ids = migrate_document_ids(
+        collection, unknown_ids, pending, documents, metadatas, ids
+    )
+    existing_ids.difference_update(migrated_ids)
+
+    stale_ids = unknown_ids.difference(migrated_ids) if remove_stale else set()
+    if stale_ids:
+        collection.delete(ids=list(stale_ids))
+
+    logger.info(
+        f"Syncing collection {collection_name}: {len(existing_ids) - len(stale_ids)} documents "
+        f"up to date, {len(migrated_ids)} moved to content ids, {len(pending)} to add, "
+        f"{len(stale_ids)} removed"
+    )
+    if not pending:
+        return collection
+
+    pending_indices = list(pending.values())
+    chunks = [
+        pending_indices[start : start + VECTORIZE_CHUNK_SIZE]
+        for start in range(0, len(pending_indices), VECTORIZE_CHUNK_SIZE)
+    ]
+    embedding_function = get_embedding_function()
+    buffer_chunks = isinstance(collection, NumpyVectorIndex)
+    stored_count = collection.count()
+    last_checkpoint = time.monotonic()
+    buffered_indices, buffered_embeddings = [], []
+
+    with ThreadPoolExecutor(max_workers=MAX_VECTORIZE_WORKERS) as executor:
+        futures = {
+            executor.submit(embedding_function, [documents[i] for i in chunk]): chunk
+            for chunk in chunks
+        }
+        try:
+            for future in tqdm(
+                as_completed(futures), total=len(futures), desc=f"Vectorizing {collection_name}"
+            ):
+                buffered_embeddings.extend(future.result())
+                buffered_indices.extend(futures[future])
+                if (
+                    buffer_chunks
+                    and len(buffered_indices) < VECTORIZE_CHECKPOINT_GROWTH * stored_count
+                    and time.monotonic() - last_checkpoint < VECTORIZE_CHECKPOINT_SECONDS
+                ):
+                    continue
+
+                upsert_embedded(
+                    collection, buffered_indices, buffered_embeddings, documents, metadatas, ids
+                )
+                stored_count += len(buffered_indices)
+                last_checkpoint = time.monotonic()
+                buffered_indices, buffered_embeddings = [], []
+        finally:
+            # Keep the chunks embedded before a failure
+            upsert_embedded(
+                collection, buffered_indices, buffered_embeddings, documents, metadatas, ids
+            )
+
+    return collection
+
+
+def migrate_document_ids(collection, candidate_ids, pending, documents, metadatas, ids):
     """
-    Vectorizes the documents and adds them to the collection
+    Moves the stored documents among candidate_ids whose content-derived id is pending to that
+    id with their stored embedding, removing them from pending, and returns the moved old ids
     """
-    chroma_client = ChromadbClient.CHROMADB_CLIENT
-    
-    logger.info(f"Creating collection {collection_name}")
-    collection = chroma_client.create_collection(
-        name=collection_name, metadata={"hnsw:space": space}
+    candidate_ids = list(candidate_ids)
+    moved_ids, indices, embeddings = [], [], []
+    for start in range(0, len(candidate_ids), VECTORIZE_CHUNK_SIZE):
+        stored = collection.get(
+            ids=candidate_ids[start : start + VECTORIZE_CHUNK_SIZE],
+            include=["documents", "metadatas", "embeddings"],
+        )
+        for old_id, document, metadata, embedding in zip(
+            stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]
+        ):
+            index = pending.pop(make_document_id(document, metadata), None)
+            if index is not None:
+                moved_ids.append(old_id)
+                indices.append(index)
+                embeddings.append(embedding)
+
+    if moved_ids:
+        upsert_embedded(collection, indices, embeddings, documents, metadatas, ids)
+        collection.delete(ids=moved_ids)
+    return moved_ids
+
+
+def upsert_embedded(collection, indices, embeddings, documents, metadatas, ids):
+    """
+    Upserts the documents at the given indices with their precomputed embeddings
+    """
+    if not indices:
+        return
+    collection.upsert(
+        documents=[documents[i] for i in indices],
+        metadatas=[metadatas[i] for i in indices],
+        ids=[ids[i] for i in indices],
+        embeddings=embeddings,
     )
 
-    logger.info(f"Adding {len(documents)} documents to collection {collection_name}")
-    collection.add(documents=documents, metadatas=metadatas, ids=ids)
+
+def sync_collection(collection_name, load_documents):
+    """
+    Returns the collection, syncing it with the documents returned by load_documents the
+    first time it is requested in this process. An already built collection is used as is
+    if its source documents are not available. Only requests for the same collection wait
+    for its sync
+    """
+    with _synced_collections_lock:
+        collection = _synced_collections.get(collection_name)
+        if collection is not None:
+            return collection
+        sync_lock = _sync_locks.setdefault(collection_name, threading.Lock())
+
+    with sync_lock:
+        with _synced_collections_lock:
+            collection = _synced_collections.get(collection_name)
+        if collection is not None:
+            return collection
+
+        try:
+            documents, metadatas, ids = load_documents()
+        except FileNotFoundError:
+            collection = get_existing_collection(collection_name)
+            if collection is None:
+                raise
+        else:
+            collection = vectorize_data(
+                documents, metadatas, ids, collection_name, space="cosine"
+            )
+
+        with _synced_collections_lock:
+            _synced_collections[collection_name] = collection
+        return collection
 
 
 def get_sample_questions(sample_questions_path):
@@ -45,7 +264,10 @@ def get_sample_questions(sample_questions_path):
         }
         for item in data
     ]
-    ids = [str(uuid.uuid4()) for _ in data]
+    ids = [
+        make_document_id(document, metadata)
+        for document, metadata in zip(documents, metadatas)
+    ]
 
     return documents, metadatas, ids
 
@@ -55,7 +277,6 @@ def make_samples_collection():
     Creates vector database of sample questions
     """
 
-    chroma_client = ChromadbClient.CHROMADB_CLIENT
     collection_name = ""
 
     # Check if collection already exists
@@ -66,24 +287,11 @@ def make_samples_collection():
         database_name = PATH_CONFIG.database_name
         collection_name = f"{database_name}_unmasked_data_samples"
 
-    try:
-        # Check if collection already exists
-        collection = chroma_client.get_collection(name=collection_name)
-
-    except InvalidCollectionException:
-        documents, metadatas, ids = get_sample_questions(
-            PATH_CONFIG.processed_train_path()
-        )
-        vectorize_data(
-            documents,
-            metadatas,
-            ids,
-            collection_name,
-            space="cosine",
-        )
-        collection = chroma_client.get_collection(name=collection_name)
-
-    return collection
+    # Only documents that are not in the collection yet are embedded
+    return sync_collection(
+        collection_name,
+        lambda: get_sample_questions(PATH_CONFIG.processed_train_path()),
+    )
 
 
 def get_database_schema(sqlite_database_path, database_description_dir):
@@ -104,77 +312,80 @@ def get_database_schema(sqlite_database_path, database_description_dir):
                 os.path.join(database_description_dir, table_csv)
             )
             for _, row in table_column_df.iterrows():
-                documents.append(row["improved_column_description"])
-                metadatas.append(
-                    {"table": table_name, "name": row["original_column_name"]}
-                )
-                ids.append(str(uuid.uuid4()))
+                document = row["improved_column_description"]
+                metadata = {"table": table_name, "name": row["original_column_name"]}
+                documents.append(document)
+                metadatas.append(metadata)
+                ids.append(make_document_id(document, metadata))
 
     connection.close()
     return documents, metadatas, ids
 
 
-def fetch_few_shots(few_shot_count: int, query: str):
+def fetch_few_shots(few_shot_count: int, query: str, where: dict = None):
     """
-    Fetches similar sample quries for the given query
+    Fetches similar sample quries for the given query, optionally restricted by a
+    metadata filter such as {"db_id": "california_schools"}
     """
-    few_shots_results = []
+    return fetch_few_shots_batch(few_shot_count, [query], where=where)[0]
+
+
+def fetch_few_shots_batch(few_shot_count: int, queries: list, where: dict = None):
+    """
+    Fetches similar sample queries for every given query with a single batched lookup,
+    returning one list of few shots per query in input order
+    """
+    if not queries:
+        return []
 
     # Initialize ChromaDB Collection
     collection = make_samples_collection()
 
-    # Query the collection
-    results = collection.query(query_texts=[query], n_results=few_shot_count + 1)
-
-    for index, item in enumerate(results["metadatas"][0]):
-        if not results["documents"][0][index] == query:
-            few_shots_results.append(
-                {
-                    "question": results["documents"][0][index],
-                    "answer": item["query"],
-                    "question_id": item["question_id"],
-                    "db_id": item["db_id"],
-                    "distance": results["distances"][0][index],
-                    "schema_used": item["schema_used"],
-                    "evidence": item["evidence"],
-                }
-            )
+    # Query the collection with cached embeddings so repeated questions skip the model
+    query_embeddings = get_embedding_function().embed_texts(list(queries))
+    results = collection.query(
+        query_embeddings=query_embeddings, n_results=few_shot_count + 1, where=where
+    )
+
+    batch_results = []
+    for query_index, query in enumerate(queries):
+        few_shots_results = []
+        documents = results["documents"][query_index]
+        distances = results["distances"][query_index]
+
+        for index, item in enumerate(results["metadatas"][query_index]):
+            if not documents[index] == query:
+                few_shots_results.append(
+                    {
+                        "question": documents[index],
+                        "answer": item["query"],
+                        "question_id": item["question_id"],
+                        "db_id": item["db_id"],
+                        "distance": distances[index],
+                        "schema_used": item["schema_used"],
+                        "evidence": item["evidence"],
+                    }
+                )
+
+        batch_results.append(few_shots_results[:few_shot_count])
 
-    return few_shots_results[:few_shot_count]
+    return batch_results
 
 
 def make_column_description_collection():
     """
     Creates vector database of column descriptions of the current database
     """
-    chroma_client = ChromadbClient.CHROMADB_CLIENT
     database_name = PATH_CONFIG.database_name
 
-    try:
-        # Check if collection already exists
-        collection = chroma_client.get_collection(
-            name=f"{database_name}_column_descriptions"
-        )
-
-    except InvalidCollectionException:
-        documents, metadatas, ids = get_database_schema(
+    # Only descriptions that are new or changed are embedded
+    return sync_collection(
+        f"{database_name}_column_descriptions",
+        lambda: get_database_schema(
             PATH_CONFIG.sqlite_path(database_name=database_name),
             PATH_CONFIG.description_dir(database_name=database_name),
-        )
-
-        # Vectorize the data
-        vectorize_data(
-            documents,
-            metadatas,
-            ids,
-            f"{database_name}_column_descriptions",
-            space="cosine",
-        )
-        collection = chroma_client.get_collection(
-            name=f"{database_name}_column_descriptions"
-        )
-
-    return collection
+        ),
+    )
 
 
 def fetch_similar_columns(
@@ -194,11 +405,17 @@ def fetch_similar_columns(
     # Initialize ChromaDB Collection
     collection = make_column_description_collection()
 
-    # Query the collection
-    for keyword in keywords:
-        result = collection.query(query_texts=[keyword], n_results=n_results + 1)
+    if not keywords:
+        return schema
+
+    # Query the collection once for all keywords, recurring keywords come from the cache
+    query_embeddings = get_embedding_function().embed_texts(list(keywords))
+    result = collection.query(
+        query_embeddings=query_embeddings, n_results=n_results + 1
+    )
 
-        for item in result["metadatas"][0]:
+    for keyword_metadatas in result["metadatas"]:
+        for item in keyword_metadatas:
             if item["table"] not in schema:
                 schema[item["table"]] = []
             schema[item["table"]].append(item["name"])